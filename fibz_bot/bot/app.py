@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from fibz_bot.bot.warmup import WarmupStatus, run_warmup
+from fibz_bot.config import settings
+from fibz_bot.memory.archive import ArchiveJob
+from fibz_bot.memory.reembed import ReembedJob
+from fibz_bot.memory.retention import RetentionJob
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+if TYPE_CHECKING:  # pragma: no cover - imported for type checking only
+    from fibz_bot.llm.agent import Agent
+    from fibz_bot.llm.router import ModelRouter
+    from fibz_bot.memory.store import MemoryStore
+
+T = TypeVar("T")
+
+log = get_logger(__name__)
+
+
+def _default_router() -> ModelRouter:
+    from fibz_bot.llm.router import ModelRouter
+
+    return ModelRouter()
+
+
+def _default_memory(router: ModelRouter) -> MemoryStore:
+    from fibz_bot.memory.store import MemoryStore
+
+    return MemoryStore(router)
+
+
+def _default_agent(router: ModelRouter) -> Agent:
+    from fibz_bot.llm.agent import Agent
+
+    return Agent(router)
+
+
+class App:
+    """Container for the bot's heavy dependencies, built on first use.
+
+    Nothing is constructed at import time. ``start()`` builds everything on a
+    worker thread (so the gateway keeps processing events), and handlers
+    ``await wait_ready()`` before touching ``router``/``memory``/``agent``.
+    Accessing a property directly still works and builds it synchronously.
+    """
+
+    def __init__(
+        self,
+        *,
+        router_factory: Callable[[], Any] = _default_router,
+        memory_factory: Callable[[Any], Any] = _default_memory,
+        agent_factory: Callable[[Any], Any] = _default_agent,
+    ) -> None:
+        self._router_factory = router_factory
+        self._memory_factory = memory_factory
+        self._agent_factory = agent_factory
+        self._lock = threading.RLock()
+        self._router: Any = None
+        self._memory: Any = None
+        self._agent: Any = None
+        self._task: asyncio.Task[None] | None = None
+        self._ready = threading.Event()
+        self.created_at = time.perf_counter()
+        self.ready_after: float | None = None
+        self.timings: dict[str, float] = {}
+        self.error: BaseException | None = None
+        self.warmup = WarmupStatus()
+        self._warmup_task: asyncio.Task[None] | None = None
+        self.retention = RetentionJob()
+        self.archiver = ArchiveJob()
+        self._retention_task: asyncio.Task[None] | None = None
+        self.reembedder = ReembedJob()
+        self._reembed_task: asyncio.Task[None] | None = None
+
+    def _build(self, name: str, factory: Callable[[], T]) -> T:
+        started = time.perf_counter()
+        value = factory()
+        self.timings[name] = round(time.perf_counter() - started, 3)
+        return value
+
+    @property
+    def router(self) -> ModelRouter:
+        with self._lock:
+            if self._router is None:
+                self._router = self._build("router", self._router_factory)
+            return self._router
+
+    @property
+    def memory(self) -> MemoryStore:
+        with self._lock:
+            if self._memory is None:
+                router = self.router
+                self._memory = self._build("memory", lambda: self._memory_factory(router))
+            return self._memory
+
+    @property
+    def agent(self) -> Agent:
+        with self._lock:
+            if self._agent is None:
+                router = self.router
+                self._agent = self._build("agent", lambda: self._agent_factory(router))
+            return self._agent
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def initialize(self) -> None:
+        """Build every dependency (blocking) and wire module-level consumers."""
+
+        from fibz_bot.policy.consent import configure_consent
+
+        with self._lock:
+            if self._ready.is_set():
+                return
+            router, memory, _ = self.router, self.memory, self.agent
+            configure_consent(memory, router)
+            self.ready_after = round(time.perf_counter() - self.created_at, 3)
+            self._ready.set()
+        metrics.inc("app.ready")
+        log.info(
+            "app_ready",
+            extra={"extra_fields": {"ready_after": self.ready_after, "timings": self.timings}},
+        )
+
+    def start(self) -> asyncio.Task[None]:
+        """Begin background initialization; safe to call repeatedly."""
+
+        if self._task is None or (self._task.done() and self.error is not None):
+            self.error = None
+            self._task = asyncio.get_running_loop().create_task(self._run_initialize())
+        return self._task
+
+    async def _run_initialize(self) -> None:
+        try:
+            await asyncio.to_thread(self.initialize)
+        except Exception as exc:
+            self.error = exc
+            log.error(
+                "app_init_failed",
+                extra={"extra_fields": {"error": exc.__class__.__name__, "detail": str(exc)[:200]}},
+            )
+
+    async def wait_ready(self, timeout: float | None = None) -> bool:
+        """Wait for initialization; False on timeout, re-raises init errors."""
+
+        if self.ready:
+            return True
+        task = self.start()
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        if self.error is not None:
+            raise self.error
+        return self.ready
+
+    def start_warmup(self, guild_ids: list[str]) -> asyncio.Task[None]:
+        """Schedule the warm-up once dependencies are ready; runs at most once."""
+
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.get_running_loop().create_task(self._run_warmup(guild_ids))
+        return self._warmup_task
+
+    async def _run_warmup(self, guild_ids: list[str]) -> None:
+        try:
+            if not await self.wait_ready():
+                return
+            await asyncio.to_thread(run_warmup, self.router, self.memory, guild_ids, self.warmup)
+        except Exception as exc:
+            self.warmup.state = "failed"
+            log.error("warmup_failed", extra={"extra_fields": {"error": exc.__class__.__name__}})
+
+    def start_retention(self, guild_ids: Callable[[], list[str]]) -> asyncio.Task[None]:
+        """Run archival (if enabled) then retention every RETENTION_INTERVAL_SECONDS once ready."""
+
+        if self._retention_task is None:
+            self._retention_task = asyncio.get_running_loop().create_task(
+                self._run_retention(guild_ids)
+            )
+        return self._retention_task
+
+    async def _run_retention(self, guild_ids: Callable[[], list[str]]) -> None:
+        if not await self.wait_ready():
+            return
+        if self._warmup_task is not None:
+            # Let the warm-up finish first; both walk the messages collection
+            await asyncio.wait([self._warmup_task])
+        while True:
+            # Archive before expiring so old windows are summarized rather than dropped
+            if settings.ARCHIVE_ENABLED:
+                try:
+                    await asyncio.to_thread(self.archiver.run_once, self.memory, self.router)
+                except Exception as exc:
+                    log.error(
+                        "archive_failed", extra={"extra_fields": {"error": exc.__class__.__name__}}
+                    )
+            if settings.RETENTION_ENABLED:
+                try:
+                    await asyncio.to_thread(self.retention.run_once, self.memory, guild_ids())
+                except Exception as exc:
+                    log.error(
+                        "retention_failed",
+                        extra={"extra_fields": {"error": exc.__class__.__name__}},
+                    )
+            await asyncio.sleep(settings.RETENTION_INTERVAL_SECONDS)
+
+    def start_reembed(self) -> asyncio.Task[None]:
+        """Re-embed into shadow collections if the embedding settings changed (opt-in)."""
+
+        if self._reembed_task is None:
+            self._reembed_task = asyncio.get_running_loop().create_task(self._run_reembed())
+        return self._reembed_task
+
+    async def _run_reembed(self) -> None:
+        if not settings.EMBED_MIGRATION_ENABLED or not await self.wait_ready():
+            return
+        if self._warmup_task is not None:
+            await asyncio.wait([self._warmup_task])
+        try:
+            if ReembedJob.needed(self.memory):
+                await asyncio.to_thread(self.reembedder.run, self.memory)
+        except Exception as exc:
+            log.error("reembed_failed", extra={"extra_fields": {"error": exc.__class__.__name__}})
+
+
+def create_app(**factories: Any) -> App:
+    return App(**factories)
+
+
+__all__ = ["App", "create_app"]
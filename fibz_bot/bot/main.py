@@ -1,37 +1,40 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import re
+import time
+from collections import deque
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
+from fibz_bot.bot.app import create_app
 from fibz_bot.config import settings
 from fibz_bot.ingest.attachments import cleanup_temp, make_parts_from_attachments
+from fibz_bot.ingest.audio import AUDIO_EXTENSIONS, parse_audio
 from fibz_bot.ingest.files import parse_docx, parse_pptx, parse_text
-from fibz_bot.ingest.images import parse_image
-from fibz_bot.llm.agent import Agent
-from fibz_bot.llm.router import ModelRouter
+from fibz_bot.ingest.images import IMAGE_EXTENSIONS, parse_image, prefetch_ocr
+from fibz_bot.llm.context import assemble_context, gather_candidates
 from fibz_bot.llm.revision import run_entity_revision_pass
-from fibz_bot.memory.store import MemoryStore, MessageMeta
+from fibz_bot.memory.retention import channel_overrides, get_policy, set_policy
+from fibz_bot.memory.snapshot import export_snapshot
+from fibz_bot.memory.store import MessageMeta
+from fibz_bot.policy.consent import classify_share_request, ensure_consent
 from fibz_bot.policy.injector import make_policy_text
-from fibz_bot.policy.consent import classify_share_request, ensure_consent, configure_consent
 from fibz_bot.storage.gcs import sign_url
+from fibz_bot.utils.deadline import Deadline, DeadlineExceeded, run_blocking
 from fibz_bot.utils.logging import get_logger
 from fibz_bot.utils.metrics import metrics, record_command
 from fibz_bot.utils.overflow import prepare_overflow_text
 
-import time
-import datetime as _dt
-from collections import deque
-import re
-
 # --- de-dupe cache for message IDs ---
 _PROCESSED_MSGS = set()
 _PROCESSED_ORDER = deque(maxlen=2048)
 
+
 def _mark_processed(message_id: int) -> bool:
     """Return True if already processed; else mark and return False."""
     if message_id in _PROCESSED_MSGS:
@@ -44,33 +47,34 @@ def _mark_processed(message_id: int) -> bool:
             _PROCESSED_MSGS.discard(old)
     return False
 
-def _iso_to_dt(s: str) -> _dt.datetime:
-    try:
-        return _dt.datetime.fromisoformat(s.replace("Z", "+00:00"))
-    except Exception:
-        return _dt.datetime.min
 
-def build_recent_dialogue(memory, guild_id: str, channel_id: str, user_id: str, max_user: int = 5, max_bot: int = 5) -> str:
+def build_recent_dialogue(
+    memory, guild_id: str, channel_id: str, user_id: str, max_user: int = 5, max_bot: int = 5
+) -> str:
     """Compact transcript of recent turns (newest last)."""
-    user_msgs = memory.list_messages(where={"guild_id": guild_id, "channel_id": channel_id, "user_id": user_id}, limit=200)
-    bot_msgs  = memory.list_messages(where={"guild_id": guild_id, "channel_id": channel_id, "role": "assistant"}, limit=200)
+    base = {"guild_id": guild_id, "channel_id": channel_id}
+    user_msgs = memory.recent_messages(where={**base, "user_id": user_id}, limit=max_user)
+    bot_msgs = memory.recent_messages(where={**base, "role": "assistant"}, limit=max_bot)
 
     def norm(items):
         out = []
-        for i in items.get("items", []):
-            meta = i.get("meta") or i.get("metadata") or {}
-            created = meta.get("created_at") or meta.get("createdAt") or ""
-            dt = _iso_to_dt(created if isinstance(created, str) else str(created))
-            out.append({
-                "when": dt,
-                "role": meta.get("role") or ("assistant" if meta.get("user_id") == str(bot.user.id if bot.user else 0) else "user"),
-                "text": i.get("text") or i.get("document") or i.get("content") or "",
-            })
+        for i in items:
+            meta = i.get("meta") or {}
+            out.append(
+                {
+                    "when": meta.get("created_at_ms") or 0,
+                    "role": meta.get("role")
+                    or (
+                        "assistant"
+                        if meta.get("user_id") == str(bot.user.id if bot.user else 0)
+                        else "user"
+                    ),
+                    "text": i.get("text") or "",
+                }
+            )
         return out
 
-    u = sorted(norm(user_msgs), key=lambda x: x["when"])[-max_user:]
-    b = sorted(norm(bot_msgs),  key=lambda x: x["when"])[-max_bot:]
-    merged = sorted(u + b, key=lambda x: x["when"])
+    merged = sorted(norm(user_msgs) + norm(bot_msgs), key=lambda x: x["when"])
 
     lines = ["### RECENT DIALOGUE (newest last)"]
     for m in merged:
@@ -84,7 +88,6 @@ def norm(items):
     return "\n".join(lines) if len(lines) > 1 else ""
 
 
-
 log = get_logger(__name__)
 
 INTENTS = discord.Intents.default()
@@ -94,27 +97,59 @@ def norm(items):
 INTENTS.members = True
 
 bot = commands.Bot(command_prefix="!", intents=INTENTS)
-router = ModelRouter()
-memory = MemoryStore(router)
-agent = Agent(router)
-configure_consent(memory, router)
+# Router/memory/agent are built lazily on a background task once the gateway connects
+app = create_app()
 
 DEFAULT_CORE = "You are Fibz, a helpful, privacy-aware assistant for this server. Follow safety, consent, and server rules."
+TIMEOUT_REPLY = "Sorry, that took too long and I stopped working on it. Please try again."
+STARTING_REPLY = "Fibz is still starting up. Please try again in a few seconds."
+# Interactions must be answered within 3s, so quick commands only wait this long for init
+READY_WAIT_SECONDS = 2.0
+PURGE_PROGRESS_INTERVAL = 3.0
+
+
+def _log_deadline_exceeded(deadline: Deadline, exc: DeadlineExceeded) -> None:
+    metrics.inc("deadline.exceeded")
+    log.warning(
+        "turn_deadline_exceeded",
+        extra={
+            "extra_fields": {"turn": deadline.name, "stage": exc.stage, "cancelled": exc.cancelled}
+        },
+    )
 
 
 def get_core_user_server(guild_id: str | None, user_id: str | None):
-    core = memory.get_persona_core() or DEFAULT_CORE
-    user = memory.get_persona_user(str(user_id or "")) if user_id else ""
-    server = memory.get_persona_server(str(guild_id or "")) if guild_id else ""
+    core = app.memory.get_persona_core() or DEFAULT_CORE
+    user = app.memory.get_persona_user(str(user_id or "")) if user_id else ""
+    server = app.memory.get_persona_server(str(guild_id or "")) if guild_id else ""
     return core, user, server
 
 
+def _is_admin(interaction: discord.Interaction) -> bool:
+    user = interaction.user
+    return isinstance(user, discord.Member) and user.guild_permissions.administrator
+
+
 def is_owner(user: discord.abc.User) -> bool:
     try:
         return str(user.id) == str(settings.FIBZ_OWNER_ID)
     except Exception:
         return False
 
+
+async def _require_ready(
+    interaction: discord.Interaction, timeout: float = READY_WAIT_SECONDS
+) -> bool:
+    """Wait briefly for background init; tell the user if it isn't done yet."""
+    if await app.wait_ready(timeout=timeout):
+        return True
+    if interaction.response.is_done():
+        await interaction.followup.send(STARTING_REPLY, ephemeral=True)
+    else:
+        await interaction.response.send_message(STARTING_REPLY, ephemeral=True)
+    return False
+
+
 @bot.tree.command(description="Owner: sync slash commands")
 async def sync(interaction: discord.Interaction):
     if str(interaction.user.id) != settings.FIBZ_OWNER_ID:
@@ -125,6 +160,11 @@ async def sync(interaction: discord.Interaction):
 
 @bot.event
 async def on_ready():
+    app.start()
+    # Warm-up runs in the background; early events are handled as soon as app is ready
+    app.start_warmup([str(g.id) for g in bot.guilds])
+    app.start_retention(lambda: [str(g.id) for g in bot.guilds])
+    app.start_reembed()
     try:
         await bot.tree.sync()
         log.info("bot_ready", extra={"extra_fields": {"status": "synced", "user": str(bot.user)}})
@@ -136,10 +176,19 @@ async def on_ready():
 @bot.tree.command(description="Show system status (counts & health).")
 async def status(interaction: discord.Interaction):
     record_command("status")
-    counts = memory.counts()
     snap = metrics.snapshot()
+    if not app.ready:
+        return await interaction.response.send_message(
+            "**Fibz status**\nStarting up (dependencies initializing) | "
+            f"Warm-up: {app.warmup.summary()}\nUptime: {snap['uptime_seconds']}s",
+            ephemeral=True,
+        )
+    counts = app.memory.counts()
     await interaction.response.send_message(
-        f"**Fibz status**\nMessages: {counts['messages']} | SelfContext: {counts['self_context']} | Entities: {counts['entities']} | Archives: {counts['archives']}\nUptime: {snap['uptime_seconds']}s",
+        f"**Fibz status**\nMessages: {counts['messages']} | SelfContext: {counts['self_context']}"
+        f" | Entities: {counts['entities']} | Archives: {counts['archives']}\n"
+        f"Uptime: {snap['uptime_seconds']}s | Ready after: {app.ready_after}s"
+        f" | Warm-up: {app.warmup.summary()}",
         ephemeral=True,
     )
 
@@ -160,7 +209,9 @@ async def metrics_cmd(interaction: discord.Interaction):
 @app_commands.describe(text="Your instruction text")
 async def persona_set(interaction: discord.Interaction, text: str):
     record_command("persona_set")
-    memory.set_persona_user(str(interaction.user.id), text)
+    if not await _require_ready(interaction):
+        return
+    app.memory.set_persona_user(str(interaction.user.id), text)
     await interaction.response.send_message("Your persona has been saved ✅", ephemeral=True)
 
 
@@ -170,7 +221,9 @@ async def persona_server(interaction: discord.Interaction, text: str):
     record_command("persona_server")
     if not interaction.user.guild_permissions.administrator:
         return await interaction.response.send_message("Admin only.", ephemeral=True)
-    memory.set_persona_server(str(interaction.guild_id), text)
+    if not await _require_ready(interaction):
+        return
+    app.memory.set_persona_server(str(interaction.guild_id), text)
     await interaction.response.send_message("Server persona updated ✅", ephemeral=True)
 
 
@@ -180,7 +233,9 @@ async def persona_core(interaction: discord.Interaction, text: str):
     record_command("persona_core")
     if not is_owner(interaction.user):
         return await interaction.response.send_message("Owner only.", ephemeral=True)
-    memory.set_persona_core(text)
+    if not await _require_ready(interaction):
+        return
+    app.memory.set_persona_core(text)
     await interaction.response.send_message("Core persona updated ✅", ephemeral=True)
 
 
@@ -192,12 +247,56 @@ async def crosschannel(interaction: discord.Interaction, enabled: bool):
     record_command("crosschannel")
     if not interaction.user.guild_permissions.administrator:
         return await interaction.response.send_message("Admin only.", ephemeral=True)
-    memory.set_cross_channel(str(interaction.guild_id), enabled)
+    if not await _require_ready(interaction):
+        return
+    app.memory.set_cross_channel(str(interaction.guild_id), enabled)
     await interaction.response.send_message(
         f"Cross-channel sharing set to **{enabled}**", ephemeral=True
     )
 
 
+@bot.tree.command(description="Show or extend the consent classifier's term lists (admin only).")
+@app_commands.describe(
+    action="show | add | remove",
+    category="sensitive → ask consent, private → ask consent",
+    terms="Comma-separated words or phrases",
+)
+@app_commands.choices(
+    action=[app_commands.Choice(name=name, value=name) for name in ("show", "add", "remove")],
+    category=[app_commands.Choice(name=name, value=name) for name in ("sensitive", "private")],
+)
+async def consent_terms(
+    interaction: discord.Interaction,
+    action: str = "show",
+    category: str | None = None,
+    terms: str | None = None,
+) -> None:
+    record_command("consent_terms")
+    if not _is_admin(interaction):
+        await interaction.response.send_message("Admin only.", ephemeral=True)
+        return
+    if not await _require_ready(interaction):
+        return
+    guild_id = str(interaction.guild_id)
+    current = app.memory.get_consent_terms(guild_id)
+    if action != "show":
+        words = [w.strip().lower() for w in (terms or "").split(",") if w.strip()]
+        if not category or not words:
+            await interaction.response.send_message(
+                "Give a category and at least one term.", ephemeral=True
+            )
+            return
+        existing = set(current.get(category, []))
+        existing = existing | set(words) if action == "add" else existing - set(words)
+        current[category] = sorted(existing)
+        app.memory.set_consent_terms(guild_id, current)
+    lines = [f"**{c}**: {', '.join(ws) or '—'}" for c, ws in sorted(current.items())]
+    await interaction.response.send_message(
+        "Server terms (added to the built-in lists):\n" + ("\n".join(lines) or "none"),
+        ephemeral=True,
+    )
+
+
 @bot.tree.command(description="Rate an answer (admin only).")
 @app_commands.describe(
     message_link="Link to the message being rated", vote="up or down", note="Optional note"
@@ -212,7 +311,11 @@ async def rate_answer(
     if not m:
         return await interaction.response.send_message("Invalid message link.", ephemeral=True)
     channel_id, message_id = m.groups()
-    memory.set_rating(str(interaction.guild_id), message_id, up=(vote.lower() == "up"), note=note)
+    if not await _require_ready(interaction):
+        return
+    app.memory.set_rating(
+        str(interaction.guild_id), message_id, up=(vote.lower() == "up"), note=note
+    )
     await interaction.response.send_message("Rating stored ✅", ephemeral=True)
 
 
@@ -221,7 +324,9 @@ async def rate_answer(
 @app_commands.describe(page="Page number (default 1)")
 async def privacy_status(interaction: discord.Interaction, page: int = 1):
     record_command("privacy_status")
-    data = memory.list_consents_for_user(str(interaction.user.id), page=page, page_size=10)
+    if not await _require_ready(interaction):
+        return
+    data = app.memory.list_consents_for_user(str(interaction.user.id), page=page, page_size=10)
     if not data["items"]:
         return await interaction.response.send_message(
             "No consents stored for you.", ephemeral=True
@@ -240,7 +345,14 @@ async def privacy_status(interaction: discord.Interaction, page: int = 1):
 @app_commands.describe(query="Your search query", k="Number of results (default 6)")
 async def memory_find(interaction: discord.Interaction, query: str, k: int = 6):
     record_command("memory_find")
-    res = memory.retrieve(query, k=k, where={"channel_id": str(interaction.channel_id)})
+    if not await _require_ready(interaction):
+        return
+    # guild_id lets a guild-sharded store read a single shard
+    res = app.memory.retrieve(
+        query,
+        k=k,
+        where={"guild_id": str(interaction.guild_id), "channel_id": str(interaction.channel_id)},
+    )
     if not res.get("ids"):
         return await interaction.response.send_message("No matches found.", ephemeral=True)
     out = []
@@ -269,22 +381,147 @@ async def memory_purge(interaction: discord.Interaction, filter: str, confirm: b
             raise ValueError("Filter must be a JSON object")
     except Exception as e:
         return await interaction.response.send_message(f"Invalid filter JSON: {e}", ephemeral=True)
+    if not await _require_ready(interaction):
+        return
 
-    preview = memory.list_messages(where=where, limit=50)
-    count_preview = len(preview.get("items", []))
+    await interaction.response.defer(ephemeral=True, thinking=True)
     if not confirm:
-        return await interaction.response.send_message(
-            f"Dry run: would delete up to {count_preview} items (showing {count_preview} preview). Set confirm=true to delete.",
+        total = await asyncio.to_thread(app.memory.count_messages, where)
+        preview = await asyncio.to_thread(app.memory.list_messages, where, 5)
+        sample = "\n".join(
+            f"- `{item['id']}` {(item.get('text') or '')[:80]}" for item in preview.get("items", [])
+        )
+        return await interaction.followup.send(
+            f"Dry run: {total} item(s) match.\n{sample}\nSet confirm=true to delete.".strip(),
             ephemeral=True,
         )
 
-    deleted = memory.delete_messages(where=where)
-    await interaction.response.send_message(f"Deleted {deleted} items.", ephemeral=True)
+    loop = asyncio.get_running_loop()
+    last_update = [time.monotonic()]
+
+    def report(done: int) -> None:
+        # Runs on the worker thread; throttle edits to one every few seconds
+        if time.monotonic() - last_update[0] < PURGE_PROGRESS_INTERVAL:
+            return
+        last_update[0] = time.monotonic()
+        asyncio.run_coroutine_threadsafe(
+            interaction.edit_original_response(content=f"Deleting… {done} item(s) so far."), loop
+        )
+
+    deleted = await asyncio.to_thread(app.memory.delete_messages, where, None, report)
+    log.info(
+        "memory_purge",
+        extra={"extra_fields": {"guild_id": str(interaction.guild_id), "deleted": deleted}},
+    )
+    await interaction.followup.send(f"Deleted {deleted} items.", ephemeral=True)
+
+
+# ---- memory_snapshot ----
+@bot.tree.command(description="Export a snapshot of all memory to SNAPSHOT_DIR (owner only).")
+async def memory_snapshot(interaction: discord.Interaction) -> None:
+    record_command("memory_snapshot")
+    if not is_owner(interaction.user):
+        await interaction.response.send_message("Owner only.", ephemeral=True)
+        return
+    if not await _require_ready(interaction):
+        return
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    path = os.path.join(settings.SNAPSHOT_DIR, f"snapshot-{stamp}")
+    try:
+        report = await asyncio.to_thread(
+            export_snapshot, app.memory, path, settings.SNAPSHOT_PAGE_SIZE
+        )
+    except Exception as exc:
+        log.error("snapshot_failed", extra={"extra_fields": {"error": exc.__class__.__name__}})
+        await interaction.followup.send(
+            f"Snapshot failed: {exc.__class__.__name__}", ephemeral=True
+        )
+        return
+    await interaction.followup.send(
+        f"Snapshot written to `{path}`: {report.summary()}", ephemeral=True
+    )
+
+
+# ---- retention ----
+@bot.tree.command(description="Show or change message retention for this server (admin only).")
+@app_commands.describe(
+    action="show | set | run | pause | resume",
+    max_age_days="Delete messages older than this many days (0 = keep forever)",
+    max_rows="Keep at most this many messages per channel (0 = unlimited)",
+    channel="Apply to one channel instead of the whole server",
+)
+@app_commands.choices(
+    action=[
+        app_commands.Choice(name=name, value=name)
+        for name in ("show", "set", "run", "pause", "resume")
+    ]
+)
+async def retention(
+    interaction: discord.Interaction,
+    action: str = "show",
+    max_age_days: float | None = None,
+    max_rows: int | None = None,
+    channel: discord.TextChannel | None = None,
+) -> None:
+    record_command("retention")
+    if not _is_admin(interaction):
+        await interaction.response.send_message("Admin only.", ephemeral=True)
+        return
+    if not await _require_ready(interaction):
+        return
+    guild_id = str(interaction.guild_id)
+    channel_id = str(channel.id) if channel else None
+    scope = f"<#{channel_id}>" if channel_id else "this server"
+
+    if action == "set":
+        changes = {}
+        if max_age_days is not None:
+            changes["max_age_days"] = max_age_days or None
+        if max_rows is not None:
+            changes["max_rows"] = max_rows or None
+        if not changes:
+            await interaction.response.send_message(
+                "Give max_age_days and/or max_rows.", ephemeral=True
+            )
+            return
+        policy = set_policy(app.memory, guild_id, channel_id, **changes)
+        await interaction.response.send_message(
+            f"Retention for {scope}: {policy.describe()}", ephemeral=True
+        )
+        return
+    if action in ("pause", "resume"):
+        policy = set_policy(app.memory, guild_id, channel_id, paused=action == "pause")
+        await interaction.response.send_message(
+            f"Retention for {scope}: {policy.describe()}", ephemeral=True
+        )
+        return
+    if action == "run":
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        report = await asyncio.to_thread(app.retention.run_once, app.memory, [guild_id])
+        if report is None:
+            await interaction.followup.send("A retention pass is already running.", ephemeral=True)
+            return
+        await interaction.followup.send(f"Retention pass: {report.summary()}", ephemeral=True)
+        return
+
+    lines = [f"**Retention** — server: {get_policy(app.memory, guild_id).describe()}"]
+    for cid, policy in sorted(channel_overrides(app.memory, guild_id).items()):
+        lines.append(f"- <#{cid}>: {policy.describe()}")
+    last = app.retention.last_report
+    lines.append(
+        f"Job: {'running' if app.retention.running else 'idle'}"
+        + (f" | last run {last.finished_at}: {last.summary()}" if last else "")
+    )
+    await interaction.response.send_message("\n".join(lines), ephemeral=True)
 
 
 # ---- helper: extract from local files (PDF/images/etc.) ----
 def extract_from_local(
-    path: str, filename_hint: str | None = None, page_whitelist: set[int] | None = None
+    path: str,
+    filename_hint: str | None = None,
+    page_whitelist: set[int] | None = None,
+    deadline: Deadline | None = None,
 ) -> list[str]:
     low = path.lower()
     label_name = filename_hint or os.path.basename(path)
@@ -299,8 +536,10 @@ def extract_from_local(
             chunks = parse_pptx(path)
         elif any(low.endswith(ext) for ext in [".txt", ".md", ".log", ".csv"]):
             chunks = parse_text(path)
-        elif any(low.endswith(ext) for ext in [".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tiff"]):
+        elif low.endswith(IMAGE_EXTENSIONS):
             chunks = parse_image(path)
+        elif low.endswith(AUDIO_EXTENSIONS) and settings.ENABLE_SPEECH_TRANSCRIPTION:
+            chunks = parse_audio(path, deadline=deadline)
         else:
             return []
         context_lines = []
@@ -310,12 +549,45 @@ def extract_from_local(
                 label += f" p.{meta['page']}"
             if "slide" in meta:
                 label += f" slide {meta['slide']}"
+            if "t" in meta:
+                label += f" t={meta['t']}"
             context_lines.append(f"[{label}] {text[:1200]}")
         return context_lines[:20]
+    except DeadlineExceeded:
+        raise
     except Exception:
         return []
 
 
+def extract_attachments(
+    attachments: list, pages_map: dict[str, set[int]], deadline: Deadline
+) -> tuple[list, list[str], list[dict], list[str]]:
+    """Download, stage and extract ``attachments``; runs in a worker thread.
+
+    Returns ``(media_parts, paths, metas, extracted_lines)``. If the turn runs
+    out of budget the downloads are removed here, since the caller has already
+    moved on without the paths.
+    """
+    media_parts, paths, metas = make_parts_from_attachments(attachments, deadline=deadline)
+    try:
+        # One Vision batch request for all images in the message
+        prefetch_ocr(paths)
+        extracted: list[str] = []
+        for p, meta in zip(paths, metas):
+            deadline.check("extract")
+            fname = meta.get("filename", "file")
+            extracted.extend(
+                extract_from_local(
+                    p, filename_hint=fname, page_whitelist=pages_map.get(fname), deadline=deadline
+                )
+            )
+        deadline.check("extract")
+    except DeadlineExceeded:
+        cleanup_temp(paths)
+        raise
+    return media_parts, paths, metas, extracted
+
+
 def parse_page_hints(hints: str) -> dict[str, set[int]]:
     mapping: dict[str, set[int]] = {}
     for part in hints.split(";"):
@@ -356,59 +628,86 @@ def parse_page_hints(hints: str) -> dict[str, set[int]]:
 async def ask(interaction: discord.Interaction, question: str, page_hints: str | None = None):
     record_command("ask")
     await interaction.response.defer(ephemeral=False)
-
-    core, user, server = get_core_user_server(str(interaction.guild_id), str(interaction.user.id))
-    policy_text = make_policy_text(memory, str(interaction.guild_id), str(interaction.channel_id))
-
-    where = {"channel_id": str(interaction.channel_id)}
-    ctx = memory.retrieve(question, k=6, where=where)
-    docs = ctx.get("documents", []) or []
-    entity_docs: list[str] = []
-    if settings.ENTITY_REVISION_ENABLED:
-        bot_entity = memory.get_entity("bot:self")
-        if bot_entity:
-            meta = bot_entity.get("metadata", {}) or {}
-            display = meta.get("display_name") or "Fibz"
-            entity_docs.append(f"### ENTITY: {display}\n{bot_entity.get('document', '')}")
+    if not await _require_ready(interaction, timeout=settings.TURN_DEADLINE_SECONDS):
+        return
+    deadline = Deadline(settings.TURN_DEADLINE_SECONDS, name="ask")
 
     media_parts, paths, metas = ([], [], [])
-    extracted = []
+    extracted: list[str] = []
     labels = []
-    pages_map = parse_page_hints(page_hints) if page_hints else {}
+    try:
+        core, user, server = get_core_user_server(
+            str(interaction.guild_id), str(interaction.user.id)
+        )
+        policy_text = make_policy_text(
+            app.memory, str(interaction.guild_id), str(interaction.channel_id)
+        )
 
-    if interaction.attachments:
-        media_parts, paths, metas = make_parts_from_attachments(interaction.attachments)
-        for p, meta in zip(paths, metas):
-            fname = meta.get("filename", "file")
-            pset = pages_map.get(fname)
-            ext_chunks = extract_from_local(p, filename_hint=fname, page_whitelist=pset)
-            extracted.extend(ext_chunks)
-            for line in ext_chunks:
-                tag = line.split("]")[0].lstrip("[").strip()
-                labels.append(tag)
-
-    docs = entity_docs + docs + extracted
-    answer = agent.run(
-        question=question,
-        core=core,
-        user=user,
-        server=server,
-        policy_text=policy_text,
-        context_docs=docs,
-        media_parts=media_parts,
-        needs_reasoning=True,
-        request_context={
-            "guild_id": str(interaction.guild_id),
-            "channel_id": str(interaction.channel_id),
-            "user_id": str(interaction.user.id),
-            "memory": memory,
-        },
-    )
+        where = {"guild_id": str(interaction.guild_id), "channel_id": str(interaction.channel_id)}
+        with deadline.stage("retrieve"):
+            ctx = app.memory.retrieve(
+                question, k=6, where=where, deadline=deadline, include_embeddings=True
+            )
+        entity_docs: list[str] = []
+        if settings.ENTITY_REVISION_ENABLED:
+            bot_entity = app.memory.get_entity("bot:self")
+            if bot_entity:
+                meta = bot_entity.get("metadata", {}) or {}
+                display = meta.get("display_name") or "Fibz"
+                entity_docs.append(f"### ENTITY: {display}\n{bot_entity.get('document', '')}")
+
+        pages_map = parse_page_hints(page_hints) if page_hints else {}
+
+        if interaction.attachments:
+            # Downloads, OCR and transcription block, so keep them off the event loop
+            media_parts, paths, metas, extracted = await run_blocking(
+                deadline,
+                "extract",
+                extract_attachments,
+                list(interaction.attachments),
+                pages_map,
+                deadline,
+            )
+
+        with deadline.stage("assemble"):
+            assembled = assemble_context(
+                gather_candidates(entities=entity_docs, retrieved=ctx, files=extracted)
+            )
+        docs = [c.text for c in assembled]
+        for c in assembled:
+            if c.source == "file":
+                labels.append(c.text.split("]")[0].lstrip("[").strip())
+        answer = await run_blocking(
+            deadline,
+            "generate",
+            app.agent.run,
+            question=question,
+            core=core,
+            user=user,
+            server=server,
+            policy_text=policy_text,
+            context_docs=docs,
+            media_parts=media_parts,
+            needs_reasoning=True,
+            request_context={
+                "guild_id": str(interaction.guild_id),
+                "channel_id": str(interaction.channel_id),
+                "user_id": str(interaction.user.id),
+                "memory": app.memory,
+            },
+            deadline=deadline,
+        )
+    except DeadlineExceeded as exc:
+        cleanup_temp(paths)
+        _log_deadline_exceeded(deadline, exc)
+        return await interaction.followup.send(TIMEOUT_REPLY)
+    finally:
+        deadline.record()
     answer = answer or ""
 
     cleanup_temp(paths)
 
-    memory.upsert_message(
+    app.memory.upsert_message(
         message_id=f"{interaction.id}-q",
         content=question,
         meta=MessageMeta(
@@ -418,10 +717,11 @@ async def ask(interaction: discord.Interaction, question: str, page_hints: str |
             user_id=str(interaction.user.id),
             role="user",
             persona="user",
+            created_at=interaction.created_at,
             tags=["ask"],
         ),
     )
-    memory.upsert_message(
+    app.memory.upsert_message(
         message_id=f"{interaction.id}-a",
         content=answer,
         meta=MessageMeta(
@@ -436,8 +736,8 @@ async def ask(interaction: discord.Interaction, question: str, page_hints: str |
     )
 
     await run_entity_revision_pass(
-        router,
-        memory,
+        app.router,
+        app.memory,
         author_id=str(interaction.user.id),
         author_display=interaction.user.display_name,
         guild_id=str(interaction.guild_id),
@@ -486,13 +786,19 @@ async def ask_about(interaction: discord.Interaction, user: discord.User, questi
             member = None
 
     # Safe display names (User lacks display_name)
-    requester_display = getattr(interaction.user, "display_name", None) or interaction.user.name  # <-- changed
-    target_display = getattr(member, "display_name", None) or getattr(user, "display_name", None) or user.name     # <-- changed
+    requester_display = (
+        getattr(interaction.user, "display_name", None) or interaction.user.name
+    )  # <-- changed
+    target_display = (
+        getattr(member, "display_name", None) or getattr(user, "display_name", None) or user.name
+    )  # <-- changed
 
     record_command("ask_about")
     await interaction.response.defer(ephemeral=False)
+    if not await _require_ready(interaction, timeout=settings.TURN_DEADLINE_SECONDS):
+        return
 
-    cross_enabled = memory.get_cross_channel(str(interaction.guild_id))
+    cross_enabled = app.memory.get_cross_channel(str(interaction.guild_id))
     classification = await classify_share_request(
         question,
         str(interaction.user.id),
@@ -500,7 +806,7 @@ async def ask_about(interaction: discord.Interaction, user: discord.User, questi
         str(interaction.guild_id),
         str(interaction.channel_id),
         cross_enabled,
-        router=router,
+        router=app.router,
     )
     if classification == "share_block":
         return await interaction.followup.send(
@@ -516,7 +822,7 @@ async def ask_about(interaction: discord.Interaction, user: discord.User, questi
             scope,
             target_key,
             interaction,
-            requester_name=requester_display,   # <-- changed
+            requester_name=requester_display,  # <-- changed
         )
         if not granted:
             return await interaction.followup.send(
@@ -527,10 +833,14 @@ async def ask_about(interaction: discord.Interaction, user: discord.User, questi
     core, user_instr, server = get_core_user_server(
         str(interaction.guild_id), str(interaction.user.id)
     )
-    policy_text = make_policy_text(memory, str(interaction.guild_id), str(interaction.channel_id))
+    policy_text = make_policy_text(
+        app.memory, str(interaction.guild_id), str(interaction.channel_id)
+    )
 
     entity_context: list[str] = []
-    entity_doc = memory.get_entity(f"user:{user.id}") if settings.ENTITY_REVISION_ENABLED else None
+    entity_doc = (
+        app.memory.get_entity(f"user:{user.id}") if settings.ENTITY_REVISION_ENABLED else None
+    )
     if entity_doc:
         meta = entity_doc.get("metadata", {}) or {}
         raw_channels = meta.get("channels", "")
@@ -539,33 +849,53 @@ async def ask_about(interaction: discord.Interaction, user: discord.User, questi
         else:
             channels = {str(c) for c in raw_channels}
         if cross_enabled or str(interaction.channel_id) in channels:
-            display = meta.get("display_name") or target_display   # <-- changed
+            display = meta.get("display_name") or target_display  # <-- changed
             entity_context.append(f"### ENTITY: {display}\n{entity_doc.get('document', '')}")
 
-    where = {"user_id": str(user.id)}
+    where = {"guild_id": str(interaction.guild_id), "user_id": str(user.id)}
     if not cross_enabled:
         where["channel_id"] = str(interaction.channel_id)
-    ctx = memory.retrieve(question, k=4, where=where)
-    docs = entity_context + (ctx.get("documents", []) or [])
+    # The consent DM wait above is user time, not ours: the turn budget starts here.
+    deadline = Deadline(settings.TURN_DEADLINE_SECONDS, name="ask_about")
+    try:
+        with deadline.stage("retrieve"):
+            ctx = app.memory.retrieve(
+                question, k=4, where=where, deadline=deadline, include_embeddings=True
+            )
+        with deadline.stage("assemble"):
+            assembled = assemble_context(gather_candidates(entities=entity_context, retrieved=ctx))
+        docs = [c.text for c in assembled]
 
-    answer = agent.run(
-        question=question,
-        core=core,
-        user=user_instr,
-        server=server,
-        policy_text=policy_text,
-        context_docs=docs,
-        needs_reasoning=True,
-        request_context={
-            "guild_id": str(interaction.guild_id),
-            "channel_id": str(interaction.channel_id),
-            "user_id": str(interaction.user.id),
-            "memory": memory,
-        },
-    ) or ""
+        answer = (
+            await run_blocking(
+                deadline,
+                "generate",
+                app.agent.run,
+                question=question,
+                core=core,
+                user=user_instr,
+                server=server,
+                policy_text=policy_text,
+                context_docs=docs,
+                needs_reasoning=True,
+                request_context={
+                    "guild_id": str(interaction.guild_id),
+                    "channel_id": str(interaction.channel_id),
+                    "user_id": str(interaction.user.id),
+                    "memory": app.memory,
+                },
+                deadline=deadline,
+            )
+            or ""
+        )
+    except DeadlineExceeded as exc:
+        _log_deadline_exceeded(deadline, exc)
+        return await interaction.followup.send(TIMEOUT_REPLY)
+    finally:
+        deadline.record()
 
     # persist Q/A
-    memory.upsert_message(
+    app.memory.upsert_message(
         message_id=f"{interaction.id}-qa",
         content=question,
         meta=MessageMeta(
@@ -575,10 +905,11 @@ async def ask_about(interaction: discord.Interaction, user: discord.User, questi
             user_id=str(interaction.user.id),
             role="user",
             persona="user",
+            created_at=interaction.created_at,
             tags=["ask_about"],
         ),
     )
-    memory.upsert_message(
+    app.memory.upsert_message(
         message_id=f"{interaction.id}-qa-answer",
         content=answer,
         meta=MessageMeta(
@@ -593,10 +924,10 @@ async def ask_about(interaction: discord.Interaction, user: discord.User, questi
     )
 
     await run_entity_revision_pass(
-        router,
-        memory,
+        app.router,
+        app.memory,
         author_id=str(interaction.user.id),
-        author_display=requester_display,   # <-- changed
+        author_display=requester_display,  # <-- changed
         guild_id=str(interaction.guild_id),
         channel_id=str(interaction.channel_id),
         message_text=question,
@@ -621,6 +952,8 @@ async def ask_about(interaction: discord.Interaction, user: discord.User, questi
 async def summarize(interaction: discord.Interaction):
     record_command("summarize")
     await interaction.response.defer(ephemeral=False)
+    if not await _require_ready(interaction, timeout=settings.TURN_DEADLINE_SECONDS):
+        return
     if not interaction.attachments:
         return await interaction.followup.send(
             "Attach a **PDF** to this command and try again.", ephemeral=True
@@ -639,22 +972,26 @@ async def summarize(interaction: discord.Interaction):
     fname = meta.get("filename", "document.pdf")
 
     from fibz_bot.ingest.files import parse_pdf as parsepdf
+    from fibz_bot.ingest.pdf_extract import fingerprint
 
     texts = parsepdf(path)
-    for idx, (text, m) in enumerate(texts, start=1):
-        memory.upsert_message(
-            message_id=f"doc:{interaction.id}:{idx}",
-            content=text,
-            meta=MessageMeta(
-                message_id=f"doc:{interaction.id}:{idx}",
-                guild_id=str(interaction.guild_id),
-                channel_id=str(interaction.channel_id),
-                user_id=str(interaction.user.id),
-                role="system",
-                modality="file",
-                tags=["doc", "pdf", fname],
-            ),
-        )
+    # Content-addressed: re-uploading the same PDF skips chunks already indexed here
+    await asyncio.to_thread(
+        app.memory.ingest_document,
+        texts,
+        fingerprint=fingerprint(path),
+        meta=MessageMeta(
+            message_id=f"doc:{interaction.id}",
+            guild_id=str(interaction.guild_id),
+            channel_id=str(interaction.channel_id),
+            user_id=str(interaction.user.id),
+            role="system",
+            modality="file",
+            created_at=interaction.created_at,
+            tags=["doc", "pdf", fname],
+        ),
+        filename=fname,
+    )
     context_lines = []
     for text, m in texts[:60]:
         label = fname
@@ -663,24 +1000,38 @@ async def summarize(interaction: discord.Interaction):
         context_lines.append(f"[{label}] {text[:1200]}")
 
     core, user, server = get_core_user_server(str(interaction.guild_id), str(interaction.user.id))
-    policy_text = make_policy_text(memory, str(interaction.guild_id), str(interaction.channel_id))
+    policy_text = make_policy_text(
+        app.memory, str(interaction.guild_id), str(interaction.channel_id)
+    )
     question = f"Create a hierarchical outline of **{fname}**. Include page tags like [file p.N] inline for claims, and a short abstract up top."
 
-    answer = agent.run(
-        question=question,
-        core=core,
-        user=user,
-        server=server,
-        policy_text=policy_text,
-        context_docs=context_lines,
-        needs_reasoning=True,
-        request_context={
-            "guild_id": str(interaction.guild_id),
-            "channel_id": str(interaction.channel_id),
-            "user_id": str(interaction.user.id),
-            "memory": memory,
-        },
-    )
+    deadline = Deadline(settings.TURN_DEADLINE_SECONDS, name="summarize")
+    try:
+        answer = await run_blocking(
+            deadline,
+            "generate",
+            app.agent.run,
+            question=question,
+            core=core,
+            user=user,
+            server=server,
+            policy_text=policy_text,
+            context_docs=context_lines,
+            needs_reasoning=True,
+            request_context={
+                "guild_id": str(interaction.guild_id),
+                "channel_id": str(interaction.channel_id),
+                "user_id": str(interaction.user.id),
+                "memory": app.memory,
+            },
+            deadline=deadline,
+        )
+    except DeadlineExceeded as exc:
+        cleanup_temp(paths)
+        _log_deadline_exceeded(deadline, exc)
+        return await interaction.followup.send(TIMEOUT_REPLY)
+    finally:
+        deadline.record()
     answer = answer or ""
 
     labels = []
@@ -711,7 +1062,9 @@ async def summarize(interaction: discord.Interaction):
 
 
 @bot.tree.command(description="Create a signed URL for a GCS object path (admin only).")
-@app_commands.describe(path_in_bucket="e.g., 'discord/filename.pdf'")
+@app_commands.describe(
+    path_in_bucket="e.g., 'discord/<sha256>.pdf' (objects are keyed by content hash)"
+)
 async def sign(interaction: discord.Interaction, path_in_bucket: str):
     record_command("sign")
     if not interaction.user.guild_permissions.administrator:
@@ -736,7 +1089,9 @@ async def entity_debug(interaction: discord.Interaction, id: str):
     record_command("entity_debug")
     if not is_owner(interaction.user):
         return await interaction.response.send_message("Owner only.", ephemeral=True)
-    doc = memory.get_entity(id)
+    if not await _require_ready(interaction):
+        return
+    doc = app.memory.get_entity(id)
     if not doc:
         return await interaction.response.send_message("Entity not found.", ephemeral=True)
     meta_json = json.dumps(doc.get("metadata", {}) or {}, indent=2)
@@ -753,11 +1108,13 @@ async def entity_refresh(interaction: discord.Interaction, user: discord.Member)
     record_command("entity_refresh")
     if not (interaction.user.guild_permissions.administrator or is_owner(interaction.user)):
         return await interaction.response.send_message("Admin only.", ephemeral=True)
-    cross_enabled = memory.get_cross_channel(str(interaction.guild_id))
-    where = {"user_id": str(user.id)}
+    if not await _require_ready(interaction):
+        return
+    cross_enabled = app.memory.get_cross_channel(str(interaction.guild_id))
+    where = {"guild_id": str(interaction.guild_id), "user_id": str(user.id)}
     if not cross_enabled:
         where["channel_id"] = str(interaction.channel_id)
-    ctx = memory.retrieve(user.display_name or user.name, k=4, where=where)
+    ctx = app.memory.retrieve(user.display_name or user.name, k=4, where=where)
     docs = [d for d in ctx.get("documents", []) if d]
     if not docs:
         return await interaction.response.send_message(
@@ -765,8 +1122,8 @@ async def entity_refresh(interaction: discord.Interaction, user: discord.Member)
         )
     combined = "\n".join(docs[:3])
     await run_entity_revision_pass(
-        router,
-        memory,
+        app.router,
+        app.memory,
         author_id=str(user.id),
         author_display=user.display_name,
         guild_id=str(interaction.guild_id),
@@ -780,11 +1137,6 @@ async def entity_refresh(interaction: discord.Interaction, user: discord.Member)
     )
 
 
-from fibz_bot.ingest.attachments import make_parts_from_attachments, cleanup_temp
-from fibz_bot.utils.overflow import prepare_overflow_text
-from fibz_bot.llm.revision import run_entity_revision_pass
-from fibz_bot.memory.store import MessageMeta
-
 @bot.event
 async def on_message(message: discord.Message):
     # --- hard guards ---
@@ -809,87 +1161,41 @@ async def on_message(message: discord.Message):
     # --- build the user query (strip prefix/mention) ---
     query = content
     if is_prefix:
-        query = content[len("!fibz"):].strip()
+        query = content[len("!fibz") :].strip()
     elif is_mention and bot.user:
         # remove leading mention only
         mention_forms = {f"<@{bot.user.id}>", f"<@!{bot.user.id}>"}
         for mtxt in mention_forms:
             if query.startswith(mtxt):
-                query = query[len(mtxt):].strip()
+                query = query[len(mtxt) :].strip()
                 break
 
+    if not await app.wait_ready(timeout=settings.TURN_DEADLINE_SECONDS):
+        await message.reply(STARTING_REPLY, mention_author=False)
+        return
+
     # --- personas and policy ---
     core, user_instr, server = get_core_user_server(
-        str(message.guild.id) if message.guild else None,
-        str(message.author.id)
+        str(message.guild.id) if message.guild else None, str(message.author.id)
+    )
+    policy_text = make_policy_text(
+        app.memory, str(message.guild.id) if message.guild else None, str(message.channel.id)
     )
-    policy_text = make_policy_text(memory, str(message.guild.id) if message.guild else None, str(message.channel.id))
-
-    # --- retrieval (channel-scoped) ---
-    where = {"channel_id": str(message.channel.id)}
-    ctx = memory.retrieve(query, k=6, where=where)
-    docs = ctx.get("documents", []) or []
-
-    # --- entity context (bot + target user) ---
-    entity_docs: list[str] = []
-    if settings.ENTITY_REVISION_ENABLED:
-        bot_entity = memory.get_entity("bot:self")
-        if bot_entity and bot_entity.get("document"):
-            bd = bot_entity["document"]
-            meta = bot_entity.get("metadata", {}) or {}
-            display = meta.get("display_name") or "Fibz"
-            entity_docs.append(f"### ENTITY: {display}\n{bd}")
-
-        user_entity = memory.get_entity(f"user:{message.author.id}")
-        if user_entity and user_entity.get("document"):
-            ud = user_entity["document"]
-            display = message.author.display_name if hasattr(message.author, "display_name") else message.author.name
-            entity_docs.append(f"### ENTITY: {display}\n{ud}")
 
-    # --- attachments → media parts + optional extraction context ---
-    media_parts, paths, metas = make_parts_from_attachments(message.attachments)
+    deadline = Deadline(settings.TURN_DEADLINE_SECONDS, name="message")
     try:
-        # If you also want extraction to text for PDFs/images, do it here and extend docs.
-        # (You already have helpers elsewhere; keep as-is if wired.)
-        pass
+        answer = await _answer_message(
+            message, query, core, user_instr, server, policy_text, deadline
+        )
+    except DeadlineExceeded as exc:
+        _log_deadline_exceeded(deadline, exc)
+        await message.reply(TIMEOUT_REPLY, mention_author=False)
+        return
     finally:
-        cleanup_temp(paths)
-
-    # --- include recent 5 user + 5 bot exchanges ---
-    recent = build_recent_dialogue(
-        memory,
-        guild_id=str(message.guild.id),
-        channel_id=str(message.channel.id),
-        user_id=str(message.author.id),
-        max_user=5,
-        max_bot=5,
-    )
-    context_docs = []
-    if recent:
-        context_docs.append(recent)
-    context_docs.extend(entity_docs)
-    context_docs.extend(docs)
-
-    # --- run the agent ---
-    answer = agent.run(
-        question=query,
-        core=core,
-        user=user_instr,
-        server=server,
-        policy_text=policy_text,
-        context_docs=context_docs,
-        media_parts=media_parts if media_parts else None,
-        needs_reasoning=False,
-        request_context={
-            "memory": memory,
-            "guild_id": str(message.guild.id),
-            "channel_id": str(message.channel.id),
-            "user_id": str(message.author.id),
-        },
-    ) or ""
+        deadline.record()
 
     # --- store Q/A (so future turns can see it) ---
-    memory.upsert_message(
+    app.memory.upsert_message(
         message_id=f"{message.id}-q",
         content=query,
         meta=MessageMeta(
@@ -899,10 +1205,11 @@ async def on_message(message: discord.Message):
             user_id=str(message.author.id),
             role="user",
             persona="user",
+            created_at=message.created_at,
             tags=["chat"],
         ),
     )
-    memory.upsert_message(
+    app.memory.upsert_message(
         message_id=f"{message.id}-a",
         content=answer,
         meta=MessageMeta(
@@ -919,8 +1226,8 @@ async def on_message(message: discord.Message):
     # --- revision pass (safe to run; we hardened it earlier) ---
     try:
         await run_entity_revision_pass(
-            router,
-            memory,
+            app.router,
+            app.memory,
             author_id=str(message.author.id),
             author_display=getattr(message.author, "display_name", None) or message.author.name,
             guild_id=str(message.guild.id),
@@ -950,6 +1257,98 @@ async def on_message(message: discord.Message):
         pass
 
 
+async def _answer_message(
+    message: discord.Message,
+    query: str,
+    core: str,
+    user_instr: str,
+    server: str,
+    policy_text: str,
+    deadline: Deadline,
+) -> str:
+    # --- retrieval (channel-scoped) ---
+    where = {"channel_id": str(message.channel.id)}
+    if message.guild is not None:
+        where["guild_id"] = str(message.guild.id)
+    with deadline.stage("retrieve"):
+        ctx = app.memory.retrieve(
+            query, k=6, where=where, deadline=deadline, include_embeddings=True
+        )
+
+    # --- entity context (bot + target user) ---
+    entity_docs: list[str] = []
+    if settings.ENTITY_REVISION_ENABLED:
+        bot_entity = app.memory.get_entity("bot:self")
+        if bot_entity and bot_entity.get("document"):
+            bd = bot_entity["document"]
+            meta = bot_entity.get("metadata", {}) or {}
+            display = meta.get("display_name") or "Fibz"
+            entity_docs.append(f"### ENTITY: {display}\n{bd}")
+
+        user_entity = app.memory.get_entity(f"user:{message.author.id}")
+        if user_entity and user_entity.get("document"):
+            ud = user_entity["document"]
+            display = (
+                message.author.display_name
+                if hasattr(message.author, "display_name")
+                else message.author.name
+            )
+            entity_docs.append(f"### ENTITY: {display}\n{ud}")
+
+    # --- attachments → media parts + optional extraction context ---
+    # Downloads, staging and transcoding block, so keep them off the event loop
+    media_parts, paths, metas = await run_blocking(
+        deadline,
+        "extract",
+        make_parts_from_attachments,
+        list(message.attachments),
+        deadline=deadline,
+    )
+    try:
+        # If you also want extraction to text for PDFs/images, do it here and extend docs.
+        # (You already have helpers elsewhere; keep as-is if wired.)
+        pass
+    finally:
+        cleanup_temp(paths)
+
+    # --- include recent 5 user + 5 bot exchanges ---
+    recent = build_recent_dialogue(
+        app.memory,
+        guild_id=str(message.guild.id),
+        channel_id=str(message.channel.id),
+        user_id=str(message.author.id),
+        max_user=5,
+        max_bot=5,
+    )
+    with deadline.stage("assemble"):
+        assembled = assemble_context(
+            gather_candidates(dialogue=recent, entities=entity_docs, retrieved=ctx)
+        )
+    context_docs = [c.text for c in assembled]
+
+    # --- run the agent ---
+    answer = await run_blocking(
+        deadline,
+        "generate",
+        app.agent.run,
+        question=query,
+        core=core,
+        user=user_instr,
+        server=server,
+        policy_text=policy_text,
+        context_docs=context_docs,
+        media_parts=media_parts if media_parts else None,
+        needs_reasoning=False,
+        request_context={
+            "memory": app.memory,
+            "guild_id": str(message.guild.id),
+            "channel_id": str(message.channel.id),
+            "user_id": str(message.author.id),
+        },
+        deadline=deadline,
+    )
+    return answer or ""
+
 
 if __name__ == "__main__":
     bot.run(settings.DISCORD_BOT_TOKEN)
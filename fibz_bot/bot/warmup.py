@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING, Any
+
+from fibz_bot.config import settings
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+if TYPE_CHECKING:  # pragma: no cover - imported for type checking only
+    from fibz_bot.llm.router import ModelRouter
+    from fibz_bot.memory.store import MemoryStore
+
+log = get_logger(__name__)
+
+
+class WarmupStatus:
+    """Progress of the post-connect warm-up, shown in /status."""
+
+    def __init__(self) -> None:
+        self.state = "disabled" if not settings.WARMUP_ENABLED else "pending"
+        self.steps: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+        self.duration: float | None = None
+
+    def summary(self) -> str:
+        if self.state == "done":
+            text = f"done in {self.duration}s"
+            if self.errors:
+                text += f" ({len(self.errors)} step(s) failed: {', '.join(sorted(self.errors))})"
+            return text
+        return self.state
+
+
+def _step(status: WarmupStatus, name: str, fn: Callable[[], Any]) -> Any:
+    started = time.perf_counter()
+    try:
+        return fn()
+    except Exception as exc:
+        # Warm-up is best-effort: a cold path is slower, not broken
+        status.errors[name] = exc.__class__.__name__
+        log.warning(
+            "warmup_step_failed",
+            extra={"extra_fields": {"step": name, "error": exc.__class__.__name__}},
+        )
+        return None
+    finally:
+        status.steps[name] = round(time.perf_counter() - started, 3)
+
+
+def _preload_guilds(memory: MemoryStore, guild_ids: Iterable[str]) -> int:
+    memory.get_persona_core()
+    memory.get_entity("bot:self")
+    n = 0
+    for guild_id in guild_ids:
+        if n >= settings.WARMUP_MAX_GUILDS:
+            break
+        memory.get_persona_server(guild_id)
+        memory.get_cross_channel(guild_id)
+        n += 1
+    return n
+
+
+def run_warmup(
+    router: ModelRouter,
+    memory: MemoryStore,
+    guild_ids: Iterable[str],
+    status: WarmupStatus,
+) -> WarmupStatus:
+    """Load indexes, open model channels and fill caches (blocking).
+
+    Every step records its own timing; failures are logged and skipped.
+    """
+
+    if not settings.WARMUP_ENABLED:
+        status.state = "disabled"
+        return status
+
+    status.state = "running"
+    started = time.perf_counter()
+    _step(status, "collections", memory.warm_collections)
+    if settings.WARMUP_MODEL_CALLS:
+        _step(status, "embed", lambda: router.embed_texts(["warmup"]))
+        _step(
+            status,
+            "generate",
+            lambda: router.model_flash.generate_content(
+                "ping", generation_config={"max_output_tokens": 1}
+            ),
+        )
+    _step(status, "guilds", lambda: _preload_guilds(memory, list(guild_ids)))
+    status.duration = round(time.perf_counter() - started, 3)
+    status.state = "done"
+    metrics.inc("warmup.runs")
+    log.info(
+        "warmup_done",
+        extra={
+            "extra_fields": {
+                "duration": status.duration,
+                "steps": status.steps,
+                "errors": status.errors,
+            }
+        },
+    )
+    return status
+
+
+__all__ = ["WarmupStatus", "run_warmup"]
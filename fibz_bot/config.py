@@ -1,8 +1,18 @@
-from pydantic_settings import BaseSettings
 from pydantic import Field
+from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_ASYNC: bool = True  # format and write on a listener thread, not the caller's
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped (logging.dropped)
+    LOG_FILE: str = "./logs/fibz.jsonl"  # rotating JSON lines; "" = stderr only
+    LOG_FILE_MAX_MB: float = 10
+    LOG_FILE_BACKUPS: int = 5
+    # Share of INFO records to keep per event name, e.g. {"model_choice": 0.1}
+    LOG_SAMPLE_RATES: dict[str, float] = {"model_choice": 0.1, "consent_fast_path": 0.1}
+
     # Discord
     DISCORD_BOT_TOKEN: str = Field(..., description="Discord bot token")
     FIBZ_OWNER_ID: str = "0"
@@ -13,9 +23,61 @@ class Settings(BaseSettings):
     VERTEX_MODEL_FLASH: str = "gemini-2.5-flash"
     VERTEX_MODEL_PRO: str = "gemini-2.5-pro"
     VERTEX_EMBED_MODEL: str = "text-embedding-004"
+    VERTEX_EMBED_DIM: int = 0  # output dimensionality; 0 = the model's native size (768)
 
     # Memory
     CHROMA_PATH: str = "./chroma_data"
+    # Vector engine: "chroma" (default) or "numpy" (memmapped matrix + optional IVF)
+    VECTOR_BACKEND: str = "chroma"
+    NUMPY_VECTOR_PATH: str = "./vector_data"
+    NUMPY_IVF_MIN_ROWS: int = 50000  # train an IVF index once a collection reaches this size
+    NUMPY_IVF_NPROBE: int = 8
+    # HNSW index parameters (Chroma) applied when a collection is created; per-collection
+    # overrides as JSON, e.g. {"messages": {"M": 32, "construction_ef": 200, "search_ef": 128}}.
+    # search_ef is updated in place on start; M/construction_ef need scripts/migrate_hnsw.py
+    HNSW_M: int = 16
+    HNSW_CONSTRUCTION_EF: int = 100
+    HNSW_SEARCH_EF: int = 100
+    HNSW_COLLECTION_PARAMS: dict[str, dict[str, int]] = {}
+    # SQLite for personas/consents/policies/ratings
+    # (default: records.sqlite3 beside the vector data)
+    RECORDS_DB_PATH: str | None = None
+    PURGE_BATCH_SIZE: int = 500
+    # Messages sharding: "off", "guild" or "channel"
+    # (split existing data with scripts/migrate_shards.py)
+    MEMORY_SHARDING: str = "off"
+    SHARD_POOL_SIZE: int = 64  # open shard handles kept (LRU)
+    SHARD_FANOUT_WORKERS: int = 8
+    # Recency-decayed retrieval: 0 disables; otherwise score blends in 0.5 ** (age / half-life)
+    RETRIEVAL_RECENCY_HALF_LIFE_HOURS: float = 0.0
+    RETRIEVAL_RECENCY_WEIGHT: float = 0.2
+
+    # Re-embedding: when VERTEX_EMBED_MODEL/VERTEX_EMBED_DIM differ from what the store was
+    # built with, copy every collection into shadow collections in the background, then switch
+    EMBED_MIGRATION_ENABLED: bool = False
+    EMBED_MIGRATION_BATCH_SIZE: int = 64
+    EMBED_MIGRATION_TEXTS_PER_MINUTE: int = 600
+
+    # Snapshots (/memory_snapshot and scripts/snapshot.py)
+    SNAPSHOT_DIR: str = "./snapshots"
+    SNAPSHOT_PAGE_SIZE: int = 5000  # rows per part file; bounds export/import memory
+
+    # Retention (per-guild/channel overrides via /retention; 0 = keep forever)
+    RETENTION_ENABLED: bool = True
+    RETENTION_INTERVAL_SECONDS: int = 3600
+    RETENTION_DEFAULT_MAX_AGE_DAYS: float = 0.0
+    RETENTION_DEFAULT_MAX_ROWS_PER_CHANNEL: int = 0
+    RETENTION_BATCH_SIZE: int = 200
+    RETENTION_BATCH_PAUSE_SECONDS: float = 0.2
+
+    # Archival tier: old conversation windows are summarized with Flash into `archives`
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_AFTER_DAYS: float = 30.0
+    ARCHIVE_WINDOW_HOURS: float = 24.0
+    ARCHIVE_MAX_GROUPS_PER_RUN: int = 50
+    ARCHIVE_MAX_INPUT_CHARS: int = 16000
+    ARCHIVE_VERBATIM_CHARS: int = 600  # shorter windows are archived as-is, no model call
+    ARCHIVE_FALLBACK_MIN_SCORE: float = 0.55
     ENTITY_REVISION_ENABLED: bool = True
     ENTITY_MAX_FACTS: int = 12
     ENTITY_ALLOW_SENSITIVE: bool = False
@@ -24,18 +86,92 @@ class Settings(BaseSettings):
     CROSS_CHANNEL_SHARING_DEFAULT: bool = False
     DEFAULT_FLASH_RATIO: float = 0.5
 
+    # Per-turn time budget (seconds) shared by retrieval, extraction, generation and tools
+    TURN_DEADLINE_SECONDS: float = 60.0
+
+    # Context assembly (dedup + MMR + token budget for the system prompt CONTEXT block)
+    CONTEXT_TOKEN_BUDGET: int = 6000
+    CONTEXT_MMR_LAMBDA: float = 0.7
+    CONTEXT_NEAR_DUP_THRESHOLD: float = 0.85
+    CONTEXT_SECTION_ORDER: str = "file,entity,dialogue,retrieval"
+
+    # Post-connect warm-up (indexes, model channels, persona/policy caches)
+    WARMUP_ENABLED: bool = True
+    WARMUP_MODEL_CALLS: bool = True
+    WARMUP_MAX_GUILDS: int = 100
+
+    # Consent checks
+    CONSENT_LABEL_CACHE_SIZE: int = 1024  # classifier labels by normalized request text
+    CONSENT_LABEL_CACHE_TTL_SECONDS: int = 86400
+    # Extra fast-path terms per category (sensitive/private), JSON in .env;
+    # guilds add their own with /consent_terms
+    CONSENT_TERMS: dict[str, list[str]] = {}
+
     # Ingestion toggles
     ENABLE_VISION_OCR: bool = False
+    IMAGE_PREPROCESS_ENABLED: bool = True  # EXIF-rotate, downscale and re-encode before Gemini/OCR
+    IMAGE_MAX_SIDE: int = 2048
+    IMAGE_MAX_PIXELS: int = 3_000_000
+    IMAGE_FORMAT: str = "webp"  # webp | jpeg | png (jpeg falls back to png for transparency)
+    IMAGE_QUALITY: int = 85
+    IMAGE_PREPROCESS_WORKERS: int = 4
+    OCR_BATCH_SIZE: int = 16  # images per Vision batch_annotate_images call (max 16)
+    OCR_CACHE_TTL_SECONDS: int = 604800  # OCR text by image fingerprint
+    OCR_CACHE_MAX: int = 4096
+    GOOGLE_CLIENT_POOL_SIZE: int = 2  # long-lived Vision/Speech clients per process
     SPEECH_LANGUAGE: str = "en-US"
+    ENABLE_SPEECH_TRANSCRIPTION: bool = False  # voice notes -> [file t=mm:ss] context lines
+    AUDIO_SEGMENT_SECONDS: int = 55  # synchronous recognize accepts up to 60s per request
+    AUDIO_SEGMENT_MIN_SECONDS: int = 5
+    AUDIO_SILENCE_DB: int = -35
+    AUDIO_SILENCE_MIN_SECONDS: float = 0.4
+    AUDIO_MAX_SECONDS: int = 1800  # longer recordings are truncated
+    AUDIO_TRANSCRIBE_WORKERS: int = 4
+    AUDIO_CACHE_TTL_SECONDS: int = 604800
+    AUDIO_CACHE_MAX: int = 512
+
+    # Audio/video over the byte budget is transcoded by ffmpeg before it goes to the model
+    MEDIA_TRANSCODE_ENABLED: bool = True
+    MEDIA_BYTE_BUDGET_MB: int = 8
+    MEDIA_TRANSCODE_WORKERS: int = 2  # concurrent ffmpeg processes
+    MEDIA_TRANSCODE_TIMEOUT_SECONDS: int = 60
+    MEDIA_AUDIO_BITRATE_KBPS: int = 32  # mono Opus
+    MEDIA_VIDEO_MODE: str = "reduce"  # reduce | keyframes (JPEG frames + audio track)
+    MEDIA_VIDEO_FPS: int = 1
+    MEDIA_VIDEO_MAX_HEIGHT: int = 480
+    MEDIA_KEYFRAME_INTERVAL_SECONDS: int = 5
+    MEDIA_MAX_KEYFRAMES: int = 24
 
     # Web search (optional)
     GOOGLE_CSE_API_KEY: str | None = None
     GOOGLE_CSE_CX: str | None = None
+    WEB_SEARCH_CACHE_TTL_SECONDS: int = 900
+    WEB_SEARCH_NEGATIVE_TTL_SECONDS: int = 60  # empty answers are retried sooner
+    WEB_SEARCH_CACHE_MAX: int = 512
+    WEB_SEARCH_CONCURRENT: bool = False  # query CSE and DDG at once, first useful answer wins
+
+    # Shared HTTP connection pool (web search, attachment downloads)
+    HTTP_POOL_CONNECTIONS: int = 10  # per-host pools kept alive
+    HTTP_POOL_MAXSIZE: int = 16  # connections per host
+    HTTP_POOL_BLOCK: bool = False  # wait for a free connection instead of opening extra ones
 
     # GCS (optional)
     GCS_BUCKET: str | None = None
     GCS_SIGN_URLS: bool = True
     GCS_SIGN_URL_EXPIRY_SECONDS: int = 86400
+    GCS_PREFIX: str = "discord"  # objects are stored as {prefix}/{sha256}{ext}
+    GCS_UPLOAD_WORKERS: int = 2
+    GCS_UPLOAD_QUEUE_SIZE: int = 64  # uploads beyond this are dropped, never waited for
+    GCS_UPLOAD_MAX_ATTEMPTS: int = 3
+    GCS_RESUMABLE_THRESHOLD_MB: int = 8  # larger files use chunked resumable uploads
+    GCS_CHUNK_SIZE_MB: int = 8
+    GCS_SPOOL_DIR: str = "./tmp/gcs_spool"
+
+    # Large media goes to the model as a gs:// URI (needs GCS_BUCKET) instead of inline bytes
+    MEDIA_STAGING_ENABLED: bool = True
+    MEDIA_STAGING_THRESHOLD_MB: int = 4
+    MEDIA_STAGING_CACHE_TTL_SECONDS: int = 86400  # fingerprint -> URI reuse across turns
+    MEDIA_STAGING_CACHE_MAX: int = 1024
 
     class Config:
         env_file = ".env"
@@ -1,10 +1,24 @@
 from __future__ import annotations
-from typing import List, Tuple
-import os, mimetypes, tempfile
 
-from vertexai.generative_models import Part
+import mimetypes
+import os
+import tempfile
+from collections.abc import Callable
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from functools import partial
+from typing import TYPE_CHECKING
+
+from fibz_bot.config import settings
+from fibz_bot.ingest.images import submit_preprocess
+from fibz_bot.ingest.media import over_budget, submit_reduce
+from fibz_bot.storage.gcs import archive_attachment  # optional; harmless if GCS not configured
+from fibz_bot.storage.staging import media_stager
+from fibz_bot.utils.deadline import Deadline, DeadlineExceeded
 from fibz_bot.utils.http import download_file
-from fibz_bot.storage.gcs import upload_bytes  # optional; harmless if GCS not configured
+
+if TYPE_CHECKING:  # pragma: no cover - vertexai is imported lazily (slow to import)
+    from vertexai.generative_models import Part
 
 
 def _detect_mime(attachment, filename: str) -> str:
@@ -16,12 +30,105 @@ def _detect_mime(attachment, filename: str) -> str:
     return guess or "application/octet-stream"
 
 
-def make_parts_from_attachments(attachments: list) -> tuple[list[Part], list[str], list[dict]]:
-    parts: list[Part] = []
+def _media_part(path: str, mime: str, name: str, meta: dict, deadline: Deadline | None) -> Part:
+    """Inline bytes, or a ``gs://`` reference for media above the staging threshold."""
+    from vertexai.generative_models import Part
+
+    # Large media: upload once (content-addressed) and reference it by URI,
+    # so the bytes are not resent inline with every model call.
+    # DeadlineExceeded propagates: an expired turn should not fall back to inline bytes
+    staged = media_stager().stage(path, mime, name, deadline=deadline)
+    if staged:
+        meta.setdefault("gcs_uri", staged)
+        return Part.from_uri(staged, mime_type=mime)
+    with open(path, "rb") as f:
+        return Part.from_data(mime_type=mime, data=f.read())
+
+
+def _prepared_image(future: Future, path: str, mime: str) -> list[Part]:
+    from vertexai.generative_models import Part
+
+    try:
+        prepared = future.result()
+    except Exception:
+        prepared = None
+    if prepared is not None:
+        return [Part.from_data(mime_type=prepared.mime, data=prepared.data)]
+    with open(path, "rb") as f:
+        return [Part.from_data(mime_type=mime, data=f.read())]
+
+
+def _reduced_media(
+    future: Future, path: str, mime: str, name: str, meta: dict, deadline: Deadline | None
+) -> list[Part]:
+    # Blocks for up to the remaining budget: callers on the event loop go through run_blocking
+    try:
+        reduced = future.result(timeout=deadline.remaining() if deadline is not None else None)
+    except FutureTimeout:
+        # Out of budget: send the original; tidy up whenever the transcode finishes
+        future.add_done_callback(
+            lambda f: f.exception() is None and f.result() and f.result().cleanup()
+        )
+        reduced = None
+    except Exception:
+        reduced = None
+    if reduced is None:
+        return [_media_part(path, mime, name, meta, deadline)]
+    try:
+        meta["transcoded"] = f"{reduced.original_bytes}->{reduced.bytes}"
+        return [_media_part(p, m, os.path.basename(p), {}, deadline) for p, m in reduced.files]
+    finally:
+        reduced.cleanup()
+
+
+def make_parts_from_attachments(
+    attachments: list, deadline: Deadline | None = None
+) -> tuple[list[Part], list[str], list[dict]]:
+    from vertexai.generative_models import Part
+
+    # Entries are Parts, or a list of Parts filled in after the loop so that
+    # image preprocessing and transcoding overlap with the next downloads
+    parts: list = []
     paths: list[str] = []
     metas: list[dict] = []
+    pending: list[tuple[int, Callable[[], list[Part]]]] = []
+    try:
+        _collect_parts(attachments, deadline, parts, paths, metas, pending)
+        for index, resolve in pending:
+            try:
+                parts[index] = resolve()
+            except DeadlineExceeded:
+                raise
+            except Exception:
+                parts[index] = [Part.from_text("[Attachment could not be read]")]
+        if deadline is not None and deadline.cancelled:
+            # run_blocking gave up on this worker, so nobody will clean up the downloads
+            raise DeadlineExceeded("extract", cancelled=True)
+    except DeadlineExceeded:
+        # The caller never sees these paths, so remove the downloads here
+        cleanup_temp(paths)
+        raise
+
+    flat: list[Part] = []
+    for item in parts:
+        flat.extend(item if isinstance(item, list) else [item])
+    return flat, paths, metas
+
+
+def _collect_parts(
+    attachments: list,
+    deadline: Deadline | None,
+    parts: list,
+    paths: list[str],
+    metas: list[dict],
+    pending: list[tuple[int, Callable[[], list[Part]]]],
+) -> None:
+    from vertexai.generative_models import Part
 
     for a in attachments:
+        if deadline is not None and deadline.expired:
+            # Out of budget: skip the remaining attachments rather than stall the turn
+            break
         url = a.url
         name = a.filename or "file"
         mime = _detect_mime(a, name)
@@ -30,22 +137,24 @@ def make_parts_from_attachments(attachments: list) -> tuple[list[Part], list[str
         # Save to a temp file
         fd, path = tempfile.mkstemp(prefix="fibz_", suffix=ext)
         os.close(fd)
-        saved = download_file(url, path)
+        try:
+            saved = download_file(url, path, deadline=deadline)
+        except DeadlineExceeded:
+            cleanup_temp([path])
+            raise
+        except Exception:
+            saved = None
         if not saved:
+            cleanup_temp([path])
             continue
 
         paths.append(saved)
         meta = {"filename": name, "mime": mime}
 
         try:
-            with open(saved, "rb") as f:
-                data = f.read()
-
-            # Optional: upload to GCS for persistence / sharing
+            # Optional: archive to GCS in the background (content-addressed, deduplicated)
             try:
-                gcs_uri = upload_bytes(
-                    f"discord/{name}", data, content_type=mime
-                )
+                gcs_uri = archive_attachment(saved, name, mime)
                 if gcs_uri:
                     meta["gcs_uri"] = gcs_uri
             except Exception:
@@ -53,21 +162,33 @@ def make_parts_from_attachments(attachments: list) -> tuple[list[Part], list[str
                 pass
 
             # Build a multimodal Part for Gemini
-            # Use from_data for ALL binary media types (image/audio/video)
-            if mime.startswith(("image/", "audio/", "video/")):
-                parts.append(Part.from_data(mime_type=mime, data=data))
+            # Use from_data/from_uri for ALL binary media types (image/audio/video)
+            if mime.startswith("image/") and settings.IMAGE_PREPROCESS_ENABLED:
+                # Downscale/re-encode on the image pool while the next attachment downloads
+                future = submit_preprocess(saved)
+                pending.append((len(parts), partial(_prepared_image, future, saved, mime)))
+                parts.append(None)
+            elif mime.startswith(("audio/", "video/")) and over_budget(saved):
+                # Over the byte budget: transcode in an ffmpeg process, send the smaller one
+                future = submit_reduce(saved, mime)
+                pending.append(
+                    (len(parts), partial(_reduced_media, future, saved, mime, name, meta, deadline))
+                )
+                parts.append(None)
+            elif mime.startswith(("image/", "audio/", "video/")):
+                parts.append(_media_part(saved, mime, name, meta, deadline))
             else:
                 # Non-media attachments: include a textual note so the model knows it's attached
                 parts.append(Part.from_text(f"[Attachment: {name} ({mime}) attached]"))
 
+        except DeadlineExceeded:
+            raise
         except Exception:
             # If anything goes wrong, still add a textual placeholder
             parts.append(Part.from_text(f"[Attachment: {name} attached but could not be read]"))
 
         metas.append(meta)
 
-    return parts, paths, metas
-
 
 def cleanup_temp(paths: list[str]):
     for p in paths:
@@ -1,20 +1,142 @@
 from __future__ import annotations
-from typing import List, Tuple
+
+import io
+import os
 import pathlib
+import re
+import tempfile
+import time
+import wave
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
+
 from fibz_bot.config import settings
+from fibz_bot.ingest.clients import speech_clients
+from fibz_bot.ingest.pdf_extract import fingerprint
+from fibz_bot.utils.backoff import retry
+from fibz_bot.utils.cache import TTLCache
+from fibz_bot.utils.deadline import Deadline
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
 
-try:
-    from google.cloud import speech_v2 as speech
-except Exception:
-    speech = None
+log = get_logger(__name__)
 
-def transcribe_audio(path: str, language_code: str | None = None) -> str:
-    language_code = language_code or settings.SPEECH_LANGUAGE
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg", ".oga", ".opus", ".m4a", ".aac", ".flac", ".webm")
+SAMPLE_RATE = 16000
+_SILENCE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+_transcripts: TTLCache[list[tuple[float, str]]] = TTLCache(
+    max_items=settings.AUDIO_CACHE_MAX, ttl=settings.AUDIO_CACHE_TTL_SECONDS
+)
+
+
+def _speech() -> Any:
+    # Imported on first transcription: google-cloud-speech is slow to import
+    try:
+        from google.cloud import speech_v2 as speech
+    except Exception:
+        return None
+    return speech
+
+
+def timestamp(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def normalize_audio(src: str, dest: str) -> None:
+    """Decode anything ffmpeg reads into mono 16 kHz 16-bit WAV (capped at AUDIO_MAX_SECONDS)."""
+
+    import ffmpeg
+
+    out = {"ac": 1, "ar": SAMPLE_RATE, "acodec": "pcm_s16le", "format": "wav"}
+    if settings.AUDIO_MAX_SECONDS > 0:
+        out["t"] = settings.AUDIO_MAX_SECONDS
+    ffmpeg.input(src).output(dest, **out).overwrite_output().run(quiet=True)
+
+
+def parse_silences(stderr: str) -> list[tuple[float, float]]:
+    """Pair ffmpeg ``silencedetect`` start/end lines into ``(start, end)`` spans."""
+
+    spans: list[tuple[float, float]] = []
+    start: float | None = None
+    for kind, value in _SILENCE.findall(stderr):
+        if kind == "start":
+            start = max(float(value), 0.0)
+        elif start is not None:
+            spans.append((start, float(value)))
+            start = None
+    return spans
+
+
+def detect_silences(wav_path: str) -> list[tuple[float, float]]:
+    import ffmpeg
+
+    _, err = (
+        ffmpeg.input(wav_path)
+        .filter(
+            "silencedetect",
+            noise=f"{settings.AUDIO_SILENCE_DB}dB",
+            d=settings.AUDIO_SILENCE_MIN_SECONDS,
+        )
+        .output("-", format="null")
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return parse_silences(err.decode("utf-8", errors="ignore"))
+
+
+def plan_segments(
+    duration: float,
+    silences: list[tuple[float, float]],
+    max_seconds: float,
+    min_seconds: float = 5.0,
+) -> list[tuple[float, float]]:
+    """Split ``[0, duration)`` into segments of at most ``max_seconds``.
+
+    Each cut goes in the middle of the latest silence that keeps the segment
+    within bounds (and at least ``min_seconds`` long); with no usable
+    silence the segment is cut hard at ``max_seconds``.
+    """
+
+    cuts = [(s + e) / 2 for s, e in silences]
+    segments: list[tuple[float, float]] = []
+    start = 0.0
+    while duration - start > max_seconds:
+        window = [c for c in cuts if start + min_seconds <= c <= start + max_seconds]
+        end = window[-1] if window else start + max_seconds
+        segments.append((start, end))
+        start = end
+    if duration - start > 0.05 or not segments:
+        segments.append((start, duration))
+    return segments
+
+
+def _wav_slices(wav_path: str, segments: list[tuple[float, float]]) -> list[bytes]:
+    out = []
+    with wave.open(wav_path, "rb") as src:
+        rate = src.getframerate()
+        for start, end in segments:
+            src.setpos(min(int(start * rate), src.getnframes()))
+            frames = src.readframes(max(int((end - start) * rate), 0))
+            buf = io.BytesIO()
+            with wave.open(buf, "wb") as dst:
+                dst.setnchannels(src.getnchannels())
+                dst.setsampwidth(src.getsampwidth())
+                dst.setframerate(rate)
+                dst.writeframes(frames)
+            out.append(buf.getvalue())
+    return out
+
+
+def _wav_duration(wav_path: str) -> float:
+    with wave.open(wav_path, "rb") as src:
+        return src.getnframes() / float(src.getframerate())
+
+
+def _recognize(content: bytes, language_code: str) -> str:
+    speech = _speech()
     if speech is None:
-        return "(Transcription unavailable: google-cloud-speech not installed/initialized.)"
-    client = speech.SpeechClient()
-    with open(path, "rb") as f:
-        audio_content = f.read()
+        raise RuntimeError("google-cloud-speech not installed/initialized")
+    client = speech_clients.get()
     config = speech.RecognitionConfig(
         auto_decoding_config=speech.AutoDetectDecodingConfig(),
         language_codes=[language_code],
@@ -23,15 +145,107 @@ def transcribe_audio(path: str, language_code: str | None = None) -> str:
     request = speech.RecognizeRequest(
         recognizer=f"projects/{settings.VERTEX_PROJECT_ID}/locations/{settings.VERTEX_LOCATION}/recognizers/_",
         config=config,
-        content=audio_content,
+        content=content,
+    )
+    response = retry(lambda: client.recognize(request=request), operation="speech_recognize")
+    return " ".join(
+        r.alternatives[0].transcript.strip() for r in response.results if r.alternatives
     )
-    response = client.recognize(request=request)
-    lines = []
-    for result in response.results:
-        lines.append(result.alternatives[0].transcript)
-    return "\n".join(lines)
 
-def parse_audio(path: str):
+
+def _recognize_all(
+    slices: list[bytes], language_code: str, workers: int, deadline: Deadline | None
+) -> list[str]:
+    """Recognize ``slices`` in order with at most ``workers`` requests in flight.
+
+    Nothing new is submitted once ``deadline`` has run out: the requests
+    already in flight finish and ``DeadlineExceeded`` is raised.
+    """
+
+    texts = [""] * len(slices)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speech") as pool:
+        running: dict[Future[str], int] = {}
+        for index, content in enumerate(slices):
+            while len(running) >= workers:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    texts[running.pop(future)] = future.result()
+            if deadline is not None:
+                deadline.check("extract")
+            running[pool.submit(_recognize, content, language_code)] = index
+        for future, index in running.items():
+            texts[index] = future.result()
+    return texts
+
+
+def transcribe_segments(
+    path: str, language_code: str | None = None, deadline: Deadline | None = None
+) -> list[tuple[float, str]]:
+    """Transcribe ``path`` as ``(start_seconds, text)`` segments, cached by fingerprint.
+
+    ffmpeg normalizes to mono 16 kHz and ``silencedetect`` finds the cut
+    points; segments of at most ``AUDIO_SEGMENT_SECONDS`` are recognized
+    ``AUDIO_TRANSCRIBE_WORKERS`` at a time and returned in order. Without an
+    ffmpeg binary the file is sent whole, as before. With a ``deadline`` no
+    further segment is sent once it expires (``DeadlineExceeded``; nothing is
+    cached).
+    """
+
+    language_code = language_code or settings.SPEECH_LANGUAGE
+    key = (fingerprint(path), language_code)
+    cached = _transcripts.get(key)
+    if cached is not None:
+        metrics.inc("audio.cache_hits")
+        return cached
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="fibz_audio_") as tmp:
+        wav = os.path.join(tmp, "audio.wav")
+        try:
+            normalize_audio(path, wav)
+        except (ImportError, FileNotFoundError):
+            # No ffmpeg on this host: one request with the original bytes
+            if deadline is not None:
+                deadline.check("extract")
+            with open(path, "rb") as f:
+                result = [(0.0, _recognize(f.read(), language_code))]
+            _transcripts.set(key, result)
+            return result
+        duration = _wav_duration(wav)
+        segments = plan_segments(
+            duration,
+            detect_silences(wav),
+            max_seconds=settings.AUDIO_SEGMENT_SECONDS,
+            min_seconds=settings.AUDIO_SEGMENT_MIN_SECONDS,
+        )
+        slices = _wav_slices(wav, segments)
+    workers = max(1, min(settings.AUDIO_TRANSCRIBE_WORKERS, len(slices)))
+    texts = _recognize_all(slices, language_code, workers, deadline)
+    result = [(start, text) for (start, _), text in zip(segments, texts) if text]
+    _transcripts.set(key, result)
+    metrics.inc("audio.segments", len(segments))
+    metrics.inc("audio.seconds", int(duration))
+    log.info(
+        "audio_transcribed",
+        extra={
+            "extra_fields": {
+                "seconds": round(duration, 1),
+                "segments": len(segments),
+                "elapsed": round(time.perf_counter() - started, 3),
+            }
+        },
+    )
+    return result
+
+
+def transcribe_audio(path: str, language_code: str | None = None) -> str:
+    if _speech() is None:
+        return "(Transcription unavailable: google-cloud-speech not installed/initialized.)"
+    return "\n".join(text for _, text in transcribe_segments(path, language_code))
+
+
+def parse_audio(path: str, deadline: Deadline | None = None) -> list[tuple[str, dict[str, Any]]]:
     p = pathlib.Path(path)
-    text = transcribe_audio(str(p))
-    return [(text, {"modality":"audio","filename":p.name})]
+    return [
+        (text, {"modality": "audio", "filename": p.name, "t": timestamp(start), "start": start})
+        for start, text in transcribe_segments(str(p), deadline=deadline)
+    ]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from fibz_bot.config import settings
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+log = get_logger(__name__)
+
+
+class ClientPool:
+    """A few long-lived API clients handed out round-robin.
+
+    Google clients are thread-safe; a small pool only spreads concurrent calls
+    over separate gRPC channels. Each client is built on first use and kept
+    for the life of the process, so the channel setup and auth handshake
+    happen once instead of per call.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], size: int | None = None) -> None:
+        self.name = name
+        self._factory = factory
+        self.size = max(1, size if size is not None else settings.GOOGLE_CLIENT_POOL_SIZE)
+        self._clients: list[Any] = [None] * self.size
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        slot = next(self._next) % self.size
+        client = self._clients[slot]
+        if client is None:
+            with self._lock:
+                client = self._clients[slot]
+                if client is None:
+                    client = self._clients[slot] = self._factory()
+                    metrics.inc(f"clients.{self.name}_created")
+                    log.info(
+                        "client_created",
+                        extra={"extra_fields": {"client": self.name, "slot": slot}},
+                    )
+        return client
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clients = [None] * self.size
+
+
+def _vision_client() -> Any:
+    from google.cloud import vision
+
+    return vision.ImageAnnotatorClient()
+
+
+def _speech_client() -> Any:
+    from google.cloud import speech_v2 as speech
+
+    return speech.SpeechClient()
+
+
+vision_clients = ClientPool("vision", _vision_client)
+speech_clients = ClientPool("speech", _speech_client)
+
+
+__all__ = ["ClientPool", "speech_clients", "vision_clients"]
@@ -1,25 +1,28 @@
 from __future__ import annotations
-from typing import List, Tuple, Optional, Iterable
-from pypdf import PdfReader
-from docx import Document as DocxDocument
-from pptx import Presentation
+
 import pathlib
+from collections.abc import Iterable
+
 
-def chunk_text(text: str, max_chars: int = 4000) -> List[str]:
+def chunk_text(text: str, max_chars: int = 4000) -> list[str]:
     chunks = []
     i = 0
     while i < len(text):
-        chunks.append(text[i:i+max_chars])
+        chunks.append(text[i : i + max_chars])
         i += max_chars
     return chunks
 
-def _normalize_pages(pages: Optional[Iterable[int]]) -> Optional[set[int]]:
+
+def _normalize_pages(pages: Iterable[int] | None) -> set[int] | None:
     if pages is None:
         return None
     s = set(int(p) for p in pages if isinstance(p, (int,)) or (isinstance(p, str) and p.isdigit()))
     return s or None
 
-def parse_pdf(path: str, pages: Optional[Iterable[int]] = None) -> List[Tuple[str, dict]]:
+
+def parse_pdf(path: str, pages: Iterable[int] | None = None) -> list[tuple[str, dict]]:
+    from pypdf import PdfReader
+
     p = pathlib.Path(path)
     reader = PdfReader(str(p))
     out = []
@@ -29,16 +32,25 @@ def parse_pdf(path: str, pages: Optional[Iterable[int]] = None) -> List[Tuple[st
             continue
         t = page.extract_text() or ""
         for ch in chunk_text(t):
-            out.append((ch, {"modality":"file","filetype":"pdf","page":i,"filename":p.name}))
+            out.append((ch, {"modality": "file", "filetype": "pdf", "page": i, "filename": p.name}))
     return out
 
-def parse_docx(path: str) -> List[Tuple[str, dict]]:
+
+def parse_docx(path: str) -> list[tuple[str, dict]]:
+    from docx import Document as DocxDocument
+
     p = pathlib.Path(path)
     doc = DocxDocument(str(p))
     text = "\n".join(paragraph.text for paragraph in doc.paragraphs)
-    return [(ch, {"modality":"file","filetype":"docx","filename":p.name}) for ch in chunk_text(text)]
+    return [
+        (ch, {"modality": "file", "filetype": "docx", "filename": p.name})
+        for ch in chunk_text(text)
+    ]
+
+
+def parse_pptx(path: str) -> list[tuple[str, dict]]:
+    from pptx import Presentation
 
-def parse_pptx(path: str) -> List[Tuple[str, dict]]:
     p = pathlib.Path(path)
     prs = Presentation(str(p))
     out = []
@@ -49,10 +61,16 @@ def parse_pptx(path: str) -> List[Tuple[str, dict]]:
                 texts.append(shape.text)
         joined = "\n".join(texts)
         for ch in chunk_text(joined):
-            out.append((ch, {"modality":"file","filetype":"pptx","slide":i,"filename":p.name}))
+            out.append(
+                (ch, {"modality": "file", "filetype": "pptx", "slide": i, "filename": p.name})
+            )
     return out
 
-def parse_text(path: str) -> List[Tuple[str, dict]]:
+
+def parse_text(path: str) -> list[tuple[str, dict]]:
     p = pathlib.Path(path)
     text = p.read_text(encoding="utf-8", errors="ignore")
-    return [(ch, {"modality":"file","filetype":"text","filename":p.name}) for ch in chunk_text(text)]
+    return [
+        (ch, {"modality": "file", "filetype": "text", "filename": p.name})
+        for ch in chunk_text(text)
+    ]
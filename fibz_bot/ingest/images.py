@@ -1,13 +1,157 @@
 from __future__ import annotations
-from typing import List, Tuple
-from PIL import Image, ExifTags
+
+import io
+import math
+import os
 import pathlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from PIL import ExifTags, Image, ImageOps
+
 from fibz_bot.config import settings
+from fibz_bot.ingest.clients import vision_clients
+from fibz_bot.ingest.pdf_extract import fingerprint
+from fibz_bot.utils.backoff import retry
+from fibz_bot.utils.cache import TTLCache
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+log = get_logger(__name__)
+
+# Opaque binary blobs that bloat the stringified metadata without telling the model anything
+_BULKY_TAGS = {"MakerNote", "UserComment", "PrintImageMatching", "InterColorProfile", "XMLPacket"}
+_IFD_POINTERS = {"ExifOffset", "GPSInfo", "InteropOffset"}
+_EXIF_IFD = 0x8769
+_ORIENTATION = 0x0112
+_MAX_VALUE_CHARS = 200
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tiff")
+_ocr_cache: TTLCache[str] = TTLCache(
+    max_items=settings.OCR_CACHE_MAX, ttl=settings.OCR_CACHE_TTL_SECONDS
+)
+_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+}
+
+
+def _vision() -> Any:
+    # Imported on first OCR call: google-cloud-vision is slow to import
+    try:
+        from google.cloud import vision
+    except Exception:
+        return None
+    return vision
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    mime: str
+    width: int
+    height: int
+    original_bytes: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - len(self.data)
+
+
+def _target_size(width: int, height: int) -> tuple[int, int]:
+    scale = 1.0
+    if settings.IMAGE_MAX_SIDE > 0:
+        scale = min(scale, settings.IMAGE_MAX_SIDE / max(width, height))
+    if settings.IMAGE_MAX_PIXELS > 0:
+        scale = min(scale, math.sqrt(settings.IMAGE_MAX_PIXELS / (width * height)))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def preprocess_image(path: str) -> PreparedImage | None:
+    """Rotate per EXIF, downscale to the pixel budget and re-encode without metadata.
+
+    Returns ``None`` for images Pillow cannot open and for animations (sent as
+    is). If re-encoding would not shrink an upright, in-budget image, the
+    original bytes are kept.
+    """
+
+    original = os.path.getsize(path)
+    try:
+        with Image.open(path) as img:
+            if getattr(img, "is_animated", False):
+                return None
+            src_mime = Image.MIME.get(img.format or "", "application/octet-stream")
+            rotated = img.getexif().get(_ORIENTATION, 1) != 1
+            oriented = ImageOps.exif_transpose(img) if rotated else img
+            size = _target_size(*oriented.size)
+            resized = size != oriented.size
+            if resized:
+                oriented = oriented.resize(size, Image.Resampling.LANCZOS)
+            fmt, mime = _FORMATS.get(settings.IMAGE_FORMAT.lower(), _FORMATS["webp"])
+            has_alpha = oriented.mode in ("RGBA", "LA", "PA") or "transparency" in oriented.info
+            if fmt == "JPEG" and has_alpha:
+                fmt, mime = _FORMATS["png"]
+            if oriented.mode not in ("RGB", "RGBA", "L", "LA"):
+                oriented = oriented.convert("RGBA" if has_alpha else "RGB")
+            buf = io.BytesIO()
+            if fmt == "PNG":
+                oriented.save(buf, fmt, optimize=True)
+            else:
+                oriented.save(buf, fmt, quality=settings.IMAGE_QUALITY)
+            width, height = oriented.size
+    except Exception as exc:
+        log.warning(
+            "image_preprocess_failed", extra={"extra_fields": {"error": exc.__class__.__name__}}
+        )
+        return None
+    data = buf.getvalue()
+    if len(data) >= original and not (rotated or resized):
+        with open(path, "rb") as f:
+            return PreparedImage(f.read(), src_mime, width, height, original)
+    return PreparedImage(data, mime, width, height, original)
+
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.IMAGE_PREPROCESS_WORKERS),
+                thread_name_prefix="image-prep",
+            )
+        return _pool
+
+
+def _record(result: PreparedImage | None) -> PreparedImage | None:
+    if result is not None:
+        metrics.inc("images.preprocessed")
+        metrics.inc("images.bytes_in", result.original_bytes)
+        metrics.inc("images.bytes_saved", max(result.saved_bytes, 0))
+        log.info(
+            "image_preprocessed",
+            extra={
+                "extra_fields": {
+                    "bytes_in": result.original_bytes,
+                    "bytes_out": len(result.data),
+                    "saved": result.saved_bytes,
+                    "size": f"{result.width}x{result.height}",
+                }
+            },
+        )
+    return result
+
+
+def submit_preprocess(path: str) -> Future:
+    """Preprocess on the shared pool (Pillow releases the GIL while decoding/resizing)."""
+
+    return _executor().submit(lambda: _record(preprocess_image(path)))
 
-try:
-    from google.cloud import vision
-except Exception:
-    vision = None
 
 def extract_exif(path: str) -> dict:
     meta = {}
@@ -15,31 +159,104 @@ def extract_exif(path: str) -> dict:
         img = Image.open(path)
         exif_data = img.getexif()
         if exif_data:
-            for tag_id, value in exif_data.items():
-                tag = ExifTags.TAGS.get(tag_id, tag_id)
-                meta[str(tag)] = str(value)
+            items = list(exif_data.items()) + list(exif_data.get_ifd(_EXIF_IFD).items())
+            for tag_id, value in items:
+                tag = str(ExifTags.TAGS.get(tag_id, tag_id))
+                if tag in _BULKY_TAGS or tag in _IFD_POINTERS:
+                    continue
+                if isinstance(value, bytes):
+                    if len(value) > 64:
+                        continue
+                    value = value.decode("ascii", errors="ignore").strip("\x00 ")
+                meta[tag] = str(value)[:_MAX_VALUE_CHARS]
     except Exception:
         pass
     return meta
 
+
+def _ocr_content(path: str) -> bytes:
+    # Runs on the image pool already, so preprocess inline rather than resubmitting
+    if settings.IMAGE_PREPROCESS_ENABLED:
+        prepared = _record(preprocess_image(path))
+        if prepared is not None:
+            return prepared.data
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def ocr_images(paths: list[str]) -> list[str]:
+    """OCR several images with batched annotate requests, cached by fingerprint.
+
+    Cached images cost one hash; the rest are preprocessed on the image pool
+    and sent ``OCR_BATCH_SIZE`` per ``batch_annotate_images`` call. Failed
+    images come back as ``""`` and are not cached.
+    """
+
+    if not paths or not settings.ENABLE_VISION_OCR:
+        return [""] * len(paths)
+    vision = _vision()
+    if vision is None:
+        return [""] * len(paths)
+    fps = [fingerprint(p) for p in paths]
+    texts: dict[str, str] = {}
+    missing: list[tuple[str, str]] = []
+    for path, fp in zip(paths, fps):
+        if fp in texts or any(fp == queued for queued, _ in missing):
+            continue  # the same image twice in one message
+        cached = _ocr_cache.get(fp)
+        if cached is not None:
+            texts[fp] = cached
+            metrics.inc("ocr.cache_hits")
+        else:
+            missing.append((fp, path))
+    if missing:
+        try:
+            contents = list(_executor().map(_ocr_content, [path for _, path in missing]))
+            client = vision_clients.get()
+            feature = vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)
+            size = max(1, min(settings.OCR_BATCH_SIZE, 16))  # the API accepts at most 16 per call
+            for start in range(0, len(missing), size):
+                requests = [
+                    vision.AnnotateImageRequest(
+                        image=vision.Image(content=content), features=[feature]
+                    )
+                    for content in contents[start : start + size]
+                ]
+                response = retry(
+                    lambda: client.batch_annotate_images(requests=requests), operation="vision_ocr"
+                )
+                metrics.inc("ocr.batches")
+                for (fp, _), result in zip(missing[start : start + size], response.responses):
+                    if result.error.message:
+                        metrics.inc("ocr.errors")
+                        continue
+                    text = result.text_annotations[0].description if result.text_annotations else ""
+                    texts[fp] = text or ""
+                    _ocr_cache.set(fp, texts[fp])
+                    metrics.inc("ocr.images")
+        except Exception as exc:
+            log.warning(
+                "ocr_failed",
+                extra={"extra_fields": {"images": len(missing), "error": exc.__class__.__name__}},
+            )
+    return [texts.get(fp, "") for fp in fps]
+
+
 def ocr_text(path: str) -> str:
-    if not settings.ENABLE_VISION_OCR or vision is None:
-        return ""
-    try:
-        client = vision.ImageAnnotatorClient()
-        with open(path, "rb") as f:
-            content = f.read()
-        image = vision.Image(content=content)
-        response = client.text_detection(image=image)
-        if response and response.text_annotations:
-            return response.text_annotations[0].description or ""
-    except Exception:
-        return ""
-    return ""
+    return ocr_images([path])[0]
+
+
+def prefetch_ocr(paths: list[str]) -> None:
+    """OCR every image among ``paths`` in one batch so per-file parsing hits the cache."""
+
+    images = [p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS)]
+    if len(images) > 1:
+        ocr_images(images)
+
 
-def parse_image(path: str) -> List[Tuple[str, dict]]:
+def parse_image(path: str) -> list[tuple[str, dict]]:
     p = pathlib.Path(path)
-    meta = {"modality":"image","filename":p.name}
+    meta = {"modality": "image", "filename": p.name}
     meta.update(extract_exif(path))
     text = ocr_text(path)
     desc = f"Image {p.name}."
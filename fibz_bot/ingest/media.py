@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from fibz_bot.config import settings
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+log = get_logger(__name__)
+
+_MB = 1024 * 1024
+
+
+@dataclass
+class ReducedMedia:
+    """Smaller stand-in for an attachment: one file, or keyframes plus an audio track."""
+
+    files: list[tuple[str, str]]  # (path, mime)
+    original_bytes: int
+    workdir: str = field(repr=False, default="")
+
+    @property
+    def bytes(self) -> int:
+        return sum(os.path.getsize(path) for path, _ in self.files)
+
+    def cleanup(self) -> None:
+        if self.workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def over_budget(path: str) -> bool:
+    return (
+        settings.MEDIA_TRANSCODE_ENABLED
+        and os.path.getsize(path) > settings.MEDIA_BYTE_BUDGET_MB * _MB
+    )
+
+
+def _run(stream: Any) -> None:
+    # ffmpeg-python only builds the command line; the process runs under a hard time limit.
+    # Global options go first: ffmpeg ignores options trailing the output file.
+    cmd = ["ffmpeg", "-y", "-nostdin", "-loglevel", "error", *stream.compile()[1:]]
+    subprocess.run(
+        cmd,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        timeout=settings.MEDIA_TRANSCODE_TIMEOUT_SECONDS,
+    )
+
+
+def _audio_args() -> dict:
+    return {
+        "vn": None,
+        "ac": 1,
+        "ar": 16000 if settings.MEDIA_AUDIO_BITRATE_KBPS <= 32 else 24000,
+        "acodec": "libopus",
+        "audio_bitrate": f"{settings.MEDIA_AUDIO_BITRATE_KBPS}k",
+    }
+
+
+def _transcode_audio(src: str, workdir: str) -> list[tuple[str, str]]:
+    import ffmpeg
+
+    out = os.path.join(workdir, "audio.ogg")
+    _run(ffmpeg.input(src).output(out, **_audio_args()))
+    return [(out, "audio/ogg")]
+
+
+def _reduce_video(src: str, workdir: str) -> list[tuple[str, str]]:
+    import ffmpeg
+
+    height = settings.MEDIA_VIDEO_MAX_HEIGHT
+    scale = f"scale=-2:'min({height},ih)'"
+    if settings.MEDIA_VIDEO_MODE == "keyframes":
+        # A frame every MEDIA_KEYFRAME_INTERVAL_SECONDS plus the audio track
+        pattern = os.path.join(workdir, "frame-%03d.jpg")
+        every = max(settings.MEDIA_KEYFRAME_INTERVAL_SECONDS, 1)
+        _run(
+            ffmpeg.input(src).output(
+                pattern,
+                vf=f"fps=1/{every},{scale}",
+                **{"frames:v": settings.MEDIA_MAX_KEYFRAMES, "q:v": 5},
+            )
+        )
+        frames = sorted(f for f in os.listdir(workdir) if f.startswith("frame-"))
+        files = [(os.path.join(workdir, f), "image/jpeg") for f in frames]
+        try:
+            files += _transcode_audio(src, workdir)
+        except subprocess.CalledProcessError:
+            pass  # silent video: no audio stream
+        return files
+    out = os.path.join(workdir, "video.mp4")
+    _run(
+        ffmpeg.input(src).output(
+            out,
+            vf=f"fps={settings.MEDIA_VIDEO_FPS},{scale}",
+            vcodec="libx264",
+            preset="veryfast",
+            crf=32,
+            acodec="aac",
+            audio_bitrate="48k",
+            ac=1,
+            movflags="+faststart",
+        )
+    )
+    return [(out, "video/mp4")]
+
+
+def reduce_media(path: str, mime: str) -> ReducedMedia | None:
+    """Transcode ``path`` to a compact representation; ``None`` if that is not smaller.
+
+    Audio becomes mono Opus at ``MEDIA_AUDIO_BITRATE_KBPS``. Video is
+    re-encoded at ``MEDIA_VIDEO_FPS`` / ``MEDIA_VIDEO_MAX_HEIGHT``, or with
+    ``MEDIA_VIDEO_MODE=keyframes`` replaced by sampled JPEG frames plus the
+    audio track. A missing ffmpeg, a failure or the time limit all yield
+    ``None`` so the caller keeps the original.
+    """
+
+    original = os.path.getsize(path)
+    workdir = tempfile.mkdtemp(prefix="fibz_media_")
+    started = time.perf_counter()
+    try:
+        if mime.startswith("audio/"):
+            files = _transcode_audio(path, workdir)
+        elif mime.startswith("video/"):
+            files = _reduce_video(path, workdir)
+        else:
+            files = []
+    except subprocess.TimeoutExpired:
+        metrics.inc("media.transcode_timeouts")
+        log.warning(
+            "media_transcode_timeout", extra={"extra_fields": {"bytes": original, "mime": mime}}
+        )
+        files = []
+    except Exception as exc:
+        metrics.inc("media.transcode_failed")
+        log.warning(
+            "media_transcode_failed",
+            extra={
+                "extra_fields": {"bytes": original, "mime": mime, "error": exc.__class__.__name__}
+            },
+        )
+        files = []
+    reduced = ReducedMedia(files, original, workdir)
+    if not files or reduced.bytes >= original:
+        reduced.cleanup()
+        return None
+    metrics.inc("media.transcoded")
+    metrics.inc("media.bytes_saved", original - reduced.bytes)
+    log.info(
+        "media_transcoded",
+        extra={
+            "extra_fields": {
+                "mime": mime,
+                "bytes_in": original,
+                "bytes_out": reduced.bytes,
+                "files": len(files),
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        },
+    )
+    return reduced
+
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def submit_reduce(path: str, mime: str) -> Future:
+    """Run ``reduce_media`` with at most ``MEDIA_TRANSCODE_WORKERS`` ffmpeg processes at once."""
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.MEDIA_TRANSCODE_WORKERS), thread_name_prefix="transcode"
+            )
+    return _pool.submit(reduce_media, path, mime)
+
+
+__all__ = ["ReducedMedia", "over_budget", "reduce_media", "submit_reduce"]
@@ -1,7 +1,8 @@
 from __future__ import annotations
-from typing import List, Tuple, Dict
-from pypdf import PdfReader
-import pathlib, hashlib
+
+import hashlib
+import pathlib
+
 
 def fingerprint(path: str) -> str:
     p = pathlib.Path(path)
@@ -11,25 +12,43 @@ def fingerprint(path: str) -> str:
             h.update(chunk)
     return h.hexdigest()[:16]
 
-def chunk_text(text: str, max_chars: int = 3000) -> List[str]:
+
+def chunk_id(fp: str, page: int | None, text: str) -> str:
+    """Stable chunk key: file fingerprint + page + content hash (same bytes -> same key)."""
+    digest = hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()[:12]
+    return f"{fp}:p{page or 0}:{digest}"
+
+
+def chunk_text(text: str, max_chars: int = 3000) -> list[str]:
     chunks = []
     i = 0
     while i < len(text):
-        chunks.append(text[i:i+max_chars])
+        chunks.append(text[i : i + max_chars])
         i += max_chars
     return chunks
 
-def extract_pdf(path: str) -> List[Dict]:
+
+def extract_pdf(path: str) -> list[dict]:
+    from pypdf import PdfReader
+
     p = pathlib.Path(path)
     fp = fingerprint(str(p))
     reader = PdfReader(str(p))
-    records: List[Dict] = []
+    records: list[dict] = []
     for page_num, page in enumerate(reader.pages, start=1):
         t = page.extract_text() or ""
         for ch in chunk_text(t):
-            records.append({
-                "id": f"pdf:{fp}:p{page_num}:{hash(ch)%10_000_000}",
-                "text": ch,
-                "meta": {"modality":"file","filetype":"pdf","filename":p.name,"page":page_num,"fingerprint":fp},
-            })
+            records.append(
+                {
+                    "id": f"pdf:{chunk_id(fp, page_num, ch)}",
+                    "text": ch,
+                    "meta": {
+                        "modality": "file",
+                        "filetype": "pdf",
+                        "filename": p.name,
+                        "page": page_num,
+                        "fingerprint": fp,
+                    },
+                }
+            )
     return records
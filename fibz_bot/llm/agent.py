@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import json
-from typing import Any, List
-
-from vertexai.generative_models import FunctionCall, Part
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any
 
 from fibz_bot.llm.cache import PromptCache
 from fibz_bot.llm.prompts import make_system_prompt
 from fibz_bot.llm.router import ModelRouter
 from fibz_bot.llm.tools import dispatch_function, toolset
 from fibz_bot.utils.backoff import retry
+from fibz_bot.utils.deadline import Deadline
+
+if TYPE_CHECKING:  # pragma: no cover - vertexai is imported lazily (slow to import)
+    from vertexai.generative_models import Part
 
 
 class Agent:
@@ -57,7 +60,9 @@ def run(
         needs_reasoning: bool = True,
         request_context: dict[str, Any] | None = None,
         max_tool_steps: int = 3,
+        deadline: Deadline | None = None,
     ) -> str:
+        from vertexai.generative_models import FunctionCall, Part
 
         cached = self.cache.get(core, user, server, policy_text)
         if cached:
@@ -74,7 +79,7 @@ def run(
             needs_reasoning=needs_reasoning,
         )
 
-        parts: List[Part] = [Part.from_text(system_instruction)]
+        parts: list[Part] = [Part.from_text(system_instruction)]
         if media_parts:
             parts.extend(media_parts)
         parts.append(Part.from_text(question))
@@ -87,6 +92,7 @@ def run(
                 generation_config={"max_output_tokens": 1024},
             ),
             operation="vertex_generate",
+            deadline=deadline,
         )
 
         # If the model emitted a malformed tool call, try once without tools
@@ -97,26 +103,36 @@ def run(
                     generation_config={"max_output_tokens": 1024},
                 ),
                 operation="vertex_generate",
+                deadline=deadline,
             )
 
         # Tool loop
         for _ in range(max_tool_steps):
-            calls: List[FunctionCall] = []
+            calls: list[FunctionCall] = []
             for cand in getattr(resp, "candidates", []) or []:
                 content = getattr(cand, "content", None)
-                for part in (getattr(content, "parts", []) or []):
+                for part in getattr(content, "parts", []) or []:
                     fc = getattr(part, "function_call", None)
                     if isinstance(fc, FunctionCall):
                         calls.append(fc)
 
             if not calls:
                 return self._safe_text(resp)
+            if deadline is not None:
+                deadline.check("tool_loop")
 
-            tool_responses: List[Part] = []
+            tool_responses: list[Part] = []
             for call in calls:
                 name = call.name
                 args = call.args or {}
-                result = dispatch_function(request_context["memory"], name, args, request_context or {})
+                with deadline.stage("tools") if deadline is not None else nullcontext():
+                    result = dispatch_function(
+                        request_context["memory"],
+                        name,
+                        args,
+                        request_context or {},
+                        deadline=deadline,
+                    )
                 # Return JSON text to the model to avoid malformed payloads
                 result_text = json.dumps(result, ensure_ascii=False)
                 tool_responses.append(
@@ -133,6 +149,7 @@ def run(
                     generation_config={"max_output_tokens": 1024},
                 ),
                 operation="vertex_generate",
+                deadline=deadline,
             )
 
         return self._safe_text(resp)
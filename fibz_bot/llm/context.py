@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from fibz_bot.config import settings
+from fibz_bot.utils.metrics import metrics
+
+DEFAULT_SECTION_ORDER = ("file", "entity", "dialogue", "retrieval")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_MIN_SHINGLES_FOR_NEAR_DUP = 3
+_MIN_TRUNCATE_TOKENS = 64
+# Embedding cosine above which two candidates are treated as the same text
+_EMBED_DUP_COSINE = 0.97
+
+
+@dataclass
+class ContextCandidate:
+    """One piece of prompt context plus what the assembler needs to rank it."""
+
+    text: str
+    source: str
+    score: float = 1.0
+    embedding: Sequence[float] | None = None
+    id: str | None = None
+    meta: dict[str, Any] = field(default_factory=dict)
+
+
+def estimate_tokens(text: str) -> int:
+    # Same rough chars/4 heuristic Agent.run uses for routing
+    return max(len(text) // 4, 1)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def _shingles(text: str, n: int = 3) -> set[str]:
+    words = _normalize(text).split()
+    if len(words) < n:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + n]) for i in range(len(words) - n + 1)}
+
+
+def _overlap(a: set[str], b: set[str]) -> float:
+    """Containment of the smaller shingle set in the larger one."""
+
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    va = np.asarray(a, dtype=np.float32)
+    vb = np.asarray(b, dtype=np.float32)
+    if va.shape != vb.shape:
+        return 0.0
+    denom = float(np.linalg.norm(va) * np.linalg.norm(vb))
+    if denom == 0.0:
+        return 0.0
+    return float(np.dot(va, vb) / denom)
+
+
+class _Item:
+    __slots__ = ("cand", "norm", "shingles", "tokens")
+
+    def __init__(self, cand: ContextCandidate) -> None:
+        self.cand = cand
+        self.norm = _normalize(cand.text)
+        self.shingles = _shingles(cand.text)
+        self.tokens = estimate_tokens(cand.text)
+
+    def similarity(self, other: _Item) -> float:
+        a, b = self.cand.embedding, other.cand.embedding
+        if a is not None and b is not None and len(a) and len(b):
+            return _cosine(a, b)
+        return _overlap(self.shingles, other.shingles)
+
+
+def _section_rank(order: Sequence[str]) -> dict[str, int]:
+    return {name: i for i, name in enumerate(order)}
+
+
+def _dedupe(items: list[_Item], threshold: float) -> tuple[list[_Item], int]:
+    kept: list[_Item] = []
+    seen: set[str] = set()
+    dropped = 0
+    for item in items:
+        if not item.norm:
+            dropped += 1
+            continue
+        digest = hashlib.sha1(item.norm.encode("utf-8")).hexdigest()
+        if digest in seen:
+            dropped += 1
+            continue
+        near = False
+        if len(item.shingles) >= _MIN_SHINGLES_FOR_NEAR_DUP:
+            for other in kept:
+                if item.norm in other.norm or _overlap(item.shingles, other.shingles) >= threshold:
+                    near = True
+                    break
+                a, b = item.cand.embedding, other.cand.embedding
+                if a is not None and b is not None and _cosine(a, b) >= _EMBED_DUP_COSINE:
+                    near = True
+                    break
+        if near:
+            dropped += 1
+            continue
+        seen.add(digest)
+        kept.append(item)
+    return kept, dropped
+
+
+def _mmr(items: list[_Item], selected: list[_Item], lam: float) -> list[_Item]:
+    """Order ``items`` by maximal marginal relevance against ``selected``."""
+
+    pool = list(items)
+    chosen = list(selected)
+    out: list[_Item] = []
+    while pool:
+        best_idx = 0
+        best_val = float("-inf")
+        for i, item in enumerate(pool):
+            redundancy = max((item.similarity(s) for s in chosen), default=0.0)
+            val = lam * item.cand.score - (1.0 - lam) * redundancy
+            if val > best_val:
+                best_idx, best_val = i, val
+        pick = pool.pop(best_idx)
+        out.append(pick)
+        chosen.append(pick)
+    return out
+
+
+def _truncate(text: str, tokens: int) -> str:
+    return text[: max(tokens * 4 - 2, 0)].rstrip() + " …"
+
+
+def assemble_context(
+    candidates: Iterable[ContextCandidate],
+    *,
+    budget_tokens: int | None = None,
+    section_order: Sequence[str] | None = None,
+    mmr_lambda: float | None = None,
+    near_dup_threshold: float | None = None,
+) -> list[ContextCandidate]:
+    """Dedupe, diversify and pack context candidates into a token budget.
+
+    Candidates are deduplicated in section-priority order (so the copy in the
+    higher-priority section survives), each section is ordered by MMR against
+    everything already selected, and sections are packed in priority order
+    until ``budget_tokens`` is used. Unknown sources go last.
+    """
+
+    budget = settings.CONTEXT_TOKEN_BUDGET if budget_tokens is None else budget_tokens
+    order = tuple(section_order or _configured_order())
+    lam = settings.CONTEXT_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+    threshold = (
+        settings.CONTEXT_NEAR_DUP_THRESHOLD if near_dup_threshold is None else near_dup_threshold
+    )
+    rank = _section_rank(order)
+
+    items = [_Item(c) for c in candidates if c.text and c.text.strip()]
+    total_in = len(items)
+    items.sort(key=lambda it: (rank.get(it.cand.source, len(rank)), -it.cand.score))
+    items, dup_dropped = _dedupe(items, threshold)
+
+    sections: dict[str, list[_Item]] = {}
+    for item in items:
+        sections.setdefault(item.cand.source, []).append(item)
+    ordered_sources = sorted(sections, key=lambda s: rank.get(s, len(rank)))
+
+    selected: list[_Item] = []
+    out: list[ContextCandidate] = []
+    remaining = budget
+    budget_dropped = 0
+    for source in ordered_sources:
+        for item in _mmr(sections[source], selected, lam):
+            if item.tokens <= remaining:
+                out.append(item.cand)
+                remaining -= item.tokens
+            elif remaining >= _MIN_TRUNCATE_TOKENS:
+                cand = item.cand
+                out.append(
+                    ContextCandidate(
+                        text=_truncate(cand.text, remaining),
+                        source=cand.source,
+                        score=cand.score,
+                        embedding=cand.embedding,
+                        id=cand.id,
+                        meta=dict(cand.meta, truncated=True),
+                    )
+                )
+                remaining = 0
+            else:
+                budget_dropped += 1
+                continue
+            selected.append(item)
+
+    metrics.inc("context.candidates", total_in)
+    metrics.inc("context.dropped_duplicates", dup_dropped)
+    metrics.inc("context.dropped_budget", budget_dropped)
+    metrics.inc("context.tokens", budget - remaining)
+    return out
+
+
+def _configured_order() -> tuple[str, ...]:
+    raw = settings.CONTEXT_SECTION_ORDER or ""
+    order = tuple(part.strip() for part in raw.split(",") if part.strip())
+    return order or DEFAULT_SECTION_ORDER
+
+
+def candidates_from_retrieval(
+    res: dict[str, Any], source: str = "retrieval"
+) -> list[ContextCandidate]:
+    """Turn a ``MemoryStore.retrieve``/``search_entities`` result into candidates."""
+
+    ids = res.get("ids") or []
+    docs = res.get("documents") or []
+    metas = res.get("metadatas") or []
+    scores = res.get("scores") or []
+    embeddings = res.get("embeddings") or []
+    out: list[ContextCandidate] = []
+    for i, doc in enumerate(docs):
+        out.append(
+            ContextCandidate(
+                text=doc or "",
+                source=source,
+                score=float(scores[i]) if i < len(scores) else 0.0,
+                embedding=embeddings[i] if i < len(embeddings) else None,
+                id=ids[i] if i < len(ids) else None,
+                meta=(metas[i] if i < len(metas) else None) or {},
+            )
+        )
+    return out
+
+
+def gather_candidates(
+    *,
+    dialogue: str = "",
+    entities: Iterable[str] = (),
+    retrieved: dict[str, Any] | None = None,
+    files: Iterable[str] = (),
+) -> list[ContextCandidate]:
+    """Collect the handler's context sources as tagged candidates."""
+
+    out: list[ContextCandidate] = []
+    if dialogue:
+        out.append(ContextCandidate(text=dialogue, source="dialogue"))
+    out.extend(ContextCandidate(text=doc, source="entity") for doc in entities)
+    out.extend(ContextCandidate(text=line, source="file") for line in files)
+    if retrieved:
+        out.extend(candidates_from_retrieval(retrieved))
+    return out
+
+
+__all__ = [
+    "ContextCandidate",
+    "assemble_context",
+    "candidates_from_retrieval",
+    "estimate_tokens",
+    "gather_candidates",
+]
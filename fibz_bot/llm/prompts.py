@@ -1,4 +1,5 @@
 from __future__ import annotations
+
 from fibz_bot.policy.precedence import build_prompt_text
 
 CAPABILITIES_TEXT = """
@@ -30,6 +31,17 @@
 """
 
 
+ARCHIVE_SUMMARY_PROMPT = """You compress an old chat transcript from one Discord channel into
+a dense archive note for long-term memory.
+
+Write plain text (no JSON, no headings), at most ~200 words:
+- Keep names/IDs as written, decisions, answers given, facts stated, links and file names, dates.
+- Drop greetings, filler and repeated content.
+- Attribute statements to their speaker when it matters.
+- Do not add anything that is not in the transcript.
+"""
+
+
 def make_system_prompt(core_text: str, user_text: str, server_text: str, policy_text: str) -> str:
     instr = build_prompt_text(core_text, user_text, server_text)
     return (
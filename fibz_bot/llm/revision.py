@@ -1,10 +1,9 @@
 from __future__ import annotations
 
 import json
+from collections.abc import Iterable
 from datetime import datetime
-from typing import Any, Iterable
-
-from vertexai.generative_models import Part
+from typing import Any
 
 from fibz_bot.config import settings
 from fibz_bot.llm.prompts import ENTITY_EXTRACTION_PROMPT
@@ -61,6 +60,8 @@ def _safe_text(resp) -> str:
 
 
 def extract_entities(router: ModelRouter, payload: str) -> dict[str, Any]:
+    from vertexai.generative_models import Part
+
     prompt = ENTITY_EXTRACTION_PROMPT.strip() + "\n\n" + payload.strip()
     resp = retry(
         lambda: router.model_flash.generate_content(
@@ -207,7 +208,9 @@ async def run_entity_revision_pass(
             "source": "auto_revision",
             "updated_at": datetime.utcnow().isoformat(),
             "guild_id": guild_id,
-            "channels": ",".join(sorted(channels)) if channels else existing_meta.get("channels", ""),
+            "channels": (
+                ",".join(sorted(channels)) if channels else existing_meta.get("channels", "")
+            ),
         }
         content = "\n".join(f"- {fact}" for fact in combined)
         memory.upsert_entity(entity_id, content, metadata)
@@ -1,30 +1,41 @@
 from __future__ import annotations
 
 import random
-
-import vertexai
-from google.cloud import aiplatform
-from vertexai.generative_models import GenerativeModel
-from vertexai.language_models import TextEmbeddingModel
+from typing import TYPE_CHECKING
 
 from fibz_bot.config import settings
 from fibz_bot.utils.backoff import retry
+from fibz_bot.utils.deadline import Deadline
 from fibz_bot.utils.logging import get_logger
 from fibz_bot.utils.metrics import record_model_choice
 
+if TYPE_CHECKING:  # pragma: no cover - vertexai is imported lazily (slow to import)
+    from vertexai.generative_models import GenerativeModel
+    from vertexai.language_models import TextEmbeddingModel
+
 log = get_logger(__name__)
 
-def init_vertex():
+
+def init_vertex() -> None:
+    import vertexai
+    from google.cloud import aiplatform
+
     vertexai.init(project=settings.VERTEX_PROJECT_ID, location=settings.VERTEX_LOCATION)
     aiplatform.init(project=settings.VERTEX_PROJECT_ID, location=settings.VERTEX_LOCATION)
 
+
 class ModelRouter:
     """Route between Flash and Pro; escalate for long/complex turns."""
-    def __init__(self):
+
+    def __init__(self) -> None:
+        from vertexai.generative_models import GenerativeModel
+        from vertexai.language_models import TextEmbeddingModel
+
         init_vertex()
         self.model_flash = GenerativeModel(settings.VERTEX_MODEL_FLASH)
         self.model_pro = GenerativeModel(settings.VERTEX_MODEL_PRO)
         self.embed_model = TextEmbeddingModel.from_pretrained(settings.VERTEX_EMBED_MODEL)
+        self._embed_models: dict[str, TextEmbeddingModel] = {}
 
     def choose_model(self, prompt_tokens: int, needs_reasoning: bool = False) -> GenerativeModel:
         if needs_reasoning or prompt_tokens > 3000:
@@ -38,18 +49,40 @@ def choose_model(self, prompt_tokens: int, needs_reasoning: bool = False) -> Gen
                 model = self.model_pro
                 tier = "pro"
         record_model_choice(tier)
-        log.info("model_choice", extra={"extra_fields": {"tier": tier, "prompt_tokens": prompt_tokens}})
+        log.info(
+            "model_choice", extra={"extra_fields": {"tier": tier, "prompt_tokens": prompt_tokens}}
+        )
+        return model
+
+    def _embedding_model(self, name: str) -> TextEmbeddingModel:
+        if name == settings.VERTEX_EMBED_MODEL:
+            return self.embed_model
+        model = self._embed_models.get(name)
+        if model is None:
+            from vertexai.language_models import TextEmbeddingModel
+
+            model = self._embed_models[name] = TextEmbeddingModel.from_pretrained(name)
         return model
 
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+    def embed_texts(
+        self,
+        texts: list[str],
+        deadline: Deadline | None = None,
+        *,
+        model: str | None = None,
+        dimensionality: int | None = None,
+    ) -> list[list[float]]:
+        """Embed with the configured model/size, or an explicit ``model``/``dimensionality``.
+
+        ``dimensionality`` 0 keeps the model's native size.
+        """
+
+        embed_model = self._embedding_model(model or settings.VERTEX_EMBED_MODEL)
+        dim = settings.VERTEX_EMBED_DIM if dimensionality is None else dimensionality
+        kwargs = {"output_dimensionality": dim} if dim else {}
         embeddings = retry(
-            lambda: self.embed_model.get_embeddings(texts),
+            lambda: embed_model.get_embeddings(texts, **kwargs),
             operation="vertex_embed",
+            deadline=deadline,
         )
         return [e.values for e in embeddings]
-
-try:
-    from vertexai.generative_models import GenerativeModel, Part, Content, SafetySetting, GenerationConfig
-except ImportError:
-    # Older SDKs used the preview path; keep linters quiet too
-    from vertexai.preview.generative_models import GenerativeModel, Part, Content, SafetySetting, GenerationConfig  # type: ignore[reportMissingImports]
@@ -1,11 +1,22 @@
 from __future__ import annotations
-from typing import Any, Dict, List
-from vertexai.generative_models import Tool, FunctionDeclaration
+
+import ast
+import operator
+import time
+from typing import TYPE_CHECKING, Any
+
 from fibz_bot.memory.store import MemoryStore
-from fibz_bot.web.search import web_search as do_search
+from fibz_bot.utils.deadline import Deadline
 from fibz_bot.utils.metrics import record_tool_call
+from fibz_bot.web.search import web_search as do_search
+
+if TYPE_CHECKING:  # pragma: no cover - vertexai is imported lazily (slow to import)
+    from vertexai.generative_models import Tool
+
 
 def toolset() -> list[Tool]:
+    from vertexai.generative_models import FunctionDeclaration, Tool
+
     memory_funcs = [
         FunctionDeclaration(
             name="retrieve_memory",
@@ -16,6 +27,10 @@ def toolset() -> list[Tool]:
                     "query": {"type": "string"},
                     "k": {"type": "integer"},
                     "channel_only": {"type": "boolean"},
+                    "since_hours": {
+                        "type": "number",
+                        "description": "Only consider messages from the last N hours.",
+                    },
                 },
                 "required": ["query"],
             },
@@ -72,35 +87,65 @@ def toolset() -> list[Tool]:
     return [Tool(function_declarations=memory_funcs + util_funcs + web_funcs)]
 
 
-import time, ast, operator
-
 _ALLOWED_OPS = {
-    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
-    ast.Div: operator.truediv, ast.Pow: operator.pow, ast.Mod: operator.mod,
-    ast.USub: operator.neg, ast.UAdd: operator.pos, ast.FloorDiv: operator.floordiv,
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.Mod: operator.mod,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.FloorDiv: operator.floordiv,
 }
 
+
 def _eval_expr(expr: str) -> float:
     node = ast.parse(expr, mode="eval")
+
     def _eval(n):
-        if isinstance(n, ast.Expression): return _eval(n.body)
-        if hasattr(ast, "Num") and isinstance(n, ast.Num): return n.n
-        if isinstance(n, ast.Constant): return n.value
-        if isinstance(n, ast.BinOp): return _ALLOWED_OPS[type(n.op)](_eval(n.left), _eval(n.right))
-        if isinstance(n, ast.UnaryOp): return _ALLOWED_OPS[type(n.op)](_eval(n.operand))
+        if isinstance(n, ast.Expression):
+            return _eval(n.body)
+        if hasattr(ast, "Num") and isinstance(n, ast.Num):
+            return n.n
+        if isinstance(n, ast.Constant):
+            return n.value
+        if isinstance(n, ast.BinOp):
+            return _ALLOWED_OPS[type(n.op)](_eval(n.left), _eval(n.right))
+        if isinstance(n, ast.UnaryOp):
+            return _ALLOWED_OPS[type(n.op)](_eval(n.operand))
         raise ValueError("Unsupported expression")
+
     return float(_eval(node))
 
-def dispatch_function(memory: MemoryStore, fn_name: str, args: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+
+def dispatch_function(
+    memory: MemoryStore,
+    fn_name: str,
+    args: dict[str, Any],
+    context: dict[str, Any],
+    deadline: Deadline | None = None,
+) -> dict[str, Any]:
     record_tool_call(fn_name)
+    if deadline is not None:
+        deadline.check(f"tool.{fn_name}")
     if fn_name == "retrieve_memory":
         query = args.get("query", "")
         k = int(args.get("k", 6))
         channel_only = bool(args.get("channel_only", True))
+        guild_id = str(context.get("guild_id") or "")
         where = {}
+        if guild_id.isdigit():
+            where["guild_id"] = guild_id
+        # Cross-channel reads only when the guild allows them
+        if not (guild_id.isdigit() and memory.get_cross_channel(guild_id)):
+            channel_only = True
         if channel_only and context.get("channel_id"):
             where["channel_id"] = str(context["channel_id"])
-        res = memory.retrieve(query, k=k, where=where or None)
+        since = None
+        if args.get("since_hours"):
+            since = int((time.time() - float(args["since_hours"]) * 3600) * 1000)
+        res = memory.retrieve(query, k=k, where=where or None, deadline=deadline, since=since)
         items = []
         for doc, meta in zip(res.get("documents", []), res.get("metadatas", [])):
             items.append({"text": doc, "meta": meta})
@@ -118,6 +163,7 @@ def dispatch_function(memory: MemoryStore, fn_name: str, args: Dict[str, Any], c
             "tags": tags or ["memo"],
         }
         from fibz_bot.memory.store import MessageMeta
+
         memory.upsert_message(meta["message_id"], text, MessageMeta(**meta))
         return {"status": "stored", "tags": tags}
     if fn_name == "calculator":
@@ -132,6 +178,6 @@ def dispatch_function(memory: MemoryStore, fn_name: str, args: Dict[str, Any], c
     if fn_name == "web_search":
         query = args.get("query", "")
         num = int(args.get("num", 5))
-        results = do_search(query, num=num) or []
+        results = do_search(query, num=num, deadline=deadline) or []
         return {"results": results}
     return {"error": f"Unknown function {fn_name}"}
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+from fibz_bot.config import settings
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+if TYPE_CHECKING:  # pragma: no cover - imported for type checking only
+    from fibz_bot.llm.router import ModelRouter
+    from fibz_bot.memory.store import MemoryStore
+
+log = get_logger(__name__)
+
+_HOUR_MS = 3_600_000
+_DAY_MS = 24 * _HOUR_MS
+# Only conversation turns are archived; indexed documents (/summarize) stay verbatim
+_ARCHIVABLE_ROLES = ["user", "assistant"]
+
+GroupKey = tuple[str, str, int]  # guild_id, channel_id, window_start_ms
+
+
+def pins_user(where: dict[str, Any] | None) -> bool:
+    """True if ``where`` filters on ``user_id`` anywhere (including ``$and``/``$or``).
+
+    An archive row summarizes every speaker in its window, so a user-scoped
+    read must not fall back to archives: it would quote the other speakers.
+    """
+
+    if not where:
+        return False
+    for key, value in where.items():
+        if key == "user_id":
+            return True
+        if key in ("$and", "$or") and any(pins_user(w) for w in value):
+            return True
+    return False
+
+
+@dataclass
+class ArchiveReport:
+    groups: int = 0
+    archived_rows: int = 0
+    archives_written: int = 0
+    model_calls: int = 0
+    errors: dict[str, str] = field(default_factory=dict)
+    duration: float = 0.0
+    finished_at: str | None = None
+
+    def summary(self) -> str:
+        text = (
+            f"{self.archived_rows} row(s) in {self.groups} window(s) -> "
+            f"{self.archives_written} archive(s) in {self.duration}s"
+        )
+        if self.errors:
+            text += f"; {len(self.errors)} window(s) failed"
+        return text
+
+
+def summarize_transcript(router: ModelRouter, transcript: str) -> str:
+    """Dense archive note for one transcript chunk (Flash)."""
+
+    from vertexai.generative_models import Part
+
+    from fibz_bot.llm.prompts import ARCHIVE_SUMMARY_PROMPT
+    from fibz_bot.llm.revision import _safe_text
+    from fibz_bot.utils.backoff import retry
+
+    prompt = ARCHIVE_SUMMARY_PROMPT.strip() + "\n\nTRANSCRIPT:\n" + transcript
+    resp = retry(
+        lambda: router.model_flash.generate_content(
+            contents=[Part.from_text(prompt)],
+            generation_config={"max_output_tokens": 512},
+        ),
+        operation="archive_summary",
+    )
+    return _safe_text(resp).strip()
+
+
+def plan_windows(
+    memory: MemoryStore, cutoff_ms: int, window_ms: int, max_groups: int
+) -> dict[GroupKey, list[str]]:
+    """Group archivable message IDs older than ``cutoff_ms`` by channel and window."""
+
+    where = {
+        "$and": [
+            {"created_at_ms": {"$lt": cutoff_ms}},
+            {"role": {"$in": _ARCHIVABLE_ROLES}},
+        ]
+    }
+    groups: dict[GroupKey, list[str]] = {}
+    for message_id, meta in memory.iter_message_metas(where):
+        meta = meta or {}
+        key = (
+            str(meta.get("guild_id") or ""),
+            str(meta.get("channel_id") or ""),
+            int(meta["created_at_ms"]) // window_ms * window_ms,
+        )
+        if key not in groups and len(groups) >= max_groups:
+            continue
+        groups.setdefault(key, []).append(message_id)
+    return groups
+
+
+def _transcript_chunks(rows: list[dict], max_chars: int) -> list[str]:
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for row in rows:
+        meta = row["meta"]
+        when = datetime.fromtimestamp(int(meta["created_at_ms"]) / 1000, timezone.utc)
+        speaker = (
+            "Fibz"
+            if meta.get("role") == "assistant"
+            else meta.get("username") or f"user {meta.get('user_id', '')}"
+        )
+        line = f"[{when:%Y-%m-%d %H:%M}] {speaker}: {(row['text'] or '').strip()[:2000]}"
+        if current and size + len(line) > max_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+class ArchiveJob:
+    """Moves old conversation windows from ``messages`` into ``archives``.
+
+    Each window (guild, channel, ``ARCHIVE_WINDOW_HOURS`` slot) is summarized
+    into one or more archive documents that carry the source message IDs.
+    Archives are written before the raw rows are deleted, so a failure at worst
+    leaves both copies.
+    """
+
+    def __init__(self, summarize: Callable[[ModelRouter, str], str] | None = None) -> None:
+        self._summarize = summarize or summarize_transcript
+        self._running = threading.Lock()
+        self.last_report: ArchiveReport | None = None
+
+    def _archive_window(
+        self,
+        memory: MemoryStore,
+        router: ModelRouter,
+        key: GroupKey,
+        ids: list[str],
+        report: ArchiveReport,
+    ) -> None:
+        guild_id, channel_id, window_start = key
+        # Pinning guild/channel keeps a sharded store on the one shard holding the window
+        scope = (
+            {"guild_id": guild_id, "channel_id": channel_id} if guild_id and channel_id else None
+        )
+        res = memory.messages.get(ids=ids, where=scope, include=["documents", "metadatas"])
+        rows = [
+            {"id": i, "text": d, "meta": m or {}}
+            for i, d, m in zip(
+                res.get("ids") or [], res.get("documents") or [], res.get("metadatas") or []
+            )
+        ]
+        if not rows:
+            return
+        rows.sort(key=lambda r: int(r["meta"]["created_at_ms"]))
+        written: list[str] = []
+        for chunk in _transcript_chunks(rows, settings.ARCHIVE_MAX_INPUT_CHARS):
+            if len(chunk) <= settings.ARCHIVE_VERBATIM_CHARS:
+                text = chunk
+            else:
+                text = self._summarize(router, chunk)
+                report.model_calls += 1
+            if not text:
+                raise ValueError("empty summary")
+            written.append(text)
+        source_ids = [r["id"] for r in rows]
+        digest = hashlib.sha1(",".join(source_ids).encode("utf-8")).hexdigest()[:12]
+        last_ms = int(rows[-1]["meta"]["created_at_ms"])
+        user_ids = sorted({str(r["meta"].get("user_id")) for r in rows if r["meta"].get("user_id")})
+        for n, text in enumerate(written):
+            memory.upsert_archive(
+                f"archive:{guild_id}:{channel_id}:{window_start}:{digest}:{n}",
+                text,
+                {
+                    "type": "archive",
+                    "role": "archive",
+                    "guild_id": guild_id,
+                    "channel_id": channel_id,
+                    "window_start_ms": window_start,
+                    "window_end_ms": window_start + int(settings.ARCHIVE_WINDOW_HOURS * _HOUR_MS),
+                    "created_at_ms": last_ms,
+                    "created_at": datetime.fromtimestamp(last_ms / 1000, timezone.utc).isoformat(),
+                    "source_ids": json.dumps(source_ids),
+                    "source_count": len(source_ids),
+                    "user_ids": ",".join(user_ids),
+                    "part": n,
+                },
+            )
+        memory.delete_message_ids(source_ids, where=scope)
+        report.groups += 1
+        report.archived_rows += len(source_ids)
+        report.archives_written += len(written)
+
+    def run_once(self, memory: MemoryStore, router: ModelRouter) -> ArchiveReport | None:
+        """One archival pass (blocking); returns None if a pass is already running."""
+
+        if not self._running.acquire(blocking=False):
+            return None
+        report = ArchiveReport()
+        started = time.perf_counter()
+        try:
+            now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+            groups = plan_windows(
+                memory,
+                cutoff_ms=now_ms - int(settings.ARCHIVE_AFTER_DAYS * _DAY_MS),
+                window_ms=int(settings.ARCHIVE_WINDOW_HOURS * _HOUR_MS),
+                max_groups=settings.ARCHIVE_MAX_GROUPS_PER_RUN,
+            )
+            for key, ids in groups.items():
+                try:
+                    self._archive_window(memory, router, key, ids, report)
+                except Exception as exc:
+                    report.errors[":".join(map(str, key))] = exc.__class__.__name__
+                    log.warning(
+                        "archive_window_failed",
+                        extra={
+                            "extra_fields": {"window": list(key), "error": exc.__class__.__name__}
+                        },
+                    )
+            report.duration = round(time.perf_counter() - started, 3)
+            report.finished_at = datetime.now(timezone.utc).isoformat()
+            self.last_report = report
+            metrics.inc("archive.runs")
+            metrics.inc("archive.rows_archived", report.archived_rows)
+            metrics.inc("archive.model_calls", report.model_calls)
+            log.info("archive_run", extra={"extra_fields": asdict(report)})
+            return report
+        finally:
+            self._running.release()
+
+
+__all__ = [
+    "ArchiveJob",
+    "ArchiveReport",
+    "pins_user",
+    "plan_windows",
+    "summarize_transcript",
+]
@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any, Protocol
+
+import numpy as np
+
+from fibz_bot.config import settings
+from fibz_bot.utils.logging import get_logger
+
+log = get_logger(__name__)
+
+Where = dict[str, Any]
+
+# Our parameter names -> Chroma's collection configuration keys
+_HNSW_CONFIG_KEYS = {
+    "M": "max_neighbors",
+    "construction_ef": "ef_construction",
+    "search_ef": "ef_search",
+}
+
+_COMPARE_OPS = {"$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin"}
+
+
+class VectorCollection(Protocol):
+    """The subset of the Chroma collection API that ``MemoryStore`` relies on.
+
+    Results use Chroma's shapes: ``get`` returns flat lists, ``query`` returns
+    one list per query embedding, and ``distances`` are cosine distances
+    (``1 - cosine_similarity``).
+    """
+
+    name: str
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: list[str] | None = None,
+        metadatas: list[dict[str, Any]] | None = None,
+    ) -> None: ...
+
+    def update(
+        self,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict[str, Any]] | None = None,
+    ) -> None:
+        """Change documents/metadata in place; metadata keys are merged."""
+        ...
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: Where | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict[str, Any]: ...
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Where | None = None,
+        include: list[str] | None = None,
+    ) -> dict[str, Any]: ...
+
+    def delete(self, ids: list[str] | None = None, where: Where | None = None) -> None: ...
+
+    def count(self) -> int: ...
+
+    def peek(self, limit: int = 10) -> dict[str, Any]: ...
+
+    def compact(self) -> int:
+        """Reclaim space left by deletes; returns rows/slots reclaimed (0 if n/a)."""
+        ...
+
+
+class VectorBackend(Protocol):
+    def get_or_create_collection(
+        self, name: str, metadata: dict[str, Any] | None = None
+    ) -> VectorCollection: ...
+
+    def delete_collection(self, name: str) -> None: ...
+
+    def list_collection_names(self) -> list[str]: ...
+
+    def release_collection(self, name: str) -> None:
+        """Drop any cached handle/resources for ``name`` (it can be reopened later)."""
+        ...
+
+
+def hnsw_params(name: str) -> dict[str, int]:
+    """HNSW parameters for a logical collection: Settings defaults + per-collection overrides."""
+
+    params = {
+        "M": settings.HNSW_M,
+        "construction_ef": settings.HNSW_CONSTRUCTION_EF,
+        "search_ef": settings.HNSW_SEARCH_EF,
+    }
+    params.update(
+        {k: int(v) for k, v in settings.HNSW_COLLECTION_PARAMS.get(name, {}).items() if k in params}
+    )
+    return params
+
+
+def collection_metadata(name: str) -> dict[str, Any]:
+    """Creation metadata for a cosine collection with its configured HNSW parameters."""
+
+    return {"hnsw:space": "cosine", **{f"hnsw:{k}": v for k, v in hnsw_params(name).items()}}
+
+
+def _requested_hnsw(metadata: dict[str, Any] | None) -> dict[str, int]:
+    metadata = metadata or {}
+    return {k: int(metadata[f"hnsw:{k}"]) for k in _HNSW_CONFIG_KEYS if f"hnsw:{k}" in metadata}
+
+
+def normalize_where(where: Where | None) -> Where | None:
+    """Return a filter Chroma accepts: ``None`` for empty, ``$and`` for multi-key dicts."""
+
+    if not where:
+        return None
+    if len(where) == 1:
+        key, value = next(iter(where.items()))
+        if key in ("$and", "$or"):
+            return {key: [normalize_where(w) for w in value if w]}
+        return {key: value}
+    return {"$and": [{k: v} for k, v in where.items()]}
+
+
+def _compare(op: str, actual: Any, expected: Any) -> bool:
+    if op == "$eq":
+        return actual == expected
+    if op == "$ne":
+        return actual != expected
+    if op == "$in":
+        return actual in expected
+    if op == "$nin":
+        return actual not in expected
+    if actual is None:
+        return False
+    try:
+        if op == "$gt":
+            return actual > expected
+        if op == "$gte":
+            return actual >= expected
+        if op == "$lt":
+            return actual < expected
+        if op == "$lte":
+            return actual <= expected
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator {op}")
+
+
+def match_where(meta: dict[str, Any], where: Where | None) -> bool:
+    """Evaluate a Chroma-style metadata filter against one metadata dict."""
+
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(match_where(meta, w) for w in cond):
+                return False
+        elif key == "$or":
+            if not any(match_where(meta, w) for w in cond):
+                return False
+        elif isinstance(cond, dict) and cond and set(cond) <= _COMPARE_OPS:
+            actual = meta.get(key)
+            if not all(_compare(op, actual, expected) for op, expected in cond.items()):
+                return False
+        elif meta.get(key) != cond:
+            return False
+    return True
+
+
+class ChromaCollection:
+    """Chroma collection with filters normalized to what Chroma validates."""
+
+    def __init__(self, collection: Any):
+        self._col = collection
+        self.name = collection.name
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: list[str] | None = None,
+        metadatas: list[dict[str, Any]] | None = None,
+    ) -> None:
+        self._col.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def update(
+        self,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict[str, Any]] | None = None,
+    ) -> None:
+        self._col.update(ids=ids, documents=documents, metadatas=metadatas)
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: Where | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict[str, Any]:
+        kwargs: dict[str, Any] = {"ids": ids, "where": normalize_where(where)}
+        if limit is not None:
+            kwargs["limit"] = limit
+        if offset is not None:
+            kwargs["offset"] = offset
+        if include is not None:
+            kwargs["include"] = include
+        return self._col.get(**kwargs)
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Where | None = None,
+        include: list[str] | None = None,
+    ) -> dict[str, Any]:
+        kwargs: dict[str, Any] = {
+            "query_embeddings": query_embeddings,
+            "n_results": n_results,
+            "where": normalize_where(where),
+        }
+        if include is not None:
+            kwargs["include"] = include
+        return self._col.query(**kwargs)
+
+    def delete(self, ids: list[str] | None = None, where: Where | None = None) -> None:
+        self._col.delete(ids=ids, where=normalize_where(where))
+
+    def count(self) -> int:
+        return self._col.count()
+
+    def peek(self, limit: int = 10) -> dict[str, Any]:
+        return self._col.peek(limit=limit)
+
+    def compact(self) -> int:
+        # Chroma maintains its own HNSW/SQLite files and exposes no compaction call
+        return 0
+
+    def hnsw_config(self) -> dict[str, int]:
+        """Current ``M``/``construction_ef``/``search_ef`` of the underlying index."""
+
+        config = (getattr(self._col, "configuration_json", None) or {}).get("hnsw") or {}
+        return {
+            ours: config[theirs] for ours, theirs in _HNSW_CONFIG_KEYS.items() if theirs in config
+        }
+
+
+class ChromaBackend:
+    def __init__(self, path: str):
+        import chromadb  # deferred: slow to import, only needed once the store is opened
+
+        self.client = chromadb.PersistentClient(path=path)
+
+    def get_or_create_collection(
+        self, name: str, metadata: dict[str, Any] | None = None
+    ) -> ChromaCollection:
+        col = ChromaCollection(self.client.get_or_create_collection(name, metadata=metadata))
+        wanted = _requested_hnsw(metadata)
+        current = col.hnsw_config()
+        if "search_ef" in wanted and current.get("search_ef") not in (None, wanted["search_ef"]):
+            # search_ef is a query-time knob Chroma lets us change on a live collection
+            col._col.modify(configuration={"hnsw": {"ef_search": wanted["search_ef"]}})
+            current["search_ef"] = wanted["search_ef"]
+        stale = {
+            k: v for k, v in wanted.items() if k != "search_ef" and current.get(k) not in (None, v)
+        }
+        if stale:
+            log.warning(
+                "hnsw_params_differ",
+                extra={
+                    "extra_fields": {
+                        "collection": name,
+                        "wanted": stale,
+                        "current": {k: current.get(k) for k in stale},
+                        "hint": "run scripts/migrate_hnsw.py",
+                    }
+                },
+            )
+        return col
+
+    def reconfigure_collection(
+        self, name: str, metadata: dict[str, Any], page_size: int = 500
+    ) -> str:
+        """Apply HNSW ``metadata`` to an existing collection.
+
+        ``search_ef`` changes in place; ``M``/``construction_ef`` are fixed at
+        build time, so the collection is copied into a new one built with the
+        new parameters, which then takes over the name. Returns ``"unchanged"``,
+        ``"modified"`` or ``"rebuilt"``.
+        """
+
+        wanted = _requested_hnsw(metadata)
+        col = self.get_or_create_collection(name, metadata=metadata)
+        current = col.hnsw_config()
+        if all(current.get(k) in (None, v) for k, v in wanted.items() if k != "search_ef"):
+            return (
+                "unchanged" if current.get("search_ef") == wanted.get("search_ef") else "modified"
+            )
+
+        tmp_name = f"rebuild_{name}"
+        if tmp_name in self.list_collection_names():
+            self.client.delete_collection(tmp_name)  # leftover from an interrupted run
+        tmp = self.client.create_collection(tmp_name, metadata=metadata)
+        offset = 0
+        while True:
+            page = col.get(
+                limit=page_size, offset=offset, include=["embeddings", "documents", "metadatas"]
+            )
+            ids = page.get("ids") or []
+            if not ids:
+                break
+            tmp.upsert(
+                ids=ids,
+                embeddings=np.asarray(page["embeddings"], dtype=np.float32),
+                documents=page.get("documents"),
+                metadatas=page.get("metadatas"),
+            )
+            offset += len(ids)
+        self.client.delete_collection(name)
+        tmp.modify(name=name)
+        log.info(
+            "hnsw_collection_rebuilt",
+            extra={"extra_fields": {"collection": name, "rows": offset, "params": wanted}},
+        )
+        return "rebuilt"
+
+    def delete_collection(self, name: str) -> None:
+        self.client.delete_collection(name)
+
+    def list_collection_names(self) -> list[str]:
+        return [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
+
+    def release_collection(self, name: str) -> None:
+        # Chroma handles are thin views over the shared client; nothing to free
+        return None
+
+
+def open_backend(kind: str | None = None) -> VectorBackend:
+    """Open the configured vector engine (``VECTOR_BACKEND``: chroma | numpy)."""
+
+    kind = (kind or settings.VECTOR_BACKEND or "chroma").lower()
+    if kind == "chroma":
+        return ChromaBackend(settings.CHROMA_PATH)
+    if kind == "numpy":
+        from fibz_bot.memory.numpy_backend import NumpyBackend
+
+        return NumpyBackend(
+            settings.NUMPY_VECTOR_PATH,
+            ivf_min_rows=settings.NUMPY_IVF_MIN_ROWS,
+            ivf_nprobe=settings.NUMPY_IVF_NPROBE,
+        )
+    raise ValueError(f"Unknown VECTOR_BACKEND {kind!r}")
+
+
+__all__ = [
+    "ChromaBackend",
+    "ChromaCollection",
+    "VectorBackend",
+    "VectorCollection",
+    "collection_metadata",
+    "hnsw_params",
+    "match_where",
+    "normalize_where",
+    "open_backend",
+]
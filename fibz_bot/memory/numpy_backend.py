@@ -0,0 +1,606 @@
+from __future__ import annotations
+
+import json
+import math
+import shutil
+import sqlite3
+from collections.abc import Sequence
+from pathlib import Path
+from threading import RLock
+from typing import Any
+
+import numpy as np
+
+from fibz_bot.memory.backend import Where, match_where
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+log = get_logger(__name__)
+
+_STATE_FILE = "collection.json"
+_VECTORS_FILE = "vectors.f32"
+_ROWS_FILE = "rows.sqlite3"
+_IVF_FILE = "ivf_centroids.npy"
+_MIN_CAPACITY = 1024
+_ASSIGN_CHUNK = 65536
+
+
+def _pkey(value: Any) -> Any:
+    # True == 1 in a dict; keep booleans apart from integers in the postings
+    return ("bool", value) if isinstance(value, bool) else value
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def _kmeans(x: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit rows; returns unit centroids."""
+
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        counts = np.bincount(assign, minlength=k)
+        nonempty = counts > 0
+        order = np.argsort(assign, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+        sums = np.add.reduceat(x[order], starts, axis=0)
+        centroids[nonempty] = _normalize_rows(sums)
+    return centroids
+
+
+class NumpyCollection:
+    """One collection: a memmapped float32 matrix plus a SQLite sidecar.
+
+    Rows live in fixed slots of ``vectors.f32`` (unit-normalized, so cosine
+    similarity is a dot product). IDs, documents and metadata are kept in
+    ``rows.sqlite3`` and mirrored in memory together with an inverted index of
+    scalar metadata values, so equality/``$in`` filters become set lookups and
+    only the surviving rows are scored. Once a collection reaches
+    ``ivf_min_rows`` an IVF coarse quantizer is trained and queries scan only
+    the ``nprobe`` closest lists.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        name: str,
+        metadata: dict[str, Any] | None = None,
+        *,
+        ivf_min_rows: int = 50000,
+        ivf_nprobe: int = 8,
+    ):
+        space = (metadata or {}).get("hnsw:space", "cosine")
+        if space != "cosine":
+            raise ValueError(f"numpy backend only supports cosine space, got {space!r}")
+        self.name = name
+        self.dir = root / name
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.ivf_min_rows = ivf_min_rows
+        self.ivf_nprobe = ivf_nprobe
+        self._lock = RLock()
+
+        state_path = self.dir / _STATE_FILE
+        if state_path.exists():
+            self._state = json.loads(state_path.read_text(encoding="utf-8"))
+        else:
+            self._state = {"dim": None, "capacity": 0, "metadata": metadata or {}, "ivf_rows": 0}
+            self._save_state()
+
+        self._db = sqlite3.connect(str(self.dir / _ROWS_FILE), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "slot INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document TEXT, "
+            "metadata TEXT NOT NULL, list INTEGER NOT NULL DEFAULT -1)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._db.commit()
+        self._finish_compaction()
+
+        capacity = int(self._state["capacity"])
+        self._vectors: np.memmap | None = None
+        if self._state["dim"] and capacity:
+            self._vectors = np.memmap(
+                self.dir / _VECTORS_FILE,
+                dtype=np.float32,
+                mode="r+",
+                shape=(capacity, int(self._state["dim"])),
+            )
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._assign = np.full(capacity, -1, dtype=np.int32)
+        self._ids: list[str | None] = [None] * capacity
+        self._docs: list[str | None] = [None] * capacity
+        self._metas: list[dict[str, Any]] = [{} for _ in range(capacity)]
+        self._slot_of: dict[str, int] = {}
+        self._postings: dict[str, dict[Any, set[int]]] = {}
+        self._size = 0
+        for slot, row_id, doc, meta_json, ivf_list in self._db.execute(
+            "SELECT slot, id, document, metadata, list FROM rows"
+        ):
+            meta = json.loads(meta_json)
+            self._ids[slot] = row_id
+            self._docs[slot] = doc
+            self._metas[slot] = meta
+            self._alive[slot] = True
+            self._assign[slot] = ivf_list
+            self._slot_of[row_id] = slot
+            self._index(slot, meta)
+            self._size = max(self._size, slot + 1)
+
+        self._centroids: np.ndarray | None = None
+        ivf_path = self.dir / _IVF_FILE
+        if ivf_path.exists():
+            self._centroids = np.load(ivf_path)
+
+    # --- persistence -------------------------------------------------------
+    def _save_state(self) -> None:
+        tmp = self.dir / (_STATE_FILE + ".tmp")
+        tmp.write_text(json.dumps(self._state), encoding="utf-8")
+        tmp.replace(self.dir / _STATE_FILE)
+
+    def _finish_compaction(self) -> None:
+        """Install a compacted vector file whose slot remap is already committed."""
+
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'pending_vectors'").fetchone()
+        if row is None:
+            return
+        pending = json.loads(row[0])
+        tmp = self.dir / pending["file"]
+        if tmp.exists():
+            tmp.replace(self.dir / _VECTORS_FILE)
+        self._state["capacity"] = pending["capacity"]
+        self._save_state()
+        self._db.execute("DELETE FROM meta WHERE key = 'pending_vectors'")
+        self._db.commit()
+
+    def _ensure_capacity(self, needed: int, dim: int) -> None:
+        if self._state["dim"] is None:
+            self._state["dim"] = dim
+        elif int(self._state["dim"]) != dim:
+            raise ValueError(
+                f"Embedding dimension {dim} does not match "
+                f"collection dimension {self._state['dim']}"
+            )
+        capacity = int(self._state["capacity"])
+        if needed <= capacity:
+            return
+        new_capacity = max(_MIN_CAPACITY, capacity * 2, needed)
+        path = self.dir / _VECTORS_FILE
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(path, "ab") as fh:
+            fh.truncate(new_capacity * dim * 4)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(new_capacity, dim))
+        grow = new_capacity - capacity
+        self._alive = np.concatenate([self._alive, np.zeros(grow, dtype=bool)])
+        self._assign = np.concatenate([self._assign, np.full(grow, -1, dtype=np.int32)])
+        self._ids.extend([None] * grow)
+        self._docs.extend([None] * grow)
+        self._metas.extend({} for _ in range(grow))
+        self._state["capacity"] = new_capacity
+        self._save_state()
+
+    # --- metadata index ----------------------------------------------------
+    def _index(self, slot: int, meta: dict[str, Any]) -> None:
+        for key, value in meta.items():
+            if value is None or isinstance(value, (str, int, float, bool)):
+                self._postings.setdefault(key, {}).setdefault(_pkey(value), set()).add(slot)
+
+    def _unindex(self, slot: int, meta: dict[str, Any]) -> None:
+        for key, value in meta.items():
+            if value is None or isinstance(value, (str, int, float, bool)):
+                self._postings.get(key, {}).get(_pkey(value), set()).discard(slot)
+
+    def _lookup(self, where: Where) -> set[int] | None:
+        """Slots matching an equality/``$in`` filter, or None if it needs a scan."""
+
+        result: set[int] | None = None
+        for key, cond in where.items():
+            if key in ("$and", "$or"):
+                parts = [self._lookup(w) for w in cond]
+                if any(p is None for p in parts):
+                    return None
+                if key == "$and":
+                    hit = set.intersection(*parts) if parts else set()  # type: ignore[arg-type]
+                else:
+                    hit = set().union(*parts)  # type: ignore[arg-type]
+            elif isinstance(cond, dict):
+                if set(cond) == {"$eq"}:
+                    hit = set(self._postings.get(key, {}).get(_pkey(cond["$eq"]), ()))
+                elif set(cond) == {"$in"}:
+                    values = self._postings.get(key, {})
+                    hit = set().union(*(values.get(_pkey(v), ()) for v in cond["$in"]))
+                else:
+                    return None
+            else:
+                hit = set(self._postings.get(key, {}).get(_pkey(cond), ()))
+            result = hit if result is None else result & hit
+        return result
+
+    def _mask(self, where: Where | None) -> np.ndarray:
+        alive = self._alive[: self._size]
+        if not where:
+            return alive.copy()
+        clauses = where["$and"] if set(where) == {"$and"} else [{k: v} for k, v in where.items()]
+        indexed: set[int] | None = None
+        residual: list[Where] = []
+        for clause in clauses:
+            hit = self._lookup(clause)
+            if hit is None:
+                residual.append(clause)
+            else:
+                indexed = hit if indexed is None else indexed & hit
+        mask = np.zeros(self._size, dtype=bool)
+        if indexed is None:
+            candidates = np.flatnonzero(alive)
+        else:
+            candidates = np.fromiter(indexed, dtype=np.int64, count=len(indexed))
+            candidates = candidates[alive[candidates]]
+        if residual:
+            # Range/negation clauses are checked only on rows the index kept
+            metrics.inc("vector.numpy.filter_scans")
+            rest = {"$and": residual}
+            candidates = np.fromiter(
+                (s for s in candidates if match_where(self._metas[s], rest)), dtype=np.int64
+            )
+        mask[candidates] = True
+        return mask
+
+    # --- IVF -----------------------------------------------------------------
+    def _nearest_lists(self, vecs: np.ndarray) -> np.ndarray:
+        assert self._centroids is not None
+        return np.argmax(vecs @ self._centroids.T, axis=1).astype(np.int32)
+
+    def build_ivf(self, nlist: int | None = None, sample_per_list: int = 64) -> int:
+        """(Re)train the IVF quantizer on live rows and reassign every row."""
+
+        with self._lock:
+            live = np.flatnonzero(self._alive[: self._size])
+            if self._vectors is None or live.size == 0:
+                return 0
+            nlist = nlist or int(min(4096, max(16, math.sqrt(live.size))))
+            nlist = min(nlist, live.size)
+            rng = np.random.default_rng(0)
+            sample = live
+            if live.size > nlist * sample_per_list:
+                sample = np.sort(rng.choice(live, size=nlist * sample_per_list, replace=False))
+            self._centroids = _kmeans(np.asarray(self._vectors[sample]), nlist)
+            for start in range(0, live.size, _ASSIGN_CHUNK):
+                chunk = live[start : start + _ASSIGN_CHUNK]
+                self._assign[chunk] = self._nearest_lists(np.asarray(self._vectors[chunk]))
+            np.save(self.dir / _IVF_FILE, self._centroids)
+            self._db.executemany(
+                "UPDATE rows SET list = ? WHERE slot = ?",
+                ((int(self._assign[s]), int(s)) for s in live),
+            )
+            self._db.commit()
+            self._state["ivf_rows"] = int(live.size)
+            self._save_state()
+            metrics.inc("vector.numpy.ivf_builds")
+            log.info(
+                "numpy_ivf_built",
+                extra={
+                    "extra_fields": {
+                        "collection": self.name,
+                        "rows": int(live.size),
+                        "nlist": nlist,
+                    }
+                },
+            )
+            return nlist
+
+    def _maybe_build_ivf(self) -> None:
+        if self.ivf_min_rows <= 0 or len(self._slot_of) < self.ivf_min_rows:
+            return
+        # Retrain when the collection has doubled since the last build
+        if self._centroids is None or len(self._slot_of) >= 2 * int(
+            self._state.get("ivf_rows") or 0
+        ):
+            self.build_ivf()
+
+    # --- collection API ----------------------------------------------------
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: list[str] | None = None,
+        metadatas: list[dict[str, Any]] | None = None,
+    ) -> None:
+        vecs = np.asarray(embeddings, dtype=np.float32)
+        if vecs.ndim != 2 or len(vecs) != len(ids):
+            raise ValueError("embeddings must be a 2-D array with one row per id")
+        if not len(ids):
+            return
+        vecs = _normalize_rows(vecs)
+        with self._lock:
+            new_ids = sum(1 for i in dict.fromkeys(ids) if i not in self._slot_of)
+            self._ensure_capacity(self._size + new_ids, vecs.shape[1])
+            assert self._vectors is not None
+            lists = self._nearest_lists(vecs) if self._centroids is not None else None
+            rows = []
+            for i, row_id in enumerate(ids):
+                slot = self._slot_of.get(row_id)
+                if slot is None:
+                    slot = self._size
+                    self._size += 1
+                    self._slot_of[row_id] = slot
+                else:
+                    self._unindex(slot, self._metas[slot])
+                meta = dict(metadatas[i]) if metadatas and metadatas[i] else {}
+                doc = documents[i] if documents else None
+                self._vectors[slot] = vecs[i]
+                self._ids[slot] = row_id
+                self._docs[slot] = doc
+                self._metas[slot] = meta
+                self._alive[slot] = True
+                self._assign[slot] = -1 if lists is None else lists[i]
+                self._index(slot, meta)
+                rows.append((slot, row_id, doc, json.dumps(meta), int(self._assign[slot])))
+            self._vectors.flush()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO rows (slot, id, document, metadata, list) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+            self._maybe_build_ivf()
+
+    def update(
+        self,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict[str, Any]] | None = None,
+    ) -> None:
+        with self._lock:
+            rows = []
+            for i, row_id in enumerate(ids):
+                slot = self._slot_of.get(row_id)
+                if slot is None:
+                    continue
+                if metadatas and metadatas[i] is not None:
+                    self._unindex(slot, self._metas[slot])
+                    meta = {**self._metas[slot], **metadatas[i]}
+                    self._metas[slot] = {k: v for k, v in meta.items() if v is not None}
+                    self._index(slot, self._metas[slot])
+                if documents and documents[i] is not None:
+                    self._docs[slot] = documents[i]
+                rows.append((self._docs[slot], json.dumps(self._metas[slot]), slot))
+            self._db.executemany("UPDATE rows SET document = ?, metadata = ? WHERE slot = ?", rows)
+            self._db.commit()
+
+    def _result_rows(self, slots: Sequence[int], include: list[str]) -> dict[str, Any]:
+        out: dict[str, Any] = {"ids": [self._ids[s] for s in slots]}
+        if "documents" in include:
+            out["documents"] = [self._docs[s] for s in slots]
+        if "metadatas" in include:
+            out["metadatas"] = [dict(self._metas[s]) for s in slots]
+        if "embeddings" in include:
+            dim = int(self._state["dim"] or 0)
+            out["embeddings"] = (
+                np.asarray(self._vectors[list(slots)])
+                if self._vectors is not None and len(slots)
+                else np.zeros((0, dim), dtype=np.float32)
+            )
+        return out
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: Where | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict[str, Any]:
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock:
+            if ids is not None:
+                slots = [self._slot_of[i] for i in ids if i in self._slot_of]
+                if where:
+                    slots = [s for s in slots if match_where(self._metas[s], where)]
+            else:
+                slots = np.flatnonzero(self._mask(where)).tolist()
+            start = offset or 0
+            slots = slots[start : start + limit] if limit is not None else slots[start:]
+            return self._result_rows(slots, include)
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Where | None = None,
+        include: list[str] | None = None,
+    ) -> dict[str, Any]:
+        include = ["documents", "metadatas", "distances"] if include is None else include
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = _normalize_rows(queries.reshape(len(queries), -1))
+        out: dict[str, list[Any]] = {key: [] for key in ["ids", *include]}
+        with self._lock:
+            base = self._mask(where)
+            probes = None
+            if self._centroids is not None and self.ivf_nprobe > 0 and len(queries):
+                nprobe = min(self.ivf_nprobe, len(self._centroids))
+                probes = np.argsort(-(queries @ self._centroids.T), axis=1)[:, :nprobe]
+            for qi, q in enumerate(queries):
+                mask = base
+                if probes is not None:
+                    mask = base & np.isin(self._assign[: self._size], probes[qi])
+                cand = np.flatnonzero(mask)
+                if not cand.size or self._vectors is None:
+                    for key in out:
+                        out[key].append([])
+                    continue
+                if cand.size > self._size // 2:
+                    sims = (self._vectors[: self._size] @ q)[cand]
+                else:
+                    sims = self._vectors[cand] @ q
+                k = min(n_results, cand.size)
+                top = np.argpartition(-sims, k - 1)[:k]
+                top = top[np.argsort(-sims[top], kind="stable")]
+                slots = cand[top].tolist()
+                rows = self._result_rows(slots, include)
+                rows["distances"] = (1.0 - sims[top]).astype(float).tolist()
+                for key in out:
+                    out[key].append(rows[key])
+        metrics.inc("vector.numpy.queries", len(queries))
+        return out
+
+    def delete(self, ids: list[str] | None = None, where: Where | None = None) -> None:
+        with self._lock:
+            if ids is not None:
+                slots = [self._slot_of[i] for i in ids if i in self._slot_of]
+                if where:
+                    slots = [s for s in slots if match_where(self._metas[s], where)]
+            elif where:
+                slots = np.flatnonzero(self._mask(where)).tolist()
+            else:
+                raise ValueError("delete() needs ids or where")
+            for slot in slots:
+                self._unindex(slot, self._metas[slot])
+                self._slot_of.pop(self._ids[slot], None)  # type: ignore[arg-type]
+                self._alive[slot] = False
+                self._ids[slot] = None
+                self._docs[slot] = None
+                self._metas[slot] = {}
+            self._db.executemany("DELETE FROM rows WHERE slot = ?", ((int(s),) for s in slots))
+            self._db.commit()
+
+    def compact(self) -> int:
+        """Rewrite the vector file and slot numbers without deleted rows.
+
+        The new file is written beside the old one; the slot remap and a
+        pending marker commit in one SQLite transaction, so an interrupted
+        compaction is completed on the next open. Returns slots reclaimed.
+        """
+
+        with self._lock:
+            live = np.flatnonzero(self._alive[: self._size])
+            reclaimed = self._size - int(live.size)
+            if reclaimed == 0 or self._vectors is None:
+                return 0
+            dim = int(self._state["dim"])
+            capacity = max(_MIN_CAPACITY, int(live.size))
+            tmp_name = _VECTORS_FILE + ".compact"
+            with open(self.dir / tmp_name, "wb") as fh:
+                fh.truncate(capacity * dim * 4)
+            fresh = np.memmap(
+                self.dir / tmp_name, dtype=np.float32, mode="r+", shape=(capacity, dim)
+            )
+            for start in range(0, live.size, _ASSIGN_CHUNK):
+                chunk = live[start : start + _ASSIGN_CHUNK]
+                fresh[start : start + len(chunk)] = self._vectors[chunk]
+            fresh.flush()
+            del fresh
+
+            # Ascending order keeps every target slot free when it is assigned
+            self._db.executemany(
+                "UPDATE rows SET slot = ? WHERE slot = ?",
+                ((new, int(old)) for new, old in enumerate(live) if new != old),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('pending_vectors', ?)",
+                (json.dumps({"file": tmp_name, "capacity": capacity}),),
+            )
+            self._db.commit()
+            self._vectors.flush()
+            self._vectors = None
+            self._finish_compaction()
+            self._vectors = np.memmap(
+                self.dir / _VECTORS_FILE, dtype=np.float32, mode="r+", shape=(capacity, dim)
+            )
+
+            order = live.tolist()
+            pad = capacity - len(order)
+            self._ids = [self._ids[s] for s in order] + [None] * pad
+            self._docs = [self._docs[s] for s in order] + [None] * pad
+            self._metas = [self._metas[s] for s in order] + [{} for _ in range(pad)]
+            self._assign = np.concatenate([self._assign[live], np.full(pad, -1, dtype=np.int32)])
+            self._alive = np.zeros(capacity, dtype=bool)
+            self._alive[: len(order)] = True
+            self._size = len(order)
+            self._slot_of = {
+                row_id: slot
+                for slot, row_id in enumerate(self._ids[: self._size])
+                if row_id is not None
+            }
+            self._postings = {}
+            for slot in range(self._size):
+                self._index(slot, self._metas[slot])
+            metrics.inc("vector.numpy.compactions")
+            log.info(
+                "numpy_compacted",
+                extra={
+                    "extra_fields": {
+                        "collection": self.name,
+                        "reclaimed": reclaimed,
+                        "rows": self._size,
+                    }
+                },
+            )
+            return reclaimed
+
+    def count(self) -> int:
+        return len(self._slot_of)
+
+    def peek(self, limit: int = 10) -> dict[str, Any]:
+        return self.get(limit=limit, include=["documents", "metadatas", "embeddings"])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._db.close()
+
+
+class NumpyBackend:
+    """Directory of :class:`NumpyCollection` instances, one sub-directory each."""
+
+    def __init__(self, path: str, *, ivf_min_rows: int = 50000, ivf_nprobe: int = 8):
+        self.root = Path(path)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ivf_min_rows = ivf_min_rows
+        self.ivf_nprobe = ivf_nprobe
+        self._collections: dict[str, NumpyCollection] = {}
+        self._lock = RLock()
+
+    def get_or_create_collection(
+        self, name: str, metadata: dict[str, Any] | None = None
+    ) -> NumpyCollection:
+        with self._lock:
+            col = self._collections.get(name)
+            if col is None:
+                col = NumpyCollection(
+                    self.root,
+                    name,
+                    metadata,
+                    ivf_min_rows=self.ivf_min_rows,
+                    ivf_nprobe=self.ivf_nprobe,
+                )
+                self._collections[name] = col
+            return col
+
+    def delete_collection(self, name: str) -> None:
+        with self._lock:
+            col = self._collections.pop(name, None)
+            if col is not None:
+                col.close()
+            shutil.rmtree(self.root / name, ignore_errors=True)
+
+    def release_collection(self, name: str) -> None:
+        """Close the memmap and SQLite handle for ``name``; the next open reloads it."""
+
+        with self._lock:
+            col = self._collections.pop(name, None)
+            if col is not None:
+                col.close()
+
+    def list_collection_names(self) -> list[str]:
+        return sorted(p.name for p in self.root.iterdir() if (p / _STATE_FILE).exists())
+
+
+__all__ = ["NumpyBackend", "NumpyCollection"]
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import builtins
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from threading import RLock
+from typing import Any
+
+from fibz_bot.config import settings
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+log = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    key TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    document TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    subject_user_id TEXT,
+    guild_id TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_type ON records(type);
+CREATE INDEX IF NOT EXISTS idx_records_subject ON records(subject_user_id, type);
+CREATE INDEX IF NOT EXISTS idx_records_guild ON records(guild_id, type);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied_at TEXT NOT NULL,
+    detail TEXT
+);
+"""
+
+_PAGE = 500
+
+
+def default_records_path() -> str:
+    """``RECORDS_DB_PATH`` or ``records.sqlite3`` beside the active vector data."""
+
+    if settings.RECORDS_DB_PATH:
+        return settings.RECORDS_DB_PATH
+    base = (
+        settings.NUMPY_VECTOR_PATH if settings.VECTOR_BACKEND == "numpy" else settings.CHROMA_PATH
+    )
+    return str(Path(base) / "records.sqlite3")
+
+
+class RecordStore:
+    """SQLite table for exact-key records: personas, consents, policies, ratings.
+
+    These rows are only ever read back by key or by ``type``/``subject_user_id``/
+    ``guild_id``, so they carry no embedding. Rows use the same
+    ``{"id", "document", "metadata"}`` shape as the vector collections.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    @staticmethod
+    def _row(key: str, document: str, metadata: str) -> dict[str, Any]:
+        return {"id": key, "document": document, "metadata": json.loads(metadata)}
+
+    def upsert(self, key: str, document: str, metadata: dict[str, Any]) -> None:
+        self.upsert_many([(key, document, metadata)])
+
+    def upsert_many(self, rows: builtins.list[tuple], *, replace: bool = True) -> int:
+        """Write ``(key, document, metadata)`` rows; ``replace=False`` keeps existing keys."""
+
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        now = datetime.utcnow().isoformat()
+        params = [
+            (
+                key,
+                str(meta.get("type") or "unknown"),
+                document or "",
+                json.dumps(meta, ensure_ascii=False),
+                None if meta.get("subject_user_id") is None else str(meta["subject_user_id"]),
+                None if meta.get("guild_id") is None else str(meta["guild_id"]),
+                now,
+            )
+            for key, document, meta in rows
+        ]
+        with self._lock:
+            cur = self._db.executemany(
+                f"{verb} INTO records "
+                "(key, type, document, metadata, subject_user_id, guild_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                params,
+            )
+            self._db.commit()
+        metrics.inc("records.writes", len(params))
+        return cur.rowcount
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT key, document, metadata FROM records WHERE key = ?", (key,)
+            ).fetchone()
+        return self._row(*row) if row else None
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            cur = self._db.execute("DELETE FROM records WHERE key = ?", (key,))
+            self._db.commit()
+        return cur.rowcount > 0
+
+    @staticmethod
+    def _where(
+        type: str | None, subject_user_id: str | None, guild_id: str | None
+    ) -> tuple[str, list]:
+        clauses, params = [], []
+        for column, value in (
+            ("type", type),
+            ("subject_user_id", subject_user_id),
+            ("guild_id", guild_id),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def list(
+        self,
+        *,
+        type: str | None = None,
+        subject_user_id: str | None = None,
+        guild_id: str | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> builtins.list[dict[str, Any]]:
+        where, params = self._where(type, subject_user_id, guild_id)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT key, document, metadata FROM records{where} ORDER BY key LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [self._row(*r) for r in rows]
+
+    def count(
+        self,
+        *,
+        type: str | None = None,
+        subject_user_id: str | None = None,
+        guild_id: str | None = None,
+    ) -> int:
+        where, params = self._where(type, subject_user_id, guild_id)
+        with self._lock:
+            return int(
+                self._db.execute(f"SELECT COUNT(*) FROM records{where}", params).fetchone()[0]
+            )
+
+    # One-time migrations -------------------------------------------------------
+    def has_migration(self, name: str) -> bool:
+        with self._lock:
+            return (
+                self._db.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone()
+                is not None
+            )
+
+    def mark_migration(self, name: str, detail: str = "") -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO migrations (name, applied_at, detail) VALUES (?, ?, ?)",
+                (name, datetime.utcnow().isoformat(), detail),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def migrate_self_context(collection: Any, records: RecordStore) -> int:
+    """Copy rows from the legacy ``self_context`` vector collection (once).
+
+    Existing keys in ``records`` win, so a write made after the upgrade is never
+    overwritten by its stale vector-store copy. Returns the number of rows read.
+    """
+
+    if records.has_migration("self_context"):
+        return 0
+    copied = 0
+    offset = 0
+    while True:
+        res = collection.get(limit=_PAGE, offset=offset, include=["documents", "metadatas"])
+        ids = res.get("ids") or []
+        if not ids:
+            break
+        docs = res.get("documents") or [""] * len(ids)
+        metas = res.get("metadatas") or [{}] * len(ids)
+        records.upsert_many(
+            [(i, d or "", dict(m or {})) for i, d, m in zip(ids, docs, metas)], replace=False
+        )
+        copied += len(ids)
+        offset += len(ids)
+    records.mark_migration("self_context", detail=f"rows={copied}")
+    log.info("records_migrated", extra={"extra_fields": {"source": "self_context", "rows": copied}})
+    return copied
+
+
+__all__ = ["RecordStore", "default_records_path", "migrate_self_context"]
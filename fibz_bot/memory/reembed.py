@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+from fibz_bot.config import settings
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+if TYPE_CHECKING:  # pragma: no cover - imported for type checking only
+    from fibz_bot.memory.backend import VectorCollection
+    from fibz_bot.memory.records import RecordStore
+    from fibz_bot.memory.store import MemoryStore
+
+log = get_logger(__name__)
+
+EMBEDDED_COLLECTIONS = ("messages", "entities", "archives")
+_ACTIVE_KEY = "embedding:active"
+_STATE_KEY = "embedding:reembed"
+
+
+@dataclass(frozen=True)
+class EmbeddingProfile:
+    """Which model/size produced a generation of collections.
+
+    Generation 0 uses the bare names (``messages``); later generations add a
+    suffix (``messages_e1``) so the shadow copy can be built beside the live one.
+    """
+
+    model: str
+    dimensionality: int = 0  # 0 = the model's native size
+    generation: int = 0
+
+    @classmethod
+    def configured(cls, generation: int = 0) -> EmbeddingProfile:
+        return cls(settings.VERTEX_EMBED_MODEL, settings.VERTEX_EMBED_DIM, generation)
+
+    def same_vectors(self, other: EmbeddingProfile) -> bool:
+        return (self.model, self.dimensionality) == (other.model, other.dimensionality)
+
+    def collection_name(self, base: str) -> str:
+        return base if self.generation == 0 else f"{base}_e{self.generation}"
+
+    def embed_kwargs(self) -> dict[str, Any]:
+        """Router overrides; empty when this is the configured profile (the router default)."""
+
+        if self.same_vectors(EmbeddingProfile.configured()):
+            return {}
+        return {"model": self.model, "dimensionality": self.dimensionality}
+
+    def describe(self) -> str:
+        size = f"{self.dimensionality}d" if self.dimensionality else "native size"
+        return f"{self.model} ({size}, generation {self.generation})"
+
+
+def load_active_profile(records: RecordStore) -> EmbeddingProfile:
+    """The profile the stored vectors were built with.
+
+    A store without a record is assumed to match the current settings and is
+    stamped with them, so later setting changes are detected.
+    """
+
+    row = records.get(_ACTIVE_KEY)
+    if row:
+        meta = row["metadata"]
+        return EmbeddingProfile(
+            str(meta["model"]),
+            int(meta.get("dimensionality") or 0),
+            int(meta.get("generation") or 0),
+        )
+    profile = EmbeddingProfile.configured()
+    save_active_profile(records, profile)
+    return profile
+
+
+def save_active_profile(records: RecordStore, profile: EmbeddingProfile) -> None:
+    records.upsert(
+        _ACTIVE_KEY,
+        f"embedding profile {profile.describe()}",
+        {"type": "embedding", **asdict(profile)},
+    )
+
+
+@dataclass
+class ReembedReport:
+    source: str = ""
+    target: str = ""
+    state: str = "pending"  # running | paused | switched | failed
+    copied: dict[str, int] = field(default_factory=dict)
+    reconciled: int = 0
+    duration: float = 0.0
+    error: str | None = None
+    finished_at: str | None = None
+
+    def summary(self) -> str:
+        rows = sum(self.copied.values())
+        text = f"{self.state}: {rows} row(s) re-embedded into {self.target} in {self.duration}s"
+        if self.reconciled:
+            text += f", {self.reconciled} reconciled"
+        return text + (f" ({self.error})" if self.error else "")
+
+
+def _all_ids(col: VectorCollection, page_size: int = 2000) -> set[str]:
+    ids: set[str] = set()
+    offset = 0
+    while True:
+        page = col.get(limit=page_size, offset=offset, include=[]).get("ids") or []
+        ids.update(page)
+        if len(page) < page_size:
+            return ids
+        offset += page_size
+
+
+class ReembedJob:
+    """Online migration of every embedded collection to a new :class:`EmbeddingProfile`.
+
+    Rows are copied in checkpointed, rate-limited batches into shadow
+    collections while the live ones keep serving. A reconcile pass then copies
+    rows written (and drops rows deleted) during the copy; the last pass runs
+    under the store's write lock right before reads switch to the shadows, so
+    no write lands in the retiring generation afterwards. Interrupted runs
+    resume from the checkpoint. The old collections are kept for rollback.
+    """
+
+    def __init__(
+        self,
+        batch_size: int | None = None,
+        texts_per_minute: int | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.batch_size = batch_size or settings.EMBED_MIGRATION_BATCH_SIZE
+        self.texts_per_minute = texts_per_minute or settings.EMBED_MIGRATION_TEXTS_PER_MINUTE
+        self._sleep = sleep
+        self._running = threading.Lock()
+        self.last_report: ReembedReport | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._running.locked()
+
+    @staticmethod
+    def needed(memory: MemoryStore) -> bool:
+        return not memory.embedding.same_vectors(EmbeddingProfile.configured())
+
+    def _target(self, memory: MemoryStore) -> tuple[EmbeddingProfile, dict[str, Any]]:
+        configured = EmbeddingProfile.configured(memory.embedding.generation + 1)
+        row = memory.records.get(_STATE_KEY)
+        state = dict(row["metadata"]) if row else {}
+        if state:
+            previous = EmbeddingProfile(
+                state["model"], int(state["dimensionality"]), int(state["generation"])
+            )
+            if previous.same_vectors(configured):
+                return previous, state
+        # Fresh run (or the target changed mid-way): drop any stale shadow first
+        for base in EMBEDDED_COLLECTIONS:
+            for name in memory.backend.list_collection_names():
+                if name == configured.collection_name(base) or name.startswith(
+                    configured.collection_name(base) + "_g"
+                ):
+                    memory.backend.delete_collection(name)
+        state = {
+            "type": "embedding",
+            **asdict(configured),
+            "done": "",
+            "collection": "",
+            "offset": 0,
+        }
+        return configured, state
+
+    def _checkpoint(self, memory: MemoryStore, state: dict[str, Any]) -> None:
+        memory.records.upsert(_STATE_KEY, f"re-embed checkpoint {state.get('collection')}", state)
+
+    def _copy(
+        self,
+        memory: MemoryStore,
+        target: EmbeddingProfile,
+        source: VectorCollection,
+        shadow: VectorCollection,
+        ids: list[str] | None = None,
+        offset: int = 0,
+    ) -> int:
+        include = ["documents", "metadatas"]
+        if ids is not None:
+            res = source.get(ids=ids, include=include)
+        else:
+            res = source.get(limit=self.batch_size, offset=offset, include=include)
+        row_ids = res.get("ids") or []
+        if not row_ids:
+            return 0
+        started = time.perf_counter()
+        docs = [d or "" for d in res.get("documents") or [""] * len(row_ids)]
+        vectors = memory.router.embed_texts([d or " " for d in docs], **target.embed_kwargs())
+        shadow.upsert(
+            ids=row_ids,
+            embeddings=vectors,
+            documents=docs,
+            metadatas=res.get("metadatas") or None,
+        )
+        metrics.inc("reembed.rows", len(row_ids))
+        # Rate limit: spread the embedding calls so live traffic keeps its quota
+        budget = len(row_ids) * 60.0 / max(self.texts_per_minute, 1)
+        spent = time.perf_counter() - started
+        if budget > spent:
+            self._sleep(budget - spent)
+        return len(row_ids)
+
+    def _reconcile(
+        self, memory: MemoryStore, target: EmbeddingProfile, shadows: dict[str, VectorCollection]
+    ) -> int:
+        changed = 0
+        for base, shadow in shadows.items():
+            source = memory.collection(base)
+            live, copied = _all_ids(source), _all_ids(shadow)
+            missing = sorted(live - copied)
+            for start in range(0, len(missing), self.batch_size):
+                changed += self._copy(
+                    memory, target, source, shadow, ids=missing[start : start + self.batch_size]
+                )
+            stale = sorted(copied - live)
+            for start in range(0, len(stale), self.batch_size):
+                shadow.delete(ids=stale[start : start + self.batch_size])
+            changed += len(stale)
+        return changed
+
+    def run(self, memory: MemoryStore, stop: threading.Event | None = None) -> ReembedReport | None:
+        """Copy, reconcile and switch (blocking); None if a run is already in progress.
+
+        Setting ``stop`` pauses after the current batch; the next run resumes.
+        """
+
+        if not self._running.acquire(blocking=False):
+            return None
+        report = ReembedReport(source=memory.embedding.describe(), state="running")
+        self.last_report = report
+        started = time.perf_counter()
+        try:
+            target, state = self._target(memory)
+            report.target = target.describe()
+            done = [b for b in str(state.get("done") or "").split(",") if b]
+            shadows = {base: memory.open_collection(base, target) for base in EMBEDDED_COLLECTIONS}
+            for base in EMBEDDED_COLLECTIONS:
+                if base in done:
+                    continue
+                offset = int(state.get("offset") or 0) if state.get("collection") == base else 0
+                source = memory.collection(base)
+                while True:
+                    if stop is not None and stop.is_set():
+                        report.state = "paused"
+                        return report
+                    n = self._copy(memory, target, source, shadows[base], offset=offset)
+                    if not n:
+                        break
+                    offset += n
+                    report.copied[base] = report.copied.get(base, 0) + n
+                    self._checkpoint(memory, {**state, "collection": base, "offset": offset})
+                done.append(base)
+                state = {**state, "done": ",".join(done), "collection": "", "offset": 0}
+                self._checkpoint(memory, state)
+            # Catch up outside the lock first so the locked pass only sees the last few writes
+            report.reconciled += self._reconcile(memory, target, shadows)
+            with memory.write_lock:
+                report.reconciled += self._reconcile(memory, target, shadows)
+                memory.switch_embeddings(target, shadows)
+            memory.records.delete(_STATE_KEY)
+            report.state = "switched"
+            metrics.inc("reembed.switches")
+            return report
+        except Exception as exc:
+            report.state = "failed"
+            report.error = exc.__class__.__name__
+            log.error("reembed_failed", extra={"extra_fields": {"error": exc.__class__.__name__}})
+            return report
+        finally:
+            report.duration = round(time.perf_counter() - started, 3)
+            report.finished_at = datetime.now(timezone.utc).isoformat()
+            log.info("reembed_run", extra={"extra_fields": asdict(report)})
+            self._running.release()
+
+
+__all__ = [
+    "EMBEDDED_COLLECTIONS",
+    "EmbeddingProfile",
+    "ReembedJob",
+    "ReembedReport",
+    "load_active_profile",
+    "save_active_profile",
+]
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+from fibz_bot.config import settings
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+if TYPE_CHECKING:  # pragma: no cover - imported for type checking only
+    from fibz_bot.memory.store import MemoryStore
+
+log = get_logger(__name__)
+
+_DAY_MS = 86_400_000
+
+
+@dataclass
+class RetentionPolicy:
+    """How long messages are kept. ``0``/``None`` means no limit."""
+
+    max_age_days: float | None = None
+    max_rows: int | None = None  # per channel
+    paused: bool = False
+
+    @property
+    def active(self) -> bool:
+        return not self.paused and bool(self.max_age_days or self.max_rows)
+
+    def describe(self) -> str:
+        age = f"{self.max_age_days:g}d" if self.max_age_days else "forever"
+        rows = str(self.max_rows) if self.max_rows else "unlimited"
+        return f"max age {age}, max rows/channel {rows}" + (" (paused)" if self.paused else "")
+
+
+def _key(guild_id: str, channel_id: str | None = None) -> str:
+    return f"retention:{guild_id}" + (f":{channel_id}" if channel_id else "")
+
+
+def _from_meta(meta: dict, base: RetentionPolicy) -> RetentionPolicy:
+    return RetentionPolicy(
+        max_age_days=meta.get("max_age_days", base.max_age_days),
+        max_rows=meta.get("max_rows", base.max_rows),
+        paused=bool(meta.get("paused", base.paused)),
+    )
+
+
+def default_policy() -> RetentionPolicy:
+    return RetentionPolicy(
+        max_age_days=settings.RETENTION_DEFAULT_MAX_AGE_DAYS or None,
+        max_rows=settings.RETENTION_DEFAULT_MAX_ROWS_PER_CHANNEL or None,
+    )
+
+
+def get_policy(
+    memory: MemoryStore, guild_id: str, channel_id: str | None = None
+) -> RetentionPolicy:
+    """Effective policy: channel override > guild policy > Settings defaults."""
+
+    policy = default_policy()
+    row = memory.records.get(_key(guild_id))
+    if row:
+        policy = _from_meta(row["metadata"], policy)
+    if channel_id:
+        row = memory.records.get(_key(guild_id, channel_id))
+        if row:
+            policy = _from_meta(row["metadata"], policy)
+    return policy
+
+
+def set_policy(
+    memory: MemoryStore,
+    guild_id: str,
+    channel_id: str | None = None,
+    **changes: object,
+) -> RetentionPolicy:
+    """Update the stored guild/channel policy (only the fields given)."""
+
+    key = _key(guild_id, channel_id)
+    row = memory.records.get(key)
+    meta = dict(row["metadata"]) if row else {}
+    meta.update({k: v for k, v in changes.items() if k in ("max_age_days", "max_rows", "paused")})
+    meta.update({"type": "retention", "guild_id": guild_id, "channel_id": channel_id or ""})
+    memory.records.upsert(key, f"retention {meta}", meta)
+    return get_policy(memory, guild_id, channel_id)
+
+
+def channel_overrides(memory: MemoryStore, guild_id: str) -> dict[str, RetentionPolicy]:
+    out: dict[str, RetentionPolicy] = {}
+    for row in memory.records.list(type="retention", guild_id=guild_id, limit=1000):
+        channel_id = row["metadata"].get("channel_id")
+        if channel_id:
+            out[channel_id] = get_policy(memory, guild_id, channel_id)
+    return out
+
+
+@dataclass
+class RetentionReport:
+    guilds: int = 0
+    expired: int = 0
+    trimmed: int = 0
+    compacted: int = 0
+    duration: float = 0.0
+    errors: dict[str, str] = field(default_factory=dict)
+    finished_at: str | None = None
+
+    @property
+    def reclaimed(self) -> int:
+        return self.expired + self.trimmed
+
+    def summary(self) -> str:
+        text = (
+            f"{self.reclaimed} row(s) reclaimed "
+            f"({self.expired} expired, {self.trimmed} over row cap) in {self.duration}s"
+        )
+        if self.errors:
+            text += f"; {len(self.errors)} guild(s) failed"
+        return text
+
+
+class RetentionJob:
+    """Deletes expired messages in small, paced batches (blocking; run on a thread)."""
+
+    def __init__(self) -> None:
+        self._running = threading.Lock()
+        self.last_report: RetentionReport | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._running.locked()
+
+    def _delete(self, memory: MemoryStore, where: dict) -> int:
+        return memory.delete_messages(
+            where,
+            batch_size=settings.RETENTION_BATCH_SIZE,
+            pause=settings.RETENTION_BATCH_PAUSE_SECONDS,
+        )
+
+    def _expire(
+        self,
+        memory: MemoryStore,
+        guild_id: str,
+        policy: RetentionPolicy,
+        overrides: dict[str, RetentionPolicy],
+        now_ms: int,
+    ) -> int:
+        expired = 0
+        if policy.max_age_days and not policy.paused:
+            where: dict = {
+                "guild_id": guild_id,
+                "created_at_ms": {"$lt": now_ms - int(policy.max_age_days * _DAY_MS)},
+            }
+            if overrides:
+                where["channel_id"] = {"$nin": sorted(overrides)}
+            expired += self._delete(memory, where)
+        for channel_id, override in overrides.items():
+            if override.max_age_days and not override.paused:
+                expired += self._delete(
+                    memory,
+                    {
+                        "guild_id": guild_id,
+                        "channel_id": channel_id,
+                        "created_at_ms": {"$lt": now_ms - int(override.max_age_days * _DAY_MS)},
+                    },
+                )
+        return expired
+
+    def _trim(
+        self,
+        memory: MemoryStore,
+        guild_id: str,
+        policy: RetentionPolicy,
+        overrides: dict[str, RetentionPolicy],
+    ) -> int:
+        if not policy.max_rows and not any(o.max_rows for o in overrides.values()):
+            return 0
+        trimmed = 0
+        for channel_id, count in memory.message_counts_by(
+            "channel_id", {"guild_id": guild_id}
+        ).items():
+            effective = overrides.get(channel_id, policy)
+            if effective.paused or not effective.max_rows or count <= effective.max_rows:
+                continue
+            scope = {"guild_id": guild_id, "channel_id": channel_id}
+            ids = memory.oldest_message_ids(scope, count - effective.max_rows)
+            trimmed += memory.delete_message_ids(
+                ids,
+                batch_size=settings.RETENTION_BATCH_SIZE,
+                pause=settings.RETENTION_BATCH_PAUSE_SECONDS,
+                where=scope,
+            )
+        return trimmed
+
+    def run_once(self, memory: MemoryStore, guild_ids: Iterable[str]) -> RetentionReport | None:
+        """One pass over ``guild_ids``; returns None if a pass is already running."""
+
+        if not self._running.acquire(blocking=False):
+            return None
+        report = RetentionReport()
+        started = time.perf_counter()
+        try:
+            now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+            for guild_id in guild_ids:
+                try:
+                    policy = get_policy(memory, guild_id)
+                    overrides = channel_overrides(memory, guild_id)
+                    if not policy.active and not any(o.active for o in overrides.values()):
+                        continue
+                    report.guilds += 1
+                    report.expired += self._expire(memory, guild_id, policy, overrides, now_ms)
+                    report.trimmed += self._trim(memory, guild_id, policy, overrides)
+                except Exception as exc:
+                    report.errors[guild_id] = exc.__class__.__name__
+                    log.warning(
+                        "retention_guild_failed",
+                        extra={
+                            "extra_fields": {"guild_id": guild_id, "error": exc.__class__.__name__}
+                        },
+                    )
+            if report.reclaimed:
+                report.compacted = sum(memory.compact().values())
+            report.duration = round(time.perf_counter() - started, 3)
+            report.finished_at = datetime.now(timezone.utc).isoformat()
+            self.last_report = report
+            metrics.inc("retention.runs")
+            metrics.inc("retention.rows_reclaimed", report.reclaimed)
+            log.info("retention_run", extra={"extra_fields": asdict(report)})
+            return report
+        finally:
+            self._running.release()
+
+
+__all__ = [
+    "RetentionJob",
+    "RetentionPolicy",
+    "RetentionReport",
+    "channel_overrides",
+    "default_policy",
+    "get_policy",
+    "set_policy",
+]
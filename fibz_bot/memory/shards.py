@@ -0,0 +1,397 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any
+
+from fibz_bot.memory.backend import VectorBackend, VectorCollection, Where, normalize_where
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+log = get_logger(__name__)
+
+SHARD_MODES = ("off", "guild", "channel")
+_DM = "dm"
+_UNSAFE = re.compile(r"[^A-Za-z0-9]")
+
+
+def _part(value: Any) -> str:
+    text = str(value or "").strip()
+    return _UNSAFE.sub("-", text) if text and text != "None" else _DM
+
+
+def shard_name(base: str, mode: str, guild_id: Any, channel_id: Any = None) -> str:
+    """Collection name for one shard, e.g. ``messages_g123`` or ``messages_g123_c456``."""
+
+    name = f"{base}_g{_part(guild_id)}"
+    if mode == "channel":
+        name += f"_c{_part(channel_id)}"
+    return name
+
+
+def _eq_value(cond: Any) -> str | None:
+    if isinstance(cond, dict):
+        if set(cond) == {"$eq"}:
+            return str(cond["$eq"])
+        return None
+    return str(cond)
+
+
+def where_scope(where: Where | None) -> tuple[str | None, str | None]:
+    """``(guild_id, channel_id)`` pinned by equality clauses in ``where``.
+
+    Clauses count at the top level or inside ``$and``.
+    """
+
+    guild: str | None = None
+    channel: str | None = None
+    clauses: list[Where] = []
+    normalized = normalize_where(where) or {}
+    if "$and" in normalized:
+        clauses = list(normalized["$and"])
+    elif "$or" not in normalized:
+        clauses = [normalized]
+    for clause in clauses:
+        for key, cond in clause.items():
+            if key == "guild_id" and guild is None:
+                guild = _eq_value(cond)
+            elif key == "channel_id" and channel is None:
+                channel = _eq_value(cond)
+    return guild, channel
+
+
+class ShardPool:
+    """LRU-bounded set of open shard handles, opened lazily on first use.
+
+    Handles leased by an in-flight call are never evicted; the pool may
+    briefly exceed ``size`` during a wide fan-out and shrinks on release.
+    """
+
+    def __init__(self, backend: VectorBackend, size: int, metadata: dict[str, Any] | None = None):
+        self.backend = backend
+        self.size = max(1, size)
+        self.metadata = metadata
+        self._handles: OrderedDict[str, VectorCollection] = OrderedDict()
+        self._leases: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def _evict(self) -> None:
+        for name in list(self._handles):
+            if len(self._handles) <= self.size:
+                return
+            if self._leases.get(name):
+                continue
+            self._handles.pop(name)
+            release = getattr(self.backend, "release_collection", None)
+            if release is not None:
+                release(name)
+            metrics.inc("memory.shard_evictions")
+
+    @contextmanager
+    def lease(self, name: str) -> Iterator[VectorCollection]:
+        with self._lock:
+            col = self._handles.get(name)
+            if col is None:
+                col = self.backend.get_or_create_collection(name, metadata=self.metadata)
+                self._handles[name] = col
+                metrics.inc("memory.shard_opens")
+            self._handles.move_to_end(name)
+            self._leases[name] = self._leases.get(name, 0) + 1
+            self._evict()
+        try:
+            yield col
+        finally:
+            with self._lock:
+                self._leases[name] -= 1
+                if not self._leases[name]:
+                    del self._leases[name]
+                self._evict()
+
+
+def _merge_get(parts: list[dict[str, Any]]) -> dict[str, Any]:
+    out: dict[str, Any] = {"ids": []}
+    for part in parts:
+        for key, value in part.items():
+            if value is None or key == "included":
+                continue
+            out.setdefault(key, []).extend(list(value))
+    return out
+
+
+def _skip(part: dict[str, Any], n: int) -> dict[str, Any]:
+    return {k: (v[n:] if v is not None and k != "included" else v) for k, v in part.items()}
+
+
+class ShardedCollection:
+    """Routes one logical collection (``messages``) to per-guild/channel shards.
+
+    Writes go to the shard named by each row's ``guild_id``/``channel_id``.
+    Reads pinned to a guild (and channel, in channel mode) touch one shard;
+    wider reads fan out over the matching shards, with queries run in parallel
+    and merged by distance. Calls by ``ids`` alone are tried on every shard in
+    scope, which is fine for the admin/background paths that use them.
+    """
+
+    def __init__(
+        self,
+        backend: VectorBackend,
+        base: str,
+        mode: str,
+        *,
+        pool_size: int = 64,
+        max_workers: int = 8,
+        metadata: dict[str, Any] | None = None,
+    ):
+        if mode not in ("guild", "channel"):
+            raise ValueError(f"Unknown shard mode {mode!r}")
+        self.backend = backend
+        self.name = base
+        self.mode = mode
+        self.pool = ShardPool(backend, pool_size, metadata)
+        self._prefix = f"{base}_g"
+        self._known: set | None = None
+        self._known_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="shard"
+        )
+
+    # ---- shard bookkeeping ----
+    def shard_names(self) -> list[str]:
+        with self._known_lock:
+            if self._known is None:
+                self._known = {
+                    n for n in self.backend.list_collection_names() if n.startswith(self._prefix)
+                }
+            return sorted(self._known)
+
+    def _remember(self, name: str) -> None:
+        self.shard_names()
+        with self._known_lock:
+            assert self._known is not None
+            self._known.add(name)
+
+    def _shard_for(self, meta: dict[str, Any] | None) -> str:
+        meta = meta or {}
+        return shard_name(self.name, self.mode, meta.get("guild_id"), meta.get("channel_id"))
+
+    def targets(self, where: Where | None) -> list[str]:
+        """Existing shards a read with ``where`` has to visit."""
+
+        guild, channel = where_scope(where)
+        names = self.shard_names()
+        if guild is not None and (self.mode == "guild" or channel is not None):
+            name = shard_name(self.name, self.mode, guild, channel)
+            return [name] if name in names else []
+        if guild is not None:
+            prefix = f"{self._prefix}{_part(guild)}_c"
+            return [n for n in names if n.startswith(prefix)]
+        if channel is not None and self.mode == "channel":
+            suffix = f"_c{_part(channel)}"
+            return [n for n in names if n.endswith(suffix)]
+        return names
+
+    def _fan_out(self, names: Sequence[str], fn: Callable[[VectorCollection], Any]) -> list[Any]:
+        def run(name: str) -> Any:
+            with self.pool.lease(name) as col:
+                return fn(col)
+
+        if len(names) <= 1:
+            return [run(n) for n in names]
+        metrics.inc("memory.shard_fanouts")
+        return list(self._executor.map(run, names))
+
+    # ---- VectorCollection ----
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: list[str] | None = None,
+        metadatas: list[dict[str, Any]] | None = None,
+    ) -> None:
+        groups: dict[str, list[int]] = {}
+        for i in range(len(ids)):
+            groups.setdefault(self._shard_for(metadatas[i] if metadatas else None), []).append(i)
+        for name, rows in groups.items():
+            with self.pool.lease(name) as col:
+                col.upsert(
+                    ids=[ids[i] for i in rows],
+                    embeddings=[embeddings[i] for i in rows],
+                    documents=[documents[i] for i in rows] if documents else None,
+                    metadatas=[metadatas[i] for i in rows] if metadatas else None,
+                )
+            self._remember(name)
+
+    def update(
+        self,
+        ids: list[str],
+        documents: list[str] | None = None,
+        metadatas: list[dict[str, Any]] | None = None,
+    ) -> None:
+        if not metadatas or not all(m and "guild_id" in m for m in metadatas):
+            for name in self.shard_names():
+                with self.pool.lease(name) as col:
+                    col.update(ids=ids, documents=documents, metadatas=metadatas)
+            return
+        groups: dict[str, list[int]] = {}
+        for i, meta in enumerate(metadatas):
+            groups.setdefault(self._shard_for(meta), []).append(i)
+        for name, rows in groups.items():
+            if name not in self.shard_names():
+                continue
+            with self.pool.lease(name) as col:
+                col.update(
+                    ids=[ids[i] for i in rows],
+                    documents=[documents[i] for i in rows] if documents else None,
+                    metadatas=[metadatas[i] for i in rows],
+                )
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: Where | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict[str, Any]:
+        names = self.targets(where)
+        if ids is not None:
+            parts = self._fan_out(names, lambda c: c.get(ids=ids, where=where, include=include))
+            return _merge_get(parts)
+        # Walk shards in name order so limit/offset paging is stable across calls
+        skip = offset or 0
+        parts = []
+        got = 0
+        for name in names:
+            if limit is not None and got >= limit:
+                break
+            want = None if limit is None else skip + limit - got
+            with self.pool.lease(name) as col:
+                part = col.get(where=where, limit=want, include=include)
+            n = len(part.get("ids") or [])
+            if skip:
+                dropped = min(skip, n)
+                part = _skip(part, dropped)
+                skip -= dropped
+                n -= dropped
+            got += n
+            parts.append(part)
+        return _merge_get(parts)
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Where | None = None,
+        include: list[str] | None = None,
+    ) -> dict[str, Any]:
+        names = self.targets(where)
+        wanted = ["documents", "metadatas", "distances"] if include is None else include
+        # The merge ranks by distance, so every shard returns it even if the caller didn't ask
+        shard_include = wanted if "distances" in wanted else [*wanted, "distances"]
+        parts = self._fan_out(
+            names,
+            lambda c: c.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where,
+                include=shard_include,
+            ),
+        )
+        keys = ["ids"] + [k for k in shard_include if k != "ids"]
+        out: dict[str, Any] = {k: [] for k in keys}
+        for q in range(len(query_embeddings)):
+            rows: list[dict[str, Any]] = []
+            for part in parts:
+                part_ids = list((part.get("ids") or [[]])[q])
+                columns = {
+                    k: list(part[k][q]) if part.get(k) is not None else [None] * len(part_ids)
+                    for k in keys
+                }
+                rows.extend({k: columns[k][j] for k in keys} for j in range(len(part_ids)))
+            rows.sort(key=lambda r: r["distances"])
+            for k in keys:
+                out[k].append([r[k] for r in rows[:n_results]])
+        if "distances" not in wanted:
+            del out["distances"]
+        return out
+
+    def delete(self, ids: list[str] | None = None, where: Where | None = None) -> None:
+        if ids is None and not where:
+            raise ValueError("delete() needs ids or where")
+        self._fan_out(self.targets(where), lambda c: c.delete(ids=ids, where=where))
+
+    def count(self) -> int:
+        return sum(self._fan_out(self.shard_names(), lambda c: c.count()))
+
+    def peek(self, limit: int = 10) -> dict[str, Any]:
+        parts = []
+        got = 0
+        for name in self.shard_names():
+            if got >= limit:
+                break
+            with self.pool.lease(name) as col:
+                part = col.peek(limit=limit - got)
+            got += len(part.get("ids") or [])
+            parts.append(part)
+        return _merge_get(parts)
+
+    def compact(self) -> int:
+        return sum(self._fan_out(self.shard_names(), lambda c: c.compact()))
+
+
+def split_collection(
+    source: VectorCollection,
+    target: ShardedCollection,
+    page_size: int = 500,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Copy every row of ``source`` into its shard, deleting each page once written.
+
+    Safe to re-run after an interruption: upserts are idempotent and rows
+    leave ``source`` only after their shard write succeeded.
+    """
+
+    moved = 0
+    while True:
+        page = source.get(limit=page_size, include=["embeddings", "documents", "metadatas"])
+        ids = page.get("ids") or []
+        if not ids:
+            break
+        target.upsert(
+            ids=ids,
+            embeddings=[list(e) for e in page["embeddings"]],
+            documents=page.get("documents"),
+            metadatas=page.get("metadatas"),
+        )
+        source.delete(ids=ids)
+        moved += len(ids)
+        if progress is not None:
+            progress(moved)
+    log.info(
+        "collection_split",
+        extra={
+            "extra_fields": {
+                "source": source.name,
+                "rows": moved,
+                "shards": len(target.shard_names()),
+            }
+        },
+    )
+    return moved
+
+
+__all__ = [
+    "SHARD_MODES",
+    "ShardPool",
+    "ShardedCollection",
+    "shard_name",
+    "split_collection",
+    "where_scope",
+]
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from fibz_bot.memory.reembed import EMBEDDED_COLLECTIONS, EmbeddingProfile, save_active_profile
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+if TYPE_CHECKING:  # pragma: no cover - imported for type checking only
+    from fibz_bot.memory.store import MemoryStore
+
+log = get_logger(__name__)
+
+FORMAT_VERSION = 1
+_MANIFEST = "manifest.json"
+_RECORDS = "records"
+
+
+class SnapshotError(ValueError):
+    """The snapshot is incomplete, corrupt or incompatible with the target store."""
+
+
+@dataclass
+class SnapshotReport:
+    path: str = ""
+    rows: dict[str, int] = field(default_factory=dict)
+    bytes: int = 0
+    duration: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(sum(self.rows.values()) / self.duration, 1) if self.duration else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return round(self.bytes / 1e6 / self.duration, 2) if self.duration else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{sum(self.rows.values())} row(s), {self.bytes / 1e6:.1f} MB in {self.duration}s "
+            f"({self.rows_per_second} rows/s, {self.mb_per_second} MB/s)"
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "rows_per_second": self.rows_per_second,
+            "mb_per_second": self.mb_per_second,
+        }
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _pages(col: Any, page_size: int) -> Iterator[dict[str, Any]]:
+    offset = 0
+    while True:
+        page = col.get(
+            limit=page_size, offset=offset, include=["embeddings", "documents", "metadatas"]
+        )
+        ids = page.get("ids") or []
+        if not ids:
+            return
+        yield page
+        offset += len(ids)
+
+
+def _write_part(
+    root: Path, stem: str, rows: list[dict[str, Any]], embeddings: np.ndarray | None
+) -> list[dict]:
+    files = []
+    jsonl = root / f"{stem}.jsonl"
+    with jsonl.open("w", encoding="utf-8") as fh:
+        for row in rows:
+            fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+    files.append(jsonl)
+    if embeddings is not None:
+        npz = root / f"{stem}.npz"
+        np.savez(npz, embeddings=embeddings)
+        files.append(npz)
+    return [{"file": f.name, "bytes": f.stat().st_size, "sha256": _sha256(f)} for f in files]
+
+
+def export_snapshot(
+    memory: MemoryStore,
+    path: str,
+    page_size: int = 5000,
+    progress: Callable[[str, int], None] | None = None,
+) -> SnapshotReport:
+    """Write every embedded collection plus the records table to ``path``.
+
+    Each page becomes one part: a JSONL file (id, document, metadata per line)
+    and an ``.npz`` with the float32 ``embeddings`` matrix in the same order,
+    so memory stays bounded by ``page_size``. Every file's SHA-256 goes into
+    ``manifest.json``, which is written last; a snapshot without one is
+    incomplete. Run against a live store, rows written during the export may
+    or may not be included.
+    """
+
+    root = Path(path)
+    root.mkdir(parents=True, exist_ok=False)
+    started = time.perf_counter()
+    report = SnapshotReport(path=str(root))
+    manifest: dict[str, Any] = {
+        "format": FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "embedding": {
+            "model": memory.embedding.model,
+            "dimensionality": memory.embedding.dimensionality,
+        },
+        "collections": {},
+    }
+    for base in EMBEDDED_COLLECTIONS:
+        parts: list[dict[str, Any]] = []
+        total = 0
+        dim = 0
+        for n, page in enumerate(_pages(memory.collection(base), page_size)):
+            ids = page["ids"]
+            embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+            dim = int(embeddings.shape[1]) if embeddings.ndim == 2 else dim
+            docs = page.get("documents") or [None] * len(ids)
+            metas = page.get("metadatas") or [None] * len(ids)
+            rows = [{"id": i, "document": d, "metadata": m} for i, d, m in zip(ids, docs, metas)]
+            files = _write_part(root, f"{base}-{n:05d}", rows, embeddings)
+            parts.append({"rows": len(ids), "files": files})
+            total += len(ids)
+            report.bytes += sum(f["bytes"] for f in files)
+            if progress is not None:
+                progress(base, total)
+        manifest["collections"][base] = {"rows": total, "dim": dim, "parts": parts}
+        report.rows[base] = total
+
+    parts = []
+    total = 0
+    offset = 0
+    while True:
+        rows = memory.records.list(limit=page_size, offset=offset)
+        if not rows:
+            break
+        files = _write_part(root, f"{_RECORDS}-{len(parts):05d}", rows, None)
+        parts.append({"rows": len(rows), "files": files})
+        report.bytes += sum(f["bytes"] for f in files)
+        total += len(rows)
+        offset += len(rows)
+    manifest["collections"][_RECORDS] = {"rows": total, "dim": 0, "parts": parts}
+    report.rows[_RECORDS] = total
+
+    (root / _MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    report.duration = round(time.perf_counter() - started, 3)
+    metrics.inc("snapshot.exports")
+    log.info("snapshot_exported", extra={"extra_fields": report.as_dict()})
+    return report
+
+
+def read_manifest(path: str, verify: bool = True) -> dict[str, Any]:
+    """Load ``manifest.json``; with ``verify`` every part's checksum is checked first."""
+
+    root = Path(path)
+    manifest_path = root / _MANIFEST
+    if not manifest_path.exists():
+        raise SnapshotError(f"{path}: no {_MANIFEST} (incomplete export?)")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("format") != FORMAT_VERSION:
+        raise SnapshotError(f"unsupported snapshot format {manifest.get('format')!r}")
+    if verify:
+        for name, info in manifest["collections"].items():
+            for part in info["parts"]:
+                for f in part["files"]:
+                    target = root / f["file"]
+                    if not target.exists() or _sha256(target) != f["sha256"]:
+                        raise SnapshotError(f"{name}: checksum mismatch for {f['file']}")
+    return manifest
+
+
+def _read_rows(root: Path, part: dict[str, Any]) -> tuple[list[dict[str, Any]], np.ndarray | None]:
+    rows: list[dict[str, Any]] = []
+    embeddings = None
+    for f in part["files"]:
+        target = root / f["file"]
+        if target.suffix == ".jsonl":
+            with target.open(encoding="utf-8") as fh:
+                rows = [json.loads(line) for line in fh if line.strip()]
+        else:
+            with np.load(target) as data:
+                embeddings = data["embeddings"]
+    return rows, embeddings
+
+
+def _adopt_profile(memory: MemoryStore, manifest: dict[str, Any]) -> None:
+    snap = manifest["embedding"]
+    wanted = EmbeddingProfile(
+        snap["model"], int(snap["dimensionality"]), memory.embedding.generation
+    )
+    if wanted.same_vectors(memory.embedding):
+        return
+    if any(memory.collection(base).count() for base in EMBEDDED_COLLECTIONS):
+        raise SnapshotError(
+            f"snapshot vectors are {wanted.describe()}, store uses {memory.embedding.describe()}"
+        )
+    # Empty store: take the snapshot's profile so the imported vectors stay queryable
+    memory.embedding = wanted
+    save_active_profile(memory.records, wanted)
+
+
+def import_snapshot(
+    memory: MemoryStore,
+    path: str,
+    batch_size: int = 1000,
+    verify: bool = True,
+    progress: Callable[[str, int], None] | None = None,
+) -> SnapshotReport:
+    """Restore a snapshot into ``memory`` with batched upserts (no re-embedding).
+
+    Upserts are idempotent, so an interrupted import can simply be re-run.
+    """
+
+    root = Path(path)
+    started = time.perf_counter()
+    manifest = read_manifest(path, verify=verify)
+    _adopt_profile(memory, manifest)
+    report = SnapshotReport(path=str(root))
+    for name, info in manifest["collections"].items():
+        loaded = 0
+        for part in info["parts"]:
+            rows, embeddings = _read_rows(root, part)
+            report.bytes += sum(f["bytes"] for f in part["files"])
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start : start + batch_size]
+                if name == _RECORDS:
+                    # The target keeps its own embedding profile/re-embed state
+                    memory.records.upsert_many(
+                        [
+                            (r["id"], r["document"], r["metadata"])
+                            for r in batch
+                            if r["metadata"].get("type") != "embedding"
+                        ]
+                    )
+                else:
+                    if embeddings is None or len(embeddings) != len(rows):
+                        raise SnapshotError(f"{name}: embeddings do not match rows")
+                    with memory.write_lock:
+                        memory.collection(name).upsert(
+                            ids=[r["id"] for r in batch],
+                            embeddings=embeddings[start : start + batch_size].tolist(),
+                            documents=[r["document"] or "" for r in batch],
+                            metadatas=[r["metadata"] or None for r in batch],
+                        )
+                loaded += len(batch)
+                if progress is not None:
+                    progress(name, loaded)
+        report.rows[name] = loaded
+    memory.clear_caches()
+    report.duration = round(time.perf_counter() - started, 3)
+    metrics.inc("snapshot.imports")
+    log.info("snapshot_imported", extra={"extra_fields": report.as_dict()})
+    return report
+
+
+__all__ = [
+    "SnapshotError",
+    "SnapshotReport",
+    "export_snapshot",
+    "import_snapshot",
+    "read_manifest",
+]
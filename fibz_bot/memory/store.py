@@ -1,15 +1,30 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
-from datetime import datetime
-import chromadb
+
+import heapq
+import json as _json
+import math
+import time
+
+# fibz_bot/memory/store.py
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from datetime import datetime, timezone
+from threading import RLock
+from typing import Any
+
+from pydantic import BaseModel, Field, model_validator
+
 from fibz_bot.config import settings
-from fibz_bot.utils.logging import get_logger
 from fibz_bot.llm.router import ModelRouter
+from fibz_bot.memory.archive import pins_user
+from fibz_bot.memory.backend import collection_metadata, open_backend
+from fibz_bot.memory.records import RecordStore, default_records_path, migrate_self_context
+from fibz_bot.memory.reembed import EmbeddingProfile, load_active_profile, save_active_profile
+from fibz_bot.memory.shards import ShardedCollection
+from fibz_bot.utils.deadline import Deadline
+from fibz_bot.utils.logging import get_logger
 from fibz_bot.utils.metrics import metrics
-# fibz_bot/memory/store.py
-from datetime import datetime
-import json as _json
+
 
 def _coerce_meta(md: dict) -> dict:
     def conv(v):
@@ -21,72 +36,361 @@ def conv(v):
             # Chroma doesn't accept arrays/objects → store as JSON string
             return _json.dumps(list(v) if isinstance(v, set) else v, ensure_ascii=False)
         return str(v)
+
     return {k: conv(v) for k, v in md.items()}
 
+
 log = get_logger(__name__)
 
+_MISSING = object()
+_DISCORD_EPOCH_MS = 1420070400000
+_HOUR_MS = 3_600_000
+TimeBound = datetime | int | float
+
+
+def _epoch_ms(value: datetime) -> int:
+    """Epoch milliseconds; naive datetimes are UTC (as produced by utcnow())."""
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def _bound_ms(value: TimeBound | None) -> int | None:
+    if value is None:
+        return None
+    return _epoch_ms(value) if isinstance(value, datetime) else int(value)
+
+
+def _snowflake_ms(message_id: str) -> int | None:
+    """Creation time encoded in a Discord snowflake (``"<id>-q"`` style keys too)."""
+
+    head = str(message_id).split("-", 1)[0]
+    if not head.isdigit():
+        return None
+    ms = (int(head) >> 22) + _DISCORD_EPOCH_MS
+    if ms <= _DISCORD_EPOCH_MS or ms > int(time.time() * 1000) + 24 * _HOUR_MS:
+        return None
+    return ms
+
+
+def _with_time_range(
+    where: dict[str, Any] | None, since: TimeBound | None, until: TimeBound | None
+) -> dict[str, Any] | None:
+    """AND a ``created_at_ms`` range onto ``where`` (since inclusive, until exclusive)."""
+
+    clauses: list[dict[str, Any]] = [where] if where else []
+    since_ms, until_ms = _bound_ms(since), _bound_ms(until)
+    if since_ms is not None:
+        clauses.append({"created_at_ms": {"$gte": since_ms}})
+    if until_ms is not None:
+        clauses.append({"created_at_ms": {"$lt": until_ms}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class _RowCache:
+    """Small LRU of rows fetched by exact ID (negative results included)."""
+
+    def __init__(self, max_items: int = 4096):
+        self.max = max_items
+        self._rows: OrderedDict[str, dict[str, Any] | None] = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._rows:
+                return _MISSING
+            self._rows.move_to_end(key)
+            return self._rows[key]
+
+    def set(self, key: str, row: dict[str, Any] | None) -> None:
+        with self._lock:
+            self._rows[key] = row
+            self._rows.move_to_end(key)
+            while len(self._rows) > self.max:
+                self._rows.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._rows.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
 
 class MessageMeta(BaseModel):
     message_id: str
-    guild_id: Optional[str] = None
-    channel_id: Optional[str] = None
-    user_id: Optional[str] = None
-    username: Optional[str] = None
+    guild_id: str | None = None
+    channel_id: str | None = None
+    user_id: str | None = None
+    username: str | None = None
     role: str = "user"
     modality: str = "text"
-    reply_to: Optional[str] = None
-    created_at: datetime = datetime.utcnow()
-    tokens: Optional[int] = None
-    persona: Optional[str] = None
+    reply_to: str | None = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at_ms: int | None = None
+    tokens: int | None = None
+    persona: str | None = None
     version: str = "0.5.0"
-    consent: Dict[str, Any] = {}
-    tags: List[str] = []
+    consent: dict[str, Any] = {}
+    tags: list[str] = []
+
+    @model_validator(mode="after")
+    def _fill_created_at_ms(self) -> MessageMeta:
+        if self.created_at_ms is None:
+            self.created_at_ms = _epoch_ms(self.created_at)
+        return self
 
 
 class MemoryStore:
     def __init__(self, router: ModelRouter):
         self.router = router
-        self.client = chromadb.PersistentClient(path=settings.CHROMA_PATH)
-        self.messages = self.client.get_or_create_collection(
-            "messages", metadata={"hnsw:space": "cosine"}
-        )
-        self.self_context = self.client.get_or_create_collection(
-            "self_context", metadata={"hnsw:space": "cosine"}
-        )
-        self.entities = self.client.get_or_create_collection(
-            "entities", metadata={"hnsw:space": "cosine"}
-        )
-        self.archives = self.client.get_or_create_collection(
-            "archives", metadata={"hnsw:space": "cosine"}
-        )
+        self.backend = open_backend()
+        self.sharding = (settings.MEMORY_SHARDING or "off").lower()
+        self.records = RecordStore(default_records_path())
+        self.embedding = load_active_profile(self.records)
+        if not self.embedding.same_vectors(EmbeddingProfile.configured()):
+            log.warning(
+                "embedding_profile_differs",
+                extra={
+                    "extra_fields": {
+                        "active": self.embedding.describe(),
+                        "configured": EmbeddingProfile.configured().describe(),
+                        "hint": "set EMBED_MIGRATION_ENABLED to re-embed; "
+                        "until then the active profile is used",
+                    }
+                },
+            )
+        # Held by writers; the re-embed switch takes it to freeze writes for its last pass
+        self.write_lock = RLock()
+        self.messages = self.open_collection("messages", self.embedding)
+        self.entities = self.open_collection("entities", self.embedding)
+        self.archives = self.open_collection("archives", self.embedding)
+        if self.sharding != "off" and (
+            self.embedding.collection_name("messages") in self.backend.list_collection_names()
+        ):
+            log.warning(
+                "unsharded_messages_present",
+                extra={"extra_fields": {"hint": "run scripts/migrate_shards.py"}},
+            )
+        if (
+            not self.records.has_migration("self_context")
+            and "self_context" in self.backend.list_collection_names()
+        ):
+            migrate_self_context(
+                self.backend.get_or_create_collection(
+                    "self_context", metadata={"hnsw:space": "cosine"}
+                ),
+                self.records,
+            )
+        self._self_context_cache = _RowCache()
+        self._entity_cache = _RowCache()
+        self._archives_present: bool | None = None
+        # Time filters, decay, retention and archival all read created_at_ms,
+        # so legacy rows are backfilled on open (a no-op once recorded as applied)
+        self.backfill_message_timestamps()
+
+    def open_collection(self, base: str, profile: EmbeddingProfile) -> Any:
+        """Open ``base`` (messages/entities/archives) for one embedding generation."""
+
+        name = profile.collection_name(base)
+        if base == "messages" and self.sharding != "off":
+            return ShardedCollection(
+                self.backend,
+                name,
+                self.sharding,
+                pool_size=settings.SHARD_POOL_SIZE,
+                max_workers=settings.SHARD_FANOUT_WORKERS,
+                metadata=collection_metadata(base),
+            )
+        return self.backend.get_or_create_collection(name, metadata=collection_metadata(base))
+
+    def collection(self, base: str) -> Any:
+        return {"messages": self.messages, "entities": self.entities, "archives": self.archives}[
+            base
+        ]
+
+    def switch_embeddings(self, profile: EmbeddingProfile, collections: dict[str, Any]) -> None:
+        """Point reads and writes at another generation's collections (one step)."""
+
+        with self.write_lock:
+            self.messages = collections["messages"]
+            self.entities = collections["entities"]
+            self.archives = collections["archives"]
+            self.embedding = profile
+            save_active_profile(self.records, profile)
+            self.clear_caches()
+        log.info("embedding_switched", extra={"extra_fields": {"profile": profile.describe()}})
+
+    def clear_caches(self) -> None:
+        """Forget cached record/entity rows (after bulk writes that bypass the setters)."""
+
+        self._self_context_cache = _RowCache()
+        self._entity_cache = _RowCache()
+        self._archives_present = None
+
+    def _embed(
+        self,
+        texts: list[str],
+        deadline: Deadline | None = None,
+        profile: EmbeddingProfile | None = None,
+    ) -> list[list[float]]:
+        """Embed with the active profile (the router default unless a re-embed is pending)."""
+
+        kwargs = (profile or self.embedding).embed_kwargs()
+        if deadline is not None:
+            kwargs["deadline"] = deadline
+        return self.router.embed_texts(texts, **kwargs)
+
+    def _upsert_embedded(
+        self, base: str, ids: list[str], documents: list[str], metadatas: list[dict[str, Any]]
+    ) -> None:
+        """Embed outside ``write_lock``, then write under it to the same profile's collection.
+
+        ``switch_embeddings`` may run while the model call is in flight; the
+        vectors are only written if the profile is unchanged once the lock is
+        held, otherwise they are recomputed for the new profile.
+        """
+
+        while True:
+            profile = self.embedding
+            vectors = self._embed(documents, profile=profile)
+            with self.write_lock:
+                if self.embedding.same_vectors(profile):
+                    self.collection(base).upsert(
+                        ids=ids, documents=documents, embeddings=vectors, metadatas=metadatas
+                    )
+                    return
+            metrics.inc("memory.reembed_write_retries")
+
+    def _embed_query(self, query: str, deadline: Deadline | None = None) -> list[float]:
+        return self._embed([query], deadline)[0]
 
     def upsert_message(self, message_id: str, content: str, meta: MessageMeta) -> None:
-        vec = self.router.embed_texts([content])[0]
-        self.messages.upsert(
-            ids=[message_id], documents=[content], embeddings=[vec], metadatas=[_coerce_meta(meta.model_dump())],
+        self._upsert_embedded(
+            "messages", [message_id], [content], [_coerce_meta(meta.model_dump())]
         )
 
-    def upsert_self_context(self, key: str, content: str, metadata: Dict[str, Any]) -> None:
-        vec = self.router.embed_texts([content])[0]
-        self.self_context.upsert(
-            ids=[key], documents=[content], embeddings=[vec], metadatas=[_coerce_meta(metadata)],
+    def ingest_document(
+        self,
+        chunks: list[tuple],
+        *,
+        fingerprint: str,
+        meta: MessageMeta,
+        filename: str,
+    ) -> dict[str, int]:
+        """Index ``(text, chunk_meta)`` chunks of one file without duplicating work.
+
+        Row IDs are content-addressed per channel (``doc:{channel}:{fp}:p{page}:{hash}``).
+        Chunks already stored for the channel are not re-embedded; the uploader is
+        added to their ``uploaders`` reference instead. Chunks new to this channel
+        reuse vectors of the same file already indexed elsewhere in the guild, so
+        only never-seen content reaches the embedding model.
+        """
+
+        from fibz_bot.ingest.pdf_extract import chunk_id
+
+        scope = {
+            k: v for k, v in (("guild_id", meta.guild_id), ("channel_id", meta.channel_id)) if v
+        }
+        keyed: dict[str, tuple] = {}
+        for text, chunk_meta in chunks:
+            key = chunk_id(fingerprint, chunk_meta.get("page") or chunk_meta.get("slide"), text)
+            keyed.setdefault(f"doc:{meta.channel_id}:{key}", (key, text, chunk_meta))
+        ids = list(keyed)
+        uploader = str(meta.user_id or "")
+        counts = {"chunks": len(ids), "skipped": 0, "reused": 0, "embedded": 0}
+
+        with self.write_lock:
+            found = self.messages.get(ids=ids, where=scope, include=["metadatas"])
+            existing = dict(zip(found.get("ids") or [], found.get("metadatas") or []))
+            refs = []
+            for row_id, row_meta in existing.items():
+                uploaders = [
+                    u for u in str((row_meta or {}).get("uploaders") or "").split(",") if u
+                ]
+                if uploader and uploader not in uploaders:
+                    refs.append((row_id, ",".join(uploaders + [uploader])))
+            if refs:
+                self.messages.update(
+                    ids=[r[0] for r in refs],
+                    metadatas=[{**scope, "uploaders": r[1]} for r in refs],
+                )
+            counts["skipped"] = len(existing)
+            missing = [i for i in ids if i not in existing]
+            if not missing:
+                metrics.inc("memory.doc_chunks_skipped", counts["skipped"])
+                return counts
+
+            reusable: dict[str, list[float]] = {}
+            if meta.guild_id:
+                same_file = self.messages.get(
+                    where={"guild_id": meta.guild_id, "fingerprint": fingerprint},
+                    include=["embeddings", "metadatas"],
+                )
+                embeddings = same_file.get("embeddings")
+                if embeddings is None:
+                    embeddings = []
+                for emb, row_meta in zip(embeddings, same_file.get("metadatas") or []):
+                    if (row_meta or {}).get("chunk_key"):
+                        reusable[row_meta["chunk_key"]] = [float(x) for x in emb]
+            to_embed = [i for i in missing if keyed[i][0] not in reusable]
+            vectors = (
+                dict(zip(to_embed, self._embed([keyed[i][1] for i in to_embed])))
+                if to_embed
+                else {}
+            )
+            base = _coerce_meta(meta.model_dump())
+            metadatas = []
+            for row_id in missing:
+                key, _, chunk_meta = keyed[row_id]
+                row_meta = {
+                    **base,
+                    **_coerce_meta(chunk_meta),
+                    "message_id": row_id,
+                    "filename": filename,
+                    "fingerprint": fingerprint,
+                    "chunk_key": key,
+                    "uploaders": uploader,
+                }
+                metadatas.append(row_meta)
+            self.messages.upsert(
+                ids=missing,
+                documents=[keyed[i][1] for i in missing],
+                embeddings=[vectors[i] if i in vectors else reusable[keyed[i][0]] for i in missing],
+                metadatas=metadatas,
+            )
+        counts["embedded"] = len(to_embed)
+        counts["reused"] = len(missing) - len(to_embed)
+        metrics.inc("memory.doc_chunks_skipped", counts["skipped"])
+        metrics.inc("memory.doc_chunks_reused", counts["reused"])
+        metrics.inc("memory.doc_chunks_embedded", counts["embedded"])
+        log.info(
+            "document_ingested", extra={"extra_fields": {"fingerprint": fingerprint, **counts}}
         )
+        return counts
+
+    def upsert_self_context(self, key: str, content: str, metadata: dict[str, Any]) -> None:
+        # Settings-style records are only read back by key or filter: no embedding
+        self.records.upsert(key, content, _coerce_meta(metadata))
+        self._self_context_cache.discard(key)
 
-    def _get_self_context_by_id(self, key: str) -> Optional[Dict[str, Any]]:
+    def _get_self_context_by_id(self, key: str) -> dict[str, Any] | None:
+        cached = self._self_context_cache.get(key)
+        if cached is not _MISSING:
+            metrics.inc("memory.cache_hits")
+            return cached
         try:
-            res = self.self_context.get(ids=[key])
-            if res and res.get("ids"):
-                return {
-                    "id": res["ids"][0],
-                    "document": res["documents"][0],
-                    "metadata": res["metadatas"][0],
-                }
+            row = self.records.get(key)
         except Exception:
             return None
-        return None
+        self._self_context_cache.set(key, row)
+        return row
 
     # Entities
-    def upsert_entity(self, entity_id: str, content: str, metadata: Dict[str, Any]) -> None:
+    def upsert_entity(self, entity_id: str, content: str, metadata: dict[str, Any]) -> None:
         meta = dict(metadata)
         meta.setdefault("entity_id", entity_id)
         raw_tags = meta.get("tags", [])
@@ -106,31 +410,41 @@ def upsert_entity(self, entity_id: str, content: str, metadata: Dict[str, Any])
             meta["channels"] = ",".join(sorted(channel_values))
         meta.setdefault("source", "auto_revision")
         meta.setdefault("updated_at", datetime.utcnow().isoformat())
-        vec = self.router.embed_texts([content])[0]
-        self.entities.upsert(
-            ids=[entity_id], documents=[content], embeddings=[vec], metadatas=[_coerce_meta(meta)],
-        )
+        self._upsert_embedded("entities", [entity_id], [content], [_coerce_meta(meta)])
+        self._entity_cache.discard(entity_id)
         metrics.inc("entity.upserts")
 
-    def get_entity(self, entity_id: str) -> Optional[Dict[str, Any]]:
+    def get_entity(self, entity_id: str) -> dict[str, Any] | None:
+        cached = self._entity_cache.get(entity_id)
+        if cached is not _MISSING:
+            metrics.inc("memory.cache_hits")
+            return cached
         try:
             res = self.entities.get(ids=[entity_id])
         except Exception:
             return None
         ids = res.get("ids") or []
-        if not ids:
-            return None
-        return {
-            "id": ids[0],
-            "document": (res.get("documents") or [""])[0],
-            "metadata": (res.get("metadatas") or [{}])[0],
-        }
+        row = None
+        if ids:
+            row = {
+                "id": ids[0],
+                "document": (res.get("documents") or [""])[0],
+                "metadata": (res.get("metadatas") or [{}])[0],
+            }
+        self._entity_cache.set(entity_id, row)
+        return row
 
     def search_entities(
-        self, query: str, k: int = 3, where: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
-        qvec = self.router.embed_texts([query])[0]
-        res = self.entities.query(query_embeddings=[qvec], n_results=k, where=where or {})
+        self,
+        query: str,
+        k: int = 3,
+        where: dict[str, Any] | None = None,
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        qvec = self._embed_query(query, deadline)
+        if deadline is not None:
+            deadline.check("search_entities")
+        res = self.entities.query(query_embeddings=[qvec], n_results=k, where=where)
         docs = res.get("documents", [[]])[0]
         ids = res.get("ids", [[]])[0]
         metas = res.get("metadatas", [[]])[0]
@@ -186,6 +500,23 @@ def get_cross_channel(self, guild_id: str) -> bool:
             return bool(row["metadata"].get("value", False))
         return False
 
+    # Consent classifier terms (extend the built-in lists per guild)
+    def set_consent_terms(self, guild_id: str, terms: dict[str, list[str]]) -> None:
+        self.upsert_self_context(
+            f"policy:consentterms:{guild_id}",
+            _json.dumps(terms, sort_keys=True),
+            {"type": "policy", "key": "consent_terms", "guild_id": guild_id},
+        )
+
+    def get_consent_terms(self, guild_id: str) -> dict[str, list[str]]:
+        row = self._get_self_context_by_id(f"policy:consentterms:{guild_id}")
+        if not row or not row.get("document"):
+            return {}
+        try:
+            return _json.loads(row["document"])
+        except ValueError:
+            return {}
+
     # Consent
     def set_consent(self, subject_user_id: str, scope: str, target: str, granted: bool) -> None:
         self.upsert_self_context(
@@ -200,7 +531,7 @@ def set_consent(self, subject_user_id: str, scope: str, target: str, granted: bo
             },
         )
 
-    def get_consent(self, subject_user_id: str, scope: str, target: str) -> Optional[bool]:
+    def get_consent(self, subject_user_id: str, scope: str, target: str) -> bool | None:
         row = self._get_self_context_by_id(f"consent:{subject_user_id}:{scope}:{target}")
         if row and isinstance(row.get("metadata"), dict):
             return bool(row["metadata"].get("granted", None))
@@ -208,23 +539,17 @@ def get_consent(self, subject_user_id: str, scope: str, target: str) -> Optional
 
     def list_consents_for_user(
         self, subject_user_id: str, page: int = 1, page_size: int = 10
-    ) -> Dict[str, Any]:
+    ) -> dict[str, Any]:
         try:
-            # Chroma supports metadata filtering in get(); fall back gracefully
             offset = max(page - 1, 0) * page_size
-            res = self.self_context.get(
-                where={"type": "consent", "subject_user_id": subject_user_id}
+            total = self.records.count(type="consent", subject_user_id=subject_user_id)
+            rows = self.records.list(
+                type="consent", subject_user_id=subject_user_id, limit=page_size, offset=offset
             )
-            ids = res.get("ids", [])
-            docs = res.get("documents", [])
-            metas = res.get("metadatas", [])
-            total = len(ids)
-            sl = slice(offset, offset + page_size)
             return {
                 "total": total,
                 "items": [
-                    {"id": ids[i], "text": docs[i], "meta": metas[i]}
-                    for i in range(*sl.indices(total))
+                    {"id": r["id"], "text": r["document"], "meta": r["metadata"]} for r in rows
                 ],
             }
         except Exception:
@@ -244,15 +569,32 @@ def set_rating(self, guild_id: str, message_id: str, up: bool, note: str | None)
         self.upsert_self_context(key, content, meta)
 
     # Retrieval
-    def retrieve(
-        self, query: str, k: int = 6, where: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
-        qvec = self.router.embed_texts([query])[0]
-        res = self.messages.query(query_embeddings=[qvec], n_results=k, where=where or {})
+    def _scored_query(
+        self,
+        col: Any,
+        qvec: list[float],
+        query: str,
+        n_results: int,
+        where: dict[str, Any] | None,
+        include_embeddings: bool,
+        half_life: float,
+    ) -> list[tuple]:
+        """Query one collection and return ``(score, id, doc, meta, embedding)`` rows."""
+
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+        res = col.query(query_embeddings=[qvec], n_results=n_results, where=where, include=include)
         docs = res.get("documents", [[]])[0]
         ids = res.get("ids", [[]])[0]
         metas = res.get("metadatas", [[]])[0]
         distances = res.get("distances", [[]])[0]
+        raw_embeddings = res.get("embeddings")
+        embeddings = (
+            [[float(x) for x in e] for e in raw_embeddings[0]]
+            if include_embeddings and raw_embeddings is not None and len(raw_embeddings)
+            else [None] * len(ids)
+        )
 
         def lexical_score(text: str, q: str) -> float:
             qset = set(w.lower() for w in q.split())
@@ -264,42 +606,329 @@ def lexical_score(text: str, q: str) -> float:
         sims = [1.0 - min(max(d, 0.0), 2.0) / 2.0 for d in distances]
         lex = [lexical_score(d, query) for d in docs]
         fused = [0.8 * s + 0.2 * l for s, l in zip(sims, lex)]
-        ranked = sorted(zip(fused, ids, docs, metas), key=lambda x: x[0], reverse=True)[:k]
-        return {
+        if half_life > 0:
+            now_ms = _epoch_ms(datetime.now(timezone.utc))
+            weight = settings.RETRIEVAL_RECENCY_WEIGHT
+            decay = []
+            for meta in metas:
+                created = (meta or {}).get("created_at_ms")
+                age_hours = (
+                    max(now_ms - int(created), 0) / _HOUR_MS if created is not None else math.inf
+                )
+                decay.append(0.5 ** (age_hours / half_life))
+            fused = [(1.0 - weight) * f + weight * d for f, d in zip(fused, decay)]
+        return list(zip(fused, ids, docs, metas, embeddings))
+
+    def retrieve(
+        self,
+        query: str,
+        k: int = 6,
+        where: dict[str, Any] | None = None,
+        deadline: Deadline | None = None,
+        include_embeddings: bool = False,
+        since: TimeBound | None = None,
+        until: TimeBound | None = None,
+        recency_half_life_hours: float | None = None,
+    ) -> dict[str, Any]:
+        """Hybrid similarity search over messages.
+
+        ``since``/``until`` (datetime or epoch ms) are pushed into the store
+        filter. With a recency half-life (argument or
+        ``RETRIEVAL_RECENCY_HALF_LIFE_HOURS``) a wider candidate set is fetched
+        and blended with an exponential age decay before the top ``k`` are kept.
+        When the best hot score is below ``ARCHIVE_FALLBACK_MIN_SCORE`` the
+        ``archives`` tier is queried with the same filter and merged in, unless
+        the filter pins ``user_id`` (archive rows mix several speakers).
+        """
+
+        qvec = self._embed_query(query, deadline)
+        if deadline is not None:
+            deadline.check("retrieve")
+        half_life = (
+            settings.RETRIEVAL_RECENCY_HALF_LIFE_HOURS
+            if recency_half_life_hours is None
+            else recency_half_life_hours
+        )
+        scoped = _with_time_range(where, since, until)
+        n_results = k * 3 if half_life > 0 else k
+        rows = self._scored_query(
+            self.messages, qvec, query, n_results, scoped, include_embeddings, half_life
+        )
+        best = max((r[0] for r in rows), default=0.0)
+        fallback = best < settings.ARCHIVE_FALLBACK_MIN_SCORE and not pins_user(scoped)
+        if fallback and self._has_archives():
+            if deadline is not None:
+                deadline.check("retrieve_archives")
+            metrics.inc("memory.archive_fallbacks")
+            rows += self._scored_query(
+                self.archives, qvec, query, n_results, scoped, include_embeddings, half_life
+            )
+        ranked = sorted(rows, key=lambda x: x[0], reverse=True)[:k]
+        out = {
             "ids": [r[1] for r in ranked],
             "documents": [r[2] for r in ranked],
             "metadatas": [r[3] for r in ranked],
             "scores": [r[0] for r in ranked],
         }
+        if include_embeddings:
+            out["embeddings"] = [r[4] for r in ranked]
+        return out
 
-    # Admin purge operations (best-effort, simple where)
+    def _has_archives(self) -> bool:
+        # Counted once, then kept true by upsert_archive: no count() per turn
+        if self._archives_present is None:
+            self._archives_present = bool(self.archives.count())
+        return self._archives_present
+
+    def upsert_archive(self, archive_id: str, content: str, metadata: dict[str, Any]) -> None:
+        self._upsert_embedded("archives", [archive_id], [content], [_coerce_meta(metadata)])
+        self._archives_present = True
+
+    # Admin listing / purge: store-side paging, bounded batches
     def list_messages(
-        self, where: Optional[Dict[str, Any]] = None, limit: int = 50
-    ) -> Dict[str, Any]:
+        self,
+        where: dict[str, Any] | None = None,
+        limit: int = 50,
+        offset: int = 0,
+        since: TimeBound | None = None,
+        until: TimeBound | None = None,
+    ) -> dict[str, Any]:
+        """One page of messages; ``next_offset`` is None on the last page."""
+
         try:
-            res = self.messages.get(where=where or {}, limit=limit)
+            res = self.messages.get(
+                where=_with_time_range(where, since, until), limit=limit, offset=offset
+            )
             items = [
                 {"id": i, "text": d, "meta": m}
                 for i, d, m in zip(
                     res.get("ids", []), res.get("documents", []), res.get("metadatas", [])
                 )
             ]
-            return {"items": items}
+            next_offset = offset + len(items) if len(items) == limit else None
+            return {"items": items, "next_offset": next_offset}
         except Exception:
-            return {"items": []}
+            return {"items": [], "next_offset": None}
 
-    def delete_messages(self, where: Optional[Dict[str, Any]] = None) -> int:
-        try:
-            res = self.messages.get(where=where or {})
-            ids = res.get("ids", [])
-            if not ids:
-                return 0
-            self.messages.delete(ids=ids)
-            return len(ids)
-        except Exception:
+    def iter_message_pages(
+        self,
+        where: dict[str, Any] | None = None,
+        page_size: int = 500,
+        since: TimeBound | None = None,
+        until: TimeBound | None = None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Stream matching messages page by page without loading them all."""
+
+        offset: int | None = 0
+        while offset is not None:
+            page = self.list_messages(
+                where=where, limit=page_size, offset=offset, since=since, until=until
+            )
+            if page["items"]:
+                yield page["items"]
+            offset = page["next_offset"]
+
+    def recent_messages(
+        self,
+        where: dict[str, Any] | None = None,
+        limit: int = 10,
+        windows_hours: tuple[float, ...] = (1, 24, 24 * 7, 24 * 30),
+    ) -> list[dict[str, Any]]:
+        """Newest ``limit`` matching messages, oldest first.
+
+        Starts with a narrow ``created_at_ms`` window and widens it only when it
+        holds fewer than ``limit`` rows, so busy channels never scan their history.
+        """
+
+        now_ms = _epoch_ms(datetime.now(timezone.utc))
+        top: list[dict[str, Any]] = []
+        for hours in (*windows_hours, None):
+            since = None if hours is None else now_ms - int(hours * _HOUR_MS)
+            rows = (
+                item for page in self.iter_message_pages(where=where, since=since) for item in page
+            )
+            top = heapq.nlargest(
+                limit, rows, key=lambda it: (it["meta"] or {}).get("created_at_ms") or 0
+            )
+            if len(top) >= limit:
+                break
+        return top[::-1]
+
+    def backfill_message_timestamps(self, page_size: int = 500) -> int:
+        """One-time migration: add ``created_at_ms`` to messages stored without it.
+
+        Rows written before the fix all carry the process-start ``created_at``;
+        the Discord snowflake in the message ID is preferred when present.
+        """
+
+        if self.records.has_migration("messages_created_at_ms"):
             return 0
+        updated = 0
+        for page in self.iter_message_pages(page_size=page_size):
+            ids: list[str] = []
+            metas: list[dict[str, Any]] = []
+            for item in page:
+                meta = item["meta"] or {}
+                if meta.get("created_at_ms") is not None:
+                    continue
+                ms = _snowflake_ms(meta.get("message_id") or item["id"])
+                if ms is None:
+                    try:
+                        ms = _epoch_ms(datetime.fromisoformat(str(meta.get("created_at"))))
+                    except ValueError:
+                        continue
+                ids.append(item["id"])
+                metas.append(
+                    {
+                        "created_at_ms": ms,
+                        "created_at": datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat(),
+                    }
+                )
+            if ids:
+                self.messages.update(ids=ids, metadatas=metas)
+                updated += len(ids)
+        self.records.mark_migration("messages_created_at_ms", detail=f"rows={updated}")
+        log.info("messages_timestamps_backfilled", extra={"extra_fields": {"rows": updated}})
+        return updated
+
+    def count_messages(self, where: dict[str, Any] | None = None, page_size: int = 2000) -> int:
+        """Exact number of messages matching ``where`` (IDs only are fetched)."""
+
+        if not where:
+            return self.messages.count()
+        total = 0
+        offset = 0
+        while True:
+            ids = (
+                self.messages.get(where=where, limit=page_size, offset=offset, include=[]).get(
+                    "ids"
+                )
+                or []
+            )
+            total += len(ids)
+            if len(ids) < page_size:
+                return total
+            offset += page_size
+
+    def delete_messages(
+        self,
+        where: dict[str, Any] | None = None,
+        batch_size: int | None = None,
+        progress: Callable[[int], None] | None = None,
+        pause: float = 0.0,
+    ) -> int:
+        """Delete matching messages in batches; ``progress`` gets the running total.
+
+        ``pause`` sleeps between batches so background jobs yield to live traffic.
+        """
+
+        batch_size = batch_size or settings.PURGE_BATCH_SIZE
+        deleted = 0
+        previous: list[str] = []
+        try:
+            while True:
+                # Always read from the start: the rows we just deleted are gone
+                ids = self.messages.get(where=where, limit=batch_size, include=[]).get("ids") or []
+                if not ids or ids == previous:
+                    break
+                self.messages.delete(ids=ids)
+                deleted += len(ids)
+                previous = ids
+                metrics.inc("memory.purged", len(ids))
+                if progress is not None:
+                    progress(deleted)
+                if pause:
+                    time.sleep(pause)
+        except Exception as exc:
+            log.warning(
+                "delete_messages_failed",
+                extra={"extra_fields": {"deleted": deleted, "error": exc.__class__.__name__}},
+            )
+        return deleted
+
+    def delete_message_ids(
+        self,
+        ids: list[str],
+        batch_size: int | None = None,
+        pause: float = 0.0,
+        where: dict[str, Any] | None = None,
+    ) -> int:
+        """Delete by ID; ``where`` (e.g. the guild/channel) narrows which shards are touched."""
+
+        batch_size = batch_size or settings.PURGE_BATCH_SIZE
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start : start + batch_size]
+            self.messages.delete(ids=batch, where=where)
+            metrics.inc("memory.purged", len(batch))
+            if pause and start + batch_size < len(ids):
+                time.sleep(pause)
+        return len(ids)
+
+    def iter_message_metas(
+        self, where: dict[str, Any] | None, page_size: int = 2000
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        offset = 0
+        while True:
+            res = self.messages.get(
+                where=where, limit=page_size, offset=offset, include=["metadatas"]
+            )
+            ids = res.get("ids") or []
+            yield from zip(ids, res.get("metadatas") or [{}] * len(ids))
+            if len(ids) < page_size:
+                return
+            offset += page_size
+
+    def message_counts_by(self, field: str, where: dict[str, Any] | None = None) -> dict[str, int]:
+        """Row counts grouped by a metadata field (metadata-only scan)."""
+
+        counts: dict[str, int] = {}
+        for _, meta in self.iter_message_metas(where):
+            key = str((meta or {}).get(field))
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def oldest_message_ids(self, where: dict[str, Any] | None, n: int) -> list[str]:
+        """IDs of the ``n`` oldest matching messages by ``created_at_ms``."""
+
+        if n <= 0:
+            return []
+        rows = (
+            (int((meta or {}).get("created_at_ms") or 0), mid)
+            for mid, meta in self.iter_message_metas(where)
+        )
+        return [mid for _, mid in heapq.nsmallest(n, rows)]
+
+    def compact(self) -> dict[str, int]:
+        """Ask each collection to reclaim space left by deletes."""
+
+        return {
+            name: col.compact()
+            for name, col in (("messages", self.messages), ("archives", self.archives))
+        }
+
+    def warm_collections(self) -> dict[str, int]:
+        """Force each collection's index into memory with a 1-NN query.
+
+        Queries with an embedding already stored in the collection, so no
+        model call is needed and dimensions always match. Returns row counts.
+        """
+        counts: dict[str, int] = {}
+        for name, col in (
+            ("messages", self.messages),
+            ("entities", self.entities),
+            ("archives", self.archives),
+        ):
+            counts[name] = col.count()
+            if not counts[name]:
+                continue
+            sample = col.peek(limit=1)
+            embeddings = sample.get("embeddings")
+            if embeddings is None or not len(embeddings):
+                continue
+            col.query(query_embeddings=[list(embeddings[0])], n_results=1, include=[])
+        return counts
 
-    def counts(self) -> Dict[str, int]:
+    def counts(self) -> dict[str, int]:
         def safe_count(col):
             try:
                 return col.count()
@@ -308,7 +937,7 @@ def safe_count(col):
 
         return {
             "messages": safe_count(self.messages),
-            "self_context": safe_count(self.self_context),
+            "self_context": safe_count(self.records),
             "entities": safe_count(self.entities),
             "archives": safe_count(self.archives),
         }
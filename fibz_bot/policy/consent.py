@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, Optional, TYPE_CHECKING
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 import discord
 
+from fibz_bot.config import settings
+from fibz_bot.policy.matcher import get_matcher
+from fibz_bot.utils.cache import TTLCache
 from fibz_bot.utils.logging import get_logger
 from fibz_bot.utils.metrics import metrics
 
@@ -29,11 +33,23 @@
     "location",
     "token",
 }
-_CLASSIFIER_SENSITIVE = SENSITIVE_KEYS
-_CLASSIFIER_PRIVATE = {"private", "dm", "direct message", "secret", "confidential"}
+# Deterministic fast path: matcher category -> label, no model call
+_CATEGORY_LABELS = {
+    "channel": "share_block",
+    "sensitive": "share_needs_consent",
+    "private": "share_needs_consent",
+}
+
+_CONSENT_MEMORY: MemoryStore | None = None
+_CONSENT_ROUTER: ModelRouter | None = None
 
-_CONSENT_MEMORY: Optional["MemoryStore"] = None
-_CONSENT_ROUTER: Optional["ModelRouter"] = None
+_LABELS = {"share_safe", "share_block", "share_needs_consent"}
+# Classifier labels by (normalized request text, cross-channel flag); LRU with a TTL
+_label_cache: TTLCache[str] = TTLCache(
+    max_items=settings.CONSENT_LABEL_CACHE_SIZE, ttl=settings.CONSENT_LABEL_CACHE_TTL_SECONDS
+)
+# One pending consent DM per (subject, scope, target); later callers await the same result
+_inflight: dict[tuple[str, str, str], asyncio.Future[bool]] = {}
 
 
 class ConsentDecision:
@@ -42,7 +58,7 @@ class ConsentDecision:
     CONSENT_REQUIRED = "consent_required"
 
 
-def classify_info(payload: Dict[str, Any]) -> str:
+def classify_info(payload: dict[str, Any]) -> str:
     tags = {str(t).lower() for t in payload.get("tags", [])}
     if "private" in tags:
         return ConsentDecision.PRIVATE
@@ -57,7 +73,7 @@ def classify_info(payload: Dict[str, Any]) -> str:
 def can_share(
     requester_id: str,
     subject_id: str,
-    item_meta: Dict[str, Any],
+    item_meta: dict[str, Any],
     *,
     same_channel: bool,
     cross_channel_toggle: bool,
@@ -67,13 +83,27 @@ def can_share(
     return bool(cross_channel_toggle)
 
 
-def configure_consent(memory: "MemoryStore", router: "ModelRouter" | None = None) -> None:
+def configure_consent(memory: MemoryStore, router: ModelRouter | None = None) -> None:
     global _CONSENT_MEMORY, _CONSENT_ROUTER
     _CONSENT_MEMORY = memory
     if router is not None:
         _CONSENT_ROUTER = router
 
 
+class ShareVerdict(NamedTuple):
+    label: str
+    category: str  # matcher category, or "self" / "cache" / "model" / "default"
+
+
+def _guild_terms(guild_id: str | None) -> dict[str, list[str]]:
+    if not guild_id or _CONSENT_MEMORY is None:
+        return {}
+    try:
+        return _CONSENT_MEMORY.get_consent_terms(guild_id)
+    except Exception:
+        return {}
+
+
 async def classify_share_request(
     request_text: str,
     requester_id: str,
@@ -82,32 +112,71 @@ async def classify_share_request(
     channel_id: str | None,
     cross_channel_enabled: bool,
     *,
-    router: "ModelRouter" | None = None,
+    router: ModelRouter | None = None,
 ) -> str:
     """Classify whether a share request is safe, blocked, or requires consent."""
 
+    verdict = await classify_share(
+        request_text,
+        requester_id,
+        subject_id,
+        guild_id,
+        channel_id,
+        cross_channel_enabled,
+        router=router,
+    )
+    return verdict.label
+
+
+async def classify_share(
+    request_text: str,
+    requester_id: str,
+    subject_id: str,
+    guild_id: str | None,
+    channel_id: str | None,
+    cross_channel_enabled: bool,
+    *,
+    router: ModelRouter | None = None,
+) -> ShareVerdict:
+    """Like ``classify_share_request`` but also says what decided the label.
+
+    The term matcher (defaults + ``CONSENT_TERMS`` + the guild's own terms)
+    answers first; only requests matching no category reach the model.
+    """
+
     metrics.inc("consent.classifier_runs")
 
     if requester_id == subject_id:
-        return "share_safe"
+        return ShareVerdict("share_safe", "self")
+
+    hit = get_matcher(settings.CONSENT_TERMS, _guild_terms(guild_id)).match(
+        request_text, cross_channel_enabled=cross_channel_enabled
+    )
+    if hit is not None:
+        metrics.inc(f"consent.fast_path.{hit.category}")
+        log.info(
+            "consent_fast_path",
+            extra={
+                "extra_fields": {"category": hit.category, "term": hit.term, "guild_id": guild_id}
+            },
+        )
+        return ShareVerdict(_CATEGORY_LABELS[hit.category], hit.category)
 
     text = (request_text or "").lower()
-    if not cross_channel_enabled:
-        if any("#" in token or "channel" in token for token in text.split()):
-            return "share_block"
-    for phrase in _CLASSIFIER_SENSITIVE:
-        if phrase in text:
-            return "share_needs_consent"
-    if any(phrase in text for phrase in _CLASSIFIER_PRIVATE):
-        return "share_needs_consent"
-
     model = router or _CONSENT_ROUTER
     if model is None:
-        return "share_safe"
+        return ShareVerdict("share_safe", "default")
+
+    key = (" ".join(text.split()), bool(cross_channel_enabled))
+    cached = _label_cache.get(key)
+    if cached is not None:
+        metrics.inc("consent.classifier_llm_avoided")
+        return ShareVerdict(cached, "cache")
 
     # Lightweight LLM check — prefer Flash
     try:
         from vertexai.generative_models import Part
+
         from fibz_bot.utils.backoff import retry
 
         prompt = (
@@ -123,21 +192,23 @@ async def classify_share_request(
             ),
             operation="consent_classifier",
         )
+        metrics.inc("consent.classifier_llm_calls")
         label = (getattr(response, "text", "") or "").strip().lower()
-        if label in {"share_safe", "share_block", "share_needs_consent"}:
-            return label
+        if label in _LABELS:
+            _label_cache.set(key, label)
+            return ShareVerdict(label, "model")
     except Exception as exc:  # pragma: no cover - network errors mocked elsewhere
         log.warning(
             "consent_classifier_fallback",
             extra={"extra_fields": {"error": exc.__class__.__name__}},
         )
-    return "share_safe"
+    return ShareVerdict("share_safe", "default")
 
 
 class ConsentView(discord.ui.View):
-    def __init__(self, timeout: Optional[float] = 120.0):
+    def __init__(self, timeout: float | None = 120.0):
         super().__init__(timeout=timeout)
-        self.result: Optional[bool] = None
+        self.result: bool | None = None
         self._event = asyncio.Event()
 
     @discord.ui.button(label="Allow", style=discord.ButtonStyle.success)
@@ -152,7 +223,7 @@ async def deny(self, interaction: discord.Interaction, button: discord.ui.Button
         self._event.set()
         await interaction.response.edit_message(content="❌ Consent denied.", view=None)
 
-    async def wait_result(self) -> Optional[bool]:
+    async def wait_result(self) -> bool | None:
         try:
             await asyncio.wait_for(self._event.wait(), timeout=self.timeout or 120.0)
         except asyncio.TimeoutError:
@@ -166,7 +237,7 @@ async def request_consent_dm(
     requester_name: str,
     scope: str,
     target: str,
-) -> Optional[bool]:
+) -> bool | None:
     try:
         view = ConsentView(timeout=180.0)
         dm = await subject.create_dm()
@@ -191,6 +262,33 @@ async def request_consent_dm(
         return None
 
 
+async def _single_flight(key: tuple[str, str, str], run: Callable[[], Awaitable[bool]]) -> bool:
+    while (pending := _inflight.get(key)) is not None:
+        metrics.inc("consent.dm_avoided")
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise  # this caller was cancelled
+            # The leader was cancelled, not us: the first waiter to get here runs the flight
+    future: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await run()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        future.exception()  # mark retrieved when nobody else is waiting
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(key, None)
+
+
 async def ensure_consent(
     subject_id: str,
     scope: str,
@@ -198,13 +296,36 @@ async def ensure_consent(
     interaction_or_client: discord.Interaction | discord.Client,
     requester_name: str | None = None,
 ) -> bool:
-    if _CONSENT_MEMORY is None:
+    """Return the stored decision, or DM the subject once and wait for it.
+
+    Concurrent calls for the same subject/scope/target share one pending DM
+    (single flight) instead of each sending their own.
+    """
+
+    memory = _CONSENT_MEMORY
+    if memory is None:
         raise RuntimeError("Consent memory is not configured")
 
-    cached = _CONSENT_MEMORY.get_consent(subject_id, scope, target)
+    cached = memory.get_consent(subject_id, scope, target)
     if cached is not None:
         return bool(cached)
 
+    return await _single_flight(
+        (subject_id, scope, target),
+        lambda: _ask_subject(
+            memory, subject_id, scope, target, interaction_or_client, requester_name
+        ),
+    )
+
+
+async def _ask_subject(
+    memory: MemoryStore,
+    subject_id: str,
+    scope: str,
+    target: str,
+    interaction_or_client: discord.Interaction | discord.Client,
+    requester_name: str | None,
+) -> bool:
     metrics.inc("consent.dm_requests")
 
     client: discord.Client
@@ -232,18 +353,20 @@ async def ensure_consent(
     decision = await request_consent_dm(client, subject, requester_name or "Unknown", scope, target)
     if decision is True:
         metrics.inc("consent.dm_grants")
-        _CONSENT_MEMORY.set_consent(subject_id, scope, target, True)
+        memory.set_consent(subject_id, scope, target, True)
         return True
     if decision is False:
         metrics.inc("consent.dm_denies")
-        _CONSENT_MEMORY.set_consent(subject_id, scope, target, False)
+        memory.set_consent(subject_id, scope, target, False)
         return False
     return False
 
 
 __all__ = [
     "ConsentDecision",
+    "ShareVerdict",
     "classify_info",
+    "classify_share",
     "classify_share_request",
     "configure_consent",
     "ensure_consent",
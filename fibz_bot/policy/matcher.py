@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections.abc import Iterable, Mapping
+from typing import NamedTuple
+
+from fibz_bot.utils.cache import TTLCache
+
+# Checked in this order; the first category present in the text decides.
+# "channel" only matters while cross-channel sharing is off. There is no
+# "safe" category: one harmless word ("favorite", "game") says nothing about
+# the rest of the request, so anything unmatched goes to the model.
+CATEGORIES = ("channel", "sensitive", "private")
+
+DEFAULT_TERMS: dict[str, tuple[str, ...]] = {
+    "sensitive": (
+        "email",
+        "e-mail",
+        "phone",
+        "phone number",
+        "address",
+        "home address",
+        "ip address",
+        "password",
+        "passport",
+        "credit card",
+        "bank account",
+        "social security",
+        "ssn",
+        "date of birth",
+        "medical",
+        "medication",
+        "diagnosis",
+        "health",
+        "finance",
+        "salary",
+        "location",
+        "token",
+        "real name",
+    ),
+    "private": ("private", "dm", "direct message", "secret", "confidential", "off the record"),
+}
+# Channel mentions (#name, <#id>) are patterns rather than terms
+_CHANNEL = r"<#\d+>|#[\w-]+|\bchannels?\b"
+
+
+class TermMatch(NamedTuple):
+    category: str
+    term: str
+
+
+def _term_pattern(term: str, *, open_ended: bool = False) -> str:
+    words = [re.escape(w) for w in term.split()]
+    if open_ended:
+        # Any suffix and joined words: "healthcare", "phonenumber", "addressed"
+        return r"\b" + r"[\s_-]*".join(words) + r"\w*"
+    # Plurals and arbitrary whitespace between words still match
+    return r"\b" + r"\s+".join(words) + r"(?:s|es)?\b"
+
+
+class TermMatcher:
+    """One compiled regex with a named group per category.
+
+    Terms become word-boundary alternatives (longest first), so a request is
+    scanned once no matter how many terms there are, and "dm" does not fire
+    inside "admin". Sensitive terms also match with any suffix ("health" in
+    "healthcare", "phone number" as "phonenumber"): over-asking for consent
+    is the safe side. Most requests contain no term at all; a plain
+    substring check on each term's first word rejects those before the
+    regex runs.
+    """
+
+    def __init__(self, terms: Mapping[str, Iterable[str]]) -> None:
+        groups = []
+        needles = {"#", "channel"}
+        self.terms: dict[str, tuple[str, ...]] = {}
+        for category in CATEGORIES:
+            if category == "channel":
+                groups.append(f"(?P<channel>{_CHANNEL})")
+                continue
+            words = sorted(
+                {t.strip().lower() for t in terms.get(category, ()) if t.strip()},
+                key=len,
+                reverse=True,
+            )
+            self.terms[category] = tuple(words)
+            needles.update(w.split()[0] for w in words)
+            if words:
+                open_ended = category == "sensitive"
+                alternatives = "|".join(_term_pattern(w, open_ended=open_ended) for w in words)
+                groups.append(f"(?P<{category}>{alternatives})")
+        self._needles = tuple(sorted(needles))
+        # Positions that cannot start any alternative are skipped cheaply
+        starts = "".join(sorted({n[0] for n in needles} | {"<"}))
+        self._regex = re.compile(f"(?=[{re.escape(starts)}])(?:{'|'.join(groups)})")
+
+    def categories(self, text: str) -> dict[str, str]:
+        """Every category present in ``text`` with its first matching term."""
+
+        found: dict[str, str] = {}
+        text = (text or "").lower()
+        if not any(n in text for n in self._needles):
+            return found
+        for m in self._regex.finditer(text):
+            category = m.lastgroup
+            if category and category not in found:
+                found[category] = m.group(0)
+                if len(found) == len(CATEGORIES):
+                    break
+        return found
+
+    def match(self, text: str, *, cross_channel_enabled: bool = True) -> TermMatch | None:
+        found = self.categories(text)
+        for category in CATEGORIES:
+            if category == "channel" and cross_channel_enabled:
+                continue
+            if category in found:
+                return TermMatch(category, found[category])
+        return None
+
+
+def merge_terms(*sources: Mapping[str, Iterable[str]] | None) -> dict[str, list[str]]:
+    merged: dict[str, list[str]] = {}
+    for source in sources:
+        for category, words in (source or {}).items():
+            if category in CATEGORIES and category != "channel":
+                merged.setdefault(category, []).extend(words)
+    return merged
+
+
+_matchers: TTLCache[TermMatcher] = TTLCache(max_items=256)
+_lock = threading.Lock()
+
+
+def get_matcher(*sources: Mapping[str, Iterable[str]] | None) -> TermMatcher:
+    """Matcher for the merged term lists, compiled once per distinct set of terms."""
+
+    merged = merge_terms(DEFAULT_TERMS, *sources)
+    key = tuple(sorted((c, tuple(sorted(set(w.lower() for w in ws)))) for c, ws in merged.items()))
+    matcher = _matchers.get(key)
+    if matcher is None:
+        with _lock:
+            matcher = _matchers.get(key)
+            if matcher is None:
+                matcher = TermMatcher(merged)
+                _matchers.set(key, matcher)
+    return matcher
+
+
+__all__ = ["CATEGORIES", "DEFAULT_TERMS", "TermMatch", "TermMatcher", "get_matcher", "merge_terms"]
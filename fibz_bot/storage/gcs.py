@@ -1,27 +1,118 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import queue
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
 from fibz_bot.config import settings
 from fibz_bot.utils.backoff import retry
+from fibz_bot.utils.cache import TTLCache
+from fibz_bot.utils.deadline import Deadline
 from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
 
 log = get_logger(__name__)
 
-try:
-    from google.cloud import storage
-except Exception:
-    storage = None
+_MB = 1024 * 1024
+_client_lock = threading.Lock()
+_cached_client: tuple[Any, Any] | None = None
 
 
 def _client():
-    if storage is None or not settings.GCS_BUCKET:
+    """Return the process-wide ``(client, bucket)``; built once, ``(None, None)`` if unavailable."""
+
+    global _cached_client
+    if not settings.GCS_BUCKET:
         return None, None
-    client = storage.Client(project=settings.VERTEX_PROJECT_ID)
-    bucket = client.bucket(settings.GCS_BUCKET)
-    return client, bucket
+    if _cached_client is None:
+        with _client_lock:
+            if _cached_client is None:
+                try:
+                    from google.cloud import storage
+                except Exception:
+                    return None, None
+                client = storage.Client(project=settings.VERTEX_PROJECT_ID)
+                _cached_client = (client, client.bucket(settings.GCS_BUCKET))
+    return _cached_client
+
+
+def reset_client() -> None:
+    global _cached_client
+    with _client_lock:
+        _cached_client = None
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_key(digest: str, filename: str) -> str:
+    """Content-addressed object path: identical bytes map to one object."""
+
+    ext = os.path.splitext(filename)[1].lower()[:16]
+    return f"{settings.GCS_PREFIX.strip('/')}/{digest}{ext}"
+
+
+def object_key(data: bytes, filename: str) -> str:
+    return content_key(hashlib.sha256(data).hexdigest(), filename)
+
+
+def gcs_uri(path_in_bucket: str) -> str:
+    return f"gs://{settings.GCS_BUCKET}/{path_in_bucket}"
+
+
+def _blob(bucket: Any, path_in_bucket: str, size: int) -> Any:
+    if size >= settings.GCS_RESUMABLE_THRESHOLD_MB * _MB:
+        # Above 8 MB the client uses a resumable upload; a chunk size (a multiple
+        # of 256 KiB) sends it in pieces, so a dropped connection resumes from
+        # the last chunk instead of restarting the whole file.
+        chunk = max(1, settings.GCS_CHUNK_SIZE_MB) * _MB
+        return bucket.blob(path_in_bucket, chunk_size=chunk)
+    return bucket.blob(path_in_bucket)
+
+
+def upload_file(
+    path_in_bucket: str,
+    local_path: str,
+    content_type: str | None = None,
+    metadata: dict[str, str] | None = None,
+    deadline: Deadline | None = None,
+) -> str | None:
+    """Upload ``local_path`` unless the object already exists; returns its ``gs://`` URI."""
+
+    _, bucket = _client()
+    if not bucket:
+        return None
+    blob = _blob(bucket, path_in_bucket, os.path.getsize(local_path))
+    if retry(blob.exists, operation="gcs_exists", deadline=deadline):
+        metrics.inc("storage.gcs_skipped_existing")
+        return gcs_uri(path_in_bucket)
+    if metadata:
+        blob.metadata = metadata
+    retry(
+        lambda: blob.upload_from_filename(
+            local_path, content_type=content_type or "application/octet-stream"
+        ),
+        operation="gcs_upload",
+        deadline=deadline,
+    )
+    metrics.inc("storage.gcs_uploads")
+    metrics.inc("storage.gcs_upload_bytes", os.path.getsize(local_path))
+    return gcs_uri(path_in_bucket)
 
 
 def upload_bytes(path_in_bucket: str, data: bytes, content_type: str | None = None) -> str | None:
-    client, bucket = _client()
+    _, bucket = _client()
     if not bucket:
         return None
     blob = bucket.blob(path_in_bucket)
@@ -32,7 +123,7 @@ def upload_bytes(path_in_bucket: str, data: bytes, content_type: str | None = No
             ),
             operation="gcs_upload",
         )
-        return f"gs://{settings.GCS_BUCKET}/{path_in_bucket}"
+        return gcs_uri(path_in_bucket)
     except Exception as exc:  # pragma: no cover - relies on GCS libraries
         log.error(
             "gcs_upload_failed",
@@ -46,6 +137,198 @@ def upload_bytes(path_in_bucket: str, data: bytes, content_type: str | None = No
         return None
 
 
+@dataclass
+class _Upload:
+    key: str
+    spool_path: str
+    content_type: str
+    filename: str
+    attempts: int = 0
+
+
+class UploadQueue:
+    """Background archival of attachments to GCS, off the reply path.
+
+    ``submit`` hard-links (or copies) the local file into a spool directory so
+    the caller may delete its temp file straight away, then enqueues it for
+    ``GCS_UPLOAD_WORKERS`` daemon threads. The queue is bounded by
+    ``GCS_UPLOAD_QUEUE_SIZE``: when full the upload is dropped and counted,
+    never waited for. Keys queued or uploaded recently are not enqueued
+    again; a failed upload is re-queued until ``GCS_UPLOAD_MAX_ATTEMPTS``.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int | None = None,
+        max_queue: int | None = None,
+        max_attempts: int | None = None,
+        spool_dir: str | None = None,
+        uploader: Any = upload_file,
+    ) -> None:
+        self.workers = max(1, workers if workers is not None else settings.GCS_UPLOAD_WORKERS)
+        self.max_attempts = max(
+            1, max_attempts if max_attempts is not None else settings.GCS_UPLOAD_MAX_ATTEMPTS
+        )
+        self.spool = Path(spool_dir or settings.GCS_SPOOL_DIR)
+        self._uploader = uploader
+        self._queue: queue.Queue[_Upload] = queue.Queue(
+            maxsize=max(1, max_queue if max_queue is not None else settings.GCS_UPLOAD_QUEUE_SIZE)
+        )
+        self._pending: set[str] = set()
+        self._done: TTLCache[bool] = TTLCache(max_items=4096, ttl=None)
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def _start(self) -> None:
+        if self._threads:
+            return
+        self.spool.mkdir(parents=True, exist_ok=True)
+        for n in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"gcs-upload-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _stage(self, local_path: str, key: str) -> str:
+        target = self.spool / key.replace("/", "_")
+        try:
+            os.link(local_path, target)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(local_path, target)
+        return str(target)
+
+    def submit(
+        self, local_path: str, key: str, content_type: str, filename: str = ""
+    ) -> str | None:
+        """Schedule ``local_path`` for upload as ``key``; returns the URI it will have."""
+
+        if not settings.GCS_BUCKET:
+            return None
+        with self._lock:
+            if key in self._pending or key in self._done:
+                metrics.inc("storage.gcs_deduped")
+                return gcs_uri(key)
+            self._start()
+            job = _Upload(key, self._stage(local_path, key), content_type, filename)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                _unlink(job.spool_path)
+                metrics.inc("storage.gcs_dropped")
+                log.warning(
+                    "gcs_upload_dropped",
+                    extra={"extra_fields": {"path": key, "reason": "queue_full"}},
+                )
+                return None
+            self._pending.add(key)
+        metrics.inc("storage.gcs_enqueued")
+        return gcs_uri(key)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: _Upload) -> None:
+        job.attempts += 1
+        started = time.perf_counter()
+        try:
+            uri = self._uploader(
+                job.key,
+                job.spool_path,
+                job.content_type,
+                {"filename": job.filename} if job.filename else None,
+            )
+        except Exception as exc:
+            if job.attempts < self.max_attempts:
+                try:
+                    self._queue.put_nowait(job)
+                    metrics.inc("storage.gcs_requeued")
+                    return
+                except queue.Full:
+                    pass
+            self._finish(job, ok=False)
+            metrics.inc("storage.gcs_failed")
+            log.error(
+                "gcs_upload_failed",
+                extra={
+                    "extra_fields": {
+                        "path": job.key,
+                        "attempts": job.attempts,
+                        "error": exc.__class__.__name__,
+                    }
+                },
+            )
+            return
+        self._finish(job, ok=uri is not None)
+        log.info(
+            "gcs_upload_done",
+            extra={
+                "extra_fields": {
+                    "path": job.key,
+                    "attempts": job.attempts,
+                    "seconds": round(time.perf_counter() - started, 3),
+                }
+            },
+        )
+
+    def _finish(self, job: _Upload, *, ok: bool) -> None:
+        _unlink(job.spool_path)
+        with self._lock:
+            self._pending.discard(job.key)
+            if ok:
+                self._done.set(job.key, True)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until everything queued so far is processed (tests, shutdown)."""
+
+        end = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if end is not None and time.monotonic() >= end:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_uploads: UploadQueue | None = None
+
+
+def upload_queue() -> UploadQueue:
+    global _uploads
+    with _client_lock:
+        if _uploads is None:
+            _uploads = UploadQueue()
+        return _uploads
+
+
+def archive_attachment(local_path: str, filename: str, content_type: str) -> str | None:
+    """Queue an attachment for background archival.
+
+    Returns ``None`` when GCS is off or the queue is full.
+    """
+
+    if not settings.GCS_BUCKET:
+        return None
+    key = content_key(file_sha256(local_path), filename)
+    return upload_queue().submit(local_path, key, content_type, filename)
+
+
 def sign_url(path_in_bucket: str) -> str | None:
     client, bucket = _client()
     if not bucket or not settings.GCS_SIGN_URLS:
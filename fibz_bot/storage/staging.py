@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+from fibz_bot.config import settings
+from fibz_bot.storage.gcs import content_key, file_sha256, upload_file
+from fibz_bot.utils.cache import TTLCache
+from fibz_bot.utils.deadline import Deadline, DeadlineExceeded
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+log = get_logger(__name__)
+
+_MB = 1024 * 1024
+
+
+class MediaStager:
+    """Upload large media once and hand the model a ``gs://`` URI instead of bytes.
+
+    Files of at least ``MEDIA_STAGING_THRESHOLD_MB`` are fingerprinted
+    (SHA-256) and stored under the same content key the archive queue uses,
+    so a staged file is also archived. The fingerprint→URI map is kept for
+    ``MEDIA_STAGING_CACHE_TTL_SECONDS``: the same file in a later turn costs
+    one hash and no request. Concurrent turns staging the same file share a
+    single upload. ``stage`` returns ``None`` when staging does not apply or
+    fails; the caller then sends the bytes inline as before.
+    """
+
+    def __init__(self, threshold_bytes: int | None = None) -> None:
+        self.threshold = (
+            threshold_bytes
+            if threshold_bytes is not None
+            else settings.MEDIA_STAGING_THRESHOLD_MB * _MB
+        )
+        self._uris: TTLCache[str] = TTLCache(
+            max_items=settings.MEDIA_STAGING_CACHE_MAX, ttl=settings.MEDIA_STAGING_CACHE_TTL_SECONDS
+        )
+        self._lock = threading.Lock()
+        self._inflight: dict[str, threading.Lock] = {}
+
+    def applies(self, size: int) -> bool:
+        return (
+            bool(settings.MEDIA_STAGING_ENABLED and settings.GCS_BUCKET) and size >= self.threshold
+        )
+
+    def stage(
+        self, path: str, mime: str, filename: str, deadline: Deadline | None = None
+    ) -> str | None:
+        size = os.path.getsize(path)
+        if not self.applies(size):
+            return None
+        fp = file_sha256(path)
+        uri = self._uris.get(fp)
+        if uri is not None:
+            metrics.inc("media.staging_cache_hits")
+            return uri
+        with self._lock:
+            gate = self._inflight.setdefault(fp, threading.Lock())
+        started = time.perf_counter()
+        try:
+            with gate:
+                uri = self._uris.get(fp)
+                if uri is None:
+                    uri = upload_file(
+                        content_key(fp, filename), path, mime, {"filename": filename}, deadline
+                    )
+                    if uri:
+                        self._uris.set(fp, uri)
+                        metrics.inc("media.staged")
+                        metrics.inc("media.staged_bytes", size)
+                else:
+                    metrics.inc("media.staging_cache_hits")
+        except DeadlineExceeded:
+            raise
+        except Exception as exc:
+            metrics.inc("media.staging_failed")
+            log.warning(
+                "media_staging_failed",
+                extra={
+                    "extra_fields": {
+                        "file": filename,
+                        "bytes": size,
+                        "error": exc.__class__.__name__,
+                    }
+                },
+            )
+            return None
+        finally:
+            with self._lock:
+                self._inflight.pop(fp, None)
+        log.info(
+            "media_staged",
+            extra={
+                "extra_fields": {
+                    "file": filename,
+                    "bytes": size,
+                    "seconds": round(time.perf_counter() - started, 3),
+                }
+            },
+        )
+        return uri
+
+    def clear(self) -> None:
+        self._uris.clear()
+
+
+_stager: MediaStager | None = None
+_stager_lock = threading.Lock()
+
+
+def media_stager() -> MediaStager:
+    global _stager
+    with _stager_lock:
+        if _stager is None:
+            _stager = MediaStager()
+        return _stager
+
+
+__all__ = ["MediaStager", "media_stager"]
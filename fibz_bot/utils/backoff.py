@@ -5,6 +5,7 @@
 from collections.abc import Callable
 from typing import TypeVar, cast
 
+from fibz_bot.utils.deadline import Deadline, DeadlineExceeded
 from fibz_bot.utils.logging import get_logger
 
 try:  # pragma: no cover - optional dependency
@@ -96,14 +97,24 @@ def retry(
     base_delay: float = 0.5,
     max_delay: float = 8.0,
     operation: str | None = None,
+    deadline: Deadline | None = None,
 ) -> T:
-    """Run ``func`` with exponential backoff + full jitter."""
+    """Run ``func`` with exponential backoff + full jitter.
+
+    With a ``deadline``, each attempt first checks the remaining budget and no
+    further attempt is scheduled unless the backoff sleep plus the duration of
+    the last attempt still fits; ``DeadlineExceeded`` is raised instead.
+    """
 
     if max_attempts < 1:
         raise ValueError("max_attempts must be >= 1")
 
+    op_name = operation or getattr(func, "__name__", "call")
     attempt = 0
     while True:
+        if deadline is not None:
+            deadline.check(op_name)
+            started = deadline.elapsed()
         try:
             return func()
         except Exception as exc:  # pragma: no cover - exercised via tests
@@ -113,11 +124,26 @@ def retry(
                 raise
             delay = min(max_delay, base_delay * (2 ** (attempt - 1)))
             sleep_for = random.uniform(0, delay)
+            if deadline is not None:
+                last_attempt = deadline.elapsed() - started
+                if not deadline.can_fit(sleep_for + last_attempt):
+                    log.warning(
+                        "retry_budget_exhausted",
+                        extra={
+                            "extra_fields": {
+                                "operation": op_name,
+                                "attempt": attempt,
+                                "remaining": round(deadline.remaining(), 3),
+                                "error": exc.__class__.__name__,
+                            }
+                        },
+                    )
+                    raise DeadlineExceeded(op_name, cancelled=deadline.cancelled) from exc
             log.warning(
                 "retrying_operation",
                 extra={
                     "extra_fields": {
-                        "operation": operation or getattr(func, "__name__", "call"),
+                        "operation": op_name,
                         "attempt": attempt,
                         "delay": round(sleep_for, 3),
                         "error": exc.__class__.__name__,
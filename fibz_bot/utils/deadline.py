@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
+
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+T = TypeVar("T")
+
+log = get_logger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a turn runs out of time budget or is cancelled."""
+
+    def __init__(self, stage: str | None = None, *, cancelled: bool = False) -> None:
+        self.stage = stage
+        self.cancelled = cancelled
+        reason = "cancelled" if cancelled else "deadline exceeded"
+        super().__init__(f"{reason} during {stage}" if stage else reason)
+
+
+class Deadline:
+    """Wall-clock budget for one turn, shared by every stage that serves it.
+
+    Stages ask for ``remaining()`` (or ``timeout(cap)``) before blocking and call
+    ``check()`` at safe points. ``cancel()`` marks the turn abandoned so workers
+    stop at their next checkpoint instead of spending more quota.
+    """
+
+    def __init__(
+        self,
+        budget: float,
+        *,
+        name: str = "turn",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.budget = float(budget)
+        self.name = name
+        self._clock = clock
+        self._start = clock()
+        self._cancelled = False
+        self.spent: dict[str, float] = {}
+
+    def elapsed(self) -> float:
+        return self._clock() - self._start
+
+    def remaining(self) -> float:
+        if self._cancelled:
+            return 0.0
+        return max(self.budget - self.elapsed(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self._cancelled or self.elapsed() >= self.budget
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def check(self, stage: str | None = None) -> None:
+        if self._cancelled:
+            raise DeadlineExceeded(stage, cancelled=True)
+        if self.elapsed() >= self.budget:
+            raise DeadlineExceeded(stage)
+
+    def can_fit(self, seconds: float) -> bool:
+        return not self._cancelled and self.remaining() > seconds
+
+    def timeout(self, cap: float, stage: str | None = None) -> float:
+        """Return ``min(cap, remaining)``; raise if nothing is left."""
+
+        self.check(stage)
+        return max(min(float(cap), self.remaining()), 0.001)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self.check(name)
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.spent[name] = self.spent.get(name, 0.0) + (self._clock() - started)
+
+    def report(self) -> dict[str, Any]:
+        budget = self.budget or 1.0
+        return {
+            "name": self.name,
+            "budget": round(self.budget, 3),
+            "elapsed": round(self.elapsed(), 3),
+            "cancelled": self._cancelled,
+            "stages": {
+                name: {"seconds": round(secs, 3), "share": round(secs / budget, 3)}
+                for name, secs in dict(self.spent).items()
+            },
+        }
+
+    def record(self) -> dict[str, Any]:
+        """Log the per-stage breakdown and add it to metrics."""
+
+        report = self.report()
+        for name, secs in dict(self.spent).items():
+            metrics.inc(f"deadline.{self.name}.{name}_ms", int(secs * 1000))
+        metrics.inc(f"deadline.{self.name}.turns")
+        log.info("turn_deadline", extra={"extra_fields": report})
+        return report
+
+
+async def run_blocking(
+    deadline: Deadline, stage: str, func: Callable[..., T], /, *args: Any, **kwargs: Any
+) -> T:
+    """Run ``func`` in a worker thread bounded by ``deadline``.
+
+    The leading parameters are positional-only so ``func`` can take its own
+    ``deadline=`` keyword (``app.agent.run`` does).
+
+    When the budget lapses the deadline is cancelled so the worker abandons
+    its remaining retries/tool calls, and ``DeadlineExceeded`` is raised here.
+    """
+
+    with deadline.stage(stage):
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(func, *args, **kwargs), timeout=deadline.remaining()
+            )
+        except asyncio.TimeoutError:
+            if deadline.remaining() > 0:
+                raise
+            deadline.cancel()
+            metrics.inc("deadline.cancelled")
+            raise DeadlineExceeded(stage, cancelled=True) from None
+
+
+__all__ = ["Deadline", "DeadlineExceeded", "run_blocking"]
@@ -1,29 +1,75 @@
 from __future__ import annotations
 
+import asyncio
+import threading
 from typing import Any
 
 import requests  # type: ignore[import-untyped]
+from requests.adapters import HTTPAdapter  # type: ignore[import-untyped]
 
+from fibz_bot.config import settings
 from fibz_bot.utils.backoff import retry
+from fibz_bot.utils.deadline import Deadline, DeadlineExceeded
 from fibz_bot.utils.logging import get_logger
 
 log = get_logger(__name__)
 
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def session() -> requests.Session:
+    """Process-wide pooled session (keep-alive, connection reuse).
+
+    ``HTTP_POOL_CONNECTIONS`` is the number of per-host pools kept and
+    ``HTTP_POOL_MAXSIZE`` the connections per host; with ``HTTP_POOL_BLOCK``
+    callers wait for a free connection instead of opening extra ones.
+    Retries stay in ``retry``, so the adapter itself never retries.
+    """
+
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=max(1, settings.HTTP_POOL_CONNECTIONS),
+                    pool_maxsize=max(1, settings.HTTP_POOL_MAXSIZE),
+                    pool_block=settings.HTTP_POOL_BLOCK,
+                    max_retries=0,
+                )
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _session = s
+    return _session
+
+
+def close_session() -> None:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
 
 def get_json(
     url: str,
     params: dict[str, Any] | None = None,
     headers: dict[str, str] | None = None,
     timeout: int = 20,
+    deadline: Deadline | None = None,
 ) -> tuple[dict | None, str | None]:
     def _call() -> dict:
-        resp = requests.get(url, params=params, headers=headers, timeout=timeout)
+        limit = deadline.timeout(timeout, "http_get_json") if deadline else timeout
+        resp = session().get(url, params=params, headers=headers, timeout=limit)
         resp.raise_for_status()
         return resp.json()
 
     try:
-        data = retry(_call, operation="http_get_json")
+        data = retry(_call, operation="http_get_json", deadline=deadline)
         return data, None
+    except DeadlineExceeded:
+        raise
     except Exception as exc:  # pragma: no cover - captured in tests
         log.error(
             "http_get_json_failed",
@@ -37,21 +83,49 @@ def download_file(
     dest_path: str,
     headers: dict[str, str] | None = None,
     timeout: int = 60,
+    deadline: Deadline | None = None,
 ) -> str | None:
     def _call() -> str:
-        with requests.get(url, stream=True, headers=headers, timeout=timeout) as r:
+        limit = deadline.timeout(timeout, "http_download") if deadline else timeout
+        with session().get(url, stream=True, headers=headers, timeout=limit) as r:
             r.raise_for_status()
             with open(dest_path, "wb") as f:
                 for chunk in r.iter_content(chunk_size=8192):
                     if chunk:
                         f.write(chunk)
+                        if deadline is not None:
+                            deadline.check("http_download")
         return dest_path
 
     try:
-        return retry(_call, operation="http_download")
+        return retry(_call, operation="http_download", deadline=deadline)
+    except DeadlineExceeded:
+        raise
     except Exception as exc:  # pragma: no cover - captured in tests
         log.error(
             "http_download_failed",
             extra={"extra_fields": {"operation": "http_download", "error": str(exc)[:200]}},
         )
         return None
+
+
+async def get_json_async(
+    url: str,
+    params: dict[str, Any] | None = None,
+    headers: dict[str, str] | None = None,
+    timeout: int = 20,
+    deadline: Deadline | None = None,
+) -> tuple[dict | None, str | None]:
+    """``get_json`` on a worker thread, sharing the pooled session."""
+
+    return await asyncio.to_thread(get_json, url, params, headers, timeout, deadline)
+
+
+async def download_file_async(
+    url: str,
+    dest_path: str,
+    headers: dict[str, str] | None = None,
+    timeout: int = 60,
+    deadline: Deadline | None = None,
+) -> str | None:
+    return await asyncio.to_thread(download_file, url, dest_path, headers, timeout, deadline)
@@ -1,10 +1,37 @@
+import atexit
+import copy
 import json
 import logging
-from typing import Any, Dict
+import logging.handlers
+import os
+import queue
+import threading
+from collections.abc import Mapping
+from types import ModuleType
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover - imported for type checking only
+    from fibz_bot.config import Settings
+
+orjson: ModuleType | None
+try:  # pragma: no cover - optional dependency
+    import orjson
+except Exception:  # pragma: no cover - stdlib json fallback
+    orjson = None
+
+
+def _dumps(payload: dict[str, Any]) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=str).decode("utf-8")
+        except TypeError:
+            pass  # e.g. non-str dict keys; json handles those
+    return json.dumps(payload, ensure_ascii=False, default=str)
+
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
-        payload: Dict[str, Any] = {
+        payload: dict[str, Any] = {
             "level": record.levelname,
             "message": record.getMessage(),
             "logger": record.name,
@@ -13,13 +40,148 @@ def format(self, record: logging.LogRecord) -> str:
             payload["exc_info"] = self.formatException(record.exc_info)
         if hasattr(record, "extra_fields"):
             payload.update(getattr(record, "extra_fields"))
-        return json.dumps(payload, ensure_ascii=False)
+        return _dumps(payload)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of INFO/DEBUG records per event (the log message).
+
+    ``rates`` maps an event name to the share to keep (``0.1`` keeps every
+    tenth). Sampling is by count, not random, so a rate is exact over any
+    run; warnings and errors always pass. Kept records carry ``sample_rate``
+    in their extra fields so counts can be scaled back up.
+    """
+
+    def __init__(self, rates: Mapping[str, float]) -> None:
+        super().__init__()
+        self.rates = {event: min(max(float(rate), 0.0), 1.0) for event, rate in rates.items()}
+        self._credit: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not isinstance(record.msg, str):
+            return True
+        rate = self.rates.get(record.msg)
+        if rate is None or rate >= 1.0:
+            return True
+        with self._lock:
+            credit = self._credit.get(record.msg, 1.0) + rate
+            keep = credit >= 1.0
+            self._credit[record.msg] = credit - 1.0 if keep else credit
+        if keep:
+            fields = dict(getattr(record, "extra_fields", None) or {})
+            fields["sample_rate"] = rate
+            record.extra_fields = fields
+        return keep
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # The stdlib version formats the record on the calling thread; here the
+    # listener's handlers do that, so the caller only copies and enqueues.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            from fibz_bot.utils.metrics import metrics
+
+            metrics.inc("logging.dropped")
+
+
+_handler: logging.Handler | None = None
+_listener: logging.handlers.QueueListener | None = None
+_lock = threading.Lock()
+
+
+def _output_handlers(settings: "Settings") -> list[logging.Handler]:
+    formatter = JsonFormatter()
+    handlers: list[logging.Handler] = [logging.StreamHandler()]
+    if settings.LOG_FILE:
+        os.makedirs(os.path.dirname(settings.LOG_FILE) or ".", exist_ok=True)
+        handlers.append(
+            logging.handlers.RotatingFileHandler(
+                settings.LOG_FILE,
+                maxBytes=int(settings.LOG_FILE_MAX_MB * 1024 * 1024),
+                backupCount=settings.LOG_FILE_BACKUPS,
+                encoding="utf-8",
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def _shared_handler() -> logging.Handler:
+    """The one handler every fibz logger writes to, built on first use.
+
+    With ``LOG_ASYNC`` records go through a bounded queue to a listener
+    thread that formats them and writes stderr plus the rotating
+    ``LOG_FILE``; a full queue drops records rather than block the event
+    loop. Without it the output handlers are attached directly.
+    """
+
+    global _handler, _listener
+    if _handler is not None:
+        return _handler
+    with _lock:
+        if _handler is not None:
+            return _handler
+        from fibz_bot.config import settings
+
+        outputs = _output_handlers(settings)
+        handler: logging.Handler
+        if settings.LOG_ASYNC:
+            records: queue.Queue[logging.LogRecord] = queue.Queue(
+                maxsize=max(settings.LOG_QUEUE_SIZE, 0)
+            )
+            handler = _QueueHandler(records)
+            _listener = logging.handlers.QueueListener(
+                records, *outputs, respect_handler_level=True
+            )
+            _listener.start()
+            atexit.register(shutdown_logging)
+        elif len(outputs) == 1:
+            handler = outputs[0]
+        else:
+            handler = _Fanout(outputs)
+        if settings.LOG_SAMPLE_RATES:
+            handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+        _handler = handler
+    return _handler
+
+
+class _Fanout(logging.Handler):
+    def __init__(self, handlers: list[logging.Handler]) -> None:
+        super().__init__()
+        self.handlers = handlers
+
+    def emit(self, record: logging.LogRecord) -> None:
+        for handler in self.handlers:
+            handler.handle(record)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread (idempotent)."""
+
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
 
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setFormatter(JsonFormatter())
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
+        from fibz_bot.config import settings
+
+        logger.addHandler(_shared_handler())
+        logger.setLevel(settings.LOG_LEVEL.upper())
     return logger
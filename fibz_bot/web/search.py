@@ -1,41 +1,164 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any
+
 from fibz_bot.config import settings
+from fibz_bot.utils.cache import TTLCache
+from fibz_bot.utils.deadline import Deadline
 from fibz_bot.utils.http import get_json
+from fibz_bot.utils.logging import get_logger
+from fibz_bot.utils.metrics import metrics
+
+log = get_logger(__name__)
 
-def google_cse_search(query: str, num: int = 5) -> List[Dict[str, Any]]:
+_cache: TTLCache[list[dict[str, Any]]] = TTLCache(
+    max_items=settings.WEB_SEARCH_CACHE_MAX, ttl=settings.WEB_SEARCH_CACHE_TTL_SECONDS
+)
+# Both providers of one search run side by side; a handful of workers covers several tool calls
+_providers = ThreadPoolExecutor(max_workers=4, thread_name_prefix="web-search")
+
+
+def google_cse_search(
+    query: str, num: int = 5, deadline: Deadline | None = None
+) -> list[dict[str, Any]]:
     api_key = getattr(settings, "GOOGLE_CSE_API_KEY", "") or ""
     cx = getattr(settings, "GOOGLE_CSE_CX", "") or ""
     if not api_key or not cx:
         return []
     url = "https://www.googleapis.com/customsearch/v1"
-    data, err = get_json(url, params={"key": api_key, "cx": cx, "q": query, "num": num})
+    data, err = get_json(
+        url, params={"key": api_key, "cx": cx, "q": query, "num": num}, deadline=deadline
+    )
     if err or not data:
         return []
     out = []
     for item in data.get("items", []):
-        out.append({
-            "title": item.get("title"),
-            "link": item.get("link"),
-            "snippet": item.get("snippet"),
-            "displayLink": item.get("displayLink")
-        })
+        out.append(
+            {
+                "title": item.get("title"),
+                "link": item.get("link"),
+                "snippet": item.get("snippet"),
+                "displayLink": item.get("displayLink"),
+            }
+        )
     return out
 
-def ddg_instant_answer(query: str) -> List[Dict[str, Any]]:
+
+def ddg_instant_answer(query: str, deadline: Deadline | None = None) -> list[dict[str, Any]]:
     url = "https://api.duckduckgo.com/"
-    data, err = get_json(url, params={"q": query, "format":"json", "no_redirect":"1", "no_html":"1"})
+    data, err = get_json(
+        url,
+        params={"q": query, "format": "json", "no_redirect": "1", "no_html": "1"},
+        deadline=deadline,
+    )
     out = []
     if data:
         if data.get("AbstractText"):
-            out.append({"title": data.get("Heading"), "link": data.get("AbstractURL"), "snippet": data.get("AbstractText")})
+            out.append(
+                {
+                    "title": data.get("Heading"),
+                    "link": data.get("AbstractURL"),
+                    "snippet": data.get("AbstractText"),
+                }
+            )
         for topic in data.get("RelatedTopics", [])[:5]:
             if isinstance(topic, dict) and topic.get("Text"):
-                out.append({"title": topic.get("Text"), "link": topic.get("FirstURL"), "snippet": topic.get("Text")})
+                out.append(
+                    {
+                        "title": topic.get("Text"),
+                        "link": topic.get("FirstURL"),
+                        "snippet": topic.get("Text"),
+                    }
+                )
     return out
 
-def web_search(query: str, num: int = 5) -> List[Dict[str, Any]]:
-    results = google_cse_search(query, num=num)
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+def _cse_enabled() -> bool:
+    return bool(
+        getattr(settings, "GOOGLE_CSE_API_KEY", "") and getattr(settings, "GOOGLE_CSE_CX", "")
+    )
+
+
+def _search_serial(query: str, num: int, deadline: Deadline | None) -> list[dict[str, Any]]:
+    results = google_cse_search(query, num=num, deadline=deadline)
     if results:
         return results[:num]
-    return ddg_instant_answer(query)[:num]
+    return ddg_instant_answer(query, deadline=deadline)[:num]
+
+
+def _search_concurrent(query: str, num: int, deadline: Deadline | None) -> list[dict[str, Any]]:
+    """Ask CSE and DDG at once; the first non-empty answer wins.
+
+    The slower provider is left to finish on its worker and its result is
+    dropped. Provider errors already come back as ``[]``; a deadline expiry
+    propagates once nothing useful has arrived.
+    """
+
+    pending = {
+        _providers.submit(google_cse_search, query, num, deadline),
+        _providers.submit(ddg_instant_answer, query, deadline),
+    }
+    error: BaseException | None = None
+    while pending:
+        done, pending = wait(
+            pending, timeout=deadline.remaining() if deadline else None, return_when=FIRST_COMPLETED
+        )
+        if not done:
+            deadline.check("web_search")  # type: ignore[union-attr]
+            break
+        for fut in done:
+            if fut.exception() is not None:
+                error = error or fut.exception()
+                continue
+            if fut.result():
+                return fut.result()[:num]
+    if error is not None:
+        raise error
+    return []
+
+
+def web_search(query: str, num: int = 5, deadline: Deadline | None = None) -> list[dict[str, Any]]:
+    """CSE (when configured) with a DDG Instant Answer fallback, cached per (query, num).
+
+    Empty answers are cached for ``WEB_SEARCH_NEGATIVE_TTL_SECONDS`` only, so a
+    transient provider failure is not remembered for the full TTL.
+    """
+
+    key = (normalize_query(query), num)
+    cached = _cache.get(key)
+    if cached is not None:
+        metrics.inc("web.cache_hits")
+        return list(cached)
+    metrics.inc("web.cache_misses")
+    if settings.WEB_SEARCH_CONCURRENT and _cse_enabled():
+        results = _search_concurrent(query, num, deadline)
+    else:
+        results = _search_serial(query, num, deadline)
+    if results:
+        _cache.set(key, results)
+    else:
+        metrics.inc("web.empty_results")
+        _cache.set(key, results, ttl=settings.WEB_SEARCH_NEGATIVE_TTL_SECONDS)
+    log.info(
+        "web_search",
+        extra={
+            "extra_fields": {"results": len(results), "concurrent": settings.WEB_SEARCH_CONCURRENT}
+        },
+    )
+    return list(results)
+
+
+async def web_search_async(
+    query: str, num: int = 5, deadline: Deadline | None = None
+) -> list[dict[str, Any]]:
+    return await asyncio.to_thread(web_search, query, num, deadline)
+
+
+def clear_cache() -> None:
+    _cache.clear()
@@ -0,0 +1,95 @@
+"""Consent classifier fast path: compiled term matcher vs the old per-phrase substring scan.
+
+Generates long chat-like requests (some with a sensitive/private term near the
+end, most with none) and reports messages/s and MB/s for both approaches.
+
+    python scripts/bench_consent_matcher.py --messages 2000 --words 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+from collections.abc import Callable
+
+# Settings require these at import time; the benchmark never talks to Discord or Vertex
+os.environ.setdefault("DISCORD_BOT_TOKEN", "bench-token")
+os.environ.setdefault("VERTEX_PROJECT_ID", "bench-project")
+
+from fibz_bot.policy.matcher import DEFAULT_TERMS, get_matcher
+
+FILLER = (
+    "what did they think about the meeting yesterday and was the plan for the weekend "
+    "still on because everyone seemed to agree that the new schedule works better"
+).split()
+
+
+def make_messages(count: int, words: int, hit_ratio: float, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    terms = [t for c in ("sensitive", "private") for t in DEFAULT_TERMS[c]]
+    out = []
+    for _ in range(count):
+        body = [rng.choice(FILLER) for _ in range(words)]
+        if rng.random() < hit_ratio:
+            body.insert(rng.randrange(words // 2, words), rng.choice(terms))
+        out.append(" ".join(body))
+    return out
+
+
+def legacy(text: str) -> bool:
+    low = text.lower()
+    if any("#" in token or "channel" in token for token in low.split()):
+        return True
+    return any(p in low for c in ("sensitive", "private") for p in DEFAULT_TERMS[c])
+
+
+def timed(fn: Callable[[str], object], messages: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for m in messages:
+            fn(m)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--hit-ratio", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages, args.words, args.hit_ratio, args.seed)
+    mb = sum(len(m) for m in messages) / 1e6
+    started = time.perf_counter()
+    matcher = get_matcher()
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    report: dict[str, object] = {
+        "messages": len(messages),
+        "mb": round(mb, 2),
+        "compile_ms": round(compile_ms, 2),
+    }
+    for name, fn in (
+        ("substring_scan", legacy),
+        ("compiled_matcher", lambda m: matcher.match(m, cross_channel_enabled=False)),
+    ):
+        seconds = timed(fn, messages, args.repeat)
+        report[name] = {
+            "seconds": round(seconds, 4),
+            "messages_per_second": round(len(messages) / seconds),
+            "mb_per_second": round(mb / seconds, 1),
+        }
+    fast_path = sum(matcher.match(m, cross_channel_enabled=True) is not None for m in messages)
+    report["fast_path_share"] = round(fast_path / len(messages), 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Embedding size benchmark: disk, build time, latency and recall for reduced dimensionalities.
+
+Each size is produced by truncating the full vectors and re-normalizing, which
+is how reduced ``output_dimensionality`` embeddings behave for
+``text-embedding-004``. Recall@k is measured against exact neighbours at the
+full size, so it shows what the smaller vectors cost in retrieval quality.
+Use ``--npz`` with real embeddings (an ``embeddings`` array) for numbers that
+mean something for our data; the synthetic corpus only shows the trend.
+
+    python scripts/bench_embed_dim.py --dims 768,512,256,128 --rows 50000
+    python scripts/bench_embed_dim.py --npz messages.npz --engine chroma
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+# Settings require these at import time; the benchmark never talks to Discord or Vertex
+os.environ.setdefault("DISCORD_BOT_TOKEN", "bench-token")
+os.environ.setdefault("VERTEX_PROJECT_ID", "bench-project")
+
+from bench_vector import BATCH, exact_topk, make_corpus  # noqa: E402  (scripts/ is on sys.path)
+
+from fibz_bot.memory.backend import ChromaBackend  # noqa: E402
+from fibz_bot.memory.numpy_backend import NumpyBackend  # noqa: E402
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+def run_size(
+    engine: str, data: np.ndarray, queries: np.ndarray, truth: list[list[str]], k: int
+) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = ChromaBackend(tmp) if engine == "chroma" else NumpyBackend(tmp)
+        col = backend.get_or_create_collection("bench", metadata={"hnsw:space": "cosine"})
+        started = time.perf_counter()
+        for start in range(0, len(data), BATCH):
+            chunk = data[start : start + BATCH]
+            ids = [str(i) for i in range(start, start + len(chunk))]
+            col.upsert(ids=ids, embeddings=chunk.tolist(), documents=ids)
+        build_s = time.perf_counter() - started
+        latencies: list[float] = []
+        hits = 0
+        for q, expected in zip(queries, truth):
+            t = time.perf_counter()
+            res = col.query(query_embeddings=[q.tolist()], n_results=k, include=[])
+            latencies.append((time.perf_counter() - t) * 1000)
+            hits += len(set(res["ids"][0]) & set(expected))
+        latencies.sort()
+        return {
+            "dim": int(data.shape[1]),
+            "vector_bytes_per_row": int(data.shape[1]) * 4,
+            "disk_mb": round(_dir_bytes(tmp) / 1e6, 2),
+            "build_s": round(build_s, 2),
+            "recall_vs_full": round(hits / (len(truth) * k), 4),
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--full-dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--npz", help="corpus file with an 'embeddings' array")
+    parser.add_argument("--dims", default="768,512,256,128")
+    parser.add_argument("--engine", choices=["numpy", "chroma"], default="numpy")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.npz:
+        data = np.load(args.npz)["embeddings"].astype(np.float32)
+    else:
+        data = make_corpus(args.rows, args.full_dim, args.clusters, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    n_queries = min(args.queries, len(data))
+    queries = data[rng.choice(len(data), n_queries, replace=False)] + 0.1 * rng.normal(
+        size=(n_queries, data.shape[1])
+    ).astype(np.float32)
+    everything = np.ones(len(data), dtype=bool)
+    truth = [exact_topk(_unit(data), everything, q, args.k) for q in queries]
+
+    results = []
+    for dim in sorted({int(d) for d in args.dims.split(",") if d.strip()}, reverse=True):
+        dim = min(dim, data.shape[1])
+        row = run_size(args.engine, _unit(data[:, :dim]), _unit(queries[:, :dim]), truth, args.k)
+        results.append(row)
+        print(json.dumps(row), flush=True)
+    full = results[0]
+    for row in results:
+        row["disk_saved_pct"] = (
+            round(100 * (1 - row["disk_mb"] / full["disk_mb"]), 1) if full["disk_mb"] else 0.0
+        )
+        row["p50_speedup"] = round(full["p50_ms"] / row["p50_ms"], 2) if row["p50_ms"] else 0.0
+    print(
+        json.dumps(
+            {"rows": len(data), "engine": args.engine, "k": args.k, "results": results}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
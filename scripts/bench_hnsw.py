@@ -0,0 +1,133 @@
+"""HNSW tuning benchmark: recall@k and query latency over a grid of M / construction_ef / search_ef.
+
+The corpus is synthetic (clustered Gaussian), an ``.npz`` file with an
+``embeddings`` array, or an existing Chroma collection under CHROMA_PATH.
+Each (M, construction_ef) pair is built once in a temporary Chroma store;
+``search_ef`` is then changed in place and the same queries are re-run against
+exact brute-force cosine neighbours.
+
+    python scripts/bench_hnsw.py --rows 50000 --dim 768 --m 8,16,32 --search-ef 10,50,100,200
+    python scripts/bench_hnsw.py --collection messages --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+
+# Settings require these at import time; the benchmark never talks to Discord or Vertex
+os.environ.setdefault("DISCORD_BOT_TOKEN", "bench-token")
+os.environ.setdefault("VERTEX_PROJECT_ID", "bench-project")
+
+from bench_vector import BATCH, exact_topk, make_corpus  # noqa: E402  (scripts/ is on sys.path)
+
+from fibz_bot.memory.backend import ChromaBackend  # noqa: E402
+
+
+def _ints(text: str) -> list[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def load_corpus(args: argparse.Namespace) -> np.ndarray:
+    if args.npz:
+        return np.load(args.npz)["embeddings"].astype(np.float32)
+    if args.collection:
+        from fibz_bot.config import settings
+
+        col = ChromaBackend(settings.CHROMA_PATH).get_or_create_collection(args.collection)
+        rows: list[np.ndarray] = []
+        offset = 0
+        while True:
+            page = col.get(limit=BATCH, offset=offset, include=["embeddings"])
+            if not page["ids"]:
+                break
+            rows.append(np.asarray(page["embeddings"], dtype=np.float32))
+            offset += len(page["ids"])
+        if not rows:
+            raise SystemExit(f"collection {args.collection!r} is empty")
+        return np.concatenate(rows)
+    return make_corpus(args.rows, args.dim, args.clusters, args.seed)
+
+
+def measure(col: Any, queries: np.ndarray, truth: list[list[str]], k: int) -> dict[str, float]:
+    latencies: list[float] = []
+    hits = 0
+    for q, expected in zip(queries, truth):
+        t = time.perf_counter()
+        res = col.query(query_embeddings=[q.tolist()], n_results=k, include=[])
+        latencies.append((time.perf_counter() - t) * 1000)
+        hits += len(set(res["ids"][0]) & set(expected))
+    latencies.sort()
+    return {
+        "recall_at_k": round(hits / (len(truth) * k), 4),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--npz", help="corpus file with an 'embeddings' array")
+    parser.add_argument("--collection", help="read the corpus from this Chroma collection")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", default="16", help="comma-separated M values")
+    parser.add_argument("--construction-ef", default="100")
+    parser.add_argument("--search-ef", default="10,50,100,200")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    data = load_corpus(args)
+    rng = np.random.default_rng(args.seed + 1)
+    n_queries = min(args.queries, len(data))
+    queries = data[rng.choice(len(data), n_queries, replace=False)] + 0.1 * rng.normal(
+        size=(n_queries, data.shape[1])
+    ).astype(np.float32)
+    unit = data / np.maximum(np.linalg.norm(data, axis=1, keepdims=True), 1e-12)
+    everything = np.ones(len(data), dtype=bool)
+    truth = [exact_topk(unit, everything, q, args.k) for q in queries]
+
+    results: list[dict[str, Any]] = []
+    for m in _ints(args.m):
+        for cef in _ints(args.construction_ef):
+            with tempfile.TemporaryDirectory() as tmp:
+                backend = ChromaBackend(tmp)
+                col = backend.get_or_create_collection(
+                    "bench",
+                    metadata={"hnsw:space": "cosine", "hnsw:M": m, "hnsw:construction_ef": cef},
+                )
+                started = time.perf_counter()
+                for start in range(0, len(data), BATCH):
+                    chunk = data[start : start + BATCH]
+                    ids = [str(i) for i in range(start, start + len(chunk))]
+                    col.upsert(ids=ids, embeddings=chunk.tolist())
+                build_s = round(time.perf_counter() - started, 2)
+                for sef in _ints(args.search_ef):
+                    col._col.modify(configuration={"hnsw": {"ef_search": sef}})
+                    row = {"M": m, "construction_ef": cef, "search_ef": sef, "build_s": build_s}
+                    row.update(measure(col, queries, truth, args.k))
+                    results.append(row)
+                    print(json.dumps(row), flush=True)
+
+    report = {
+        "rows": len(data),
+        "dim": int(data.shape[1]),
+        "queries": n_queries,
+        "k": args.k,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Startup benchmark: import latency of the bot module and time to first-ready.
+
+Import time is measured in fresh interpreters (median of ``--runs``). First-ready
+builds the real router/memory/agent through ``app.wait_ready()``, so it needs the
+same environment as the bot (Vertex credentials, CHROMA_PATH); pass
+``--skip-ready`` to measure imports only.
+
+    python scripts/bench_startup.py --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_IMPORT_SNIPPET = (
+    "import time, sys\n"
+    "t = time.perf_counter()\n"
+    "import fibz_bot.bot.main\n"
+    "dt = time.perf_counter() - t\n"
+    "heavy = [m for m in ('vertexai', 'chromadb', 'google.cloud.aiplatform') if m in sys.modules]\n"
+    "print(dt, ','.join(heavy))\n"
+)
+
+
+def measure_import(runs: int) -> dict[str, object]:
+    samples: list[float] = []
+    heavy: str = ""
+    env = dict(os.environ)
+    env.setdefault("DISCORD_BOT_TOKEN", "bench-token")
+    env.setdefault("VERTEX_PROJECT_ID", "bench-project")
+    for _ in range(runs):
+        out = (
+            subprocess.run(
+                [sys.executable, "-c", _IMPORT_SNIPPET],
+                capture_output=True,
+                text=True,
+                check=True,
+                env=env,
+            )
+            .stdout.strip()
+            .splitlines()[-1]
+        )
+        value, _, heavy = out.partition(" ")
+        samples.append(float(value))
+    return {
+        "runs": runs,
+        "median_s": round(statistics.median(samples), 3),
+        "min_s": round(min(samples), 3),
+        "max_s": round(max(samples), 3),
+        "heavy_modules_loaded": [m for m in heavy.split(",") if m],
+    }
+
+
+def measure_ready() -> dict[str, object]:
+    started = time.perf_counter()
+    from fibz_bot.bot.main import app
+
+    imported = time.perf_counter() - started
+    try:
+        asyncio.run(app.wait_ready())
+    except Exception as exc:
+        return {"error": f"{exc.__class__.__name__}: {str(exc)[:200]}"}
+    return {
+        "import_s": round(imported, 3),
+        "first_ready_s": round(time.perf_counter() - started, 3),
+        "timings": app.timings,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-ready", action="store_true")
+    args = parser.parse_args()
+
+    report: dict[str, object] = {"import": measure_import(args.runs)}
+    if not args.skip_ready:
+        report["ready"] = measure_ready()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
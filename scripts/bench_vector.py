@@ -0,0 +1,166 @@
+"""Vector backend benchmark: recall@k and query latency, Chroma vs NumPy (flat / IVF).
+
+Builds each engine in a temporary directory from the same synthetic clustered
+corpus, then runs the same queries (optionally with a metadata filter) and
+compares against exact brute-force cosine neighbours.
+
+    python scripts/bench_vector.py --rows 50000 --dim 768 --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+# Settings require these at import time; the benchmark never talks to Discord or Vertex
+os.environ.setdefault("DISCORD_BOT_TOKEN", "bench-token")
+os.environ.setdefault("VERTEX_PROJECT_ID", "bench-project")
+
+from fibz_bot.memory.backend import ChromaBackend
+from fibz_bot.memory.numpy_backend import NumpyBackend
+
+BATCH = 2000
+
+
+def make_corpus(rows: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    data = centers[rng.integers(0, clusters, rows)] + 0.3 * rng.normal(size=(rows, dim)).astype(
+        np.float32
+    )
+    return data.astype(np.float32)
+
+
+def exact_topk(unit: np.ndarray, mask: np.ndarray, q: np.ndarray, k: int) -> list[str]:
+    sims = unit @ (q / np.linalg.norm(q))
+    sims[~mask] = -np.inf
+    return [str(i) for i in np.argsort(-sims)[:k]]
+
+
+def run_engine(
+    name: str,
+    make: Callable[[str], Any],
+    data: np.ndarray,
+    queries: np.ndarray,
+    truth: list[list[str]],
+    k: int,
+    where: dict[str, Any] | None,
+    after_load: Callable[[Any], None] | None = None,
+) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        col = make(tmp)
+        started = time.perf_counter()
+        for start in range(0, len(data), BATCH):
+            chunk = data[start : start + BATCH]
+            ids = [str(i) for i in range(start, start + len(chunk))]
+            col.upsert(
+                ids=ids,
+                embeddings=chunk.tolist(),
+                documents=ids,
+                metadatas=[{"shard": int(i) % 4} for i in range(start, start + len(chunk))],
+            )
+        if after_load is not None:
+            after_load(col)
+        build_s = time.perf_counter() - started
+
+        latencies: list[float] = []
+        hits = 0
+        for q, expected in zip(queries, truth):
+            t = time.perf_counter()
+            res = col.query(query_embeddings=[q.tolist()], n_results=k, where=where, include=[])
+            latencies.append((time.perf_counter() - t) * 1000)
+            hits += len(set(res["ids"][0]) & set(expected))
+        latencies.sort()
+        return {
+            "engine": name,
+            "build_s": round(build_s, 2),
+            "recall_at_k": round(hits / (len(truth) * k), 4),
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--filtered", action="store_true", help="add a where={'shard': 1} filter")
+    parser.add_argument("--skip-chroma", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    data = make_corpus(args.rows, args.dim, args.clusters, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = data[rng.choice(args.rows, args.queries, replace=False)] + 0.1 * rng.normal(
+        size=(args.queries, args.dim)
+    ).astype(np.float32)
+    where = {"shard": 1} if args.filtered else None
+    mask = (np.arange(args.rows) % 4 == 1) if args.filtered else np.ones(args.rows, dtype=bool)
+    unit = data / np.linalg.norm(data, axis=1, keepdims=True)
+    truth = [exact_topk(unit, mask, q, args.k) for q in queries]
+
+    engines: list[dict[str, Any]] = []
+    if not args.skip_chroma:
+        engines.append(
+            run_engine(
+                "chroma",
+                lambda d: ChromaBackend(d).get_or_create_collection(
+                    "bench", metadata={"hnsw:space": "cosine"}
+                ),
+                data,
+                queries,
+                truth,
+                args.k,
+                where,
+            )
+        )
+    engines.append(
+        run_engine(
+            "numpy_flat",
+            lambda d: NumpyBackend(d, ivf_min_rows=0).get_or_create_collection("bench"),
+            data,
+            queries,
+            truth,
+            args.k,
+            where,
+        )
+    )
+    engines.append(
+        run_engine(
+            f"numpy_ivf_nprobe{args.nprobe}",
+            lambda d: NumpyBackend(
+                d, ivf_min_rows=0, ivf_nprobe=args.nprobe
+            ).get_or_create_collection("bench"),
+            data,
+            queries,
+            truth,
+            args.k,
+            where,
+            after_load=lambda col: col.build_ivf(),
+        )
+    )
+    report = {
+        "rows": args.rows,
+        "dim": args.dim,
+        "queries": args.queries,
+        "k": args.k,
+        "filtered": args.filtered,
+        "engines": engines,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
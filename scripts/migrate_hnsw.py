@@ -0,0 +1,57 @@
+"""Apply the configured HNSW parameters (HNSW_* settings) to existing Chroma collections.
+
+``search_ef`` is changed in place. Collections built with a different ``M``
+or ``construction_ef`` are copied into a new collection with the new
+parameters, which then takes over the name. Stop the bot before rebuilding.
+
+    python scripts/migrate_hnsw.py            # all memory collections
+    python scripts/migrate_hnsw.py --dry-run  # show what would change
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+
+from fibz_bot.config import settings
+from fibz_bot.memory.backend import ChromaBackend, collection_metadata, hnsw_params
+
+_LOGICAL = ("messages", "entities", "archives")
+
+
+def logical_name(name: str) -> str:
+    # Re-embed generations (messages_e1) and shards (messages_g<guild>[_c<channel>])
+    # map to their base
+    return re.sub(r"(_e\d+)?(_g[^_]+(_c[^_]+)?)?$", "", name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--collection", action="append", help="only these collections (repeatable)")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    if settings.VECTOR_BACKEND.lower() != "chroma":
+        parser.error("HNSW parameters only apply to VECTOR_BACKEND=chroma")
+
+    backend = ChromaBackend(settings.CHROMA_PATH)
+    names = args.collection or [
+        n for n in backend.list_collection_names() if logical_name(n) in _LOGICAL
+    ]
+    report = []
+    for name in sorted(names):
+        base = logical_name(name)
+        entry = {"collection": name, "wanted": hnsw_params(base)}
+        if args.dry_run:
+            entry["current"] = backend.get_or_create_collection(name).hnsw_config()
+        else:
+            entry["result"] = backend.reconfigure_collection(
+                name, collection_metadata(base), page_size=args.page_size
+            )
+        report.append(entry)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
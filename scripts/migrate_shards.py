@@ -0,0 +1,75 @@
+"""Split the single ``messages`` collection into per-guild or per-channel shards.
+
+Rows are copied page by page into ``messages_g<guild>[_c<channel>]`` and
+removed from the source once written, so the tool can be stopped and re-run.
+Stop the bot first, run this, then set ``MEMORY_SHARDING`` to the same mode.
+
+    python scripts/migrate_shards.py --mode channel
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from fibz_bot.config import settings
+from fibz_bot.memory.backend import collection_metadata, open_backend
+from fibz_bot.memory.records import RecordStore, default_records_path
+from fibz_bot.memory.reembed import load_active_profile
+from fibz_bot.memory.shards import ShardedCollection, split_collection
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["guild", "channel"], default=settings.MEMORY_SHARDING)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument(
+        "--keep-source",
+        action="store_true",
+        help="leave the (now empty) messages collection in place",
+    )
+    args = parser.parse_args()
+    if args.mode not in ("guild", "channel"):
+        parser.error("--mode must be guild or channel")
+
+    backend = open_backend()
+    records = RecordStore(default_records_path())
+    name = load_active_profile(records).collection_name("messages")
+    if name not in backend.list_collection_names():
+        print(json.dumps({"moved": 0, "detail": f"no unsharded {name} collection"}))
+        return
+    source = backend.get_or_create_collection(name, metadata=collection_metadata("messages"))
+    target = ShardedCollection(
+        backend,
+        name,
+        args.mode,
+        pool_size=settings.SHARD_POOL_SIZE,
+        metadata=collection_metadata("messages"),
+    )
+    started = time.perf_counter()
+    moved = split_collection(
+        source,
+        target,
+        page_size=args.page_size,
+        progress=lambda n: print(f"moved {n} row(s)", flush=True),
+    )
+    if not args.keep_source and source.count() == 0:
+        backend.delete_collection(name)
+    duration = round(time.perf_counter() - started, 3)
+    records.mark_migration(f"messages_shards_{args.mode}", detail=f"rows={moved}")
+    print(
+        json.dumps(
+            {
+                "moved": moved,
+                "shards": len(target.shard_names()),
+                "mode": args.mode,
+                "seconds": duration,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
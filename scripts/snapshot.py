@@ -0,0 +1,70 @@
+"""Export or restore a memory snapshot (collections + records) without re-embedding.
+
+    python scripts/snapshot.py export ./snapshots/2024-06-01
+    python scripts/snapshot.py verify ./snapshots/2024-06-01
+    python scripts/snapshot.py import ./snapshots/2024-06-01 --batch-size 2000
+
+Run with the bot stopped; ``/memory_snapshot`` exports from the live bot.
+The target of an import is whatever CHROMA_PATH / VECTOR_BACKEND /
+MEMORY_SHARDING point at, so a snapshot can move data between engines.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+
+from fibz_bot.config import settings
+from fibz_bot.memory.snapshot import export_snapshot, import_snapshot, read_manifest
+from fibz_bot.memory.store import MemoryStore
+
+
+def _progress(every: float = 2.0) -> Callable[[str, int], None]:
+    last = [0.0]
+
+    def report(name: str, rows: int) -> None:
+        if time.monotonic() - last[0] >= every:
+            last[0] = time.monotonic()
+            print(f"{name}: {rows} row(s)", flush=True)
+
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("action", choices=["export", "import", "verify"])
+    parser.add_argument("path")
+    parser.add_argument("--page-size", type=int, default=settings.SNAPSHOT_PAGE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--no-verify", action="store_true", help="skip checksum verification on import"
+    )
+    args = parser.parse_args()
+
+    if args.action == "verify":
+        manifest = read_manifest(args.path, verify=True)
+        print(
+            json.dumps(
+                {name: info["rows"] for name, info in manifest["collections"].items()}, indent=2
+            )
+        )
+        return
+    # No model calls are made: vectors come from (or go into) the snapshot
+    memory = MemoryStore(None)  # type: ignore[arg-type]
+    if args.action == "export":
+        report = export_snapshot(memory, args.path, page_size=args.page_size, progress=_progress())
+    else:
+        report = import_snapshot(
+            memory,
+            args.path,
+            batch_size=args.batch_size,
+            verify=not args.no_verify,
+            progress=_progress(),
+        )
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,67 @@
+from __future__ import annotations
+
 import os
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pytest
 
 os.environ.setdefault("DISCORD_BOT_TOKEN", "test-token")
 os.environ.setdefault("VERTEX_PROJECT_ID", "test-project")
+os.environ.setdefault("LOG_FILE", "")
+
+if TYPE_CHECKING:  # settings must not be imported before the environment above is set
+    from fibz_bot.memory.store import MemoryStore
+
+
+class CountingModel:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def generate_content(self, *_args: object, **_kwargs: object) -> None:
+        self.calls += 1
+        return None
+
+
+class CountingRouter:
+    """Stands in for ModelRouter: deterministic embeddings, and counts what it is asked."""
+
+    def __init__(self) -> None:
+        self.model_flash = CountingModel()
+        self.calls = 0
+        self.embedded: list[str] = []
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        self.embedded.extend(texts)
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+
+@pytest.fixture
+def counting_router() -> CountingRouter:
+    return CountingRouter()
+
+
+@pytest.fixture
+def make_store(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, counting_router: CountingRouter
+) -> Callable[..., MemoryStore]:
+    """Open a MemoryStore under ``tmp_path``; call again to reopen it.
+
+    Settings patched in the test before the call (backend, sharding) apply.
+    """
+    from fibz_bot.config import settings
+    from fibz_bot.memory.store import MemoryStore
+
+    monkeypatch.setattr(settings, "CHROMA_PATH", str(tmp_path / "chroma"))
+
+    def make(router: Any = None) -> MemoryStore:
+        return MemoryStore(router or counting_router)  # type: ignore[arg-type]
+
+    return make
+
+
+@pytest.fixture
+def memory_store(make_store: Callable[..., MemoryStore]) -> MemoryStore:
+    return make_store()
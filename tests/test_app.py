@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from fibz_bot.bot.app import App
+from fibz_bot.policy import consent
+
+
+def test_importing_bot_does_not_load_heavy_clients() -> None:
+    code = (
+        "import sys, fibz_bot.bot.main\n"
+        "print(','.join(m for m in ('vertexai', 'chromadb') if m in sys.modules))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ),
+    )
+    assert out.stdout.strip() == ""
+
+
+def test_dependencies_are_built_lazily_once() -> None:
+    built: list[str] = []
+    routers: list[object] = []
+
+    def router_factory() -> object:
+        built.append("router")
+        return object()
+
+    def memory_factory(router: object) -> object:
+        built.append("memory")
+        routers.append(router)
+        return object()
+
+    app = App(
+        router_factory=router_factory, memory_factory=memory_factory, agent_factory=lambda r: r
+    )
+    assert built == []
+    mem = app.memory
+    assert app.memory is mem
+    assert built == ["router", "memory"]
+    assert routers[0] is app.router
+    assert not app.ready
+
+
+def test_wait_ready_initializes_in_background(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(consent, "_CONSENT_MEMORY", None)
+    monkeypatch.setattr(consent, "_CONSENT_ROUTER", None)
+    app = App(
+        router_factory=lambda: "router",
+        memory_factory=lambda r: "memory",
+        agent_factory=lambda r: "agent",
+    )
+
+    async def run() -> bool:
+        app.start()
+        return await app.wait_ready(timeout=5)
+
+    assert asyncio.run(run()) is True
+    assert app.ready
+    assert consent._CONSENT_MEMORY == "memory"
+    assert set(app.timings) == {"router", "memory", "agent"}
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.memory.archive import ArchiveJob, pins_user
+from fibz_bot.memory.store import MemoryStore, MessageMeta
+
+
+class KeywordRouter:
+    """Embeds on two topics, so retrieval scores are predictable."""
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        vecs = []
+        for t in texts:
+            low = t.lower()
+            vecs.append([1.0 if "deploy" in low else 0.0, 1.0 if "lunch" in low else 0.0, 0.1])
+        return vecs
+
+
+def _msg(
+    store: MemoryStore,
+    mid: str,
+    text: str,
+    channel: str,
+    when: datetime,
+    role: str = "user",
+    user: str = "u1",
+) -> None:
+    store.upsert_message(
+        mid,
+        text,
+        MessageMeta(
+            message_id=mid,
+            guild_id="g",
+            channel_id=channel,
+            role=role,
+            user_id=user,
+            created_at=when,
+        ),
+    )
+
+
+def test_old_windows_are_archived_and_used_as_fallback(
+    make_store: Callable[..., MemoryStore], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "ARCHIVE_AFTER_DAYS", 30)
+    monkeypatch.setattr(settings, "ARCHIVE_WINDOW_HOURS", 24)
+    monkeypatch.setattr(settings, "ARCHIVE_VERBATIM_CHARS", 80)
+    store = make_store(KeywordRouter())
+    old = datetime.now(timezone.utc) - timedelta(days=60)
+    old = old.replace(hour=10, minute=0, second=0, microsecond=0)
+    _msg(store, "o1", "we deploy on fridays after the freeze", "c1", old)
+    _msg(
+        store, "o2", "ok, deploy window is 3pm", "c1", old + timedelta(minutes=5), role="assistant"
+    )
+    _msg(store, "o3", "lunch?", "c2", old)
+    _msg(store, "n1", "lunch today at noon", "c1", datetime.now(timezone.utc))
+
+    calls: list[str] = []
+
+    def fake_summarize(_router: object, transcript: str) -> str:
+        calls.append(transcript)
+        return "Summary: deploys happen Fridays at 3pm after the freeze."
+
+    report = ArchiveJob(summarize=fake_summarize).run_once(store, KeywordRouter())  # type: ignore[arg-type]
+
+    assert report is not None
+    assert report.groups == 2 and report.archived_rows == 3
+    assert report.model_calls == 1  # the short c2 window is archived verbatim
+    assert "Fibz: ok, deploy window is 3pm" in calls[0]
+    assert store.count_messages() == 1
+    archived = store.archives.get(where={"channel_id": "c1"})
+    assert json.loads(archived["metadatas"][0]["source_ids"]) == ["o1", "o2"]
+
+    res = store.retrieve("when do we deploy", k=2, where={"channel_id": "c1"})
+    assert res["documents"][0].startswith("Summary: deploys")
+    assert res["metadatas"][0]["type"] == "archive"
+
+
+def test_user_scoped_reads_skip_archives(
+    make_store: Callable[..., MemoryStore], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "ARCHIVE_AFTER_DAYS", 30)
+    monkeypatch.setattr(settings, "ARCHIVE_VERBATIM_CHARS", 10_000)
+    store = make_store(KeywordRouter())
+    old = datetime.now(timezone.utc) - timedelta(days=60)
+    _msg(store, "a1", "my flight lands at 6pm", "c1", old, user="alice")
+    _msg(store, "b1", "my new address is 12 Elm St", "c1", old + timedelta(minutes=1), user="bob")
+    report = ArchiveJob().run_once(store, KeywordRouter())  # type: ignore[arg-type]
+    assert report is not None and report.archives_written == 1
+
+    # The window quotes both speakers: a read scoped to either must not surface it
+    for user in ("alice", "bob"):
+        where = {"$and": [{"guild_id": "g"}, {"user_id": user}]}
+        assert store.retrieve("address", k=2, where=where)["ids"] == []
+    assert store.retrieve("address", k=2, where={"channel_id": "c1"})["ids"]
+
+    assert pins_user({"guild_id": "g", "user_id": "7"})
+    assert pins_user({"$or": [{"channel_id": "c"}, {"user_id": {"$in": ["1"]}}]})
+    assert not pins_user({"guild_id": "g"}) and not pins_user(None)
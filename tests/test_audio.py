@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import wave
+from pathlib import Path
+
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.ingest import audio
+from fibz_bot.utils.deadline import Deadline, DeadlineExceeded
+
+STDERR = """
+[silencedetect @ 0x1] silence_start: 12.5
+[silencedetect @ 0x1] silence_end: 13.5 | silence_duration: 1
+[silencedetect @ 0x1] silence_start: 50
+[silencedetect @ 0x1] silence_end: 51 | silence_duration: 1
+[silencedetect @ 0x1] silence_start: 118
+"""
+
+
+def test_silence_parsing_and_segment_planning() -> None:
+    silences = audio.parse_silences(STDERR)
+    assert silences == [(12.5, 13.5), (50.0, 51.0)]  # trailing open silence ignored
+    segments = audio.plan_segments(130.0, silences, max_seconds=55, min_seconds=5)
+    assert segments == [(0.0, 50.5), (50.5, 105.5), (105.5, 130.0)]
+    assert all(end - start <= 55 for start, end in segments)
+    assert audio.plan_segments(3.0, [], max_seconds=55) == [(0.0, 3.0)]
+    assert audio.timestamp(125.9) == "02:05"
+
+
+def fake_normalize(src: str, dest: str) -> None:
+    with wave.open(dest, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(audio.SAMPLE_RATE)
+        w.writeframes(b"\x00\x00" * audio.SAMPLE_RATE * 130)
+
+
+def test_segments_transcribed_concurrently_in_order_and_cached(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[int] = []
+    active = [0, 0]
+    lock = threading.Lock()
+
+    def fake_recognize(content: bytes, language_code: str) -> str:
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        calls.append(len(content))
+        threading.Event().wait(0.05)
+        with lock:
+            active[0] -= 1
+        return f"{int(len(content) / 32000)} seconds of speech"
+
+    monkeypatch.setattr(audio, "normalize_audio", fake_normalize)
+    monkeypatch.setattr(audio, "detect_silences", lambda wav: audio.parse_silences(STDERR))
+    monkeypatch.setattr(audio, "_recognize", fake_recognize)
+    monkeypatch.setattr(settings, "AUDIO_TRANSCRIBE_WORKERS", 3)
+    audio._transcripts.clear()
+    note = tmp_path / "voice.ogg"
+    note.write_bytes(b"OggS fake voice note")
+
+    chunks = audio.parse_audio(str(note))
+    assert [(m["t"], text) for text, m in chunks] == [
+        ("00:00", "50 seconds of speech"),
+        ("00:50", "55 seconds of speech"),
+        ("01:45", "24 seconds of speech"),
+    ]
+    assert len(calls) == 3 and active[1] > 1
+
+    # Same bytes again: served from the fingerprint cache
+    assert audio.transcribe_segments(str(note)) == [(m["start"], t) for t, m in chunks]
+    assert len(calls) == 3
+
+
+def test_expired_deadline_stops_submitting_segments(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    deadline = Deadline(30.0)
+    calls: list[int] = []
+
+    def slow_recognize(content: bytes, language_code: str) -> str:
+        calls.append(len(content))
+        deadline.cancel()  # the turn gives up while the first segment is in flight
+        return "partial"
+
+    monkeypatch.setattr(audio, "normalize_audio", fake_normalize)
+    monkeypatch.setattr(audio, "detect_silences", lambda wav: audio.parse_silences(STDERR))
+    monkeypatch.setattr(audio, "_recognize", slow_recognize)
+    monkeypatch.setattr(settings, "AUDIO_TRANSCRIBE_WORKERS", 1)
+    audio._transcripts.clear()
+    note = tmp_path / "voice.ogg"
+    note.write_bytes(b"OggS another voice note")
+
+    with pytest.raises(DeadlineExceeded):
+        audio.parse_audio(str(note), deadline=deadline)
+    assert len(calls) == 1  # 3 planned segments, only the first was sent
+    assert len(audio._transcripts) == 0  # a partial transcript is not cached
@@ -65,7 +65,9 @@ def fake_get(*args, **kwargs):
 
     monkeypatch.setattr(backoff.random, "uniform", lambda *_: 0.0)
     monkeypatch.setattr(backoff.time, "sleep", lambda _: None)
-    monkeypatch.setattr("fibz_bot.utils.http.requests.get", fake_get)
+    monkeypatch.setattr(
+        "fibz_bot.utils.http.session", lambda: type("S", (), {"get": staticmethod(fake_get)})
+    )
 
     data, err = get_json("https://example.com")
     assert data == {"ok": "yes"}
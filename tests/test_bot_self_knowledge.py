@@ -1,22 +1,15 @@
 from __future__ import annotations
 
 import asyncio
-from pathlib import Path
 
 from fibz_bot.config import settings
 from fibz_bot.llm import revision
 from fibz_bot.memory.store import MemoryStore
 
 
-class DummyRouter:
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        return [[0.1 for _ in range(2)] for _ in texts]
-
-
-def test_owner_updates_bot_entity(monkeypatch, tmp_path: Path):
-    monkeypatch.setattr(settings, "CHROMA_PATH", str(tmp_path / "chroma"))
+def test_owner_updates_bot_entity(monkeypatch, memory_store: MemoryStore, counting_router):
     monkeypatch.setattr(settings, "ENTITY_REVISION_ENABLED", True)
-    store = MemoryStore(DummyRouter())
+    store = memory_store
 
     def fake_extract(_router, _payload):
         return {
@@ -29,7 +22,7 @@ def fake_extract(_router, _payload):
 
     asyncio.run(
         revision.run_entity_revision_pass(
-            DummyRouter(),
+            counting_router,
             store,
             author_id="owner",
             author_display="Owner",
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 import asyncio
+from typing import Any
+
+import pytest
 
 from fibz_bot.policy.consent import classify_share_request
 
@@ -45,3 +48,102 @@ def test_classify_private_needs_consent():
         )
     )
     assert result == "share_needs_consent"
+
+
+class CountingModel:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def generate_content(self, contents: Any, generation_config: Any = None) -> Any:
+        self.calls += 1
+        return type("R", (), {"text": "share_block"})()
+
+
+def test_classifier_labels_are_cached_by_normalized_text() -> None:
+    from fibz_bot.policy import consent
+
+    consent._label_cache.clear()
+    model = CountingModel()
+
+    def run(text: str, cross: bool) -> str:
+        return asyncio.run(
+            classify_share_request(text, "1", "2", "10", "20", cross, router=model)  # type: ignore[arg-type]
+        )
+
+    assert run("What did Dana say yesterday?", True) == "share_block"
+    assert run("  what DID dana   say yesterday? ", True) == "share_block"
+    assert model.calls == 1
+    run("What did Dana say yesterday?", False)  # the cross-channel flag is part of the key
+    assert model.calls == 2
+
+
+def test_concurrent_consent_checks_share_one_dm(monkeypatch: pytest.MonkeyPatch) -> None:
+    from fibz_bot.policy import consent
+
+    class Memory:
+        def __init__(self) -> None:
+            self.saved: dict[tuple[str, ...], bool] = {}
+
+        def get_consent(self, *key: str) -> bool | None:
+            return self.saved.get(key)
+
+        def set_consent(self, subject: str, scope: str, target: str, value: bool) -> None:
+            self.saved[(subject, scope, target)] = value
+
+    dms: list[str] = []
+
+    async def fake_dm(
+        client: Any, subject: str, requester_name: str, scope: str, target: str
+    ) -> bool:
+        dms.append(requester_name)
+        await asyncio.sleep(0.05)
+        return True
+
+    class Client:
+        def get_user(self, user_id: int) -> object:
+            return object()
+
+    monkeypatch.setattr(consent, "request_consent_dm", fake_dm)
+    monkeypatch.setattr(consent, "_CONSENT_MEMORY", Memory())
+
+    async def main() -> list[bool]:
+        return await asyncio.gather(
+            *(
+                consent.ensure_consent("7", "channel", "20", Client(), requester_name=n)  # type: ignore[arg-type]
+                for n in "abc"
+            ),
+            consent.ensure_consent("7", "channel", "99", Client(), requester_name="d"),  # type: ignore[arg-type]
+        )
+
+    assert asyncio.run(main()) == [True, True, True, True]
+    assert sorted(dms) == ["a", "d"]
+    assert not consent._inflight
+
+
+def test_waiters_retry_when_the_leader_is_cancelled(monkeypatch: pytest.MonkeyPatch) -> None:
+    from fibz_bot.policy import consent
+
+    runs: list[str] = []
+
+    def flight(name: str) -> Any:
+        async def run() -> bool:
+            runs.append(name)
+            await asyncio.sleep(0.05)
+            return True
+
+        return run
+
+    async def main() -> tuple[bool, bool]:
+        key = ("7", "channel", "20")
+        leader = asyncio.create_task(consent._single_flight(key, flight("leader")))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(consent._single_flight(key, flight("waiter")))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter, waiter.cancelled()
+
+    assert asyncio.run(main()) == (True, False)
+    assert runs == ["leader", "waiter"]
+    assert not consent._inflight
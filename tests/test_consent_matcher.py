@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from fibz_bot.policy import consent
+from fibz_bot.policy.consent import ShareVerdict
+from fibz_bot.policy.matcher import TermMatch, get_matcher
+
+
+def test_terms_match_on_word_boundaries_and_plurals() -> None:
+    matcher = get_matcher()
+    assert matcher.match("Which addresses did they use?") == TermMatch("sensitive", "addresses")
+    assert matcher.match("Was it raised at the admin meeting?") is None  # not "dm"
+    assert matcher.match("Is she in the DMs?") == TermMatch("private", "dms")
+    assert matcher.match("Send me her PHONE   NUMBER") == TermMatch("sensitive", "phone   number")
+    assert matcher.match("What music is he into?") is None
+
+
+@pytest.mark.parametrize(
+    ("text", "term"),
+    [
+        ("Does he have any healthcare issues?", "healthcare"),
+        ("What's her phonenumber?", "phonenumber"),
+        ("Forward me their emails", "emails"),
+        ("Where was the letter addressed to?", "addressed"),
+    ],
+)
+def test_sensitive_terms_match_compounds_and_suffixes(text: str, term: str) -> None:
+    assert get_matcher().match(text) == TermMatch("sensitive", term)
+
+
+def test_category_precedence_and_channel_only_when_cross_channel_off() -> None:
+    matcher = get_matcher()
+    text = "What is their favorite secret in #general, and their email?"
+    cross = matcher.match(text, cross_channel_enabled=True)
+    same = matcher.match(text, cross_channel_enabled=False)
+    assert cross is not None and cross.category == "sensitive"
+    assert same is not None and same.category == "channel"
+    assert set(matcher.categories(text)) == {"channel", "sensitive", "private"}
+
+
+def test_guild_terms_widen_fast_path(monkeypatch: pytest.MonkeyPatch) -> None:
+    class Memory:
+        def get_consent_terms(self, guild_id: str) -> dict[str, list[str]]:
+            return (
+                {"private": ["alt account"], "sensitive": ["workplace"]} if guild_id == "10" else {}
+            )
+
+    monkeypatch.setattr(consent, "_CONSENT_MEMORY", Memory())
+
+    def verdict(text: str, guild_id: str) -> ShareVerdict:
+        return asyncio.run(consent.classify_share(text, "1", "2", guild_id, "20", True))
+
+    assert verdict("Does Sam have an alt account?", "10") == ("share_needs_consent", "private")
+    assert verdict("Where is Sam's workplace?", "10") == ("share_needs_consent", "sensitive")
+    assert verdict("Does Sam have an alt account?", "11") == ("share_safe", "default")
+    assert get_matcher({"private": ["alt account"]}) is get_matcher({"private": ["Alt Account"]})
+    # Categories the matcher no longer has (an old stored "benign" list) are ignored
+    assert get_matcher({"benign": ["speedrun"]}).match("Sam's best speedrun?") is None
+
+
+class LabelModel:
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.calls = 0
+
+    def generate_content(self, contents: Any, generation_config: Any = None) -> Any:
+        self.calls += 1
+        return type("R", (), {"text": self.label})()
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "What's her favorite bar and what time does she leave work each night?",
+        "Which game does he play and who is he dating?",
+    ],
+)
+def test_harmless_words_do_not_approve_a_request(text: str) -> None:
+    consent._label_cache.clear()
+    model = LabelModel("share_needs_consent")
+    verdict = asyncio.run(
+        consent.classify_share(text, "1", "2", None, "20", True, router=model)  # type: ignore[arg-type]
+    )
+    assert verdict == ("share_needs_consent", "model")
+    assert model.calls == 1
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from fibz_bot.llm.context import (
+    ContextCandidate,
+    assemble_context,
+    estimate_tokens,
+    gather_candidates,
+)
+from fibz_bot.memory.store import MemoryStore, MessageMeta
+
+
+def test_drops_exact_and_contained_duplicates() -> None:
+    dialogue = (
+        "### RECENT DIALOGUE (newest last)\n"
+        "User: what is the deploy schedule for friday\nFibz: noon"
+    )
+    retrieved = {
+        "ids": ["a", "b", "c"],
+        "documents": [
+            "What is the deploy schedule for Friday?",
+            "what is the deploy schedule for friday",
+            "The staging cluster moved to us-west1 last week",
+        ],
+        "metadatas": [{}, {}, {}],
+        "scores": [0.9, 0.8, 0.7],
+    }
+    out = assemble_context(
+        gather_candidates(dialogue=dialogue, retrieved=retrieved), budget_tokens=1000
+    )
+    texts = [c.text for c in out]
+    assert dialogue in texts
+    assert "The staging cluster moved to us-west1 last week" in texts
+    assert len(texts) == 2
+
+
+def test_mmr_prefers_diverse_candidates() -> None:
+    cands = [
+        ContextCandidate("alpha one", "retrieval", score=0.9, embedding=[1.0, 0.0]),
+        ContextCandidate("alpha two", "retrieval", score=0.88, embedding=[0.96, 0.28]),
+        ContextCandidate("beta three", "retrieval", score=0.8, embedding=[0.0, 1.0]),
+    ]
+    out = assemble_context(cands, budget_tokens=1000, mmr_lambda=0.5)
+    assert [c.text for c in out][:2] == ["alpha one", "beta three"]
+
+
+def test_packs_sections_by_priority_within_budget() -> None:
+    files = [f"[paper.pdf p.{i}] " + f"word{i} " * 200 for i in range(1, 6)]
+    cands = gather_candidates(
+        entities=["### ENTITY: Fibz\n- supports summaries"],
+        files=files,
+        retrieved={"documents": ["older chat " * 50], "scores": [0.5]},
+    )
+    budget = 900
+    out = assemble_context(
+        cands, budget_tokens=budget, section_order=("entity", "file", "retrieval")
+    )
+    assert out[0].source == "entity"
+    assert sum(estimate_tokens(c.text) for c in out) <= budget
+    assert all(c.source != "retrieval" for c in out)
+
+
+def test_retrieve_can_return_embeddings(memory_store: MemoryStore) -> None:
+    store = memory_store
+    store.upsert_message("m1", "hello there", MessageMeta(message_id="m1", channel_id="c"))
+    res = store.retrieve("hello", k=1, where={"channel_id": "c"}, include_embeddings=True)
+    assert res["ids"] == ["m1"]
+    assert len(res["embeddings"][0]) == 3
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+import fibz_bot.utils.backoff as backoff
+from fibz_bot.utils.deadline import Deadline, DeadlineExceeded, run_blocking
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_deadline_tracks_remaining_and_stages() -> None:
+    clock = FakeClock()
+    deadline = Deadline(10.0, name="ask", clock=clock)
+    with deadline.stage("retrieve"):
+        clock.now = 2.5
+    assert deadline.remaining() == pytest.approx(7.5)
+    assert deadline.timeout(20.0) == pytest.approx(7.5)
+    assert deadline.timeout(3.0) == pytest.approx(3.0)
+    report = deadline.report()
+    assert report["stages"]["retrieve"]["share"] == pytest.approx(0.25)
+
+    clock.now = 10.0
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("generate")
+
+
+def test_cancel_stops_next_checkpoint() -> None:
+    deadline = Deadline(60.0)
+    deadline.cancel()
+    assert deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded) as info:
+        deadline.check("tool_loop")
+    assert info.value.cancelled
+
+
+def test_retry_stops_when_budget_cannot_fit_attempt(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = FakeClock()
+    deadline = Deadline(1.0, clock=clock)
+    calls = []
+
+    def _call() -> None:
+        calls.append(True)
+        clock.now += 0.6
+        response = requests.Response()
+        response.status_code = 503
+        raise requests.exceptions.HTTPError(response=response)
+
+    monkeypatch.setattr(backoff.random, "uniform", lambda *_: 0.0)
+    monkeypatch.setattr(backoff.time, "sleep", lambda _: None)
+
+    with pytest.raises(DeadlineExceeded):
+        backoff.retry(_call, max_attempts=5, deadline=deadline)
+    # 0.6s used, 0.4s left: another 0.6s attempt cannot fit
+    assert len(calls) == 1
+
+
+def test_run_blocking_cancels_deadline() -> None:
+    deadline = Deadline(0.05)
+
+    def slow() -> str:
+        time.sleep(0.2)
+        return "late"
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run_blocking(deadline, "generate", slow))
+    assert deadline.cancelled
+    assert "generate" in deadline.spent
+
+
+def test_run_blocking_passes_deadline_kwarg_through() -> None:
+    deadline = Deadline(5.0)
+
+    def agent_run(prompt: str, *, deadline: Deadline | None = None) -> tuple[str, Deadline | None]:
+        return prompt, deadline
+
+    result = asyncio.run(run_blocking(deadline, "generate", agent_run, "hi", deadline=deadline))
+    assert result == ("hi", deadline)
+
+
+def test_attachment_download_deadline_propagates_and_cleans_up(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import os
+    from types import SimpleNamespace
+
+    from fibz_bot.ingest import attachments
+
+    def download(url: str, dest: str, deadline: Deadline | None = None) -> str:
+        if url.endswith("second.txt"):
+            raise DeadlineExceeded("download")
+        with open(dest, "w") as f:
+            f.write("hello")
+        return dest
+
+    monkeypatch.setattr(attachments, "download_file", download)
+    monkeypatch.setattr(attachments.tempfile, "tempdir", str(tmp_path))
+    files = [
+        SimpleNamespace(url=f"https://cdn/{n}", filename=n, content_type="text/plain")
+        for n in ("first.txt", "second.txt", "third.txt")
+    ]
+    with pytest.raises(DeadlineExceeded):
+        attachments.make_parts_from_attachments(files, deadline=Deadline(5.0))
+    assert not os.listdir(tmp_path)
+
+
+def test_attachments_off_loop_clean_up_after_the_turn_gives_up(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import os
+    from types import SimpleNamespace
+
+    from fibz_bot.ingest import attachments
+
+    def slow_download(url: str, dest: str, deadline: Deadline | None = None) -> str:
+        time.sleep(0.3)
+        with open(dest, "w") as f:
+            f.write("hello")
+        return dest
+
+    monkeypatch.setattr(attachments, "download_file", slow_download)
+    monkeypatch.setattr(attachments.tempfile, "tempdir", str(tmp_path))
+    files = [SimpleNamespace(url="https://cdn/a.txt", filename="a.txt", content_type="text/plain")]
+    ticks: list[int] = []
+
+    async def turn() -> None:
+        async def ticker() -> None:
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.02)
+
+        task = asyncio.create_task(ticker())
+        try:
+            await run_blocking(
+                deadline,
+                "extract",
+                attachments.make_parts_from_attachments,
+                files,
+                deadline=deadline,
+            )
+        finally:
+            task.cancel()
+
+    deadline = Deadline(0.1)
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(turn())
+    assert len(ticks) >= 3  # the loop kept running while the download blocked
+    # asyncio.run waits for the worker; it removed the download nobody will use
+    assert not os.listdir(tmp_path)
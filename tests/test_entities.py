@@ -1,19 +1,10 @@
 from __future__ import annotations
 
-from pathlib import Path
-
 from fibz_bot.memory.store import MemoryStore
-from fibz_bot.config import settings
-
-
-class DummyRouter:
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        return [[float(i + 1)] for i, _ in enumerate(texts)]
 
 
-def test_entity_roundtrip(tmp_path: Path, monkeypatch):
-    monkeypatch.setattr(settings, "CHROMA_PATH", str(tmp_path / "chroma"))
-    store = MemoryStore(DummyRouter())
+def test_entity_roundtrip(memory_store: MemoryStore):
+    store = memory_store
     store.upsert_entity(
         "user:123",
         "- enjoys chess",
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.storage import gcs
+
+
+class FakeBlob:
+    def __init__(self, store: dict, name: str, chunk_size: int | None = None) -> None:
+        self.store, self.name, self.chunk_size, self.metadata = store, name, chunk_size, None
+
+    def exists(self) -> bool:
+        return self.name in self.store
+
+    def upload_from_filename(self, path: str, content_type: str | None = None) -> None:
+        self.store[self.name] = (Path(path).read_bytes(), self.chunk_size, self.metadata)
+
+
+class FakeBucket:
+    def __init__(self) -> None:
+        self.objects: dict = {}
+
+    def blob(self, name: str, chunk_size: int | None = None) -> FakeBlob:
+        return FakeBlob(self.objects, name, chunk_size)
+
+
+def test_uploads_are_content_addressed_deduplicated_and_retried(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "GCS_BUCKET", "bkt")
+    monkeypatch.setattr(settings, "GCS_RESUMABLE_THRESHOLD_MB", 0)
+    bucket = FakeBucket()
+    monkeypatch.setattr(gcs, "_client", lambda: (object(), bucket))
+
+    data = b"same bytes"
+    key = gcs.object_key(data, "Report.PDF")
+    assert key == gcs.object_key(data, "other-name.pdf") and key.endswith(".pdf")
+
+    failures = [1]
+
+    def flaky(*args: Any) -> str | None:
+        if failures:
+            failures.pop()
+            raise ConnectionError("reset")
+        return gcs.upload_file(*args)
+
+    q = gcs.UploadQueue(workers=1, max_queue=4, spool_dir=str(tmp_path / "spool"), uploader=flaky)
+    a = tmp_path / "a.pdf"
+    a.write_bytes(data)
+    assert q.submit(str(a), key, "application/pdf", "Report.PDF") == f"gs://bkt/{key}"
+    a.unlink()  # the caller's temp file may go away immediately
+    assert q.join(timeout=5)
+    content, chunk_size, metadata = bucket.objects[key]
+    assert content == data and chunk_size and metadata == {"filename": "Report.PDF"}
+    assert not list((tmp_path / "spool").iterdir())
+
+    # Uploaded keys are not queued again; an existing object is skipped by the worker
+    b = tmp_path / "b.pdf"
+    b.write_bytes(data)
+    q.submit(str(b), key, "application/pdf")
+    assert q.depth == 0
+    fresh = gcs.UploadQueue(workers=1, spool_dir=str(tmp_path / "spool2"))
+    bucket.objects[key] = ("kept", None, None)
+    fresh.submit(str(b), key, "application/pdf")
+    assert fresh.join(timeout=5)
+    assert bucket.objects[key][0] == "kept"
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, cast
+
+import pytest
+from PIL import Image
+
+from fibz_bot.config import settings
+from fibz_bot.ingest.images import extract_exif, preprocess_image, submit_preprocess
+from fibz_bot.utils.metrics import metrics
+
+
+def _photo(path: Path) -> None:
+    img = Image.effect_noise((1600, 1200), 40).convert("RGB")
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90° clockwise when displayed
+    exif[0x010F] = "PhoneMaker"
+    exif.get_ifd(0x8769)[0x927C] = b"\x00" * 4096  # MakerNote blob
+    exif.get_ifd(0x8769)[0x9003] = "2024:06:01 12:00:00"
+    img.save(path, "JPEG", quality=98, exif=exif)
+
+
+def test_preprocess_rotates_downscales_and_strips_metadata(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "IMAGE_MAX_SIDE", 800)
+    monkeypatch.setattr(settings, "IMAGE_MAX_PIXELS", 200_000)
+    photo = tmp_path / "photo.jpg"
+    _photo(photo)
+
+    meta = extract_exif(str(photo))
+    assert meta["Make"] == "PhoneMaker"
+    assert meta["DateTimeOriginal"] == "2024:06:01 12:00:00"
+    assert "MakerNote" not in meta and "ExifOffset" not in meta
+
+    before = cast(int, metrics.snapshot().get("images.bytes_saved", 0))
+    prepared = submit_preprocess(str(photo)).result(timeout=30)
+    assert prepared.mime == "image/webp"
+    assert prepared.height > prepared.width  # portrait after EXIF rotation
+    assert prepared.width * prepared.height <= 200_000
+    assert prepared.saved_bytes > 0
+    assert cast(int, metrics.snapshot()["images.bytes_saved"]) - before == prepared.saved_bytes
+    out = tmp_path / "out.webp"
+    out.write_bytes(prepared.data)
+    assert not Image.open(out).getexif()
+
+    # Already small and upright: keep the original bytes rather than grow them
+    tiny = tmp_path / "tiny.png"
+    Image.new("RGB", (8, 8), "white").save(tiny, optimize=True)
+    kept = preprocess_image(str(tiny))
+    assert kept is not None
+    assert kept.saved_bytes >= 0
+    assert kept.mime in ("image/png", "image/webp")
+
+
+class FakeVision:
+    """Stand-in for google.cloud.vision: counts clients and batch calls."""
+
+    created = 0
+    batches: list[int] = []
+
+    class Feature:
+        class Type:
+            TEXT_DETECTION = 1
+
+        def __init__(self, type_: int) -> None:
+            self.type_ = type_
+
+    class Image:
+        def __init__(self, content: bytes) -> None:
+            self.content = content
+
+    class AnnotateImageRequest:
+        def __init__(self, image: Any, features: Any) -> None:
+            self.image = image
+
+    class ImageAnnotatorClient:
+        def __init__(self) -> None:
+            FakeVision.created += 1
+
+        def batch_annotate_images(self, requests: list[Any]) -> Any:
+            FakeVision.batches.append(len(requests))
+            ns = type("NS", (), {})
+            responses = []
+            for req in requests:
+                r = ns()
+                r.error = type("E", (), {"message": ""})()
+                r.text_annotations = [
+                    type("A", (), {"description": f"{len(req.image.content)} bytes"})()
+                ]
+                responses.append(r)
+            out = ns()
+            out.responses = responses
+            return out
+
+
+def test_ocr_batches_reuses_client_and_caches_by_fingerprint(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from fibz_bot.ingest import clients, images
+
+    monkeypatch.setattr(settings, "ENABLE_VISION_OCR", True)
+    monkeypatch.setattr(settings, "IMAGE_PREPROCESS_ENABLED", False)
+    monkeypatch.setattr(images, "_vision", lambda: FakeVision)
+    monkeypatch.setattr(
+        images, "vision_clients", clients.ClientPool("vision", FakeVision.ImageAnnotatorClient, 1)
+    )
+    images._ocr_cache.clear()
+    shots = []
+    for i, color in enumerate(["red", "blue", "red"]):
+        path = tmp_path / f"shot{i}.png"
+        Image.new("RGB", (20, 20), color).save(path)
+        shots.append(str(path))
+
+    texts = images.ocr_images(shots)
+    assert texts[0] == texts[2] and texts[0].endswith("bytes")
+    assert FakeVision.batches == [2]  # one request; the duplicate screenshot is sent once
+
+    # Re-posted screenshots come from the cache; the client is built only once
+    assert images.ocr_text(shots[1]) == texts[1]
+    images.prefetch_ocr(shots)
+    assert FakeVision.batches == [2] and FakeVision.created == 1
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from conftest import CountingRouter
+
+from fibz_bot.ingest.pdf_extract import chunk_id, fingerprint
+from fibz_bot.memory.store import MemoryStore, MessageMeta
+
+
+def _meta(channel: str, user: str) -> MessageMeta:
+    return MessageMeta(
+        message_id="doc:x",
+        guild_id="1",
+        channel_id=channel,
+        user_id=user,
+        role="system",
+        modality="file",
+    )
+
+
+def test_reingesting_a_document_skips_or_reuses_chunks(
+    tmp_path: Path, memory_store: MemoryStore, counting_router: CountingRouter
+) -> None:
+    doc = tmp_path / "a.pdf"
+    doc.write_bytes(b"%PDF-1.4 same bytes")
+    fp = fingerprint(str(doc))
+    assert fp == fingerprint(str(doc))
+    assert chunk_id(fp, 2, "text") == chunk_id(fp, 2, "text") != chunk_id(fp, 3, "text")
+
+    store = memory_store
+    chunks = [
+        ("page one text", {"page": 1}),
+        ("page two text", {"page": 2}),
+        ("page two text", {"page": 2}),
+    ]
+
+    first = store.ingest_document(chunks, fingerprint=fp, meta=_meta("10", "u1"), filename="a.pdf")
+    assert first == {"chunks": 2, "skipped": 0, "reused": 0, "embedded": 2}
+    assert len(counting_router.embedded) == 2
+
+    again = store.ingest_document(chunks, fingerprint=fp, meta=_meta("10", "u2"), filename="a.pdf")
+    assert again["skipped"] == 2 and again["embedded"] == 0
+    rows = store.list_messages({"channel_id": "10"})["items"]
+    assert len(rows) == 2
+    assert all(r["meta"]["uploaders"] == "u1,u2" for r in rows)
+
+    # Another channel of the same guild gets its own rows, built from the stored vectors
+    other = store.ingest_document(chunks, fingerprint=fp, meta=_meta("20", "u3"), filename="a.pdf")
+    assert other["reused"] == 2 and other["embedded"] == 0
+    assert len(counting_router.embedded) == 2
+    assert store.count_messages({"channel_id": "20"}) == 2
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import queue
+from pathlib import Path
+from typing import Any, cast
+
+from fibz_bot.utils.logging import JsonFormatter, SamplingFilter, _QueueHandler
+
+
+def _record(msg: str, level: int = logging.INFO, **fields: Any) -> logging.LogRecord:
+    record = logging.LogRecord("fibz.test", level, __file__, 1, msg, None, None)
+    if fields:
+        record.extra_fields = fields
+    return record
+
+
+def test_sampling_keeps_exact_share_per_event() -> None:
+    sampler = SamplingFilter({"model_choice": 0.1})
+    kept = [
+        r for r in (_record("model_choice", tier="flash") for _ in range(100)) if sampler.filter(r)
+    ]
+    assert len(kept) == 10
+    assert getattr(kept[0], "extra_fields") == {"tier": "flash", "sample_rate": 0.1}
+    assert all(sampler.filter(_record("other_event")) for _ in range(5))
+    assert all(sampler.filter(_record("model_choice", logging.WARNING)) for _ in range(5))
+
+
+def test_queue_handler_defers_formatting_and_drops_when_full(tmp_path: Path) -> None:
+    from fibz_bot.utils.metrics import metrics
+
+    q: queue.Queue = queue.Queue(maxsize=2)
+    handler = _QueueHandler(q)
+    logger = logging.getLogger("fibz.test.queue")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    try:
+        before = cast(int, metrics.snapshot().get("logging.dropped", 0))
+        logger.info("upload %s", "done", extra={"extra_fields": {"bytes": 12}})
+        logger.info("second")
+        logger.info("third")  # queue full
+        assert metrics.snapshot().get("logging.dropped", 0) == before + 1
+        queued = q.get_nowait()
+        assert queued.msg == "upload done" and queued.args is None
+        assert not hasattr(queued, "message")  # not formatted on the caller's thread
+
+        out = tmp_path / "fibz.jsonl"
+        file_handler = logging.handlers.RotatingFileHandler(out, maxBytes=1024, backupCount=1)
+        file_handler.setFormatter(JsonFormatter())
+        listener = logging.handlers.QueueListener(q, file_handler)
+        q.put_nowait(queued)
+        listener.start()
+        listener.stop()
+        file_handler.close()
+        lines = [json.loads(line) for line in out.read_text().splitlines()]
+        assert [line["message"] for line in lines] == ["second", "upload done"]
+        assert lines[1]["bytes"] == 12
+    finally:
+        logger.removeHandler(handler)
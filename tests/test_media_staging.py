@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import threading
+import uuid
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.storage import gcs
+from fibz_bot.storage.staging import MediaStager
+
+
+class FakeGcs(BaseHTTPRequestHandler):
+    """Just enough of the GCS JSON API for exists + multipart/resumable uploads."""
+
+    objects: dict[str, bytes] = {}
+    sessions: dict[str, dict] = {}
+    requests: list[str] = []
+
+    def log_message(self, *args: object) -> None:  # keep pytest output quiet
+        pass
+
+    def _json(self, status: int, body: dict, headers: dict | None = None) -> None:
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _resource(self, name: str) -> dict:
+        return {
+            "bucket": "bkt",
+            "name": name,
+            "size": str(len(self.objects[name])),
+            "generation": "1",
+        }
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        self.requests.append(f"GET {url.path}")
+        name = unquote(url.path.split("/o/", 1)[1])
+        if name in self.objects:
+            self._json(200, self._resource(name))
+        else:
+            self._json(404, {"error": {"code": 404, "message": "Not Found"}})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        kind = parse_qs(url.query)["uploadType"][0]
+        self.requests.append(f"POST {kind}")
+        body = self._body()
+        if kind == "resumable":
+            sid = uuid.uuid4().hex
+            self.sessions[sid] = {
+                "name": json.loads(body or b"{}").get("name") or parse_qs(url.query)["name"][0],
+                "data": b"",
+            }
+            host = self.headers["Host"]
+            self._json(200, {}, {"Location": f"http://{host}/session/{sid}"})
+            return
+        boundary = self.headers["Content-Type"].split("boundary=")[1].strip('"').encode()
+        meta_part, data_part = [p for p in body.split(b"--" + boundary) if p.strip(b"-\r\n")][:2]
+        name = json.loads(meta_part.split(b"\r\n\r\n", 1)[1])["name"]
+        self.objects[name] = data_part.split(b"\r\n\r\n", 1)[1][:-2]
+        self._json(200, self._resource(name))
+
+    def do_PUT(self) -> None:
+        sid = urlparse(self.path).path.rsplit("/", 1)[1]
+        session = self.sessions[sid]
+        self.requests.append("PUT chunk")
+        session["data"] += self._body()
+        total = self.headers["Content-Range"].rsplit("/", 1)[1]
+        if total != "*" and len(session["data"]) == int(total):
+            self.objects[session["name"]] = session["data"]
+            self._json(200, self._resource(session["name"]))
+        else:
+            self.send_response(308)
+            self.send_header("Range", f"bytes=0-{len(session['data']) - 1}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+
+@pytest.fixture
+def fake_gcs(monkeypatch: pytest.MonkeyPatch) -> Iterator[type[FakeGcs]]:
+    FakeGcs.objects, FakeGcs.sessions, FakeGcs.requests = {}, {}, []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGcs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("STORAGE_EMULATOR_HOST", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(settings, "GCS_BUCKET", "bkt")
+    gcs.reset_client()
+    yield FakeGcs
+    gcs.reset_client()
+    server.shutdown()
+
+
+def test_large_media_is_staged_once_and_reused(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, fake_gcs: type[FakeGcs]
+) -> None:
+    monkeypatch.setattr(settings, "GCS_CHUNK_SIZE_MB", 4)
+    small = tmp_path / "clip.mp3"
+    small.write_bytes(b"a" * 5000)
+    big = tmp_path / "video.mp4"
+    big.write_bytes(bytes(range(256)) * 36_000)  # ~9 MB: chunked resumable upload
+
+    stager = MediaStager(threshold_bytes=4096)
+    tiny = tmp_path / "tiny.png"
+    tiny.write_bytes(b"png")
+    assert stager.stage(str(tiny), "image/png", "tiny.png") is None  # below threshold: inline
+
+    uri = stager.stage(str(small), "audio/mpeg", "clip.mp3")
+    key = gcs.content_key(gcs.file_sha256(str(small)), "clip.mp3")
+    assert uri == f"gs://bkt/{key}"
+    assert fake_gcs.objects[key] == small.read_bytes()
+    assert "POST multipart" in fake_gcs.requests
+
+    big_uri = stager.stage(str(big), "video/mp4", "video.mp4")
+    assert big_uri is not None
+    assert fake_gcs.objects[big_uri.split("bkt/", 1)[1]] == big.read_bytes()
+    assert fake_gcs.requests.count("PUT chunk") == 3
+
+    # Later turns: cached fingerprint, no further requests at all
+    seen = len(fake_gcs.requests)
+    copy = tmp_path / "renamed.mp3"
+    copy.write_bytes(small.read_bytes())
+    assert stager.stage(str(copy), "audio/mpeg", "renamed.mp3") == uri
+    assert len(fake_gcs.requests) == seen
+
+    # A fresh process finds the object already stored and skips the upload
+    assert MediaStager(threshold_bytes=4096).stage(str(small), "audio/mpeg", "clip.mp3") == uri
+    assert fake_gcs.requests[seen:] == [f"GET /storage/v1/b/bkt/o/{key.replace('/', '%2F')}"]
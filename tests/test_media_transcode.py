@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.ingest import attachments, media
+
+
+def fake_ffmpeg(stream: Any) -> None:
+    """Write a small output where ffmpeg would (frames for an image pattern)."""
+    out = stream.compile()[-1]
+    if "%03d" in out:
+        for n in (1, 2, 3):
+            Path(out % n).write_bytes(b"jpeg" * 100)
+    else:
+        Path(out).write_bytes(b"small" * 100)
+
+
+def _attachments(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, files: dict[str, tuple[str, int]]
+) -> list:
+    sources = {}
+    for name, (mime, size) in files.items():
+        src = tmp_path / f"src-{name}"
+        src.write_bytes(os.urandom(size))
+        sources[f"https://cdn/{name}"] = src
+    monkeypatch.setattr(
+        attachments,
+        "download_file",
+        lambda url, dest, deadline=None: shutil.copy(sources[url], dest),
+    )
+    return [
+        SimpleNamespace(url=f"https://cdn/{n}", filename=n, content_type=m)
+        for n, (m, _) in files.items()
+    ]
+
+
+def test_media_over_budget_is_sent_transcoded(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "MEDIA_BYTE_BUDGET_MB", 1)
+    monkeypatch.setattr(media, "_run", fake_ffmpeg)
+    items = _attachments(
+        tmp_path,
+        monkeypatch,
+        {
+            "note.wav": ("audio/wav", 2 * 1024 * 1024),
+            "small.wav": ("audio/wav", 1000),
+            "doc.txt": ("text/plain", 10),
+        },
+    )
+    parts, paths, metas = attachments.make_parts_from_attachments(items)
+    try:
+        mimes = [p.inline_data.mime_type if "inline_data" in p._raw_part else None for p in parts]
+        assert mimes == ["audio/ogg", "audio/wav", None]
+        assert metas[0]["transcoded"] == f"{2 * 1024 * 1024}->500"
+        assert "transcoded" not in metas[1]
+    finally:
+        attachments.cleanup_temp(paths)
+
+    # Keyframes mode: several frames plus the audio track replace one video
+    monkeypatch.setattr(settings, "MEDIA_VIDEO_MODE", "keyframes")
+    items = _attachments(tmp_path, monkeypatch, {"clip.mp4": ("video/mp4", 2 * 1024 * 1024)})
+    parts, paths, _ = attachments.make_parts_from_attachments(items)
+    attachments.cleanup_temp(paths)
+    assert [p.inline_data.mime_type for p in parts] == ["image/jpeg"] * 3 + ["audio/ogg"]
+
+
+def test_transcode_time_limit_keeps_the_original(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def too_slow(stream: Any) -> None:
+        raise subprocess.TimeoutExpired("ffmpeg", settings.MEDIA_TRANSCODE_TIMEOUT_SECONDS)
+
+    monkeypatch.setattr(media, "_run", too_slow)
+    monkeypatch.setattr(media.tempfile, "tempdir", str(tmp_path))
+    src = tmp_path / "big.wav"
+    src.write_bytes(b"x" * 4096)
+    assert media.reduce_media(str(src), "audio/wav") is None
+    assert not [d for d in os.listdir(tmp_path) if d.startswith("fibz_media_")]
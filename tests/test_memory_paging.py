@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.memory.backend import open_backend
+from fibz_bot.memory.store import MemoryStore, MessageMeta
+
+
+def _seed(store: MemoryStore) -> MemoryStore:
+    for i in range(7):
+        channel = "c1" if i < 5 else "c2"
+        store.upsert_message(
+            f"m{i}",
+            f"message {i}",
+            MessageMeta(message_id=f"m{i}", guild_id="g", channel_id=channel),
+        )
+    return store
+
+
+def test_paging_and_counts(memory_store: MemoryStore) -> None:
+    store = _seed(memory_store)
+    where = {"guild_id": "g", "channel_id": "c1"}
+    assert store.count_messages(where, page_size=2) == 5
+    assert store.count_messages() == 7
+
+    first = store.list_messages(where=where, limit=2)
+    assert len(first["items"]) == 2 and first["next_offset"] == 2
+    pages = list(store.iter_message_pages(where=where, page_size=2))
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert len({item["id"] for page in pages for item in page}) == 5
+
+
+def test_delete_in_batches_reports_progress(memory_store: MemoryStore) -> None:
+    store = _seed(memory_store)
+    seen: list[int] = []
+    deleted = store.delete_messages({"channel_id": "c1"}, batch_size=2, progress=seen.append)
+    assert deleted == 5
+    assert seen == [2, 4, 5]
+    assert store.count_messages() == 2
+    assert store.count_messages({"channel_id": "c1"}) == 0
+
+
+def test_message_meta_timestamps_are_per_instance() -> None:
+    first = MessageMeta(message_id="a")
+    time.sleep(0.005)
+    second = MessageMeta(message_id="b")
+    assert second.created_at > first.created_at
+    assert second.created_at_ms is not None and first.created_at_ms is not None
+    assert second.created_at_ms >= first.created_at_ms + 4
+    aware = MessageMeta(message_id="c", created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    assert aware.created_at_ms == 1704067200000
+
+
+def test_time_range_filters_and_recency(memory_store: MemoryStore) -> None:
+    store = memory_store
+    now = datetime.now(timezone.utc)
+    for i, age_hours in enumerate((0.5, 30, 24 * 40)):
+        store.upsert_message(
+            f"t{i}",
+            "same text",
+            MessageMeta(
+                message_id=f"t{i}", channel_id="c", created_at=now - timedelta(hours=age_hours)
+            ),
+        )
+
+    recent = store.list_messages(where={"channel_id": "c"}, since=now - timedelta(hours=48))
+    assert {item["id"] for item in recent["items"]} == {"t0", "t1"}
+    older = store.retrieve("same text", k=5, until=now - timedelta(hours=24))
+    assert set(older["ids"]) == {"t1", "t2"}
+
+    ranked = store.retrieve("same text", k=3, recency_half_life_hours=24)
+    assert ranked["ids"] == ["t0", "t1", "t2"]
+    assert [item["id"] for item in store.recent_messages({"channel_id": "c"}, limit=2)] == [
+        "t1",
+        "t0",
+    ]
+
+
+def test_backfill_uses_snowflake_then_iso(
+    make_store: Callable[[], MemoryStore], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", False)
+    snowflake = str((1704067200000 - 1420070400000) << 22)
+    legacy = {"created_at": "2023-06-01T00:00:00", "channel_id": "c"}
+    # Rows written by a release that predates created_at_ms
+    open_backend().get_or_create_collection("messages").upsert(
+        ids=[f"{snowflake}-q", "mem:x"],
+        embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+        documents=["q", "memo"],
+        metadatas=[{**legacy, "message_id": f"{snowflake}-q"}, {**legacy, "message_id": "mem:x"}],
+    )
+    store = make_store()  # backfills on open
+    metas = {i: m for i, m in zip(*(store.messages.get().get(k) for k in ("ids", "metadatas")))}
+    assert metas[f"{snowflake}-q"]["created_at_ms"] == 1704067200000
+    assert metas["mem:x"]["created_at_ms"] == 1685577600000
+    assert store.backfill_message_timestamps() == 0
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from conftest import CountingRouter
+
+from fibz_bot.config import settings
+from fibz_bot.memory.backend import ChromaBackend
+from fibz_bot.memory.store import MemoryStore
+
+
+def test_settings_records_skip_embeddings(
+    memory_store: MemoryStore, counting_router: CountingRouter
+) -> None:
+    store = memory_store
+    store.set_persona_server("g1", "be brief")
+    store.set_cross_channel("g1", True)
+    for target in ("a", "b", "c"):
+        store.set_consent("u1", "share", target, target != "b")
+    store.set_consent("u2", "share", "a", True)
+    store.set_rating("g1", "m1", True, None)
+
+    assert counting_router.calls == 0
+    assert store.get_persona_server("g1") == "be brief"
+    assert store.get_cross_channel("g1") is True
+    assert store.get_consent("u1", "share", "b") is False
+    page = store.list_consents_for_user("u1", page=2, page_size=2)
+    assert page["total"] == 3
+    assert [item["meta"]["target"] for item in page["items"]] == ["c"]
+    assert store.records.count(type="rating", guild_id="g1") == 1
+
+
+def test_legacy_self_context_is_migrated_once(make_store: Callable[[], MemoryStore]) -> None:
+    legacy = ChromaBackend(settings.CHROMA_PATH).get_or_create_collection(
+        "self_context", metadata={"hnsw:space": "cosine"}
+    )
+    legacy.upsert(
+        ids=["persona:core", "consent:u1:share:a"],
+        embeddings=[[0.1, 0.2], [0.2, 0.1]],
+        documents=["legacy core", "consent scope=share target=a granted=True"],
+        metadatas=[
+            {"type": "persona", "scope": "core"},
+            {
+                "type": "consent",
+                "subject_user_id": "u1",
+                "scope": "share",
+                "target": "a",
+                "granted": True,
+            },
+        ],
+    )
+
+    store = make_store()
+    assert store.get_persona_core() == "legacy core"
+    assert store.get_consent("u1", "share", "a") is True
+    assert store.records.has_migration("self_context")
+
+    store.set_persona_core("new core")
+    again = make_store()
+    assert again.get_persona_core() == "new core"
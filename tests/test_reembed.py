@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.memory.reembed import EmbeddingProfile, ReembedJob
+from fibz_bot.memory.store import MemoryStore, MessageMeta
+from fibz_bot.utils.deadline import Deadline
+
+
+class ProfileRouter:
+    """Embeds to the requested size so shadow and live vectors differ."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    def embed_texts(
+        self,
+        texts: list[str],
+        deadline: Deadline | None = None,
+        *,
+        model: str | None = None,
+        dimensionality: int | None = None,
+    ) -> list[list[float]]:
+        self.calls.append({"model": model, "dimensionality": dimensionality, "n": len(texts)})
+        dim = settings.VERTEX_EMBED_DIM if dimensionality is None else dimensionality
+        dim = dim or 4
+        return [[float(len(t) + i) for i in range(dim)] for t in texts]
+
+
+def test_reembed_pauses_resumes_and_switches(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "NUMPY_VECTOR_PATH", str(tmp_path / "vec"))
+    monkeypatch.setattr(settings, "VERTEX_EMBED_DIM", 0)
+    router = ProfileRouter()
+    store = MemoryStore(router)  # type: ignore[arg-type]
+    for i in range(5):
+        store.upsert_message(
+            f"m{i}", f"message {i}", MessageMeta(message_id=f"m{i}", guild_id="1", channel_id="2")
+        )
+    store.upsert_entity("user:1", "likes tea", {"display_name": "A"})
+    assert store.embedding == EmbeddingProfile(settings.VERTEX_EMBED_MODEL, 0, 0)
+
+    monkeypatch.setattr(settings, "VERTEX_EMBED_DIM", 2)
+    assert ReembedJob.needed(store)
+    # Until the switch, queries keep embedding with the active (old) profile
+    store.retrieve("message", k=2)
+    assert router.calls[-1]["dimensionality"] == 0
+
+    stop = threading.Event()
+    job = ReembedJob(batch_size=2, texts_per_minute=1, sleep=lambda _: stop.set())
+    report = job.run(store, stop=stop)
+    assert report is not None
+    assert report.state == "paused" and report.copied == {"messages": 2}
+
+    # Writes and deletes during the migration shift the checkpoint; reconcile repairs both
+    store.upsert_message(
+        "m9", "late message", MessageMeta(message_id="m9", guild_id="1", channel_id="2")
+    )
+    store.delete_message_ids(["m0"])
+    report = ReembedJob(batch_size=2, texts_per_minute=10**6, sleep=lambda _: None).run(store)
+    assert report is not None and report.state == "switched", report
+    assert report.copied["messages"] == 3 and report.reconciled == 2
+    assert store.messages.name == "messages_e1"
+    assert store.count_messages() == 5 and store.entities.count() == 1
+    assert store.embedding.generation == 1 and store.embedding.embed_kwargs() == {}
+    assert len(store.retrieve("message", k=3)["ids"]) == 3
+
+    reopened = MemoryStore(router)  # type: ignore[arg-type]
+    assert reopened.embedding == EmbeddingProfile(settings.VERTEX_EMBED_MODEL, 2, 1)
+    assert reopened.count_messages() == 5
+
+
+def test_write_racing_the_switch_is_reembedded(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "NUMPY_VECTOR_PATH", str(tmp_path / "vec"))
+    monkeypatch.setattr(settings, "VERTEX_EMBED_DIM", 0)
+
+    class SwitchingRouter(ProfileRouter):
+        """Runs the whole migration while the first "racy" embed is in flight."""
+
+        racy: list[int] = []
+
+        def embed_texts(
+            self,
+            texts: list[str],
+            deadline: Deadline | None = None,
+            *,
+            model: str | None = None,
+            dimensionality: int | None = None,
+        ) -> list[list[float]]:
+            vectors = super().embed_texts(
+                texts, deadline, model=model, dimensionality=dimensionality
+            )
+            if texts == ["racy"]:
+                self.racy.append(len(vectors[0]))
+                if len(self.racy) == 1:
+                    job = ReembedJob(batch_size=10, texts_per_minute=10**6, sleep=lambda _: None)
+                    report = job.run(store)
+                    assert report is not None and report.state == "switched"
+            return vectors
+
+    router = SwitchingRouter()
+    store = MemoryStore(router)  # type: ignore[arg-type]
+    store.upsert_message("m1", "before", MessageMeta(message_id="m1", guild_id="1", channel_id="2"))
+    monkeypatch.setattr(settings, "VERTEX_EMBED_DIM", 2)
+
+    store.upsert_message("m2", "racy", MessageMeta(message_id="m2", guild_id="1", channel_id="2"))
+    # The old-profile vector was discarded and the row re-embedded for the new collection
+    assert router.racy == [4, 2]
+    assert store.messages.name == "messages_e1"
+    row = store.messages.get(ids=["m2"], include=["embeddings"])
+    assert len(row["embeddings"][0]) == 2
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.memory.retention import RetentionJob, get_policy, set_policy
+from fibz_bot.memory.store import MemoryStore, MessageMeta
+
+
+def _seed(store: MemoryStore, channel: str, ages_days: list[float], guild: str = "g1") -> None:
+    now = datetime.now(timezone.utc)
+    for i, age in enumerate(ages_days):
+        mid = f"{guild}-{channel}-{i}"
+        store.upsert_message(
+            mid,
+            f"msg {i}",
+            MessageMeta(
+                message_id=mid,
+                guild_id=guild,
+                channel_id=channel,
+                created_at=now - timedelta(days=age),
+            ),
+        )
+
+
+def test_policy_precedence(memory_store: MemoryStore, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "RETENTION_DEFAULT_MAX_ROWS_PER_CHANNEL", 1000)
+    store = memory_store
+    assert get_policy(store, "g1").max_rows == 1000
+    set_policy(store, "g1", max_age_days=30)
+    set_policy(store, "g1", "c2", max_age_days=7, max_rows=None)
+    assert get_policy(store, "g1").max_age_days == 30
+    channel = get_policy(store, "g1", "c2")
+    assert channel.max_age_days == 7 and channel.max_rows is None
+    assert get_policy(store, "g1", "c1").max_age_days == 30
+
+
+def test_run_once_expires_and_trims(
+    memory_store: MemoryStore, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "RETENTION_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "RETENTION_BATCH_PAUSE_SECONDS", 0.0)
+    store = memory_store
+    _seed(store, "c1", [1, 5, 40, 50])
+    _seed(store, "c2", [1, 2, 3, 10, 20])
+    _seed(store, "c1", [100], guild="g2")
+    set_policy(store, "g1", max_age_days=30)
+    set_policy(store, "g1", "c2", max_rows=2)
+
+    report = RetentionJob().run_once(store, ["g1", "g2"])
+
+    assert report is not None
+    assert report.guilds == 1
+    assert report.expired == 2
+    assert report.trimmed == 3
+    remaining = sorted(i["id"] for p in store.iter_message_pages() for i in p)
+    assert remaining == ["g1-c1-0", "g1-c1-1", "g1-c2-0", "g1-c2-1", "g2-c1-0"]
+
+    set_policy(store, "g1", paused=True)
+    _seed(store, "c1", [60])
+    paused = RetentionJob().run_once(store, ["g1"])
+    assert paused is not None and paused.reclaimed == 0
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import cast
+
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.memory.backend import VectorCollection
+from fibz_bot.memory.numpy_backend import NumpyBackend
+from fibz_bot.memory.shards import ShardedCollection, shard_name, split_collection, where_scope
+from fibz_bot.memory.store import MemoryStore, MessageMeta
+
+_ROWS = [
+    ("a", [1.0, 0.0], "g1", "c1"),
+    ("b", [0.9, 0.1], "g1", "c2"),
+    ("c", [0.0, 1.0], "g1", "c3"),
+    ("d", [1.0, 0.05], "g2", "c9"),
+]
+
+
+def _seed(col: VectorCollection) -> None:
+    col.upsert(
+        ids=[r[0] for r in _ROWS],
+        embeddings=[r[1] for r in _ROWS],
+        documents=[f"doc {r[0]}" for r in _ROWS],
+        metadatas=[{"guild_id": r[2], "channel_id": r[3], "n": i} for i, r in enumerate(_ROWS)],
+    )
+
+
+def test_sharded_routing_fanout_and_lru(tmp_path: Path) -> None:
+    assert where_scope({"guild_id": "1", "channel_id": {"$nin": ["2"]}}) == ("1", None)
+    assert shard_name("messages", "channel", None, "5") == "messages_gdm_c5"
+
+    backend = NumpyBackend(str(tmp_path))
+    col = ShardedCollection(backend, "messages", "channel", pool_size=1, max_workers=4)
+    _seed(col)
+    assert col.shard_names() == [
+        "messages_gg1_cc1",
+        "messages_gg1_cc2",
+        "messages_gg1_cc3",
+        "messages_gg2_cc9",
+    ]
+    assert len(col.pool) == 1
+    assert col.count() == 4
+
+    # Channel-pinned reads stay on one shard; guild-wide reads fan out and merge by distance
+    assert col.targets({"guild_id": "g1", "channel_id": "c2"}) == ["messages_gg1_cc2"]
+    res = col.query(query_embeddings=[[1.0, 0.0]], n_results=2, where={"guild_id": "g1"})
+    assert res["ids"][0] == ["a", "b"]
+    assert res["distances"][0][0] <= res["distances"][0][1]
+    res = col.query(query_embeddings=[[1.0, 0.0]], n_results=2, where={"channel_id": "c9"})
+    assert res["ids"][0] == ["d"]
+
+    page1 = col.get(where={"guild_id": "g1"}, limit=2, include=["metadatas"])
+    page2 = col.get(where={"guild_id": "g1"}, limit=2, offset=2, include=["metadatas"])
+    assert page1["ids"] + page2["ids"] == ["a", "b", "c"]
+
+    col.update(ids=["a"], metadatas=[{"guild_id": "g1", "channel_id": "c1", "n": 42}])
+    assert col.get(ids=["a"])["metadatas"][0]["n"] == 42
+    col.delete(ids=["a", "d"])
+    assert col.count() == 2
+    assert len(col.pool) <= 1
+
+
+def test_split_collection_and_store_sharding(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_store: Callable[[], MemoryStore]
+) -> None:
+    backend = NumpyBackend(str(tmp_path / "vec"))
+    source = backend.get_or_create_collection("messages")
+    _seed(source)
+    target = ShardedCollection(backend, "messages", "guild")
+    assert split_collection(source, target, page_size=3) == 4
+    assert source.count() == 0
+    assert target.targets({"guild_id": "g1", "channel_id": "c1"}) == ["messages_gg1"]
+    assert target.count() == 4
+
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "NUMPY_VECTOR_PATH", str(tmp_path / "store"))
+    monkeypatch.setattr(settings, "MEMORY_SHARDING", "channel")
+    store = make_store()
+    for i, channel in enumerate(["10", "10", "20"]):
+        store.upsert_message(
+            f"m{i}",
+            f"hello {i}",
+            MessageMeta(message_id=f"m{i}", guild_id="1", channel_id=channel, user_id="u"),
+        )
+    assert store.count_messages({"guild_id": "1", "channel_id": "10"}) == 2
+    assert store.count_messages() == 3
+    hits = store.retrieve("hello", k=5, where={"guild_id": "1"})
+    assert sorted(hits["ids"]) == ["m0", "m1", "m2"]
+    assert store.retrieve("hello", k=5, where={"channel_id": "20"})["ids"] == ["m2"]
+    assert store.delete_messages({"guild_id": "1", "channel_id": "10"}) == 2
+    assert store.counts()["messages"] == 1
+
+
+def test_channel_scoped_read_opens_one_guild_shard(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_store: Callable[[], MemoryStore]
+) -> None:
+    from fibz_bot.utils.metrics import metrics
+
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "NUMPY_VECTOR_PATH", str(tmp_path / "store"))
+    monkeypatch.setattr(settings, "MEMORY_SHARDING", "guild")
+    monkeypatch.setattr(settings, "SHARD_POOL_SIZE", 1)
+    store = make_store()
+    for guild in ("1", "2", "3"):
+        store.upsert_message(
+            f"m{guild}",
+            "hello",
+            MessageMeta(message_id=f"m{guild}", guild_id=guild, channel_id="10"),
+        )
+
+    # The filter /ask and on_message use: guild_id pins the shard, channel_id narrows within it
+    where = {"guild_id": "1", "channel_id": "10"}
+    before = cast(dict[str, int], metrics.snapshot())
+    assert store.retrieve("hello", k=5, where=where)["ids"] == ["m1"]
+    after = cast(dict[str, int], metrics.snapshot())
+    assert after.get("memory.shard_opens", 0) - before.get("memory.shard_opens", 0) == 1
+    assert after.get("memory.shard_fanouts", 0) == before.get("memory.shard_fanouts", 0)
+    # Without guild_id every guild's shard is visited
+    assert len(store.messages.targets({"channel_id": "10"})) == 3
+
+
+def test_fanout_query_without_distances(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_store: Callable[[], MemoryStore]
+) -> None:
+    col = ShardedCollection(NumpyBackend(str(tmp_path / "vec")), "messages", "guild")
+    _seed(col)
+    res = col.query(query_embeddings=[[1.0, 0.0]], n_results=3, include=["documents"])
+    assert res["ids"][0] == ["a", "d", "b"]  # ranked by distance across both guild shards
+    assert res["documents"][0] == ["doc a", "doc d", "doc b"]
+    assert set(res) == {"ids", "documents"}
+
+    # The warm-up "collections" step queries with include=[]
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "NUMPY_VECTOR_PATH", str(tmp_path / "store"))
+    monkeypatch.setattr(settings, "MEMORY_SHARDING", "guild")
+    store = make_store()
+    for guild in ("1", "2"):
+        store.upsert_message(
+            f"m{guild}", "hello", MessageMeta(message_id=f"m{guild}", guild_id=guild)
+        )
+    assert store.warm_collections()["messages"] == 2
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pytest
+from conftest import CountingRouter
+
+from fibz_bot.config import settings
+from fibz_bot.memory.snapshot import SnapshotError, export_snapshot, import_snapshot, read_manifest
+from fibz_bot.memory.store import MemoryStore, MessageMeta
+
+
+def test_snapshot_roundtrip_across_engines(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    make_store: Callable[[], MemoryStore],
+    counting_router: CountingRouter,
+) -> None:
+    source = make_store()
+    for i in range(7):
+        source.upsert_message(
+            f"m{i}",
+            f"message number {i}",
+            MessageMeta(message_id=f"m{i}", guild_id="1", channel_id="2"),
+        )
+    source.upsert_entity("user:1", "likes tea", {"display_name": "A"})
+    source.set_persona_core("be kind")
+
+    report = export_snapshot(source, str(tmp_path / "snap"), page_size=3)
+    assert report.rows == {"messages": 7, "entities": 1, "archives": 0, "records": 2}
+    assert report.bytes > 0
+    manifest = read_manifest(str(tmp_path / "snap"))
+    assert len(manifest["collections"]["messages"]["parts"]) == 3
+    assert manifest["collections"]["messages"]["dim"] == 3
+
+    # Restore into a sharded NumPy store: no embedding calls, same rows and vectors
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "NUMPY_VECTOR_PATH", str(tmp_path / "vec"))
+    monkeypatch.setattr(settings, "MEMORY_SHARDING", "guild")
+    target = make_store()
+    calls = counting_router.calls
+    restored = import_snapshot(target, str(tmp_path / "snap"), batch_size=2)
+    assert counting_router.calls == calls
+    assert restored.rows["messages"] == 7
+    assert target.count_messages({"guild_id": "1"}) == 7
+    entity = target.get_entity("user:1")
+    assert entity is not None and entity["document"] == "likes tea"
+    assert target.get_persona_core() == "be kind"
+    got = target.messages.get(ids=["m3"], include=["embeddings"])
+    expected = np.asarray(counting_router.embed_texts(["message number 3"])[0])
+    vec = np.asarray(got["embeddings"][0])
+    assert float(
+        vec @ expected / (np.linalg.norm(vec) * np.linalg.norm(expected))
+    ) == pytest.approx(1.0)
+
+    # Corruption is caught before anything is written
+    part = tmp_path / "snap" / manifest["collections"]["messages"]["parts"][0]["files"][0]["file"]
+    part.write_text(part.read_text(encoding="utf-8").replace("number", "NUMBER"), encoding="utf-8")
+    with pytest.raises(SnapshotError):
+        import_snapshot(target, str(tmp_path / "snap"))
+    (tmp_path / "snap" / "manifest.json").write_text(json.dumps({"format": 99}), encoding="utf-8")
+    with pytest.raises(SnapshotError):
+        read_manifest(str(tmp_path / "snap"))
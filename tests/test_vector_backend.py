@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.memory.backend import (
+    ChromaBackend,
+    VectorCollection,
+    match_where,
+    normalize_where,
+)
+from fibz_bot.memory.numpy_backend import NumpyBackend
+from fibz_bot.memory.store import MemoryStore, MessageMeta
+
+
+def _seed(col: VectorCollection) -> None:
+    col.upsert(
+        ids=["a", "b", "c"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]],
+        documents=["alpha", "beta", "gamma"],
+        metadatas=[
+            {"guild_id": "g1", "channel_id": "c1", "n": 1},
+            {"guild_id": "g1", "channel_id": "c2", "n": 2},
+            {"guild_id": "g2", "channel_id": "c1", "n": 3},
+        ],
+    )
+
+
+def test_where_normalization_and_matching() -> None:
+    assert normalize_where({}) is None
+    assert normalize_where({"a": 1, "b": 2}) == {"$and": [{"a": 1}, {"b": 2}]}
+    meta = {"a": 1, "b": "x", "flag": True}
+    assert match_where(meta, {"$and": [{"a": {"$gte": 1}}, {"b": {"$in": ["x", "y"]}}]})
+    assert not match_where(meta, {"$or": [{"a": 2}, {"b": "z"}]})
+    assert not match_where(meta, {"flag": 1, "a": {"$lt": 0}})
+
+
+def test_numpy_collection_roundtrip(tmp_path: Path) -> None:
+    backend = NumpyBackend(str(tmp_path), ivf_min_rows=0)
+    col = backend.get_or_create_collection("messages", metadata={"hnsw:space": "cosine"})
+    _seed(col)
+    assert col.count() == 3
+
+    res = col.query(query_embeddings=[[1.0, 0.1]], n_results=2)
+    assert res["ids"][0] == ["a", "c"]
+    assert res["distances"][0][0] < res["distances"][0][1]
+
+    res = col.query(
+        query_embeddings=[[1.0, 0.1]], n_results=5, where={"guild_id": "g1", "channel_id": "c2"}
+    )
+    assert res["ids"][0] == ["b"]
+    assert col.get(where={"n": {"$gte": 2}})["ids"] == ["b", "c"]
+    assert col.get(limit=1, offset=1)["ids"] == ["b"]
+
+    col.upsert(
+        ids=["a"], embeddings=[[0.0, 1.0]], documents=["alpha2"], metadatas=[{"guild_id": "g3"}]
+    )
+    assert col.get(where={"guild_id": "g1"})["ids"] == ["b"]
+    col.delete(where={"guild_id": "g2"})
+    assert col.count() == 2
+    col.close()
+
+    reopened = NumpyBackend(str(tmp_path)).get_or_create_collection("messages")
+    got = reopened.get(ids=["a"], include=["documents", "metadatas", "embeddings"])
+    assert got["documents"] == ["alpha2"]
+    assert got["metadatas"] == [{"guild_id": "g3"}]
+    assert np.allclose(got["embeddings"][0], [0.0, 1.0])
+    assert reopened.count() == 2
+
+
+def test_numpy_ivf_recall(tmp_path: Path) -> None:
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(20, 16))
+    data = centers[rng.integers(0, 20, 3000)] + 0.1 * rng.normal(size=(3000, 16))
+    col = NumpyBackend(str(tmp_path), ivf_min_rows=1000, ivf_nprobe=4).get_or_create_collection("v")
+    col.upsert(ids=[str(i) for i in range(len(data))], embeddings=data.tolist())
+    assert col._centroids is not None
+
+    unit = data / np.linalg.norm(data, axis=1, keepdims=True)
+    hits = 0
+    for qi in range(0, 3000, 150):
+        truth = set(np.argsort(-(unit @ unit[qi]))[:10].astype(str))
+        got = set(col.query(query_embeddings=[data[qi].tolist()], n_results=10)["ids"][0])
+        hits += len(truth & got)
+    assert hits / (20 * 10) >= 0.9
+
+
+def test_chroma_accepts_empty_and_multi_key_filters(tmp_path: Path) -> None:
+    col = ChromaBackend(str(tmp_path)).get_or_create_collection(
+        "tests", metadata={"hnsw:space": "cosine"}
+    )
+    _seed(col)
+    assert len(col.get(where={})["ids"]) == 3
+    assert col.get(where={"guild_id": "g1", "channel_id": "c2"})["ids"] == ["b"]
+
+
+def test_memory_store_on_numpy_backend(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, make_store: Callable[[], MemoryStore]
+) -> None:
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "NUMPY_VECTOR_PATH", str(tmp_path))
+    store = make_store()
+    store.upsert_message(
+        "m1", "hello there", MessageMeta(message_id="m1", guild_id="g", channel_id="c")
+    )
+    store.set_persona_core("be kind")
+    assert store.get_persona_core() == "be kind"
+    res = store.retrieve("hello there", k=3, where={"guild_id": "g", "channel_id": "c"})
+    assert res["ids"] == ["m1"]
+    assert store.counts()["messages"] == 1
+
+
+def test_numpy_compaction_reclaims_slots(tmp_path: Path) -> None:
+    col = NumpyBackend(str(tmp_path), ivf_min_rows=0).get_or_create_collection("messages")
+    col.upsert(
+        ids=[f"r{i}" for i in range(6)],
+        embeddings=[[float(i), 1.0] for i in range(6)],
+        documents=[f"doc {i}" for i in range(6)],
+        metadatas=[{"even": i % 2 == 0} for i in range(6)],
+    )
+    col.delete(where={"even": True})
+    assert col.compact() == 3
+    assert col.get(where={"even": False})["ids"] == ["r1", "r3", "r5"]
+    assert col.query(query_embeddings=[[5.0, 1.0]], n_results=1)["ids"][0] == ["r5"]
+    col.close()
+    reopened = NumpyBackend(str(tmp_path)).get_or_create_collection("messages")
+    got = reopened.get(ids=["r3"], include=["documents", "embeddings"])
+    assert got["documents"] == ["doc 3"]
+    assert np.allclose(got["embeddings"][0], np.array([3.0, 1.0]) / np.linalg.norm([3.0, 1.0]))
+
+
+def test_hnsw_params_applied_and_migrated(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from fibz_bot.memory.backend import collection_metadata, hnsw_params
+
+    monkeypatch.setattr(
+        settings, "HNSW_COLLECTION_PARAMS", {"messages": {"M": 24, "search_ef": 64}}
+    )
+    assert hnsw_params("messages") == {
+        "M": 24,
+        "construction_ef": settings.HNSW_CONSTRUCTION_EF,
+        "search_ef": 64,
+    }
+    assert hnsw_params("entities")["M"] == settings.HNSW_M
+
+    backend = ChromaBackend(str(tmp_path))
+    col = backend.get_or_create_collection("messages", metadata={"hnsw:space": "cosine"})
+    _seed(col)
+    assert col.hnsw_config()["M"] == 16
+
+    # search_ef follows Settings on reopen; M needs a rebuild that keeps every row
+    assert (
+        backend.get_or_create_collection("messages", collection_metadata("messages")).hnsw_config()[
+            "search_ef"
+        ]
+        == 64
+    )
+    assert (
+        backend.reconfigure_collection("messages", collection_metadata("messages"), page_size=2)
+        == "rebuilt"
+    )
+    col = backend.get_or_create_collection("messages")
+    assert col.hnsw_config() == hnsw_params("messages")
+    assert sorted(col.get()["ids"]) == ["a", "b", "c"]
+    assert (
+        backend.reconfigure_collection("messages", collection_metadata("messages")) == "unchanged"
+    )
+    assert "rebuild_messages" not in backend.list_collection_names()
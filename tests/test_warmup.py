@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import pytest
+from conftest import CountingRouter
+
+from fibz_bot.bot.warmup import WarmupStatus, run_warmup
+from fibz_bot.config import settings
+from fibz_bot.memory.store import MemoryStore, MessageMeta
+
+
+def test_warmup_loads_indexes_and_caches(
+    memory_store: MemoryStore, counting_router: CountingRouter, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(settings, "WARMUP_MODEL_CALLS", True)
+    router, store = counting_router, memory_store
+    store.upsert_message("m1", "hello", MessageMeta(message_id="m1"))
+    store.set_cross_channel("g1", True)
+
+    status = run_warmup(router, store, ["g1", "g2"], WarmupStatus())  # type: ignore[arg-type]
+
+    assert status.state == "done"
+    assert not status.errors
+    assert set(status.steps) == {"collections", "embed", "generate", "guilds"}
+    assert router.model_flash.calls == 1
+    # persona core, bot:self, 2 x (server persona + cross-channel flag)
+    assert len(store._self_context_cache) == 5
+    assert len(store._entity_cache) == 1
+    assert store.get_cross_channel("g1") is True
+
+
+def test_cache_is_invalidated_on_write(memory_store: MemoryStore) -> None:
+    store = memory_store
+    assert store.get_persona_server("g1") == ""
+    store.set_persona_server("g1", "be brief")
+    assert store.get_persona_server("g1") == "be brief"
+
+
+def test_warmup_disabled(counting_router: CountingRouter, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", False)
+    status = run_warmup(counting_router, None, [], WarmupStatus())  # type: ignore[arg-type]
+    assert status.state == "disabled"
+    assert status.summary() == "disabled"
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+import pytest
+
+from fibz_bot.config import settings
+from fibz_bot.web import search
+
+
+def test_search_cache_and_concurrent_providers(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    def ddg(q: str, deadline: Any = None) -> list[dict[str, Any]]:
+        calls.append("ddg")
+        return []
+
+    def cse(q: str, num: int = 5, deadline: Any = None) -> list[dict[str, Any]]:
+        calls.append("cse")
+        return [{"title": q}] * 9
+
+    monkeypatch.setattr(search, "ddg_instant_answer", ddg)
+    monkeypatch.setattr(search, "google_cse_search", cse)
+    search.clear_cache()
+
+    first = search.web_search("  Python   GIL ", num=3)
+    assert len(first) == 3 and calls == ["cse"]
+    # Same query after normalization: served from the cache
+    assert search.web_search("python gil", num=3) == first
+    assert calls == ["cse"]
+    assert search.web_search("python gil", num=2) != first  # num is part of the key
+
+    # Empty answers are cached with the shorter negative TTL
+    monkeypatch.setattr(search, "google_cse_search", lambda q, num=5, deadline=None: [])
+    monkeypatch.setattr(settings, "WEB_SEARCH_NEGATIVE_TTL_SECONDS", 0)
+    calls.clear()
+    assert search.web_search("nothing", num=3) == []
+    assert search.web_search("nothing", num=3) == []
+    assert calls == ["ddg", "ddg"]
+
+    # Concurrent mode: DDG answers while CSE is still waiting
+    release = threading.Event()
+
+    def slow_cse(q: str, num: int = 5, deadline: Any = None) -> list[dict[str, Any]]:
+        release.wait(5)
+        return [{"title": "cse"}]
+
+    monkeypatch.setattr(settings, "GOOGLE_CSE_API_KEY", "k")
+    monkeypatch.setattr(settings, "GOOGLE_CSE_CX", "cx")
+    monkeypatch.setattr(settings, "WEB_SEARCH_CONCURRENT", True)
+    monkeypatch.setattr(search, "google_cse_search", slow_cse)
+    monkeypatch.setattr(search, "ddg_instant_answer", lambda q, deadline=None: [{"title": "ddg"}])
+    try:
+        assert search.web_search("race", num=3) == [{"title": "ddg"}]
+    finally:
+        release.set()
+        search.clear_cache()